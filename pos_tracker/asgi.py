@@ -1,3 +1,13 @@
+"""
+ASGI entry point.
+
+The polling endpoints (tracker.views_async) are async views: under an ASGI server a poll
+waiting on the database holds no worker, so one process serves many more open tabs.
+Run with, e.g.:
+    gunicorn pos_tracker.asgi:application -k uvicorn.workers.UvicornWorker
+The WSGI entry point (pos_tracker.wsgi) keeps working with the same code.
+"""
+
 import os
 from django.core.asgi import get_asgi_application
 
@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import sys
 import logging
 import pymysql
 
@@ -63,6 +64,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "tracker.middleware.StaticAssetMiddleware",  # Serves collected static files before session/DB work
+    "tracker.middleware.RequestMetricsMiddleware",  # Times requests and their SQL (REQUEST_METRICS_*)
+    "tracker.middleware.ReadYourWritesMiddleware",  # Keeps reporting views on the primary right after a write
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -128,6 +132,26 @@ DATABASES = {
     }
 }
 
+# Read replica for reports and analytics (tracker.db_router): views marked @reporting_view read
+# from it when REPORTING_DB_NAME is set; HOST/PORT/USER/PASSWORD default to the primary's
+REPORTING_DB_ALIAS = 'reporting'
+REPORTING_DB_NAME = os.environ.get('REPORTING_DB_NAME', '')
+if REPORTING_DB_NAME:
+    _primary = DATABASES['default']
+    DATABASES[REPORTING_DB_ALIAS] = {
+        **_primary,
+        'NAME': REPORTING_DB_NAME,
+        'HOST': os.environ.get('REPORTING_DB_HOST', _primary.get('HOST', '')),
+        'PORT': os.environ.get('REPORTING_DB_PORT', _primary.get('PORT', '')),
+        'USER': os.environ.get('REPORTING_DB_USER', _primary.get('USER', '')),
+        'PASSWORD': os.environ.get('REPORTING_DB_PASSWORD', _primary.get('PASSWORD', '')),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['tracker.db_router.ReportingRouter']
+REPORTING_DB_MAX_LAG = int(os.environ.get('REPORTING_DB_MAX_LAG', '30'))  # Seconds behind before falling back to the primary
+REPORTING_LAG_CHECK_SECONDS = int(os.environ.get('REPORTING_LAG_CHECK_SECONDS', '5'))
+REPORTING_PIN_SECONDS = int(os.environ.get('REPORTING_PIN_SECONDS', '30'))  # Primary reads after a user's own write
+
 # Timezone settings
 TIME_ZONE = 'Asia/Riyadh'
 USE_TZ = True
@@ -164,6 +188,17 @@ STATIC_URL = "/static/"
 STATICFILES_DIRS = [BASE_DIR / "tracker" / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# Production static build: `python manage.py build_static` minifies CSS/JS, writes
+# content-hashed names + staticfiles.json and precompressed .gz/.br variants.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "tracker.storage.CompressedManifestStaticFilesStorage"},
+}
+STATICFILES_MINIFY = [k.strip() for k in os.environ.get('STATICFILES_MINIFY', 'css,js').split(',') if k.strip()]
+
+# Serve STATIC_ROOT from the app (with far-future caching) when no CDN/web server handles /static/
+SERVE_STATIC_FILES = str(os.environ.get('SERVE_STATIC_FILES', str(not DEBUG))).lower() in ('1', 'true', 'yes')
+
 # Media files (uploads)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -179,8 +214,62 @@ LOGIN_REDIRECT_URL = "/"
 LOGOUT_REDIRECT_URL = "/login/"
 LOGIN_URL = "/login/"
 
-# Session settings
-SESSION_ENGINE = "django.contrib.sessions.backends.db"
+# Caches. CACHE_BACKEND picks the default cache:
+#   locmem    - per process (default). Every gunicorn worker and the scheduler keep their own copy, so
+#               a write invalidates only its own process; the cache TTLs below default short for it
+#   file      - shared by the processes of one host (CACHE_LOCATION is a directory)
+#   redis     - shared by every host (CACHE_LOCATION=redis://host:6379/1, needs the redis package)
+#   memcached - shared by every host (CACHE_LOCATION=host:11211, needs pymemcache)
+# Sessions get their own tier, picked the same way with SESSION_CACHE_BACKEND/SESSION_CACHE_LOCATION
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+    "memcached": "django.core.cache.backends.memcached.PyMemcacheCache",
+}
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem').lower()
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    CACHE_BACKEND = "locmem"
+CACHE_SHARED = CACHE_BACKEND != "locmem"  # True when every process sees the same default cache
+SESSION_CACHE_BACKEND = os.environ.get('SESSION_CACHE_BACKEND', 'locmem').lower()
+if SESSION_CACHE_BACKEND not in CACHE_BACKENDS:
+    SESSION_CACHE_BACKEND = "locmem"
+SESSION_CACHE_MAX_ENTRIES = int(os.environ.get('SESSION_CACHE_MAX_ENTRIES', '5000'))
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND],
+        "LOCATION": os.environ.get('CACHE_LOCATION', str(BASE_DIR / ".cache" / "default") if CACHE_BACKEND == "file" else ""),
+    },
+    "sessions": {
+        "BACKEND": CACHE_BACKENDS[SESSION_CACHE_BACKEND],
+        "LOCATION": os.environ.get(
+            'SESSION_CACHE_LOCATION',
+            str(BASE_DIR / ".cache" / "sessions") if SESSION_CACHE_BACKEND == "file" else "sessions",
+        ),
+        "TIMEOUT": 1209600,
+        # Only the locmem and file backends cull; for redis/memcached the server bounds memory
+        **({"OPTIONS": {"MAX_ENTRIES": SESSION_CACHE_MAX_ENTRIES}} if SESSION_CACHE_BACKEND in ("locmem", "file") else {}),
+    },
+}
+
+# Session settings. SESSION_BACKEND picks the engine:
+#   db             - one django_session SELECT on every authenticated request (default)
+#   cached_db      - reads come from the "sessions" cache, writes go through to django_session
+#   cache          - cache only; sessions are lost when entries are evicted or the process restarts
+#   signed_cookies - nothing stored server-side; registration wizard data must fit in a 4KB cookie
+# cached_db and cache need a "sessions" cache that every web process shares (SESSION_CACHE_BACKEND=
+# redis, memcached, or file on a single host). With locmem each worker keeps its own copy, so a
+# logout in one worker leaves the session valid in the others; tracker.services.sessions refuses
+# that combination at startup when WEB_CONCURRENCY (gunicorn's worker count) is above 1.
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', '1'))
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'db').lower()
+SESSION_ENGINE = {
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "db": "django.contrib.sessions.backends.db",
+    "cache": "django.contrib.sessions.backends.cache",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+}.get(SESSION_BACKEND, "django.contrib.sessions.backends.db")
+SESSION_CACHE_ALIAS = "sessions"
 SESSION_COOKIE_AGE = 1209600  # 2 weeks in seconds
 
 # Security settings for production
@@ -195,7 +284,92 @@ if not DEBUG:
 APSCHEDULER_DATETIME_FORMAT = "N j, Y, f:s a"
 APSCHEDULER_RUN_NOW_TIMEOUT = 25  # Seconds
 
-# Logging configuration
+# Branch metrics API: seconds to cache a (period, branch set) result; 0 disables
+BRANCH_METRICS_CACHE_TTL = int(os.environ.get('BRANCH_METRICS_CACHE_TTL', '60'))
+
+# List-page KPI counters (tracker.services.kpi_counters): max age in seconds of a cached set. Writes
+# only invalidate the writing process's copy unless CACHE_SHARED, so it defaults short then
+KPI_CACHE_TTL = int(os.environ.get('KPI_CACHE_TTL', '300' if CACHE_SHARED else '30'))
+
+# Reference-data cache (tracker.services.reference_data): writes invalidate it, this bounds idle entries.
+# Without CACHE_SHARED other processes never see the invalidation, so this is how stale they can get
+REFDATA_CACHE_TTL = int(os.environ.get('REFDATA_CACHE_TTL', '86400' if CACHE_SHARED else '15'))
+
+# Vehicle analytics trends (tracker.services.vehicle_trends): invoice writes invalidate, this bounds the rest.
+# Without CACHE_SHARED the invalidation never leaves the writing process (e.g. scheduler bulk uploads)
+VEHICLE_TRENDS_CACHE_TTL = int(os.environ.get('VEHICLE_TRENDS_CACHE_TTL', '600' if CACHE_SHARED else '30'))
+
+# Server-rendered chart images (tracker.services.charts)
+CHART_RENDER_WORKERS = int(os.environ.get('CHART_RENDER_WORKERS', '2'))  # 0 renders on the image request
+CHART_CACHE_TTL = int(os.environ.get('CHART_CACHE_TTL', '86400'))
+CHART_RENDER_TIMEOUT = int(os.environ.get('CHART_RENDER_TIMEOUT', '30'))  # Seconds an image request waits
+# Comma-separated pages that skip server-side charts, e.g. "customer_groups"
+SERVER_CHARTS_DISABLED = [p.strip() for p in os.environ.get('SERVER_CHARTS_DISABLED', '').split(',') if p.strip()]
+
+# OCR fallback for scanned invoices (tracker.utils.pdf_ocr)
+INVOICE_OCR_ENABLED = str(os.environ.get('INVOICE_OCR_ENABLED', 'true')).lower() in ('1', 'true', 'yes')
+INVOICE_OCR_ENGINE = os.environ.get('INVOICE_OCR_ENGINE', 'tracker.utils.pdf_ocr.TesseractEngine')
+INVOICE_OCR_DPI = int(os.environ.get('INVOICE_OCR_DPI', '300'))
+INVOICE_OCR_WORKERS = int(os.environ.get('INVOICE_OCR_WORKERS', '2'))
+INVOICE_OCR_PAGE_TIMEOUT = int(os.environ.get('INVOICE_OCR_PAGE_TIMEOUT', '60'))  # Seconds
+INVOICE_OCR_MAX_PAGES = int(os.environ.get('INVOICE_OCR_MAX_PAGES', '10'))
+
+# Bulk invoice ingestion (tracker.services.invoice_batch)
+INVOICE_BATCH_WORKERS = int(os.environ.get('INVOICE_BATCH_WORKERS', '4'))  # Extraction processes; 1 = inline
+INVOICE_BATCH_MAX_FILES = int(os.environ.get('INVOICE_BATCH_MAX_FILES', '1000'))
+INVOICE_BATCH_MAX_FILE_MB = int(os.environ.get('INVOICE_BATCH_MAX_FILE_MB', '20'))
+
+# Request instrumentation (tracker.services.request_metrics); per-process, shown at console/request-metrics/
+REQUEST_METRICS_ENABLED = str(os.environ.get('REQUEST_METRICS_ENABLED', 'true')).lower() in ('1', 'true', 'yes')
+REQUEST_METRICS_SLOW_MS = int(os.environ.get('REQUEST_METRICS_SLOW_MS', '1000'))
+REQUEST_METRICS_SLOW_QUERIES = int(os.environ.get('REQUEST_METRICS_SLOW_QUERIES', '100'))
+REQUEST_METRICS_SLOW_SAMPLE_RATE = float(os.environ.get('REQUEST_METRICS_SLOW_SAMPLE_RATE', '1.0'))  # Share of slow requests logged
+REQUEST_METRICS_SLOW_KEEP = int(os.environ.get('REQUEST_METRICS_SLOW_KEEP', '100'))  # Kept in memory for the page
+# JSON lines of slow requests; the logs/ directory is gitignored. `manage.py test` writes no file
+REQUEST_METRICS_SLOW_LOG = os.environ.get('REQUEST_METRICS_SLOW_LOG', str(BASE_DIR / 'logs' / 'slow_requests.log'))
+TESTING = sys.argv[1:2] == ['test']
+
+# Async polling views (tracker.views_async): threads running their database calls, per process
+ASYNC_DB_THREADS = int(os.environ.get('ASYNC_DB_THREADS', '8'))
+
+# History archival (tracker.services.archive): closed orders and their invoices older than this many days; 0 disables the nightly job
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', '730'))
+ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', '200'))  # Seed rows per transaction
+
+# Logging (tracker.utils.log_pipeline): records go through an in-memory queue so request
+# threads never write to disk. Every process appends to the same files (each gunicorn worker,
+# the scheduler, and the OCR/batch pool children), and rotating one file from several
+# processes loses records, so no process rotates them: they are WatchedFileHandlers, which
+# reopen the file once it has been moved away. Rotate them with logrotate, for example
+#     /srv/pos_tracker/logs/*.log { daily  rotate 7  compress  delaycompress  missingok }
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'DEBUG' if DEBUG else 'INFO').upper()
+LOG_FILE = os.environ.get('LOG_FILE', str(BASE_DIR / 'logs' / 'debug.log'))  # `manage.py test` writes no file
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json').lower()  # 'json' or 'text' for LOG_FILE
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', '10000'))  # Records beyond this are dropped, not waited on
+# Per-logger limit for INFO/DEBUG lines of hot paths: at most LOG_HOT_PATH_RATE per call site per LOG_HOT_PATH_PERIOD seconds
+LOG_HOT_PATH_RATE = int(os.environ.get('LOG_HOT_PATH_RATE', '20'))
+LOG_HOT_PATH_PERIOD = int(os.environ.get('LOG_HOT_PATH_PERIOD', '60'))
+LOG_HOT_PATH_LOGGERS = [
+    'tracker.utils.order_type_detector',
+    'tracker.utils.pdf_text_extractor',
+    'tracker.utils.pdf_ocr',
+    'tracker.views_invoice_upload',
+    'tracker.views_vehicle_tracking',
+]
+# Comma-separated loggers that keep only a LOG_SAMPLE_RATE share of their INFO/DEBUG lines
+LOG_SAMPLED_LOGGERS = [n.strip() for n in os.environ.get('LOG_SAMPLED_LOGGERS', '').split(',') if n.strip()]
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', '0.1'))
+
+
+def _log_file(filename, formatter, level='INFO'):
+    return {'class': 'logging.handlers.WatchedFileHandler', 'level': level, 'filename': filename,
+            'formatter': formatter, 'encoding': 'utf-8', 'delay': True}
+
+
+if not TESTING:
+    for _path in (LOG_FILE, REQUEST_METRICS_SLOW_LOG):
+        os.makedirs(os.path.dirname(_path) or '.', exist_ok=True)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -208,22 +382,65 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'tracker.utils.log_pipeline.JsonFormatter',
+        },
+        'raw': {
+            'format': '{message}',
+            'style': '{',
+        },
     },
-    'handlers': {
-        'file': {
-            'level': 'DEBUG' if DEBUG else 'INFO',
-            'class': 'logging.FileHandler',
-            'filename': BASE_DIR / 'debug.log',
-            'formatter': 'verbose',
+    'filters': {
+        'hot_path': {
+            '()': 'tracker.utils.log_pipeline.RateLimitFilter',
+            'rate': LOG_HOT_PATH_RATE,
+            'per': LOG_HOT_PATH_PERIOD,
         },
+        'sampled': {
+            '()': 'tracker.utils.log_pipeline.SampleFilter',
+            'rate': LOG_SAMPLE_RATE,
+        },
+    },
+    'handlers': {
+        'file': (
+            {'class': 'logging.NullHandler'} if TESTING
+            else _log_file(LOG_FILE, 'json' if LOG_FORMAT == 'json' else 'verbose', LOG_LEVEL)
+        ),
         'console': {
             'level': 'INFO',
             'class': 'logging.StreamHandler',
             'formatter': 'simple',
         },
+        # One JSON object per slow request (tracker.services.request_metrics)
+        'slow_requests': (
+            {'class': 'logging.NullHandler'} if TESTING else _log_file(REQUEST_METRICS_SLOW_LOG, 'raw')
+        ),
+        # Named to sort after the handlers they feed, which dictConfig must build first
+        'queue': {
+            'class': 'tracker.utils.log_pipeline.QueueListenerHandler',
+            'handlers': ['cfg://handlers.console', 'cfg://handlers.file'],
+            'maxsize': LOG_QUEUE_SIZE,
+        },
+        'slow_requests_queue': {
+            'class': 'tracker.utils.log_pipeline.QueueListenerHandler',
+            'handlers': ['cfg://handlers.slow_requests'],
+            'maxsize': LOG_QUEUE_SIZE,
+        },
+    },
+    'loggers': {
+        'tracker.slow_requests': {
+            'handlers': ['slow_requests_queue'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        **{
+            name: {'filters': [f for f, names in (('hot_path', LOG_HOT_PATH_LOGGERS), ('sampled', LOG_SAMPLED_LOGGERS))
+                               if name in names]}
+            for name in {*LOG_HOT_PATH_LOGGERS, *LOG_SAMPLED_LOGGERS}
+        },
     },
     'root': {
-        'handlers': ['console', 'file'],
-        'level': 'DEBUG' if DEBUG else 'INFO',
+        'handlers': ['queue'],
+        'level': LOG_LEVEL,
     },
 }
@@ -3,7 +3,7 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
 from django.db import models
 from django.db.models import Q
-from .models import Customer, Vehicle, Order, InventoryItem, Branch, ServiceType, ServiceAddon, LabourCode, DelayReasonCategory, DelayReason, Salesperson, Invoice, InvoiceLineItem, Profile
+from .models import Customer, Vehicle, Order, InventoryItem, Branch, Holiday, ServiceType, ServiceAddon, LabourCode, DelayReasonCategory, DelayReason, Salesperson, Invoice, InvoiceLineItem, Profile
 
 class ProfileInline(admin.StackedInline):
     model = Profile
@@ -50,6 +50,13 @@ class ServiceAddonAdmin(admin.ModelAdmin):
     list_filter = ("is_active",)
     search_fields = ("name",)
 
+@admin.register(Holiday)
+class HolidayAdmin(admin.ModelAdmin):
+    list_display = ('date', 'name', 'branch')
+    list_filter = ('branch',)
+    date_hierarchy = 'date'
+
+
 @admin.register(Branch)
 class BranchAdmin(admin.ModelAdmin):
     list_display = ('get_branch_name', 'code', 'region', 'get_parent', 'get_sub_branches_count', 'get_users_count', 'is_active')
@@ -64,6 +71,9 @@ class BranchAdmin(admin.ModelAdmin):
             'fields': ('parent', 'get_branch_hierarchy'),
             'classes': ('wide',),
         }),
+        ('Working Hours', {
+            'fields': ('work_start', 'work_end', 'work_days'),
+        }),
         ('Metadata', {
             'fields': ('created_at',),
             'classes': ('collapse',),
@@ -6,6 +6,13 @@ class TrackerConfig(AppConfig):
     name = "tracker"
 
     def ready(self):  # noqa: D401
+        from django.db.backends.signals import connection_created
+
+        from .services import request_metrics
+        from .services.sessions import check_engine
+        check_engine()
+        connection_created.connect(request_metrics.install, dispatch_uid='tracker.request_metrics')
+
         # Import signal handlers
         try:
             from . import signals  # noqa: F401
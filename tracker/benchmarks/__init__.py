@@ -0,0 +1,178 @@
+"""
+Query-count / latency / memory benchmarks for the heavy views.
+
+A dataset is seeded with tracker.utils.seed_data at a named scale, then each scenario in
+tracker.benchmarks.scenarios is requested through the test client and measured:
+  - queries: number of SQL statements for one request (middleware included)
+  - time_ms: median wall time over `repeat` requests (cache cleared before each)
+  - peak_kb: peak Python memory allocated during one request (tracemalloc)
+Results are compared with a JSON baseline (baseline.json next to this file).
+
+Run with: python manage.py run_benchmarks --scale small
+"""
+
+import io
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+BASELINE_PATH = Path(__file__).with_name('baseline.json')
+
+# branches, inventory items, customers, orders, invoices
+SCALES = {
+    'small': {'branches': 3, 'inventory_items': 20, 'customers': 60, 'orders': 200, 'invoices': 100},
+    'medium': {'branches': 20, 'inventory_items': 60, 'customers': 2000, 'orders': 10000, 'invoices': 5000},
+    'large': {'branches': 20, 'inventory_items': 100, 'customers': 20000, 'orders': 100000, 'invoices': 50000},
+    # Invoice-heavy analytics (api_vehicle_analytics): --scale invoices_100k --only api_vehicle_analytics
+    'invoices_100k': {'branches': 20, 'inventory_items': 100, 'customers': 20000, 'orders': 2000, 'invoices': 100000},
+}
+
+
+@dataclass
+class Scenario:
+    name: str
+    url_name: str
+    method: str = 'get'
+    # Callables receive the seeding context dict and return request params/data
+    params: Optional[Callable[[dict], dict]] = None
+
+
+@dataclass
+class Result:
+    name: str
+    status: int
+    queries: int
+    time_ms: float
+    peak_kb: float
+    sql: List[str] = field(default_factory=list, repr=False)
+
+    def as_dict(self) -> dict:
+        return {'queries': self.queries, 'time_ms': round(self.time_ms, 1), 'peak_kb': round(self.peak_kb, 1)}
+
+
+def seed_dataset(scale: str = 'small', seed: int = 42, log=lambda *a: None) -> dict:
+    """Seed the current database and return a context dict used by scenario params."""
+    from django.core.management import call_command
+    from tracker.utils.seed_data import (
+        ensure_branches, ensure_brands_and_inventory, ensure_customers_and_vehicles, ensure_invoices, ensure_orders,
+    )
+
+    sizes = SCALES[scale]
+    rng = random.Random(seed)
+    call_command('seed_delay_reasons', stdout=io.StringIO())
+    branches = ensure_branches(sizes['branches'], rng=rng, log=log, with_users=False)
+    _brands, items = ensure_brands_and_inventory(sizes['inventory_items'], rng=rng, log=log)
+    customers, vehicles = ensure_customers_and_vehicles(sizes['customers'], rng=rng, log=log, branches=branches)
+    ensure_orders(customers, vehicles, items, sizes['orders'], rng=rng, log=log)
+    ensure_invoices(customers, vehicles, items, sizes['invoices'], rng=rng, log=log)
+
+    user, _ = User.objects.get_or_create(username='benchmark', defaults={'is_staff': True, 'is_superuser': True})
+    vehicle = next((v for v in vehicles if v.customer_id), None)
+    return {
+        'scale': scale,
+        'user': user,
+        'customer': vehicle.customer if vehicle else customers[0],
+        'vehicle': vehicle,
+        'search': customers[0].full_name.split()[-1],
+        'counter': 0,
+    }
+
+
+def _request(client: Client, scenario: Scenario, ctx: dict):
+    ctx['counter'] += 1
+    data = scenario.params(ctx) if scenario.params else {}
+    return getattr(client, scenario.method)(reverse(scenario.url_name), data)
+
+
+def run_scenario(client: Client, scenario: Scenario, ctx: dict, repeat: int = 3) -> Result:
+    # Warm-up: imports, template compilation, URL resolver
+    _request(client, scenario, ctx)
+
+    timings = []
+    queries = None
+    status = None
+    sql = []
+    for _ in range(max(1, repeat)):
+        cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = _request(client, scenario, ctx)
+            timings.append((time.perf_counter() - started) * 1000)
+        if queries is None:
+            queries = len(captured.captured_queries)
+            status = response.status_code
+            sql = [q['sql'] for q in captured.captured_queries]
+
+    cache.clear()
+    tracemalloc.start()
+    try:
+        _request(client, scenario, ctx)
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return Result(scenario.name, status, queries, statistics.median(timings), peak / 1024, sql)
+
+
+def run_benchmarks(ctx: dict, names: Optional[List[str]] = None, repeat: int = 3) -> Dict[str, Result]:
+    from .scenarios import SCENARIOS
+
+    client = Client()
+    client.force_login(ctx['user'])
+    results = {}
+    for scenario in SCENARIOS:
+        if names and scenario.name not in names:
+            continue
+        results[scenario.name] = run_scenario(client, scenario, ctx, repeat=repeat)
+    return results
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> dict:
+    try:
+        with open(path, encoding='utf-8') as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(results: Dict[str, Result], scale: str, path: Path = BASELINE_PATH) -> None:
+    data = load_baseline(path)
+    data[scale] = {name: r.as_dict() for name, r in sorted(results.items())}
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(data, fh, indent=2, sort_keys=True)
+        fh.write('\n')
+
+
+def compare(results: Dict[str, Result], baseline: dict, query_slack: int = 0,
+            time_ratio: float = 2.0, time_slack_ms: float = 25.0, memory_ratio: float = 1.5) -> List[str]:
+    """Return human-readable regressions of `results` against one scale's baseline.
+
+    Query counts must not grow by more than `query_slack`. Time and memory only count
+    as regressions when they exceed the baseline by the given ratio (and, for time,
+    by at least `time_slack_ms`) since they vary between machines.
+    """
+    problems = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if result.status >= 400:
+            problems.append(f"{name}: HTTP {result.status}")
+        if not base:
+            continue
+        if result.queries > base['queries'] + query_slack:
+            problems.append(f"{name}: {result.queries} queries (baseline {base['queries']})")
+        if time_ratio and result.time_ms > max(base['time_ms'] * time_ratio, base['time_ms'] + time_slack_ms):
+            problems.append(f"{name}: {result.time_ms:.0f}ms (baseline {base['time_ms']:.0f}ms)")
+        if memory_ratio and result.peak_kb > base['peak_kb'] * memory_ratio:
+            problems.append(f"{name}: peak {result.peak_kb:.0f}KB (baseline {base['peak_kb']:.0f}KB)")
+    return problems
@@ -0,0 +1,50 @@
+"""Benchmark scenarios: the views whose query counts and latency we track."""
+
+from datetime import timedelta
+
+from django.utils import timezone
+
+from . import Scenario
+
+
+def _invoice_upload_data(ctx):
+    customer = ctx['customer']
+    vehicle = ctx['vehicle']
+    return {
+        'pre_selected_customer_id': customer.id,
+        'customer_name': customer.full_name,
+        'customer_phone': customer.phone,
+        'plate': vehicle.plate_number if vehicle else '',
+        'invoice_number': f"BENCH-UPLOAD-{ctx['counter']:06d}",
+        'invoice_date': timezone.localdate().isoformat(),
+        'subtotal': '300.00',
+        'tax_amount': '54.00',
+        'total_amount': '354.00',
+        'item_code[]': ['41003', '21001', '30010'],
+        'item_description[]': ['Tyre 205/55R16', 'Wheel alignment', 'Labour'],
+        'item_qty[]': ['2', '1', '1'],
+        'item_price[]': ['100.00', '60.00', '40.00'],
+    }
+
+
+SCENARIOS = [
+    Scenario('dashboard', 'tracker:dashboard'),
+    Scenario('orders_list', 'tracker:orders_list'),
+    Scenario('customer_groups', 'tracker:customer_groups'),
+    Scenario('api_vehicle_tracking_data', 'tracker:api_vehicle_tracking_data', params=lambda ctx: {'period': 'yearly'}),
+    Scenario('api_vehicle_analytics', 'tracker:api_vehicle_analytics', params=lambda ctx: {
+        'period': 'weekly',
+        'start_date': (timezone.localdate() - timedelta(days=365)).isoformat(),
+        'end_date': timezone.localdate().isoformat(),
+    }),
+    Scenario('api_delay_analytics_summary', 'tracker:api_delay_analytics_summary', params=lambda ctx: {'period': 'all'}),
+    Scenario('api_delay_reasons_breakdown', 'tracker:api_delay_reasons_breakdown', params=lambda ctx: {'period': 'all'}),
+    Scenario('api_delay_trends', 'tracker:api_delay_trends', params=lambda ctx: {'period': 'all'}),
+    Scenario('api_delay_by_order_type', 'tracker:api_delay_by_order_type', params=lambda ctx: {'period': 'all'}),
+    Scenario('api_delay_by_user', 'tracker:api_delay_by_user', params=lambda ctx: {'period': 'all'}),
+    Scenario('api_delay_impact_analysis', 'tracker:api_delay_impact_analysis', params=lambda ctx: {'period': 'all'}),
+    Scenario('invoice_list', 'tracker:invoice_list'),
+    Scenario('customers_search', 'tracker:customers_search', params=lambda ctx: {'q': ctx['search']}),
+    Scenario('api_create_invoice_from_upload', 'tracker:api_create_invoice_from_upload', method='post',
+             params=_invoice_upload_data),
+]
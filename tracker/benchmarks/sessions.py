@@ -0,0 +1,65 @@
+"""
+Per-request session overhead for each SESSION_ENGINE choice.
+
+Each engine gets a fresh logged-in client, then:
+  - read: GET a small cached JSON endpoint (session load + auth only)
+  - write: POST registration wizard step 2, which stores step data in the session
+The time and the number of django_session queries per request are averaged over
+`requests` calls after one warm-up call. Everything else the request does is identical
+across engines, so the differences are the session cost.
+
+Run with: python manage.py run_benchmarks --sessions
+"""
+
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable
+
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+
+@dataclass
+class SessionResult:
+    engine: str
+    read_ms: float
+    read_session_queries: float
+    write_ms: float
+    write_session_queries: float
+
+
+def _measure(client: Client, method: str, url: str, data: dict, requests: int):
+    getattr(client, method)(url, data)
+    timings, session_queries = [], 0
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            getattr(client, method)(url, data)
+            timings.append((time.perf_counter() - started) * 1000)
+        session_queries += sum('django_session' in q['sql'] for q in captured.captured_queries)
+    return statistics.median(timings), session_queries / requests
+
+
+def measure_engine(user, engine: str, requests: int = 50) -> SessionResult:
+    with override_settings(SESSION_ENGINE=ENGINES[engine]):
+        client = Client()
+        client.force_login(user)
+        read_ms, read_q = _measure(client, 'get', reverse('tracker:api_get_salespersons'), {}, requests)
+        write_ms, write_q = _measure(
+            client, 'post', reverse('tracker:customer_register'), {'step': 2, 'intent': 'service'}, requests
+        )
+    return SessionResult(engine, read_ms, read_q, write_ms, write_q)
+
+
+def compare_engines(user, engines: Iterable[str] = ENGINES, requests: int = 50) -> Dict[str, SessionResult]:
+    return {engine: measure_engine(user, engine, requests) for engine in engines}
@@ -1,50 +1,164 @@
+import hashlib
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required, user_passes_test
+from django.core.cache import cache
+from django.db.models import Count, Q
 from django.http import JsonResponse, HttpRequest
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from .models import Branch, Order, Customer
 
+# Seconds to cache a computed (period, branch set) result; 0 disables caching
+BRANCH_METRICS_CACHE_TTL = getattr(settings, 'BRANCH_METRICS_CACHE_TTL', 60)
+
+ORDER_TOTALS = ('orders', 'completed', 'in_progress', 'cancelled', 'overdue')
+TOTAL_KEYS = ORDER_TOTALS + ('new_customers',)
+
+
+def _period_range(period: str, today):
+    if period == 'daily':
+        return today, today
+    if period == 'weekly':
+        return today - timedelta(days=6), today
+    if period == 'yearly':
+        return today.replace(month=1, day=1), today
+    return today - timedelta(days=29), today
+
+
+def _day_bounds(start_date, end_date):
+    """Aware [start, end) datetimes so the filters can use the created_at indexes
+    instead of wrapping the column in a DATE() cast."""
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(start_date, time.min), tz)
+    end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min), tz)
+    return start, end
+
+
+def branch_totals(branch_ids, start_date, end_date):
+    """Return {branch_id: totals} using one grouped query for orders and one for customers."""
+    start, end = _day_bounds(start_date, end_date)
+    totals = {bid: dict.fromkeys(TOTAL_KEYS, 0) for bid in branch_ids}
+
+    order_rows = (
+        Order.objects.filter(branch_id__in=branch_ids, created_at__gte=start, created_at__lt=end)
+        .values('branch_id')
+        .annotate(
+            orders=Count('id'),
+            completed=Count('id', filter=Q(status='completed')),
+            in_progress=Count('id', filter=Q(status__in=['created', 'in_progress'])),
+            cancelled=Count('id', filter=Q(status='cancelled')),
+            overdue=Count('id', filter=Q(status='overdue')),
+        )
+        .order_by()
+    )
+    for row in order_rows:
+        totals[row['branch_id']].update({k: row[k] for k in ORDER_TOTALS})
+
+    customer_rows = (
+        Customer.objects.filter(branch_id__in=branch_ids, registration_date__gte=start, registration_date__lt=end)
+        .values('branch_id')
+        .annotate(new_customers=Count('id'))
+        .order_by()
+    )
+    for row in customer_rows:
+        totals[row['branch_id']]['new_customers'] = row['new_customers']
+    return totals
+
+
+def _rollup(branch_rows, group_by, parents):
+    """Sum branch totals by region or by top-level parent branch."""
+    groups = {}
+    for row in branch_rows:
+        b = row['branch']
+        if group_by == 'region':
+            key = b['region'] or 'Unassigned'
+            label = key
+        else:
+            # Walk up to the main branch (the chain is short; guard against cycles)
+            root, seen = b['id'], set()
+            while parents.get(root) and root not in seen:
+                seen.add(root)
+                root = parents[root]
+            key = root
+            label = None
+        group = groups.setdefault(key, {'key': key, 'name': label, 'branch_ids': [], 'totals': dict.fromkeys(TOTAL_KEYS, 0)})
+        group['branch_ids'].append(b['id'])
+        for k in TOTAL_KEYS:
+            group['totals'][k] += row['totals'][k]
+    if group_by == 'parent':
+        names = dict(Branch.objects.filter(id__in=list(groups)).values_list('id', 'name'))
+        for key, group in groups.items():
+            group['name'] = names.get(key, str(key))
+    return sorted(groups.values(), key=lambda g: str(g['name']))
+
+
 @login_required
 @user_passes_test(lambda u: u.is_superuser or u.is_staff)
 def api_branch_metrics(request: HttpRequest):
+    """Order and new-customer totals per branch for a period.
+
+    Query params:
+    - period: daily | weekly | monthly (default) | yearly
+    - start, end: YYYY-MM-DD; an explicit range overrides period
+    - branches: comma-separated branch ids (superusers only)
+    - group: region | parent to add roll-ups over the branch rows
+    """
     period = (request.GET.get('period') or 'monthly').lower()
     today = timezone.localdate()
-    if period == 'daily':
-        start_date = today
-        end_date = today
-    elif period == 'weekly':
-        start_date = today - timezone.timedelta(days=6)
-        end_date = today
-    elif period == 'yearly':
-        start_date = today.replace(month=1, day=1)
-        end_date = today
-    else:
-        start_date = today - timezone.timedelta(days=29)
-        end_date = today
+    start_date, end_date = _period_range(period, today)
+
+    start_param, end_param = request.GET.get('start'), request.GET.get('end')
+    if start_param or end_param:
+        try:
+            start_date = parse_date(start_param) if start_param else start_date
+            end_date = parse_date(end_param) if end_param else end_date
+        except ValueError:
+            start_date = end_date = None
+        if not start_date or not end_date:
+            return JsonResponse({'error': 'Dates must be in YYYY-MM-DD format'}, status=400)
+        if start_date > end_date:
+            return JsonResponse({'error': 'start must be on or before end'}, status=400)
+        period = 'custom'
+
+    group_by = (request.GET.get('group') or '').lower()
+    if group_by not in ('', 'region', 'parent'):
+        return JsonResponse({'error': "group must be 'region' or 'parent'"}, status=400)
 
     if request.user.is_superuser:
-        branches = Branch.objects.filter(is_active=True).order_by('name')
+        branches = Branch.objects.filter(is_active=True)
+        requested = [s for s in (request.GET.get('branches') or '').split(',') if s.strip().isdigit()]
+        if requested:
+            branches = branches.filter(id__in=[int(s) for s in requested])
     else:
         b = getattr(getattr(request.user, 'profile', None), 'branch', None)
         branches = Branch.objects.filter(id=b.id) if b else Branch.objects.none()
+    branches = list(branches.order_by('name').values('id', 'name', 'code', 'region', 'parent_id'))
+    branch_ids = [b['id'] for b in branches]
+
+    cache_key = None
+    if BRANCH_METRICS_CACHE_TTL and request.GET.get('nocache') != '1':
+        ids_hash = hashlib.md5(','.join(map(str, sorted(branch_ids))).encode()).hexdigest()
+        cache_key = f"branch_metrics:{start_date}:{end_date}:{group_by}:{ids_hash}"
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return JsonResponse(cached)
+
+    totals = branch_totals(branch_ids, start_date, end_date) if branch_ids else {}
+    data = [
+        {
+            'branch': {'id': b['id'], 'name': b['name'], 'code': b['code'], 'region': b['region']},
+            'totals': totals[b['id']],
+        }
+        for b in branches
+    ]
+    payload = {'period': period, 'start': start_date.isoformat(), 'end': end_date.isoformat(), 'branches': data}
+    if group_by:
+        parents = dict(Branch.objects.values_list('id', 'parent_id')) if group_by == 'parent' else {}
+        payload['group'] = group_by
+        payload['rollups'] = _rollup(data, group_by, parents)
 
-    data = []
-    for b in branches:
-        oqs = Order.objects.filter(branch=b, created_at__date__gte=start_date, created_at__date__lte=end_date)
-        cqs = Customer.objects.filter(branch=b, registration_date__date__gte=start_date, registration_date__date__lte=end_date)
-        total = oqs.count()
-        completed = oqs.filter(status='completed').count()
-        in_progress = oqs.filter(status__in=['created','in_progress']).count()
-        cancelled = oqs.filter(status='cancelled').count()
-        overdue = oqs.filter(status='overdue').count()
-        data.append({
-            'branch': {'id': b.id, 'name': b.name, 'code': b.code, 'region': b.region},
-            'totals': {
-                'orders': total,
-                'completed': completed,
-                'in_progress': in_progress,
-                'cancelled': cancelled,
-                'overdue': overdue,
-                'new_customers': cqs.count(),
-            }
-        })
-    return JsonResponse({'period': period, 'start': start_date.isoformat(), 'end': end_date.isoformat(), 'branches': data})
+    if cache_key:
+        cache.set(cache_key, payload, BRANCH_METRICS_CACHE_TTL)
+    return JsonResponse(payload)
@@ -0,0 +1,162 @@
+"""
+Read-replica routing for reports and analytics.
+
+The dashboard, customer groups, organisation, delay analytics and vehicle tracking pages
+and the exports only read, but they read a lot, and on the primary they compete with
+front-desk order entry. Views wrapped in @reporting_view (or class-based views using
+ReportingViewMixin) send their reads to the REPORTING_DB_ALIAS database, when one is
+configured (see REPORTING_DB_NAME in settings). Everything else is unchanged:
+  - writes always go to the primary. Once a reporting view writes, its remaining reads
+    go to the primary too, as do reads inside a transaction on the primary
+  - read-your-writes: ReadYourWritesMiddleware marks a browser for REPORTING_PIN_SECONDS
+    after any successful POST/PUT/PATCH/DELETE. Reporting views then read from the
+    primary, so an order just saved shows up on the dashboard
+  - replication lag: for MySQL replicas, SHOW REPLICA STATUS is checked at most every
+    REPORTING_LAG_CHECK_SECONDS. When the replica is more than REPORTING_DB_MAX_LAG
+    seconds behind, stopped or unreachable, reads fall back to the primary
+  - objects read from the replica are saved to the primary
+
+To try it locally with SQLite, copy the database and point the alias at the copy:
+    cp db.sqlite3 reporting.sqlite3
+    REPORTING_DB_NAME=reporting.sqlite3 python manage.py runserver
+The copy is not replicated, so reports show the data as it was when copied.
+"""
+
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = 'read_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+# Per request (or task): {'alias': replica alias, 'wrote': bool} while a reporting view runs
+_reads: ContextVar[Optional[dict]] = ContextVar('reporting_reads', default=None)
+
+# alias -> (checked at, lag in seconds or None when unusable)
+_lag_cache = {}
+_lag_lock = threading.Lock()
+
+
+def reporting_alias() -> Optional[str]:
+    """The configured reporting database alias, or None when there is none."""
+    alias = getattr(settings, 'REPORTING_DB_ALIAS', 'reporting')
+    return alias if alias != DEFAULT_DB_ALIAS and alias in settings.DATABASES else None
+
+
+def _measure_lag(alias: str) -> Optional[float]:
+    """Seconds the replica is behind; 0 when it does not replicate (e.g. a SQLite copy)."""
+    conn = connections[alias]
+    if conn.vendor != 'mysql':
+        conn.ensure_connection()
+        return 0.0
+    with conn.cursor() as cursor:
+        for statement in ('SHOW REPLICA STATUS', 'SHOW SLAVE STATUS'):
+            try:
+                cursor.execute(statement)
+                break
+            except Exception:
+                continue
+        else:
+            return 0.0
+        row = cursor.fetchone()
+        if row is None:
+            return 0.0  # Not a replica: a standalone second instance
+        status = dict(zip([c[0] for c in cursor.description], row))
+    lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+    return None if lag is None else float(lag)  # NULL: replication is stopped
+
+
+def replica_lag(alias: str) -> Optional[float]:
+    """Cached lag of the replica; None when it is unreachable or not replicating."""
+    now = time.monotonic()
+    with _lag_lock:
+        cached = _lag_cache.get(alias)
+        if cached and now - cached[0] < getattr(settings, 'REPORTING_LAG_CHECK_SECONDS', 5):
+            return cached[1]
+    try:
+        lag = _measure_lag(alias)
+    except Exception as exc:
+        logger.warning(f"Reporting database '{alias}' unavailable, reading from the primary: {exc}")
+        lag = None
+    with _lag_lock:
+        _lag_cache[alias] = (now, lag)
+    return lag
+
+
+def read_alias_for(request=None) -> Optional[str]:
+    """Where a reporting view's reads should go for this request: the replica alias, or None for the primary."""
+    alias = reporting_alias()
+    if alias is None:
+        return None
+    if request is not None and request.COOKIES.get(PIN_COOKIE):
+        return None
+    lag = replica_lag(alias)
+    if lag is None or lag > getattr(settings, 'REPORTING_DB_MAX_LAG', 30):
+        return None
+    return alias
+
+
+@contextmanager
+def reporting_reads(request=None):
+    """Route the reads inside the block to the reporting database (when it is usable)."""
+    alias = read_alias_for(request)
+    token = _reads.set({'alias': alias, 'wrote': False} if alias else None)
+    try:
+        yield alias
+    finally:
+        _reads.reset(token)
+
+
+def reporting_view(view):
+    """Decorator: the view's reads go to the reporting database. Put it below @login_required."""
+    if iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            with reporting_reads(request):
+                return await view(request, *args, **kwargs)
+    else:
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            with reporting_reads(request):
+                return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReportingViewMixin:
+    """Class-based view counterpart of @reporting_view."""
+
+    def dispatch(self, request, *args, **kwargs):
+        with reporting_reads(request):
+            return super().dispatch(request, *args, **kwargs)
+
+
+class ReportingRouter:
+    """DATABASE_ROUTERS entry: replica reads inside reporting views, everything else on the primary."""
+
+    def db_for_read(self, model, **hints):
+        state = _reads.get()
+        if state is None or state['wrote'] or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return state['alias']
+
+    def db_for_write(self, model, **hints):
+        state = _reads.get()
+        if state is not None:
+            state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # The replica holds the same rows
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != reporting_alias()
@@ -515,44 +515,35 @@ class OrderForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        # Dynamic service types from DB
+        from .services import reference_data
+
+        # Dynamic service types and add-ons (cached reference data)
         try:
-            svc_qs = ServiceType.objects.filter(is_active=True).order_by('name')
-            svc_choices = [(s.name, s.name) for s in svc_qs]
-            self.fields['service_selection'].choices = svc_choices
+            self.fields['service_selection'].choices = [(s['name'], s['name']) for s in reference_data.get('service_types')]
         except Exception:
             # Keep empty choices on error
             self.fields['service_selection'].choices = []
-
-        # Dynamic service addons from DB
         try:
-            addon_qs = ServiceAddon.objects.filter(is_active=True).order_by('name')
-            addon_choices = [(a.name, a.name) for a in addon_qs]
-            self.fields['tire_services'].choices = addon_choices
+            self.fields['tire_services'].choices = [(a['name'], a['name']) for a in reference_data.get('service_addons')]
         except Exception:
             # Keep empty choices on error
             self.fields['tire_services'].choices = []
 
         # Dynamic item choices with brand info from inventory
         try:
-            # Get all active inventory items with their brands
-            items = InventoryItem.objects.select_related('brand').filter(is_active=True).order_by('brand__name', 'name')
-            
             # Create combined item choices (value = item_id, label = "Brand - Item Name")
             item_choices = [('', 'Select item')]
             item_brand_map = {}
-            
-            for item in items:
-                if item.name:
-                    brand_name = item.brand.name if item.brand else 'Unbranded'
-                    label = f"{brand_name} - {item.name}"
-                    item_choices.append((item.id, label))
-                    item_brand_map[str(item.id)] = {
-                        'name': item.name,
-                        'brand': brand_name,
-                        'quantity': item.quantity
+
+            for item in reference_data.get('inventory_items'):
+                if item['name']:
+                    item_choices.append((item['id'], f"{item['brand']} - {item['name']}"))
+                    item_brand_map[str(item['id'])] = {
+                        'name': item['name'],
+                        'brand': item['brand'],
+                        'quantity': item['quantity']
                     }
-            
+
             self.fields["item_name"].widget = forms.Select(
                 attrs={
                     'class': 'form-select',
@@ -0,0 +1,34 @@
+"""
+Move old closed orders and their invoices into the archive tables, or bring groups back.
+Run with: python manage.py archive_history [--days 730] [--batch-size 200] [--dry-run]
+          python manage.py archive_history --restore o123 i456
+
+Also scheduled nightly by runapscheduler (see tracker.scheduler). Group keys are shown on
+archived records (ArchivedOrder.group / ArchivedInvoice.group).
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.services import archive
+
+
+class Command(BaseCommand):
+    help = "Archive orders and invoices older than --days (default ARCHIVE_AFTER_DAYS), or restore archived groups"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Archive closed history older than this many days")
+        parser.add_argument("--batch-size", type=int, help="Seed rows per transaction (default ARCHIVE_BATCH_SIZE)")
+        parser.add_argument("--dry-run", action="store_true", help="Only count what would be archived")
+        parser.add_argument("--restore", nargs="+", metavar="GROUP", help="Move these archive groups back instead")
+
+    def handle(self, *args, **options):
+        if options["restore"]:
+            orders, invoices = archive.restore(options["restore"])
+            self.stdout.write(self.style.SUCCESS(f"Restored {orders} orders and {invoices} invoices."))
+            return
+        try:
+            totals = archive.archive(days=options["days"], batch_size=options["batch_size"], dry_run=options["dry_run"])
+        except archive.ArchiveError as exc:
+            raise CommandError(str(exc))
+        verb = "Would archive" if options["dry_run"] else "Archived"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {totals['orders']} orders and {totals['invoices']} invoices."))
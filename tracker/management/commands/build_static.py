@@ -0,0 +1,129 @@
+"""
+Build production static assets and report files nothing references.
+Run with: python manage.py build_static [--report-only] [--top 30]
+
+The heavy lifting (minify, hash, precompress) is done by
+tracker.storage.CompressedManifestStaticFilesStorage during collectstatic.
+"""
+
+import os
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+TEMPLATE_STATIC_RE = re.compile(r"""\{%\s*static\s+['"]([^'"]+)['"]""")
+CSS_URL_RE = re.compile(r"""url\(\s*['"]?([^'")]+?)['"]?\s*\)""")
+# Plain string paths inside templates/JS, e.g. "/static/assets/images/x.png"
+LITERAL_STATIC_RE = re.compile(r"""['"(]/?static/([^'")?#\s]+)""")
+
+
+def _static_roots():
+    return [Path(p) for p in getattr(settings, 'STATICFILES_DIRS', [])]
+
+
+def _template_dirs():
+    dirs = []
+    for conf in settings.TEMPLATES:
+        dirs.extend(Path(d) for d in conf.get('DIRS', []))
+    return dirs
+
+
+def collect_static_files() -> dict:
+    """Map relative static path -> absolute Path for every source file."""
+    files = {}
+    for root in _static_roots():
+        for dirpath, _dirnames, filenames in os.walk(root):
+            for fn in filenames:
+                full = Path(dirpath) / fn
+                files[full.relative_to(root).as_posix()] = full
+    return files
+
+
+def find_referenced(files: dict) -> set:
+    """Return the set of static paths referenced from templates, including
+    assets pulled in transitively through CSS url() references and literal paths in JS."""
+    referenced = set()
+    for tdir in _template_dirs():
+        for path in tdir.rglob('*.html'):
+            try:
+                text = path.read_text(encoding='utf-8', errors='ignore')
+            except OSError:
+                continue
+            referenced.update(TEMPLATE_STATIC_RE.findall(text))
+            referenced.update(LITERAL_STATIC_RE.findall(text))
+
+    pending = [r for r in referenced if r.endswith(('.css', '.js'))]
+    seen = set()
+    while pending:
+        name = pending.pop()
+        if name in seen or name not in files:
+            continue
+        seen.add(name)
+        try:
+            text = files[name].read_text(encoding='utf-8', errors='ignore')
+        except OSError:
+            continue
+        found = set(LITERAL_STATIC_RE.findall(text))
+        if name.endswith('.css'):
+            base = os.path.dirname(name)
+            for url in CSS_URL_RE.findall(text):
+                if url.startswith(('data:', 'http:', 'https:', '//', '#')):
+                    continue
+                url = url.split('?')[0].split('#')[0]
+                found.add(os.path.normpath(os.path.join(base, url)).replace(os.sep, '/'))
+        for ref in found - referenced:
+            referenced.add(ref)
+            if ref.endswith(('.css', '.js')):
+                pending.append(ref)
+    return referenced
+
+
+def _fmt_size(num: int) -> str:
+    for unit in ('B', 'KB', 'MB'):
+        if num < 1024:
+            return f"{num:.0f}{unit}"
+        num /= 1024
+    return f"{num:.1f}GB"
+
+
+class Command(BaseCommand):
+    help = "Run collectstatic with minification/hashing/precompression and report unreferenced static assets"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--report-only",
+            action="store_true",
+            help="Skip collectstatic and only print the unreferenced assets report",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=30,
+            help="Number of largest unreferenced files to list (default: 30)",
+        )
+
+    def handle(self, *args, **options):
+        if not options["report_only"]:
+            call_command("collectstatic", interactive=False, verbosity=options.get("verbosity", 1))
+
+        files = collect_static_files()
+        referenced = find_referenced(files)
+        unreferenced = sorted(
+            ((name, path.stat().st_size) for name, path in files.items() if name not in referenced),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+        total = sum(size for _, size in unreferenced)
+        self.stdout.write(
+            f"Static files: {len(files)}, referenced: {len(files) - len(unreferenced)}, "
+            f"unreferenced: {len(unreferenced)} ({_fmt_size(total)})"
+        )
+        for name, size in unreferenced[: options["top"]]:
+            self.stdout.write(f"  {_fmt_size(size):>8}  {name}")
+        if unreferenced:
+            self.stdout.write(self.style.WARNING(
+                "Unreferenced files may still be loaded dynamically from JS; review before deleting."
+            ))
@@ -0,0 +1,104 @@
+"""
+Import customers (and their vehicles) from a CSV file in batches.
+Run with: python manage.py import_customers_csv customers.csv --branch B01 [--batch-size 1000] [--dry-run]
+
+Expected headers (case-insensitive; unknown columns are ignored):
+  full_name, phone, email, whatsapp, address, customer_type, organization_name,
+  tax_number, personal_subtype, code, registration_date, plate_number, make, model, vehicle_type
+A customer with several vehicles can appear on several rows with the same name/phone.
+"""
+
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.models import Branch
+from tracker.services import CustomerImportService
+
+HEADER_ALIASES = {
+    'name': 'full_name',
+    'customer_name': 'full_name',
+    'phone_number': 'phone',
+    'mobile': 'phone',
+    'plate': 'plate_number',
+    'plate_no': 'plate_number',
+    'customer_code': 'code',
+    'tin': 'tax_number',
+    'type': 'customer_type',
+}
+
+
+def _normalized_rows(reader):
+    for row in reader:
+        out = {}
+        for key, value in row.items():
+            if key is None:
+                continue
+            k = key.strip().lower().replace(' ', '_')
+            out[HEADER_ALIASES.get(k, k)] = value
+        yield out
+
+
+class Command(BaseCommand):
+    help = "Bulk import customers and vehicles from CSV using bulk_create with in-memory customer codes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path", help="Path to the CSV file")
+        parser.add_argument(
+            "--branch",
+            help="Branch code or name to assign imported customers to",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows per batch/transaction (default: 1000)",
+        )
+        parser.add_argument(
+            "--delimiter",
+            default=",",
+            help="CSV delimiter (default: ',')",
+        )
+        parser.add_argument(
+            "--encoding",
+            default="utf-8-sig",
+            help="File encoding (default: utf-8-sig)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Parse and deduplicate without writing anything",
+        )
+
+    def handle(self, *args, **options):
+        branch = None
+        if options["branch"]:
+            ref = options["branch"].strip()
+            branch = Branch.objects.filter(code__iexact=ref).first() or Branch.objects.filter(name__iexact=ref).first()
+            if not branch:
+                raise CommandError(f"Branch '{ref}' not found")
+
+        service = CustomerImportService(branch=branch, batch_size=options["batch_size"], dry_run=options["dry_run"])
+        started = time.monotonic()
+        try:
+            with open(options["csv_path"], newline="", encoding=options["encoding"]) as fh:
+                reader = csv.DictReader(fh, delimiter=options["delimiter"])
+                stats = service.import_rows(_normalized_rows(reader))
+        except FileNotFoundError:
+            raise CommandError(f"File not found: {options['csv_path']}")
+
+        elapsed = time.monotonic() - started
+        prefix = "[DRY RUN] " if options["dry_run"] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}Processed {stats['rows']} row(s) in {elapsed:.1f}s: "
+            f"{stats['customers_created']} customer(s) created, {stats['customers_existing']} already existed; "
+            f"{stats['vehicles_created']} vehicle(s) created, {stats['vehicles_existing']} already existed."
+        ))
+        skipped = stats['skipped']
+        if skipped:
+            self.stdout.write(self.style.WARNING(f"Skipped {len(skipped)} row(s):"))
+            for row_number, reason in skipped[:50]:
+                self.stdout.write(f"  row {row_number}: {reason}")
+            if len(skipped) > 50:
+                self.stdout.write(f"  ... and {len(skipped) - 50} more")
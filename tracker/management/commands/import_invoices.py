@@ -0,0 +1,77 @@
+"""
+Bulk-create invoices from a directory of PDFs or a ZIP archive.
+Run with: python manage.py import_invoices /path/to/invoices [--branch B01] [--user clerk]
+          [--workers 4] [--recursive] [--dry-run] [--report exceptions.csv]
+
+Invoices are matched to existing customers by code, plate and phone; files that cannot be
+matched or created safely are listed in the exceptions report for the manual upload flow.
+"""
+
+import os
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.models import Branch
+from tracker.services import invoice_batch
+
+
+class Command(BaseCommand):
+    help = "Extract and bulk-create invoices from a directory or ZIP of PDFs, with an exceptions report"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Directory of PDFs or a .zip archive")
+        parser.add_argument("--branch", help="Branch code or name; matches customers of that branch only")
+        parser.add_argument("--user", help="Username recorded as the invoices' creator")
+        parser.add_argument("--workers", type=int, help="Extraction processes (default: INVOICE_BATCH_WORKERS)")
+        parser.add_argument("--recursive", action="store_true", help="Include subdirectories")
+        parser.add_argument("--dry-run", action="store_true", help="Extract and match without writing anything")
+        parser.add_argument("--report", help="Write the exceptions report to this CSV file (default: stdout)")
+
+    def handle(self, *args, **options):
+        branch = None
+        if options["branch"]:
+            ref = options["branch"].strip()
+            branch = Branch.objects.filter(code__iexact=ref).first() or Branch.objects.filter(name__iexact=ref).first()
+            if not branch:
+                raise CommandError(f"Branch '{ref}' not found")
+        user = None
+        if options["user"]:
+            user = get_user_model().objects.filter(username=options["user"]).first()
+            if not user:
+                raise CommandError(f"User '{options['user']}' not found")
+
+        path = options["path"]
+        started = time.monotonic()
+        try:
+            if os.path.isfile(path) and path.lower().endswith(".zip"):
+                items = invoice_batch.read_zip(path)
+            else:
+                items = invoice_batch.read_directory(path, recursive=options["recursive"])
+        except invoice_batch.BatchError as e:
+            raise CommandError(str(e))
+
+        invoice_batch.InvoiceBatchImport(
+            branch=branch, user=user, workers=options["workers"], dry_run=options["dry_run"],
+        ).run(items)
+
+        summary = invoice_batch.summarize(items)
+        statuses = summary["statuses"]
+        prefix = "[DRY RUN] " if options["dry_run"] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}Processed {summary['files']} file(s) in {time.monotonic() - started:.1f}s: "
+            f"{statuses.get('created', 0) + statuses.get('ready', 0)} invoice(s) "
+            f"{'ready' if options['dry_run'] else 'created'}, {statuses.get('review', 0)} need review."
+        ))
+        for reason, count in sorted(summary["reasons"].items()):
+            self.stdout.write(f"  {reason}: {count}")
+
+        if not statuses.get("review"):
+            return
+        if options["report"]:
+            with open(options["report"], "w", newline="", encoding="utf-8") as fh:
+                rows = invoice_batch.write_report(items, fh)
+            self.stdout.write(f"Wrote {rows} exception(s) to {options['report']}")
+        else:
+            invoice_batch.write_report(items, self.stdout)
@@ -0,0 +1,48 @@
+"""
+Record the current stock balance of every inventory item.
+Run with: python manage.py inventory_snapshot [--at "2024-05-31 23:59"] [--show-at "2024-05-01"]
+
+Also scheduled nightly by runapscheduler (see tracker.scheduler). Snapshots let
+tracker.services.inventory_ledger.stock_at() replay only recent ledger rows.
+"""
+
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from tracker.models import InventoryItem
+from tracker.services import inventory_ledger
+
+
+def _parse_when(value: str):
+    when = parse_datetime(value)
+    if when is None:
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f"Invalid date/time: {value}")
+        when = datetime.combine(day, time.max)
+    if timezone.is_naive(when):
+        when = timezone.make_aware(when)
+    return when
+
+
+class Command(BaseCommand):
+    help = "Snapshot inventory balances (or print stock levels at a past date with --show-at)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--at", help="Timestamp to record the snapshot under (default: now)")
+        parser.add_argument("--show-at", help="Print each item's stock at this date/time instead of snapshotting")
+
+    def handle(self, *args, **options):
+        if options["show_at"]:
+            when = _parse_when(options["show_at"])
+            balances = inventory_ledger.stock_at(when)
+            names = dict(InventoryItem.objects.values_list('id', 'name'))
+            for item_id, qty in sorted(balances.items(), key=lambda kv: names.get(kv[0], '')):
+                self.stdout.write(f"{names.get(item_id, item_id)}: {qty}")
+            return
+        at = _parse_when(options["at"]) if options["at"] else None
+        count = inventory_ledger.take_snapshot(at)
+        self.stdout.write(self.style.SUCCESS(f"Snapshotted {count} inventory items."))
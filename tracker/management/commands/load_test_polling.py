@@ -0,0 +1,118 @@
+"""
+Simulate open browser tabs polling a running server and report latency per tab count.
+Run with: python manage.py load_test_polling --url http://127.0.0.1:8000 --username admin --password ...
+                                             [--tabs 50 100 200] [--duration 60] [--speed 10] [--p95-ms 500]
+
+Each simulated tab logs in, then polls like the real pages do: its order's status every
+12s, the customers summary every 20s and the notifications summary every 5 minutes.
+--speed divides those intervals, so a short run produces the load of a longer one.
+The reported capacity is the largest tab count whose p95 stays under --p95-ms with no errors.
+
+To compare the two serving modes, run it against each in turn with the same settings:
+    gunicorn pos_tracker.wsgi:application -w 4                                 # before
+    gunicorn pos_tracker.asgi:application -w 4 -k uvicorn.workers.UvicornWorker  # after
+"""
+
+import re
+import statistics
+import threading
+import time
+from collections import Counter
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+POLLS = (  # (path, seconds between polls)
+    ('/api/orders/{order}/status/', 12),
+    ('/api/customers/summary/?ids={customers}', 20),
+    ('/api/notifications/summary/', 300),
+)
+
+
+def _login(base_url, username, password):
+    session = requests.Session()
+    page = session.get(f'{base_url}/login/', timeout=30)
+    match = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', page.text)
+    if not match:
+        raise CommandError(f'No login form at {base_url}/login/ (status {page.status_code})')
+    response = session.post(f'{base_url}/login/', timeout=30, allow_redirects=False, headers={'Referer': f'{base_url}/login/'},
+                            data={'csrfmiddlewaretoken': match.group(1), 'username': username, 'password': password})
+    if response.status_code != 302:
+        raise CommandError('Login failed: check --username and --password')
+    return session
+
+
+def _tab(session, base_url, paths, speed, stop, latencies, errors, lock):
+    due = [time.monotonic()] * len(paths)
+    while not stop.is_set():
+        now = time.monotonic()
+        for i, (path, interval) in enumerate(paths):
+            if now < due[i]:
+                continue
+            due[i] = now + interval / speed
+            started = time.perf_counter()
+            try:
+                status = session.get(base_url + path, timeout=30, allow_redirects=False).status_code
+            except requests.RequestException as exc:
+                status = type(exc).__name__
+            with lock:
+                if status == 200:
+                    latencies.append((time.perf_counter() - started) * 1000)
+                else:
+                    errors.append(f'{path.split("?")[0]} {status}')
+        stop.wait(max(0.01, min(due) - time.monotonic()))
+
+
+class Command(BaseCommand):
+    help = "Load-test the polling endpoints of a running server with simulated browser tabs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000", help="Server base URL (default: http://127.0.0.1:8000)")
+        parser.add_argument("--username", required=True)
+        parser.add_argument("--password", required=True)
+        parser.add_argument("--tabs", type=int, nargs="+", default=[50, 100, 200], help="Open tab counts to try (default: 50 100 200)")
+        parser.add_argument("--duration", type=int, default=60, help="Seconds per tab count (default: 60)")
+        parser.add_argument("--speed", type=float, default=10.0, help="Poll this many times faster than browsers (default: 10)")
+        parser.add_argument("--order", type=int, default=1, help="Order id the tabs poll the status of (default: 1)")
+        parser.add_argument("--customers", default="1,2,3,4,5", help="Customer ids for the summary poll (default: 1,2,3,4,5)")
+        parser.add_argument("--p95-ms", type=float, default=500.0, help="p95 latency target in ms (default: 500)")
+
+    def handle(self, *args, **options):
+        base_url = options["url"].rstrip("/")
+        paths = [(path.format(order=options["order"], customers=options["customers"]), interval) for path, interval in POLLS]
+        session = _login(base_url, options["username"], options["password"])
+        capacity = None
+
+        for tabs in sorted(options["tabs"]):
+            latencies, errors, lock, stop = [], [], threading.Lock(), threading.Event()
+            threads = []
+            for _ in range(tabs):
+                tab = requests.Session()
+                tab.cookies.update(session.cookies)
+                threads.append(threading.Thread(target=_tab, daemon=True,
+                                                args=(tab, base_url, paths, options["speed"], stop, latencies, errors, lock)))
+            for thread in threads:
+                thread.start()
+            time.sleep(options["duration"])
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+            if len(latencies) >= 2:
+                cuts = statistics.quantiles(latencies, n=100)
+                p50, p95 = cuts[49], cuts[94]
+            else:
+                p50 = p95 = latencies[0] if latencies else float("inf")
+            line = f"{tabs:>5} tabs: {len(latencies)} ok, {len(errors)} errors, p50 {p50:.0f} ms, p95 {p95:.0f} ms"
+            if errors:
+                line += " (" + ", ".join(f"{n}x {e}" for e, n in Counter(errors).most_common(3)) + ")"
+            if errors or p95 > options["p95_ms"]:
+                self.stdout.write(self.style.WARNING(line))
+            else:
+                self.stdout.write(line)
+                capacity = tabs
+
+        if capacity is None:
+            self.stdout.write(self.style.ERROR(f"No tab count stayed under p95 {options['p95_ms']:.0f} ms without errors"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Capacity: {capacity} tabs under p95 {options['p95_ms']:.0f} ms"))
@@ -0,0 +1,27 @@
+"""
+Rebuild the monthly organisation rollups behind the organisation report.
+Run with: python manage.py rebuild_org_rollups [--customer 12 15] [--batch-size 500]
+
+Needed once after deploying the rollup table and after imports or bulk edits that bypass
+model signals; normal order, invoice and customer writes keep it current (see
+tracker.services.org_rollups).
+"""
+
+from django.core.management.base import BaseCommand
+
+from tracker.services import org_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild organisation monthly rollups from orders and invoices"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--customer", nargs="+", type=int, help="Customer ids to rebuild (default: all)")
+        parser.add_argument("--batch-size", type=int, default=500, help="Customers per rebuild pass (default: 500)")
+
+    def handle(self, *args, **options):
+        if options["customer"]:
+            written = org_rollups.rebuild(options["customer"])
+        else:
+            written = org_rollups.rebuild_all(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} rollup rows."))
@@ -0,0 +1,23 @@
+"""
+Rebuild customer total_visits, last_visit and total_spent from orders and invoices.
+Run with: python manage.py recompute_customer_stats [--customer 12 15] [--batch-size 1000]
+
+Use after imports or bulk edits that bypass model signals; normal order and invoice
+writes keep the counters current (see tracker.services.customer_stats).
+"""
+
+from django.core.management.base import BaseCommand
+
+from tracker.services import customer_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute customer visit and spending counters from orders and invoices"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--customer", nargs="+", type=int, help="Customer ids to recompute (default: all)")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Customers per UPDATE (default: 1000)")
+
+    def handle(self, *args, **options):
+        updated = customer_stats.recompute(options["customer"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Recomputed stats for {updated} customers."))
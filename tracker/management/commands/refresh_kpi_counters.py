@@ -0,0 +1,26 @@
+"""
+Recompute the cached list-page KPI counters for every branch.
+Run with: python manage.py refresh_kpi_counters [--only orders customers]
+
+Also scheduled every few minutes by runapscheduler (see tracker.scheduler).
+"""
+
+from django.core.management.base import BaseCommand
+
+from tracker.services import kpi_counters
+
+
+class Command(BaseCommand):
+    help = "Refresh cached KPI counters used by the orders, customers and inquiries lists"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--only",
+            nargs="+",
+            choices=sorted(kpi_counters.COUNTER_SETS),
+            help="Counter sets to refresh (default: all)",
+        )
+
+    def handle(self, *args, **options):
+        refreshed = kpi_counters.refresh_all(options["only"])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {refreshed} KPI counter entries."))
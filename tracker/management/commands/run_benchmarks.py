@@ -0,0 +1,89 @@
+"""
+Seed a throwaway test database and benchmark the heavy views against the stored baseline.
+Run with: python manage.py run_benchmarks [--scale small|medium|large] [--only dashboard orders_list]
+                                          [--repeat 3] [--update-baseline] [--show-sql]
+          python manage.py run_benchmarks --sessions [--repeat 50]
+
+The real database is never touched: a test database is created (and destroyed) the same
+way the test runner does it. Exits with an error when a scenario regresses.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from tracker.benchmarks import SCALES, compare, load_baseline, run_benchmarks, save_baseline, seed_dataset
+
+
+class Command(BaseCommand):
+    help = "Benchmark query counts, wall time and peak memory of key views against a JSON baseline"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Dataset size (default: small)")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed for the dataset (default: 42)")
+        parser.add_argument("--only", nargs="+", help="Scenario names to run (default: all)")
+        parser.add_argument("--repeat", type=int, default=3, help="Timed requests per scenario (default: 3)")
+        parser.add_argument("--update-baseline", action="store_true", help="Write results as the new baseline for this scale")
+        parser.add_argument("--query-slack", type=int, default=0, help="Extra queries tolerated per scenario (default: 0)")
+        parser.add_argument("--time-ratio", type=float, default=2.0, help="Allowed time growth vs baseline; 0 disables (default: 2.0)")
+        parser.add_argument("--memory-ratio", type=float, default=1.5, help="Allowed peak memory growth; 0 disables (default: 1.5)")
+        parser.add_argument("--show-sql", action="store_true", help="Print the captured SQL for each scenario")
+        parser.add_argument("--sessions", action="store_true",
+                            help="Compare per-request overhead of the session engines instead of running scenarios")
+
+    def handle(self, *args, **options):
+        scale = options["scale"]
+        verbosity = options.get("verbosity", 1)
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            started = time.monotonic()
+            log = self.stdout.write if verbosity > 1 else (lambda *a: None)
+            ctx = seed_dataset(scale, seed=options["seed"], log=log)
+            self.stdout.write(f"Seeded '{scale}' dataset {SCALES[scale]} in {time.monotonic() - started:.1f}s")
+            if options["sessions"]:
+                from tracker.benchmarks.sessions import compare_engines
+                session_results = compare_engines(ctx["user"], requests=max(options["repeat"], 10))
+            else:
+                results = run_benchmarks(ctx, names=options["only"], repeat=options["repeat"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options["sessions"]:
+            self.stdout.write(f"{'engine':<16} {'read ms':>8} {'read q':>7} {'write ms':>9} {'write q':>8}   (q = django_session queries/request)")
+            for r in session_results.values():
+                self.stdout.write(
+                    f"{r.engine:<16} {r.read_ms:>8.2f} {r.read_session_queries:>7.1f} {r.write_ms:>9.2f} {r.write_session_queries:>8.1f}"
+                )
+            return
+
+        baseline = load_baseline().get(scale, {})
+        self.stdout.write(f"{'scenario':<34} {'status':>6} {'queries':>8} {'time ms':>9} {'peak KB':>9}   baseline q/ms/KB")
+        for name, r in results.items():
+            base = baseline.get(name)
+            ref = f"{base['queries']}/{base['time_ms']:.0f}/{base['peak_kb']:.0f}" if base else "-"
+            self.stdout.write(f"{name:<34} {r.status:>6} {r.queries:>8} {r.time_ms:>9.1f} {r.peak_kb:>9.0f}   {ref}")
+            if options["show_sql"]:
+                for sql in r.sql:
+                    self.stdout.write(f"    {sql[:200]}")
+
+        if options["update_baseline"]:
+            save_baseline(results, scale)
+            self.stdout.write(self.style.SUCCESS(f"Baseline for '{scale}' updated."))
+            return
+
+        problems = compare(
+            results, baseline,
+            query_slack=options["query_slack"],
+            time_ratio=options["time_ratio"],
+            memory_ratio=options["memory_ratio"],
+        )
+        if problems:
+            for p in problems:
+                self.stdout.write(self.style.ERROR(f"  {p}"))
+            raise CommandError(f"{len(problems)} benchmark regression(s)")
+        self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
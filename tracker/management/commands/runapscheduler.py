@@ -0,0 +1,76 @@
+"""
+Run the periodic jobs defined in tracker.scheduler.JOBS in the foreground.
+Run with: python manage.py runapscheduler
+
+Start exactly one instance per deployment (e.g. a separate Procfile process).
+"""
+
+import logging
+
+from apscheduler.schedulers.blocking import BlockingScheduler
+from apscheduler.triggers.cron import CronTrigger
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django_apscheduler import util
+from django_apscheduler.jobstores import DjangoJobStore
+from django_apscheduler.models import DjangoJob, DjangoJobExecution
+
+from tracker.scheduler import JOBS, run_job
+
+logger = logging.getLogger(__name__)
+
+
+@util.close_old_connections
+def delete_old_job_executions(max_age=604_800):
+    """Drop job execution records older than max_age seconds (default: 7 days)."""
+    DjangoJobExecution.objects.delete_old_job_executions(max_age)
+
+
+class Command(BaseCommand):
+    help = "Run APScheduler with the jobs from tracker.scheduler"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--list",
+            action="store_true",
+            help="Print the configured jobs and exit",
+        )
+
+    def handle(self, *args, **options):
+        if options["list"]:
+            for job_id, path, trigger in JOBS:
+                self.stdout.write(f"{job_id:<28} {path}  {trigger}")
+            return
+
+        scheduler = BlockingScheduler(timezone=settings.TIME_ZONE)
+        scheduler.add_jobstore(DjangoJobStore(), "default")
+        # Jobs removed from JOBS (or disabled by settings) would otherwise keep running from the job store
+        stale = DjangoJob.objects.exclude(id__in=[job_id for job_id, _path, _trigger in JOBS] + ["delete_old_job_executions"])
+        for job_id in stale.values_list("id", flat=True):
+            logger.info(f"Removing job '{job_id}', no longer configured")
+        stale.delete()
+        for job_id, path, trigger in JOBS:
+            scheduler.add_job(
+                util.close_old_connections(run_job),
+                args=[path],
+                id=job_id,
+                max_instances=1,
+                coalesce=True,
+                replace_existing=True,
+                **trigger,
+            )
+            logger.info(f"Scheduled job '{job_id}' ({path})")
+        scheduler.add_job(
+            delete_old_job_executions,
+            trigger=CronTrigger(day_of_week="mon", hour="00", minute="00"),
+            id="delete_old_job_executions",
+            max_instances=1,
+            replace_existing=True,
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"Starting scheduler with {len(JOBS)} job(s)..."))
+        try:
+            scheduler.start()
+        except KeyboardInterrupt:
+            scheduler.shutdown()
+            self.stdout.write(self.style.SUCCESS("Scheduler stopped."))
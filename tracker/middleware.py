@@ -1,9 +1,157 @@
+import json
+import mimetypes
+import os
+import re
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponseNotModified
 from django.utils import timezone
 from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import empty
+from django.utils.http import http_date
+from django.views.static import was_modified_since
 from datetime import timedelta
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+from . import db_router
 from .models import Order
+from .services import request_metrics
+
+
+class StaticAssetMiddleware(MiddlewareMixin):
+    """Serve collected static files straight from STATIC_ROOT when there is no CDN/web server in front.
+
+    - Prefers precompressed .br/.gz siblings written by CompressedManifestStaticFilesStorage
+    - Content-hashed names (listed in staticfiles.json) get a one-year immutable Cache-Control
+    - Answers If-Modified-Since/If-None-Match with 304
+    Placed before the session/auth middleware so asset hits never touch the database.
+    Enabled with settings.SERVE_STATIC_FILES.
+    """
+    HASHED_MAX_AGE = 60 * 60 * 24 * 365
+    UNHASHED_MAX_AGE = 60 * 60
+    ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+    _accept_re = re.compile(r'\b(br|gzip)\b')
+
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        self.enabled = getattr(settings, 'SERVE_STATIC_FILES', False) and bool(settings.STATIC_ROOT)
+        self.prefix = (settings.STATIC_URL or '/static/')
+        if not self.prefix.startswith('/'):
+            self.prefix = '/' + self.prefix
+        self.root = os.path.realpath(str(settings.STATIC_ROOT)) if settings.STATIC_ROOT else ''
+        self._hashed_names = None
+        # path -> (size, mtime, {encoding: (path, size)}) ; files are immutable after a build
+        self._stat_cache = {}
+
+    def _load_hashed_names(self):
+        if self._hashed_names is None:
+            names = set()
+            try:
+                with open(os.path.join(self.root, 'staticfiles.json'), encoding='utf-8') as fh:
+                    names = set(json.load(fh).get('paths', {}).values())
+            except (OSError, ValueError):
+                pass
+            self._hashed_names = names
+        return self._hashed_names
+
+    def _lookup(self, rel):
+        entry = self._stat_cache.get(rel)
+        if entry is not None:
+            return entry
+        full = os.path.realpath(os.path.join(self.root, rel))
+        if not full.startswith(self.root + os.sep) or not os.path.isfile(full):
+            return None
+        st = os.stat(full)
+        variants = {}
+        for encoding, suffix in self.ENCODINGS:
+            if os.path.isfile(full + suffix):
+                variants[encoding] = full + suffix
+        entry = (full, st.st_size, st.st_mtime, variants)
+        if len(self._stat_cache) < 5000:
+            self._stat_cache[rel] = entry
+        return entry
+
+    def process_request(self, request):
+        if not self.enabled or request.method not in ('GET', 'HEAD'):
+            return None
+        path = request.path_info
+        if not path.startswith(self.prefix):
+            return None
+        rel = path[len(self.prefix):]
+        if not rel or rel.endswith('/'):
+            return None
+        entry = self._lookup(rel)
+        if entry is None:
+            return None
+        full, size, mtime, variants = entry
+
+        etag = f'"{int(mtime):x}-{size:x}"'
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag or not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'), mtime
+        ):
+            response = HttpResponseNotModified()
+        else:
+            content_type, _ = mimetypes.guess_type(full)
+            serve_path, encoding = full, None
+            accepted = set(self._accept_re.findall(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+            for enc, _suffix in self.ENCODINGS:
+                if enc in accepted and enc in variants:
+                    serve_path, encoding = variants[enc], enc
+                    break
+            response = FileResponse(
+                open(serve_path, 'rb'),
+                content_type=content_type or 'application/octet-stream',
+                filename=os.path.basename(full),
+            )
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+            response.headers['Last-Modified'] = http_date(mtime)
+
+        response.headers['ETag'] = etag
+        if variants:
+            response.headers['Vary'] = 'Accept-Encoding'
+        max_age = self.HASHED_MAX_AGE if rel in self._load_hashed_names() else self.UNHASHED_MAX_AGE
+        immutable = ', immutable' if max_age == self.HASHED_MAX_AGE else ''
+        response.headers['Cache-Control'] = f'public, max-age={max_age}{immutable}'
+        return response
+
+
+class ReadYourWritesMiddleware:
+    """After a successful write request, keep this browser's reporting views on the primary.
+
+    Sets a short-lived cookie (settings.REPORTING_PIN_SECONDS) that tracker.db_router reads,
+    so a page viewed right after saving does not come from a replica that is still catching
+    up. Does nothing unless a reporting database is configured.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self._pin(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self._pin(request, await self.get_response(request))
+
+    @staticmethod
+    def _pin(request, response):
+        if (request.method not in db_router.SAFE_METHODS and response.status_code < 400
+                and db_router.reporting_alias()):
+            seconds = getattr(settings, 'REPORTING_PIN_SECONDS', 30)
+            response.set_cookie(db_router.PIN_COOKIE, '1', max_age=seconds, httponly=True, samesite='Lax')
+        return response
+
 
 class TimezoneMiddleware(MiddlewareMixin):
     def process_request(self, request):
@@ -75,3 +223,74 @@ class AutoProgressOrdersMiddleware(MiddlewareMixin):
         except Exception:
             request.stale_in_progress_count = 0
             request.stale_in_progress_list = []
+
+
+class RequestMetricsMiddleware:
+    """Record wall time, SQL count/time and repeated SQL of each request (tracker.services.request_metrics).
+
+    Queries are counted by the execute_wrapper request_metrics installs on every database
+    connection, so it works with DEBUG off, and under ASGI for the sync views and middleware
+    that sync_to_async runs on another thread. Placed right after StaticAssetMiddleware: the
+    queries of the session, auth and auto-progress middleware count towards the request too.
+    Enabled with settings.REQUEST_METRICS_ENABLED.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not request_metrics.enabled():
+            return self.get_response(request)
+
+        recorder = request_metrics.QueryRecorder()
+        token = request_metrics.current.set(recorder)
+        started = perf_counter()
+        status = 500
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            request_metrics.current.reset(token)
+            user = getattr(request, 'user', None)
+            self._record(request, status, started, recorder,
+                         user.get_username() if user is not None and user.is_authenticated else None)
+
+    async def __acall__(self, request):
+        if not request_metrics.enabled():
+            return await self.get_response(request)
+
+        recorder = request_metrics.QueryRecorder()
+        token = request_metrics.current.set(recorder)
+        started = perf_counter()
+        status = 500
+        try:
+            response = await self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            request_metrics.current.reset(token)
+            # Loading a lazy request.user here would query from the event loop
+            user = getattr(getattr(request, 'user', None), '_wrapped', None)
+            self._record(request, status, started, recorder,
+                         user.get_username() if user not in (None, empty) and user.is_authenticated else None)
+
+    @staticmethod
+    def _record(request, status, started, recorder, username):
+        match = getattr(request, 'resolver_match', None)
+        request_metrics.record(
+            view=(match.view_name if match else '') or 'unresolved',
+            method=request.method,
+            path=request.path,
+            status=status,
+            seconds=perf_counter() - started,
+            recorder=recorder,
+            user=username,
+        )
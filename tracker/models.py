@@ -1,8 +1,9 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 from django.db.models import Q
-from datetime import timedelta
+from datetime import time, timedelta
 from decimal import Decimal
 import uuid
 
@@ -14,6 +15,10 @@ class Branch(models.Model):
     region = models.CharField(max_length=128, blank=True, null=True)
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='sub_branches')
     is_active = models.BooleanField(default=True)
+    # Working calendar for working-hours durations (tracker.utils.working_hours)
+    work_start = models.TimeField(default=time(8, 0))
+    work_end = models.TimeField(default=time(17, 0))
+    work_days = models.CharField(max_length=7, default='1111111', help_text="Working days Monday to Sunday, e.g. 1111110 for Mon-Sat")
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -47,6 +52,22 @@ class Branch(models.Model):
         return self.sub_branches.all()
 
 
+class Holiday(models.Model):
+    """Non-working day, for one branch or (branch empty) for every branch."""
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE, null=True, blank=True, related_name='holidays')
+    date = models.DateField()
+    name = models.CharField(max_length=128, blank=True)
+
+    class Meta:
+        ordering = ["date"]
+        constraints = [
+            models.UniqueConstraint(fields=["branch", "date"], name="uniq_holiday_branch_date"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.date:%Y-%m-%d} {self.name}".strip()
+
+
 class Salesperson(models.Model):
     """Sales personnel for tracking sales transactions and audit purposes."""
     code = models.CharField(max_length=32, unique=True, help_text="Unique salesperson code (e.g., 346, 401)")
@@ -126,9 +147,9 @@ class Customer(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.code:
-            self.code = f"CUST{str(uuid.uuid4())[:8].upper()}"
-            while Customer.objects.filter(code=self.code).exists():
-                self.code = f"CUST{str(uuid.uuid4())[:8].upper()}"
+            # Allocated in memory (ULID-style), no existence query needed
+            from .utils.codes import generate_customer_code
+            self.code = generate_customer_code()
         if not self.arrival_time:
             self.arrival_time = timezone.now()
         super().save(*args, **kwargs)
@@ -339,11 +360,11 @@ class Order(models.Model):
         return f"{self.order_number} - {self.customer.full_name}"
 
     def calculate_estimated_duration(self):
-        """Calculate estimated duration in minutes based on started_at and completed_at."""
+        """Working minutes between started_at and completed_at on the branch's calendar."""
         if not self.started_at or not self.completed_at:
             return None
-        from .utils.time_utils import calculate_estimated_duration
-        return calculate_estimated_duration(self.started_at, self.completed_at)
+        from .utils.working_hours import calendar_for
+        return calendar_for(self.branch_id).minutes_between(self.started_at, self.completed_at)
 
     def get_overdue_status(self):
         """Get overdue status with working hours elapsed."""
@@ -557,11 +578,20 @@ class InventoryAdjustment(models.Model):
         ("addition", "Addition"),
         ("removal", "Removal"),
     )
+    # Ledger-only types written by tracker.services.inventory_ledger for order stock holds
+    LEDGER_TYPES = ADJUSTMENT_TYPES + (
+        ("reservation", "Reservation"),
+        ("release", "Release"),
+    )
+    # Types that increase InventoryItem.quantity; everything else decreases it
+    INCREASING_TYPES = ("addition", "release")
+
     item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='adjustments')
-    adjustment_type = models.CharField(max_length=16, choices=ADJUSTMENT_TYPES)
+    adjustment_type = models.CharField(max_length=16, choices=LEDGER_TYPES)
     quantity = models.PositiveIntegerField()
     reference = models.CharField(max_length=64, blank=True, null=True)
     notes = models.TextField(blank=True, null=True)
+    order = models.ForeignKey('Order', on_delete=models.SET_NULL, null=True, blank=True, related_name='inventory_adjustments')
     adjusted_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='inventory_adjustments')
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -570,8 +600,14 @@ class InventoryAdjustment(models.Model):
         indexes = [
             models.Index(fields=['created_at'], name='idx_inv_adj_created'),
             models.Index(fields=['adjustment_type'], name='idx_inv_adj_type'),
+            models.Index(fields=['item', 'created_at'], name='idx_inv_adj_item_created'),
         ]
 
+    @property
+    def delta(self) -> int:
+        """Signed change this row made to the item's quantity."""
+        return self.quantity if self.adjustment_type in self.INCREASING_TYPES else -self.quantity
+
     # Backwards-friendly aliases used by older utility scripts
     @property
     def user(self):
@@ -585,6 +621,52 @@ class InventoryAdjustment(models.Model):
         return f"{self.get_adjustment_type_display()} {self.quantity} × {self.item}"
 
 
+class InventoryReservation(models.Model):
+    """Stock held by an open sales order: taken from InventoryItem.quantity when the order
+    is created, kept on completion and returned to stock if the order is cancelled."""
+    STATUS_CHOICES = (
+        ("active", "Active"),
+        ("consumed", "Consumed"),
+        ("released", "Released"),
+    )
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='reservations')
+    order = models.ForeignKey('Order', on_delete=models.CASCADE, related_name='inventory_reservations')
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='active')
+    created_at = models.DateTimeField(auto_now_add=True)
+    closed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['order', 'status'], name='idx_inv_res_order_status'),
+            models.Index(fields=['item', 'status'], name='idx_inv_res_item_status'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['order', 'item'], condition=models.Q(status='active'), name='uniq_active_reservation'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.quantity} × {self.item} for order {self.order_id} ({self.status})"
+
+
+class InventorySnapshot(models.Model):
+    """Periodic on-hand balance per item, so stock-at-date only replays the ledger since
+    the nearest snapshot."""
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='snapshots')
+    quantity = models.IntegerField()
+    taken_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ['-taken_at']
+        indexes = [
+            models.Index(fields=['item', 'taken_at'], name='idx_inv_snap_item_taken'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.item}: {self.quantity} @ {self.taken_at:%Y-%m-%d %H:%M}"
+
+
 class Profile(models.Model):
     """User profile with branch assignment and role tracking."""
     ROLE_CHOICES = [
@@ -768,6 +850,9 @@ class Invoice(models.Model):
             models.Index(fields=['customer'], name='idx_invoice_customer'),
             models.Index(fields=['order'], name='idx_invoice_order'),
             models.Index(fields=['status'], name='idx_invoice_status'),
+            # Keyset pagination of the invoice list (newest first), overall and per branch
+            models.Index(fields=['invoice_date', 'id'], name='idx_invoice_date_id'),
+            models.Index(fields=['branch', 'invoice_date', 'id'], name='idx_invoice_branch_date_id'),
         ]
 
     def __str__(self) -> str:
@@ -796,7 +881,10 @@ class Invoice(models.Model):
         from datetime import datetime
         year = datetime.now().year
         prefix = f"INV-{year}-"
-        existing = Invoice.objects.filter(invoice_number__startswith=prefix).values_list('invoice_number', flat=True)
+        existing = [
+            *Invoice.objects.filter(invoice_number__startswith=prefix).values_list('invoice_number', flat=True),
+            *ArchivedInvoice.objects.filter(invoice_number__startswith=prefix).values_list('invoice_number', flat=True),
+        ]
         max_seq = 0
         for inv_no in existing:
             try:
@@ -990,3 +1078,131 @@ class InquiryNote(models.Model):
 
     def __str__(self) -> str:
         return f"{self.get_note_type_display()} for Inquiry #{self.inquiry.id}"
+
+
+class OrganizationMonthlyRollup(models.Model):
+    """Per-month order and invoice totals for an organisation customer (government, NGO,
+    company), kept current by tracker.services.org_rollups so the organisation report reads
+    one row per customer-month instead of scanning their orders."""
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE, null=True, blank=True, related_name='org_rollups')
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='monthly_rollups')
+    month = models.DateField(help_text="First day of the month (local time)")
+    orders = models.PositiveIntegerField(default=0)
+    service_orders = models.PositiveIntegerField(default=0)
+    sales_orders = models.PositiveIntegerField(default=0)
+    inquiry_orders = models.PositiveIntegerField(default=0)
+    completed_orders = models.PositiveIntegerField(default=0)
+    cancelled_orders = models.PositiveIntegerField(default=0)
+    invoice_count = models.PositiveIntegerField(default=0)
+    invoice_gross = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    last_order_at = models.DateTimeField(null=True, blank=True)
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['customer', 'month']
+        indexes = [
+            models.Index(fields=['branch', 'month'], name='idx_org_rollup_branch_month'),
+            models.Index(fields=['month'], name='idx_org_rollup_month'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['customer', 'month'], name='uniq_org_rollup_customer_month'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.customer_id} {self.month:%Y-%m}: {self.orders} orders"
+
+
+class ArchivedOrder(models.Model):
+    """A completed or cancelled order moved out of the hot tables by tracker.services.archive.
+
+    Keeps the original id and the columns history pages filter on. `records` holds the order
+    with its components, attachments (metadata; the files stay in storage), signatures,
+    inquiry notes and reservations in Django's serializer format, for read-through and restore.
+    """
+    id = models.BigIntegerField(primary_key=True, help_text="The original Order id")
+    order_number = models.CharField(max_length=32, unique=True)
+    branch = models.ForeignKey(Branch, on_delete=models.PROTECT, null=True, blank=True, related_name='archived_orders')
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='archived_orders')
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_orders')
+    type = models.CharField(max_length=16)
+    status = models.CharField(max_length=16)
+    created_at = models.DateTimeField()
+    completed_at = models.DateTimeField(null=True, blank=True)
+    group = models.CharField(max_length=32, db_index=True, help_text="Orders and invoices archived (and restored) together")
+    records = models.JSONField(encoder=DjangoJSONEncoder)
+    inventory_adjustment_ids = models.JSONField(default=list, blank=True, help_text="Adjustments detached from the order")
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['customer', 'created_at'], name='idx_arch_order_customer'),
+            models.Index(fields=['vehicle', 'created_at'], name='idx_arch_order_vehicle'),
+            models.Index(fields=['branch', 'created_at'], name='idx_arch_order_branch'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.order_number} (archived)"
+
+
+class ArchivedInvoice(models.Model):
+    """An invoice moved out of the hot tables with its line items, payment and order links.
+
+    See ArchivedOrder; `order_id` is the original order, archived in the same group.
+    """
+    id = models.BigIntegerField(primary_key=True, help_text="The original Invoice id")
+    invoice_number = models.CharField(max_length=32, db_index=True)
+    branch = models.ForeignKey(Branch, on_delete=models.PROTECT, null=True, blank=True, related_name='archived_invoices')
+    customer = models.ForeignKey(Customer, on_delete=models.PROTECT, related_name='archived_invoices')
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_invoices')
+    order_id = models.BigIntegerField(null=True, blank=True, db_index=True)
+    invoice_date = models.DateField()
+    status = models.CharField(max_length=16)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    created_at = models.DateTimeField()
+    group = models.CharField(max_length=32, db_index=True)
+    records = models.JSONField(encoder=DjangoJSONEncoder)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-invoice_date', '-invoice_number']
+        indexes = [
+            models.Index(fields=['customer', 'invoice_date'], name='idx_arch_invoice_customer'),
+            models.Index(fields=['vehicle', 'invoice_date'], name='idx_arch_invoice_vehicle'),
+            models.Index(fields=['branch', 'invoice_date'], name='idx_arch_invoice_branch'),
+        ]
+
+    def __str__(self) -> str:
+        return f"Invoice {self.invoice_number} (archived)"
+
+
+class InvoiceUploadBatch(models.Model):
+    """A ZIP of invoice PDFs uploaded for bulk ingestion, processed off the request by the scheduler.
+
+    See tracker.services.invoice_batch; `items` holds the per-file report rows once done.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    archive = models.FileField(upload_to='invoice_batches/', blank=True)
+    branch = models.ForeignKey(Branch, on_delete=models.SET_NULL, null=True, blank=True, related_name='invoice_upload_batches')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='invoice_upload_batches')
+    dry_run = models.BooleanField(default=False)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='queued', db_index=True)
+    summary = models.JSONField(default=dict, blank=True)
+    items = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self) -> str:
+        return f"Invoice upload {self.pk} ({self.status})"
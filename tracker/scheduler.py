@@ -0,0 +1,26 @@
+"""
+Periodic jobs, run by `python manage.py runapscheduler` (APScheduler with the
+django_apscheduler job store, so runs are visible in the admin).
+
+Each entry is (job id, dotted path of a no-argument callable, trigger kwargs). Add new
+jobs here rather than starting schedulers inside web workers.
+"""
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+JOBS = [
+    ('inventory_snapshot', 'tracker.services.inventory_ledger.take_snapshot', {'trigger': 'cron', 'hour': 23, 'minute': 55}),
+    ('clear_expired_sessions', 'tracker.services.sessions.clear_expired', {'trigger': 'cron', 'hour': 3, 'minute': 30}),
+    ('archive_history', 'tracker.services.archive.run', {'trigger': 'cron', 'hour': 2, 'minute': 15}),
+    ('process_invoice_uploads', 'tracker.services.invoice_batch.process_queued', {'trigger': 'interval', 'minutes': 1}),
+]
+
+if getattr(settings, 'CACHE_SHARED', False):
+    # Warming the counters in this process only reaches web workers through a shared cache
+    JOBS.insert(0, ('refresh_kpi_counters', 'tracker.services.kpi_counters.refresh_all', {'trigger': 'interval', 'minutes': 4}))
+
+
+def run_job(path: str):
+    """Entry point stored in the job store; resolves the callable lazily so jobs pickle by name."""
+    return import_string(path)()
@@ -1,5 +1,6 @@
 """Centralized services for business logic."""
 
 from .customer_service import CustomerService, VehicleService, OrderService
+from .customer_import import CustomerImportService
 
-__all__ = ['CustomerService', 'VehicleService', 'OrderService']
+__all__ = ['CustomerService', 'VehicleService', 'OrderService', 'CustomerImportService']
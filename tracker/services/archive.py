@@ -0,0 +1,354 @@
+"""
+Archival of old orders and invoices out of the hot tables.
+
+Every list, dashboard and report reads Order, Invoice and InvoiceLineItem. Completed and
+cancelled history older than ARCHIVE_AFTER_DAYS moves to ArchivedOrder / ArchivedInvoice:
+one row per order or invoice, holding the original id, the columns history pages filter on,
+and the row plus its dependents in Django's serializer format.
+
+An order's dependents are its components, attachments (metadata only; the files stay in
+storage), attachment signatures, inquiry notes and reservations. An invoice's dependents are
+its line items, payment and order links. Inventory adjustments stay in the hot table with
+their order link cleared; the ids are kept so a restore can re-link them.
+
+Orders and invoices referring to each other (Invoice.order, OrderInvoiceLink,
+OrderComponent.invoice) move together as a group. If any member of a group is still young
+or open, the whole group stays. So a hot row never loses a link to an archived one.
+
+Derived data stays correct:
+  - the customer_stats and org_rollups rebuilds read the archive as well as the hot tables
+  - the delete signals therefore recompute total_spent and the monthly rollups to the same
+    values
+
+Read-through: customer_detail lists archived orders and invoices next to the hot ones.
+order_detail, invoice_detail and the invoice document views fall back to the archive, and
+vehicle_history() merges both for a vehicle.
+
+Run with `python manage.py archive_history`; also scheduled nightly (tracker.scheduler).
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.core import serializers
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import Exists, OuterRef, QuerySet
+from django.utils import timezone
+
+from tracker.models import (
+    ArchivedInvoice, ArchivedOrder, InquiryNote, InventoryAdjustment, InventoryReservation, Invoice,
+    InvoiceLineItem, InvoicePayment, Order, OrderAttachment, OrderAttachmentSignature, OrderComponent,
+    OrderInvoiceLink,
+)
+
+logger = logging.getLogger(__name__)
+
+FINAL_ORDER_STATUSES = ('completed', 'cancelled')
+ARCHIVE_AFTER_DAYS = getattr(settings, 'ARCHIVE_AFTER_DAYS', 730)
+ARCHIVE_BATCH_SIZE = getattr(settings, 'ARCHIVE_BATCH_SIZE', 200)
+
+# Dependents stored with each order / invoice: (model, lookup of the owning row's id)
+ORDER_DEPENDENTS = (
+    (OrderComponent, 'order_id'),
+    (OrderAttachment, 'order_id'),
+    (OrderAttachmentSignature, 'attachment__order_id'),
+    (InquiryNote, 'inquiry_id'),
+    (InventoryReservation, 'order_id'),
+)
+INVOICE_DEPENDENTS = (
+    (InvoiceLineItem, 'invoice_id'),
+    (InvoicePayment, 'invoice_id'),
+    (OrderInvoiceLink, 'invoice_id'),
+)
+# Restore order: parents before the rows pointing at them
+_RESTORE_RANK = {Order: 0, Invoice: 1, OrderAttachment: 2, OrderAttachmentSignature: 4}
+
+
+class ArchiveError(ValueError):
+    pass
+
+
+def cutoff_for(days: Optional[int] = None, now: Optional[datetime] = None) -> datetime:
+    days = ARCHIVE_AFTER_DAYS if days is None else days
+    if days < 1:
+        raise ArchiveError("The archive age must be at least one day")
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def _old_orders(cutoff: datetime) -> QuerySet:
+    """Closed before the cutoff and holding no stock (an active reservation means the sale is open)."""
+    active = InventoryReservation.objects.filter(order=OuterRef('pk'), status='active')
+    return (Order.objects.filter(status__in=FINAL_ORDER_STATUSES, created_at__lt=cutoff)
+            .exclude(completed_at__gte=cutoff).exclude(cancelled_at__gte=cutoff).exclude(Exists(active)))
+
+
+def _old_invoices(cutoff: datetime) -> QuerySet:
+    return Invoice.objects.filter(invoice_date__lt=timezone.localdate(cutoff), created_at__lt=cutoff)
+
+
+# ---- Grouping ----------------------------------------------------------------------
+
+def _edges(order_ids: Set[int], invoice_ids: Set[int]) -> Set[Tuple[int, int]]:
+    """(order id, invoice id) pairs that reference each other, touching the given rows."""
+    found = set()
+    for side, ids in (('order_id', order_ids), ('invoice_id', invoice_ids)):
+        if not ids:
+            continue
+        found.update(Invoice.objects.filter(**{'order_id__in' if side == 'order_id' else 'pk__in': ids},
+                                            order__isnull=False).values_list('order_id', 'id'))
+        found.update(OrderInvoiceLink.objects.filter(**{f'{side}__in': ids}).values_list('order_id', 'invoice_id'))
+        found.update(OrderComponent.objects.filter(**{f'{side}__in': ids}, invoice__isnull=False)
+                     .values_list('order_id', 'invoice_id'))
+    return found
+
+
+def groups(order_ids: Iterable[int] = (), invoice_ids: Iterable[int] = ()) -> List[Tuple[Set[int], Set[int]]]:
+    """Split the given rows, plus everything linked to them, into (order ids, invoice ids) groups."""
+    orders, invoices = set(order_ids), set(invoice_ids)
+    edges: Set[Tuple[int, int]] = set()
+    new_orders, new_invoices = set(orders), set(invoices)
+    while new_orders or new_invoices:
+        found = _edges(new_orders, new_invoices) - edges
+        edges |= found
+        new_orders = {o for o, _ in found} - orders
+        new_invoices = {i for _, i in found} - invoices
+        orders |= new_orders
+        invoices |= new_invoices
+
+    parent = {('o', o): ('o', o) for o in orders}
+    parent.update({('i', i): ('i', i) for i in invoices})
+
+    def root(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for o, i in edges:
+        parent[root(('o', o))] = root(('i', i))
+    members = defaultdict(lambda: (set(), set()))
+    for kind, pk in parent:
+        members[root((kind, pk))][0 if kind == 'o' else 1].add(pk)
+    return list(members.values())
+
+
+def _eligible_groups(cutoff, order_ids=(), invoice_ids=()) -> List[Tuple[Set[int], Set[int]]]:
+    found = groups(order_ids, invoice_ids)
+    all_orders = set().union(*(g[0] for g in found)) if found else set()
+    all_invoices = set().union(*(g[1] for g in found)) if found else set()
+    old_orders = set(_old_orders(cutoff).filter(pk__in=all_orders).values_list('pk', flat=True))
+    old_invoices = set(_old_invoices(cutoff).filter(pk__in=all_invoices).values_list('pk', flat=True))
+    return [(o, i) for o, i in found if o <= old_orders and i <= old_invoices]
+
+
+# ---- Archiving -----------------------------------------------------------------------
+
+def _group_key(orders: Set[int], invoices: Set[int]) -> str:
+    return f"o{min(orders)}" if orders else f"i{min(invoices)}"
+
+
+def _dependents(spec, owner_ids) -> Dict[int, list]:
+    by_owner = defaultdict(list)
+    for model, lookup in spec:
+        rows = model.objects.filter(**{f'{lookup}__in': owner_ids})
+        owner_of = dict(rows.values_list('pk', lookup))
+        for record in serializers.serialize('python', rows):
+            by_owner[owner_of[record['pk']]].append(record)
+    return by_owner
+
+
+def _archive_group_set(selected: List[Tuple[Set[int], Set[int]]]) -> Tuple[int, int]:
+    group_of_order = {o: _group_key(os_, is_) for os_, is_ in selected for o in os_}
+    group_of_invoice = {i: _group_key(os_, is_) for os_, is_ in selected for i in is_}
+    order_ids, invoice_ids = list(group_of_order), list(group_of_invoice)
+
+    with transaction.atomic():
+        orders = list(Order.objects.filter(pk__in=order_ids))
+        invoices = list(Invoice.objects.filter(pk__in=invoice_ids))
+        order_deps = _dependents(ORDER_DEPENDENTS, order_ids)
+        invoice_deps = _dependents(INVOICE_DEPENDENTS, invoice_ids)
+        adjustments = defaultdict(list)
+        for order_id, pk in InventoryAdjustment.objects.filter(order_id__in=order_ids).values_list('order_id', 'pk'):
+            adjustments[order_id].append(pk)
+
+        ArchivedOrder.objects.bulk_create([
+            ArchivedOrder(
+                id=o.pk, order_number=o.order_number, branch_id=o.branch_id, customer_id=o.customer_id,
+                vehicle_id=o.vehicle_id, type=o.type, status=o.status, created_at=o.created_at,
+                completed_at=o.completed_at or o.cancelled_at, group=group_of_order[o.pk],
+                records=serializers.serialize('python', [o]) + order_deps[o.pk],
+                inventory_adjustment_ids=adjustments[o.pk],
+            )
+            for o in orders
+        ], batch_size=500)
+        ArchivedInvoice.objects.bulk_create([
+            ArchivedInvoice(
+                id=i.pk, invoice_number=i.invoice_number, branch_id=i.branch_id, customer_id=i.customer_id,
+                vehicle_id=i.vehicle_id, order_id=i.order_id, invoice_date=i.invoice_date, status=i.status,
+                total_amount=i.total_amount or 0, created_at=i.created_at, group=group_of_invoice[i.pk],
+                records=serializers.serialize('python', [i]) + invoice_deps[i.pk],
+            )
+            for i in invoices
+        ], batch_size=500)
+
+        InventoryAdjustment.objects.filter(order_id__in=order_ids).update(order=None)
+        # Regular deletes: the cascades clear the dependents, and the signals refresh
+        # total_spent, rollups and caches, which now read the archived rows instead
+        Invoice.objects.filter(pk__in=invoice_ids).delete()
+        Order.objects.filter(pk__in=order_ids).delete()
+    return len(orders), len(invoices)
+
+
+def archive(days: Optional[int] = None, batch_size: Optional[int] = None, dry_run: bool = False,
+            now: Optional[datetime] = None) -> Dict[str, int]:
+    """Move eligible orders and invoices into the archive tables, one transaction per batch.
+
+    Returns counts of archived 'orders' and 'invoices' (would-be counts with dry_run).
+    """
+    cutoff = cutoff_for(days, now)
+    batch_size = batch_size or ARCHIVE_BATCH_SIZE
+    totals = {'orders': 0, 'invoices': 0}
+    # A group can be reached from several seeds; in a dry run its rows are also not gone yet
+    seen_orders: Set[int] = set()
+    seen_invoices: Set[int] = set()
+    for qs, seed_kind in ((_old_orders(cutoff), 'order_ids'), (_old_invoices(cutoff), 'invoice_ids')):
+        last_pk = 0
+        while True:
+            seeds = list(qs.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not seeds:
+                break
+            last_pk = seeds[-1]
+            selected = [(o, i) for o, i in _eligible_groups(cutoff, **{seed_kind: seeds})
+                        if not (o & seen_orders or i & seen_invoices)]
+            if not selected:
+                continue
+            for o, i in selected:
+                seen_orders |= o
+                seen_invoices |= i
+            if dry_run:
+                counts = (sum(len(o) for o, _ in selected), sum(len(i) for _, i in selected))
+            else:
+                counts = _archive_group_set(selected)
+            totals['orders'] += counts[0]
+            totals['invoices'] += counts[1]
+    logger.info(f"{'Would archive' if dry_run else 'Archived'} {totals['orders']} orders and "
+                f"{totals['invoices']} invoices older than {cutoff:%Y-%m-%d}")
+    return totals
+
+
+def run() -> Dict[str, int]:
+    """Scheduled entry point; ARCHIVE_AFTER_DAYS = 0 turns archiving off."""
+    if ARCHIVE_AFTER_DAYS <= 0:
+        return {'orders': 0, 'invoices': 0}
+    return archive()
+
+
+# ---- Restore -------------------------------------------------------------------------
+
+def restore(groups_: Iterable[str]) -> Tuple[int, int]:
+    """Move whole archive groups back into the hot tables. Returns (orders, invoices) restored."""
+    keys = set(groups_)
+    with transaction.atomic():
+        archived_orders = list(ArchivedOrder.objects.filter(group__in=keys))
+        archived_invoices = list(ArchivedInvoice.objects.filter(group__in=keys))
+        objects = [obj for row in archived_orders + archived_invoices
+                   for obj in serializers.deserialize('python', row.records, ignorenonexistent=True)]
+        objects.sort(key=lambda d: _RESTORE_RANK.get(type(d.object), 3))
+        for obj in objects:
+            obj.save()
+        for row in archived_orders:
+            if row.inventory_adjustment_ids:
+                InventoryAdjustment.objects.filter(pk__in=row.inventory_adjustment_ids, order__isnull=True).update(order_id=row.pk)
+        ArchivedInvoice.objects.filter(group__in=keys).delete()
+        ArchivedOrder.objects.filter(group__in=keys).delete()
+    return len(archived_orders), len(archived_invoices)
+
+
+# ---- Read-through --------------------------------------------------------------------
+
+def instances(row) -> list:
+    """Unsaved model instances of an archived row's records; the first is the order / invoice."""
+    objects = [d.object for d in serializers.deserialize('python', row.records, ignorenonexistent=True)]
+    by_key = {(type(obj), obj.pk): obj for obj in objects}
+    for obj in objects:
+        obj._state.adding = False
+        obj.is_archived = True
+        # Point relations inside the record at each other: their hot rows no longer exist
+        for field in obj._meta.concrete_fields:
+            target = by_key.get((field.related_model, getattr(obj, field.attname))) if field.is_relation else None
+            if target is not None:
+                field.set_cached_value(obj, target)
+    return objects
+
+
+def archived_orders(qs: QuerySet) -> List[Order]:
+    """Order instances for ArchivedOrder rows, flagged with is_archived."""
+    return [instances(row)[0] for row in qs]
+
+
+def archived_invoices(qs: QuerySet) -> List[Invoice]:
+    return [instances(row)[0] for row in qs]
+
+
+def _describe(obj) -> str:
+    try:
+        return str(obj)
+    except ObjectDoesNotExist:  # __str__ follows a relation to a row that is archived elsewhere
+        return f"{obj._meta.verbose_name.capitalize()} #{obj.pk}"
+
+
+def detail_context(row) -> dict:
+    """Template context for tracker/archived_record.html: the record, its dependents by type and its group."""
+    record, *dependents = instances(row)
+    line_items = [obj for obj in dependents if isinstance(obj, InvoiceLineItem)]
+    related = defaultdict(list)
+    for obj in dependents:
+        if not isinstance(obj, InvoiceLineItem):
+            related[obj._meta.verbose_name_plural.capitalize()].append(_describe(obj))
+    group_orders = ArchivedOrder.objects.filter(group=row.group)
+    group_invoices = ArchivedInvoice.objects.filter(group=row.group)
+    if isinstance(row, ArchivedOrder):
+        group_orders = group_orders.exclude(pk=row.pk)
+    else:
+        group_invoices = group_invoices.exclude(pk=row.pk)
+    return {
+        'record': record,
+        'row': row,
+        'kind': 'order' if isinstance(row, ArchivedOrder) else 'invoice',
+        'line_items': line_items,
+        'related': dict(related),
+        'group_orders': group_orders.order_by('created_at'),
+        'group_invoices': group_invoices.order_by('invoice_date'),
+    }
+
+
+def with_archived(hot: Iterable, archived: Iterable, key) -> list:
+    """Hot and archived rows as one list, newest first by `key`."""
+    return sorted([*hot, *archived], key=key, reverse=True)
+
+
+def find_order(pk: int, qs: Optional[QuerySet] = None) -> Optional[ArchivedOrder]:
+    return (ArchivedOrder.objects.all() if qs is None else qs).filter(pk=pk).first()
+
+
+def find_invoice(pk: int, qs: Optional[QuerySet] = None) -> Optional[ArchivedInvoice]:
+    return (ArchivedInvoice.objects.all() if qs is None else qs).filter(pk=pk).first()
+
+
+def vehicle_history(vehicle_id: int, branch_id: Optional[int] = None) -> Dict[str, list]:
+    """Orders and invoices of a vehicle, hot and archived, newest first."""
+    orders = Order.objects.filter(vehicle_id=vehicle_id)
+    archived = ArchivedOrder.objects.filter(vehicle_id=vehicle_id)
+    invoices = Invoice.objects.filter(vehicle_id=vehicle_id)
+    archived_inv = ArchivedInvoice.objects.filter(vehicle_id=vehicle_id)
+    if branch_id:
+        orders, archived = orders.filter(branch_id=branch_id), archived.filter(branch_id=branch_id)
+        invoices, archived_inv = invoices.filter(branch_id=branch_id), archived_inv.filter(branch_id=branch_id)
+    return {
+        'orders': with_archived(orders, archived_orders(archived), key=lambda o: o.created_at),
+        'invoices': with_archived(invoices, archived_invoices(archived_inv), key=lambda i: (i.invoice_date, i.pk)),
+    }
@@ -0,0 +1,159 @@
+"""
+Server-rendered chart images, cached by content and rendered off the request path.
+
+Pages used to call matplotlib inline and embed base64 PNGs in the HTML on every request.
+Now a page asks for chart_url(kind, data, **options):
+  - the key is the signed, compressed spec (kind, data, options) itself, so whichever
+    worker process gets the image request can render it without shared state, and clients
+    cannot make the server render specs it did not issue. An unchanged chart has the same
+    URL, so browsers keep it (private, immutable) and the PNG is cached by a hash of the key
+  - a worker thread (CHART_RENDER_WORKERS) starts rendering it in the background, so the
+    page itself never waits on matplotlib
+  - tracker:chart_image serves the PNG; if this process's worker has not finished it waits
+    for it, and otherwise (another process, or CHART_RENDER_WORKERS=0) it renders on the
+    image request
+  - pages listed in SERVER_CHARTS_DISABLED skip server-side charts (enabled()) and rely on
+    their client-side chart data
+
+Renderers in RENDERERS are callables or dotted paths, so tests and environments without
+matplotlib can swap them (CHART_RENDERERS setting).
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Dict, Optional, Union
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+RENDERERS = {
+    'monthly_trend': 'tracker.utils.chart_utils.render_monthly_trend_png',
+}
+
+CHART_CACHE_TTL = getattr(settings, 'CHART_CACHE_TTL', 86400)
+CHART_RENDER_TIMEOUT = getattr(settings, 'CHART_RENDER_TIMEOUT', 30)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_futures: Dict[str, Future] = {}
+_lock = threading.Lock()
+
+
+class ChartError(ValueError):
+    """Unknown chart kind."""
+
+
+def enabled(page: str) -> bool:
+    """Whether `page` should use server-rendered charts."""
+    return page not in getattr(settings, 'SERVER_CHARTS_DISABLED', ())
+
+
+def _renderers() -> Dict[str, Union[str, Callable]]:
+    return {**RENDERERS, **getattr(settings, 'CHART_RENDERERS', {})}
+
+
+class _SpecSerializer:
+    """JSON with sorted keys, so equal specs sign to the same key."""
+
+    def dumps(self, obj) -> bytes:
+        return json.dumps(obj, sort_keys=True, separators=(',', ':'), default=str).encode('latin-1')
+
+    def loads(self, data: bytes):
+        return json.loads(data.decode('latin-1'))
+
+
+def _signer() -> signing.Signer:
+    return signing.Signer(salt='tracker.charts')
+
+
+def chart_key(kind: str, data, **options) -> str:
+    return _signer().sign_object({'kind': kind, 'data': data, 'options': options},
+                               serializer=_SpecSerializer, compress=True)
+
+
+def _spec(key: str) -> Optional[dict]:
+    try:
+        return _signer().unsign_object(key, serializer=_SpecSerializer)
+    except signing.BadSignature:
+        return None
+
+
+def _png_key(key: str) -> str:
+    return f"chart:png:{hashlib.sha256(key.encode()).hexdigest()[:32]}"
+
+
+def _pool() -> Optional[ThreadPoolExecutor]:
+    global _executor
+    workers = getattr(settings, 'CHART_RENDER_WORKERS', 2)
+    if workers <= 0:
+        return None
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='chart-render')
+        return _executor
+
+
+def render(key: str) -> Optional[bytes]:
+    """Render (or fetch) the PNG for `key`; None if the spec is unknown or rendering failed."""
+    png = cache.get(_png_key(key))
+    if png is not None:
+        return png
+    spec = _spec(key)
+    if spec is None or spec['kind'] not in _renderers():
+        return None
+    renderer = _renderers()[spec['kind']]
+    try:
+        if isinstance(renderer, str):
+            renderer = import_string(renderer)
+        png = renderer(spec['data'], **spec['options'])
+    except Exception:
+        logger.exception(f"Chart {_png_key(key)} ({spec['kind']}) failed to render")
+        return None
+    cache.set(_png_key(key), png, CHART_CACHE_TTL)
+    return png
+
+
+def _forget(key: str, _future: Future) -> None:
+    with _lock:
+        _futures.pop(key, None)
+
+
+def request_chart(kind: str, data, **options) -> str:
+    """Register a chart and start rendering it in the background; returns its key."""
+    if kind not in _renderers():
+        raise ChartError(f"Unknown chart kind: {kind}")
+    key = chart_key(kind, data, **options)
+    if cache.get(_png_key(key)) is not None:
+        return key
+    pool = _pool()
+    if pool is not None:
+        with _lock:
+            if key in _futures:
+                return key
+            future = _futures[key] = pool.submit(render, key)
+        future.add_done_callback(lambda f: _forget(key, f))
+    return key
+
+
+def chart_url(kind: str, data, **options) -> str:
+    return reverse('tracker:chart_image', args=[request_chart(kind, data, **options)])
+
+
+def get_png(key: str, timeout: Optional[float] = None) -> Optional[bytes]:
+    """PNG for `key`, waiting for an in-flight background render if there is one."""
+    with _lock:
+        future = _futures.get(key)
+    if future is not None:
+        try:
+            return future.result(timeout=timeout or CHART_RENDER_TIMEOUT)
+        except FutureTimeout:
+            logger.warning(f"Chart {key} still rendering after {timeout or CHART_RENDER_TIMEOUT}s")
+            return None
+    return render(key)
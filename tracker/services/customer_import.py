@@ -0,0 +1,211 @@
+"""
+Batched customer/vehicle import built on bulk_create.
+
+Customer codes are assigned in memory (tracker.utils.codes), so a batch costs a fixed
+number of queries regardless of its size:
+  1 SELECT for existing customers matching the batch identities,
+  1 INSERT for new customers, 1 SELECT to map codes back to ids,
+  1 SELECT for existing vehicles, 1 INSERT for new vehicles.
+Rows are deduplicated the same way as CustomerService.find_duplicate_customer
+(branch + case-insensitive name + normalized phone).
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from datetime import date, datetime
+
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from tracker.models import Branch, Customer, Vehicle
+from tracker.utils import normalize_phone
+from tracker.utils.codes import customer_codes
+
+logger = logging.getLogger(__name__)
+
+CUSTOMER_FIELDS = (
+    'full_name', 'phone', 'email', 'whatsapp', 'address', 'customer_type',
+    'organization_name', 'tax_number', 'personal_subtype',
+)
+VEHICLE_FIELDS = ('plate_number', 'make', 'model', 'vehicle_type')
+VALID_CUSTOMER_TYPES = {choice for choice, _ in Customer.TYPE_CHOICES}
+
+
+def _clean(value: Any) -> Optional[str]:
+    value = (str(value).strip() if value is not None else '')
+    return value or None
+
+
+def _parse_registration(value: Any) -> Optional[datetime]:
+    """Accept a datetime/date or an ISO string; returns an aware datetime or None."""
+    if isinstance(value, datetime):
+        dt = value
+    elif isinstance(value, date):
+        dt = datetime.combine(value, datetime.min.time())
+    else:
+        text = _clean(value)
+        if not text:
+            return None
+        dt = parse_datetime(text)
+        if dt is None:
+            d = parse_date(text)
+            dt = datetime.combine(d, datetime.min.time()) if d else None
+    if dt is not None and timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
+class CustomerImportService:
+    """Import customers (and optionally one vehicle per row) in batches."""
+
+    def __init__(self, branch: Optional[Branch] = None, batch_size: int = 1000, dry_run: bool = False):
+        self.branch = branch
+        self.batch_size = max(1, int(batch_size))
+        self.dry_run = dry_run
+        self._codes_seen = set()  # legacy codes already used earlier in this import
+        self.stats = {
+            'rows': 0,
+            'customers_created': 0,
+            'customers_existing': 0,
+            'vehicles_created': 0,
+            'vehicles_existing': 0,
+            'skipped': [],  # (row_number, reason)
+        }
+
+    @staticmethod
+    def _identity(full_name: str, phone: str) -> tuple:
+        return (full_name.lower(), normalize_phone(phone))
+
+    def import_rows(self, rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Import an iterable of dict rows (e.g. csv.DictReader). Returns the stats dict."""
+        batch = []
+        for row_number, row in enumerate(rows, start=1):
+            self.stats['rows'] += 1
+            batch.append((row_number, row))
+            if len(batch) >= self.batch_size:
+                self._import_batch(batch)
+                batch = []
+        if batch:
+            self._import_batch(batch)
+        return self.stats
+
+    def _parse(self, row_number: int, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        data = {f: _clean(row.get(f)) for f in CUSTOMER_FIELDS + VEHICLE_FIELDS}
+        data['code'] = _clean(row.get('code'))
+        try:
+            data['registration_date'] = _parse_registration(row.get('registration_date'))
+        except ValueError:
+            data['registration_date'] = None
+        if not data['full_name'] or not data['phone']:
+            self.stats['skipped'].append((row_number, 'missing full_name or phone'))
+            return None
+        ctype = (data['customer_type'] or 'personal').lower()
+        data['customer_type'] = ctype if ctype in VALID_CUSTOMER_TYPES else 'personal'
+        if data['plate_number']:
+            data['plate_number'] = data['plate_number'].upper()
+        return data
+
+    def _existing_customers(self, identities: set) -> Dict[tuple, int]:
+        names = {name for name, _ in identities}
+        qs = Customer.objects.filter(branch=self.branch).annotate(lname=Lower('full_name')).filter(lname__in=names)
+        found = {}
+        for cid, name, phone in qs.values_list('id', 'full_name', 'phone'):
+            key = self._identity(name, phone or '')
+            if key in identities:
+                found.setdefault(key, cid)
+        return found
+
+    def _import_batch(self, batch: List[tuple]) -> None:
+        parsed = {}  # identity -> data (first occurrence wins within a file)
+        vehicles_by_identity = {}
+        for row_number, row in batch:
+            data = self._parse(row_number, row)
+            if not data:
+                continue
+            key = self._identity(data['full_name'], data['phone'])
+            parsed.setdefault(key, data)
+            if data['plate_number']:
+                vehicles_by_identity.setdefault(key, {})[data['plate_number']] = data
+        if not parsed:
+            return
+
+        existing = self._existing_customers(set(parsed))
+        new_keys = [k for k in parsed if k not in existing]
+
+        # Legacy codes supplied in the file must not clash with codes already in use
+        legacy_codes = [parsed[k]['code'] for k in new_keys if parsed[k]['code']]
+        if legacy_codes:
+            taken = set(Customer.objects.filter(code__in=legacy_codes).values_list('code', flat=True))
+            for k in new_keys:
+                if parsed[k]['code'] in taken:
+                    logger.info(f"Customer code {parsed[k]['code']} already in use; allocating a new one")
+                    parsed[k]['code'] = None
+        self.stats['customers_existing'] += len(existing)
+
+        now = timezone.now()
+        codes = iter(customer_codes.allocate_many(len(new_keys)))
+        new_customers = []
+        code_by_key = {}
+        for key in new_keys:
+            data = parsed[key]
+            code = data['code']
+            if not code or code in self._codes_seen:
+                code = next(codes)
+            self._codes_seen.add(code)
+            code_by_key[key] = code
+            new_customers.append(Customer(
+                code=code,
+                branch=self.branch,
+                arrival_time=now,
+                registration_date=data['registration_date'] or now,
+                current_status='arrived',
+                **{f: data[f] for f in CUSTOMER_FIELDS},
+            ))
+
+        if self.dry_run:
+            self.stats['customers_created'] += len(new_customers)
+            self.stats['vehicles_created'] += sum(len(v) for v in vehicles_by_identity.values())
+            return
+
+        with transaction.atomic():
+            Customer.objects.bulk_create(new_customers, batch_size=self.batch_size)
+            self.stats['customers_created'] += len(new_customers)
+            # Not every backend returns PKs from bulk_create (MySQL), so map codes back in one query
+            id_by_code = dict(
+                Customer.objects.filter(code__in=list(code_by_key.values())).values_list('code', 'id')
+            )
+            customer_ids = dict(existing)
+            for key, code in code_by_key.items():
+                if code in id_by_code:
+                    customer_ids[key] = id_by_code[code]
+
+            if vehicles_by_identity:
+                self._import_vehicles(vehicles_by_identity, customer_ids)
+
+    def _import_vehicles(self, vehicles_by_identity: Dict[tuple, Dict[str, Dict]], customer_ids: Dict[tuple, int]) -> None:
+        owner_ids = [customer_ids[k] for k in vehicles_by_identity if k in customer_ids]
+        existing = {
+            (cid, (plate or '').upper())
+            for cid, plate in Vehicle.objects.filter(customer_id__in=owner_ids).values_list('customer_id', 'plate_number')
+        }
+        new_vehicles = []
+        for key, plates in vehicles_by_identity.items():
+            cid = customer_ids.get(key)
+            if not cid:
+                continue
+            for plate, data in plates.items():
+                if (cid, plate) in existing:
+                    self.stats['vehicles_existing'] += 1
+                    continue
+                new_vehicles.append(Vehicle(
+                    customer_id=cid,
+                    plate_number=plate,
+                    make=data['make'],
+                    model=data['model'],
+                    vehicle_type=data['vehicle_type'],
+                ))
+        Vehicle.objects.bulk_create(new_vehicles, batch_size=self.batch_size)
+        self.stats['vehicles_created'] += len(new_vehicles)
@@ -293,38 +293,14 @@ class CustomerService:
         Update customer's visit tracking information.
         Call this whenever a customer interacts with the system (creates order, etc.)
         Only increments total_visits once per day to track distinct visit days, not order count.
+        The check and increment happen in one conditional UPDATE (see customer_stats.record_visit).
         """
         if not customer:
             return
 
         try:
-            from django.utils import timezone as tz_module
-            now = timezone.now()
-            # IMPORTANT: Use localdate() consistently for timezone-aware date comparisons
-            # This ensures the date is extracted in the server's configured timezone, not UTC
-            today = tz_module.localdate(now) if hasattr(tz_module, 'localdate') else now.date()
-
-            # Check if customer already visited today
-            last_visit_today = False
-            if customer.last_visit:
-                try:
-                    # IMPORTANT: Also use localdate() for the last_visit to ensure consistent timezone handling
-                    # Previously this used .date() which extracted UTC date, causing timezone mismatches
-                    last_visit_date = tz_module.localdate(customer.last_visit) if hasattr(tz_module, 'localdate') else customer.last_visit.date() if hasattr(customer.last_visit, 'date') else customer.last_visit
-                    last_visit_today = (last_visit_date == today)
-                except Exception:
-                    last_visit_today = False
-
-            # Update last_visit and arrival_time
-            customer.last_visit = now
-            customer.arrival_time = now
-            customer.current_status = 'arrived'
-
-            # Only increment total_visits if this is a new visit day
-            if not last_visit_today:
-                customer.total_visits = (customer.total_visits or 0) + 1
-
-            customer.save(update_fields=['last_visit', 'total_visits', 'arrival_time', 'current_status'])
+            from .customer_stats import record_visit
+            record_visit(customer)
         except Exception as e:
             logger.warning(f"Error updating customer visit: {e}")
 
@@ -0,0 +1,143 @@
+"""
+Customer visit and spending counters (total_visits, last_visit, total_spent).
+
+The customer groups, segmentation and top-customer reports read these columns directly,
+so they have to be right without being recomputed per request:
+  - record_visit() is one conditional UPDATE: total_visits goes up only when the stored
+    last_visit is before the start of today (local time), evaluated by the database against
+    the row's current value, so two orders started together count one visit
+  - refresh_spent() sets total_spent to the sum of the customer's non-cancelled invoices in
+    one UPDATE with a correlated subquery; invoice save/delete signals (tracker.signals)
+    queue it for commit, so an invoice saved several times in one transaction costs one UPDATE
+  - recompute() rebuilds all three from orders and invoices in batches, for backfills and
+    after bulk imports that bypass signals (`python manage.py recompute_customer_stats`)
+  - archived orders and invoices (tracker.services.archive) are counted too, so archiving a
+    customer's history does not change the counters
+"""
+
+import logging
+from datetime import datetime, time
+from decimal import Decimal
+from typing import Iterable, Optional, Union
+
+from django.db.models import (
+    Case, Count, DecimalField, F, Max, OuterRef, PositiveIntegerField, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce, NullIf, TruncDate
+from django.utils import timezone
+
+from tracker.models import ArchivedInvoice, ArchivedOrder, Customer, Invoice, Order
+from tracker.utils.transactions import on_commit_batch
+
+logger = logging.getLogger(__name__)
+
+CustomerRef = Union[Customer, int]
+
+# Invoices that do not count towards a customer's spending
+EXCLUDED_INVOICE_STATUSES = ('cancelled',)
+
+
+def _customer_id(customer: CustomerRef) -> int:
+    return customer.pk if isinstance(customer, Customer) else int(customer)
+
+
+def _start_of_day(when: datetime) -> datetime:
+    return timezone.make_aware(datetime.combine(timezone.localdate(when), time.min))
+
+
+def record_visit(customer: Optional[CustomerRef], when: Optional[datetime] = None) -> bool:
+    """Mark the customer as arrived now, counting a visit once per local day.
+
+    Returns True when a row was updated. A Customer instance passed in gets the new values
+    too, so a later save() of that instance does not write stale counters back.
+    """
+    if not customer:
+        return False
+    now = when or timezone.now()
+    day_start = _start_of_day(now)
+    is_new_day = Q(last_visit__isnull=True) | Q(last_visit__lt=day_start)
+    updated = Customer.objects.filter(pk=_customer_id(customer)).update(
+        total_visits=Case(
+            When(is_new_day, then=F('total_visits') + 1),
+            default=F('total_visits'),
+            output_field=PositiveIntegerField(),
+        ),
+        last_visit=now,
+        arrival_time=now,
+        current_status='arrived',
+    )
+    if updated and isinstance(customer, Customer):
+        if customer.last_visit is None or customer.last_visit < day_start:
+            customer.total_visits = (customer.total_visits or 0) + 1
+        customer.last_visit = customer.arrival_time = now
+        customer.current_status = 'arrived'
+    return bool(updated)
+
+
+def _spent_subquery():
+    def total(model):
+        return Coalesce(
+            Subquery(
+                model.objects.filter(customer=OuterRef('pk'))
+                .exclude(status__in=EXCLUDED_INVOICE_STATUSES)
+                .values('customer')
+                .annotate(total=Sum('total_amount'))
+                .values('total')[:1]
+            ),
+            Value(Decimal('0')),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        )
+    return total(Invoice) + total(ArchivedInvoice)
+
+
+def refresh_spent(customer_ids: Iterable[int]) -> int:
+    """Set total_spent from the invoices of the given customers. Returns rows updated."""
+    ids = {int(i) for i in customer_ids if i}
+    if not ids:
+        return 0
+    return Customer.objects.filter(pk__in=ids).update(total_spent=_spent_subquery())
+
+
+def refresh_spent_on_commit(customer_ids: Iterable[int]) -> None:
+    """refresh_spent() once per transaction, however many invoice writes it contains."""
+    ids = {int(i) for i in customer_ids if i}
+    if ids:
+        on_commit_batch(refresh_spent, set, lambda pending: pending.update(ids))
+
+
+def recompute(customer_ids: Optional[Iterable[int]] = None, batch_size: int = 1000) -> int:
+    """Rebuild total_visits, last_visit and total_spent from orders and invoices.
+
+    A visit is a distinct local day with at least one order. Customers without orders keep
+    their stored visit fields (they may have been registered on a visit that created no
+    order); total_spent is always rebuilt. Returns the number of customers updated.
+
+    Hot and archived days are counted separately, so a day with both an archived and a hot
+    order counts twice. Archiving moves whole old groups, which makes that rare.
+    """
+    tz = timezone.get_current_timezone()
+
+    def per_customer(model, **aggregate):
+        (name,) = aggregate
+        rows = model.objects.filter(customer=OuterRef('pk')).values('customer')
+        return Subquery(rows.annotate(**aggregate).values(name)[:1])
+
+    def visit_days(model):
+        return Coalesce(per_customer(model, days=Count(TruncDate('created_at', tzinfo=tz), distinct=True)), 0)
+
+    days = NullIf(visit_days(Order) + visit_days(ArchivedOrder), 0)
+    latest = Coalesce(per_customer(Order, latest=Max('created_at')), per_customer(ArchivedOrder, latest=Max('created_at')))
+
+    qs = Customer.objects.order_by('pk')
+    if customer_ids is not None:
+        qs = qs.filter(pk__in=list(customer_ids))
+    ids = list(qs.values_list('pk', flat=True))
+    updated = 0
+    for start in range(0, len(ids), batch_size):
+        updated += Customer.objects.filter(pk__in=ids[start:start + batch_size]).update(
+            total_visits=Coalesce(days, F('total_visits'), output_field=PositiveIntegerField()),
+            last_visit=Coalesce(latest, F('last_visit')),
+            total_spent=_spent_subquery(),
+        )
+    logger.info(f"Recomputed stats for {updated} customers")
+    return updated
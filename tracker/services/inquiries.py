@@ -0,0 +1,148 @@
+"""
+Inquiries workspace: stats, note timelines and bulk actions.
+
+  - counts() returns every status and follow-up figure from one conditional aggregate;
+    kpi_counters caches it per branch scope for the inquiries page
+  - attach_latest_notes() loads the newest notes for a whole page of inquiries in one
+    query: a ROW_NUMBER() window over (inquiry, -created_at), served by
+    idx_inquiry_note_created, filtered to the first N per inquiry
+  - set_status() / add_note() act on many inquiries with one bulk_update and one
+    bulk_create, and record a status_change note per inquiry that actually changed
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from django.db import transaction
+from django.db.models import Count, F, Q, QuerySet, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from tracker.models import InquiryNote, Order
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ('created', 'in_progress', 'completed')
+STATUS_LABELS = {'created': 'New', 'in_progress': 'In Progress', 'completed': 'Resolved'}
+OPEN_STATUSES = ('created', 'in_progress')
+NOTE_TYPES = ('response', 'note')
+
+
+def counts(qs: QuerySet, today=None) -> Dict[str, int]:
+    """Status and follow-up counts for a queryset of inquiries, in one query."""
+    today = today or timezone.localdate()
+    open_q = Q(status__in=OPEN_STATUSES)
+    return qs.aggregate(
+        total=Count('id'),
+        new=Count('id', filter=Q(status='created')),
+        in_progress=Count('id', filter=Q(status='in_progress')),
+        resolved=Count('id', filter=Q(status='completed')),
+        follow_up_required=Count('id', filter=Q(follow_up_date__isnull=False)),
+        follow_up_due_today=Count('id', filter=open_q & Q(follow_up_date=today)),
+        follow_up_overdue=Count('id', filter=open_q & Q(follow_up_date__lte=today)),
+    )
+
+
+def latest_notes(inquiry_ids: Iterable[int], per_inquiry: int = 1) -> Dict[int, List[InquiryNote]]:
+    """{inquiry_id: newest notes first}, at most `per_inquiry` each, in one query."""
+    ids = list(inquiry_ids)
+    if not ids:
+        return {}
+    rows = (
+        InquiryNote.objects.filter(inquiry_id__in=ids)
+        .select_related('created_by')
+        .annotate(rank=Window(RowNumber(), partition_by=[F('inquiry_id')], order_by=F('created_at').desc()))
+        .filter(rank__lte=per_inquiry)
+        .order_by('inquiry_id', 'rank')
+    )
+    notes: Dict[int, List[InquiryNote]] = {i: [] for i in ids}
+    for note in rows:
+        notes[note.inquiry_id].append(note)
+    return notes
+
+
+def attach_latest_notes(inquiries: Sequence[Order], per_inquiry: int = 1) -> Sequence[Order]:
+    """Set `latest_notes` (list) and `latest_note` (or None) on each inquiry."""
+    notes = latest_notes([i.pk for i in inquiries], per_inquiry)
+    for inquiry in inquiries:
+        inquiry.latest_notes = notes.get(inquiry.pk, [])
+        inquiry.latest_note = inquiry.latest_notes[0] if inquiry.latest_notes else None
+    return inquiries
+
+
+def note_author(note: InquiryNote) -> str:
+    if not note.created_by:
+        return 'System'
+    return note.created_by.first_name or note.created_by.username
+
+
+def serialize_note(note: InquiryNote) -> dict:
+    return {
+        'id': note.id,
+        'type': note.note_type,
+        'type_display': note.get_note_type_display(),
+        'content': note.content,
+        'created_by': note_author(note),
+        'created_at': note.created_at.isoformat(),
+        'is_visible_to_customer': note.is_visible_to_customer,
+    }
+
+
+def timeline(inquiry: Order) -> List[dict]:
+    """All notes of one inquiry, newest first, authors joined in the same query."""
+    return [serialize_note(n) for n in InquiryNote.objects.filter(inquiry=inquiry).select_related('created_by')]
+
+
+def _invalidate_counters() -> None:
+    # bulk_update and update() skip the Order signals that normally do this
+    from tracker.services import kpi_counters
+    kpi_counters.invalidate_for_model(Order)
+
+
+def set_status(inquiries: QuerySet, status: str, user=None) -> int:
+    """Move inquiries to `status`, writing one status_change note per changed inquiry.
+
+    Returns the number of inquiries changed; those already in `status` are left alone.
+    """
+    if status not in STATUSES:
+        raise ValueError(f"Invalid status: {status}")
+    now = timezone.now()
+    with transaction.atomic():
+        changed = list(inquiries.exclude(status=status).only('id', 'status', 'completed_at'))
+        if not changed:
+            return 0
+        notes = []
+        for inquiry in changed:
+            notes.append(InquiryNote(
+                inquiry=inquiry,
+                note_type='status_change',
+                content=f"Status changed: {STATUS_LABELS.get(inquiry.status, inquiry.status)} -> {STATUS_LABELS[status]}",
+                created_by=user,
+                is_visible_to_customer=False,
+            ))
+            inquiry.status = status
+            inquiry.completed_at = now if status == 'completed' else None
+        Order.objects.bulk_update(changed, ['status', 'completed_at'], batch_size=500)
+        InquiryNote.objects.bulk_create(notes, batch_size=500)
+    _invalidate_counters()
+    return len(changed)
+
+
+def add_note(inquiries: QuerySet, content: str, user=None, note_type: str = 'note') -> int:
+    """Add the same note to many inquiries; new inquiries move to in_progress. Returns notes created."""
+    content = (content or '').strip()
+    if not content:
+        raise ValueError("Note content is required")
+    if note_type not in NOTE_TYPES:
+        raise ValueError(f"Invalid note type: {note_type}")
+    with transaction.atomic():
+        ids = list(inquiries.values_list('id', flat=True))
+        InquiryNote.objects.bulk_create([
+            InquiryNote(inquiry_id=pk, note_type=note_type, content=content, created_by=user,
+                        is_visible_to_customer=(note_type == 'response'))
+            for pk in ids
+        ], batch_size=500)
+        moved = Order.objects.filter(pk__in=ids, status='created').update(status='in_progress')
+    if moved:
+        _invalidate_counters()
+    return len(ids)
@@ -0,0 +1,251 @@
+"""
+Inventory ledger: every stock change is an InventoryAdjustment row plus an F() delta.
+
+Quantities are never read, modified in Python and saved back, so concurrent order
+creations/completions cannot overwrite each other's changes:
+  - adjust() applies a batch of (item, delta) lines in one transaction: one conditional
+    UPDATE per line, one bulk INSERT of ledger rows, one read of the new balances and one
+    cache invalidation pass for the whole batch
+  - removals never take an item below zero; a removal larger than the stock on hand is
+    clamped and the ledger records what was actually taken
+  - sales orders reserve their stock on creation (reserve_for_order), keep it on completion
+    (consume_for_order) and give it back on cancellation (release_for_order)
+  - take_snapshot() stores every item's balance; stock_at() answers "how many on date X"
+    from the nearest snapshot plus the ledger rows after it. The snapshot runs nightly from
+    the scheduler (tracker.scheduler) and on demand via the inventory_snapshot command.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+
+from tracker.models import InventoryAdjustment, InventoryItem, InventoryReservation, InventorySnapshot, Order
+
+logger = logging.getLogger(__name__)
+
+ItemRef = Union[InventoryItem, int]
+
+
+class InsufficientStock(ValueError):
+    """Raised by strict reservations when the item has less stock than requested."""
+
+    def __init__(self, item: InventoryItem, requested: int, available: int):
+        self.item = item
+        self.requested = requested
+        self.available = available
+        super().__init__(f"Only {available} in stock for {item.name}")
+
+
+def resolve_item(name: str, brand: str) -> Optional[InventoryItem]:
+    """Look up an item by exact name and case-insensitive brand name."""
+    name = (name or '').strip()
+    brand = (brand or '').strip()
+    if not name:
+        return None
+    return InventoryItem.objects.select_related('brand').filter(name=name, brand__name__iexact=brand).first()
+
+
+def _item_id(item: ItemRef) -> int:
+    return item.pk if isinstance(item, InventoryItem) else int(item)
+
+
+def _apply_delta(item_id: int, delta: int) -> int:
+    """Apply one signed delta with a conditional UPDATE; returns the change actually made."""
+    if delta >= 0:
+        InventoryItem.objects.filter(pk=item_id).update(quantity=F('quantity') + delta)
+        return delta
+    wanted = -delta
+    if InventoryItem.objects.filter(pk=item_id, quantity__gte=wanted).update(quantity=F('quantity') - wanted):
+        return delta
+    # Not enough on hand: take what is there (locked where the backend supports it)
+    on_hand = (
+        InventoryItem.objects.select_for_update().filter(pk=item_id).values_list('quantity', flat=True).first()
+    ) or 0
+    if on_hand:
+        InventoryItem.objects.filter(pk=item_id).update(quantity=F('quantity') - on_hand)
+    return -on_hand
+
+
+def _clear_caches(item_ids: Iterable[int]) -> None:
+    from tracker.utils import clear_inventory_cache
+
+    for name, brand in InventoryItem.objects.filter(pk__in=set(item_ids)).values_list('name', 'brand__name'):
+        clear_inventory_cache(name, brand)
+
+
+def _adjust(lines, user, order, reference, notes, types) -> Tuple[Dict[int, int], Dict[int, int]]:
+    merged: Dict[int, int] = defaultdict(int)
+    for item, delta in lines:
+        merged[_item_id(item)] += int(delta)
+    merged = {item_id: delta for item_id, delta in merged.items() if delta}
+    if not merged:
+        return {}, {}
+
+    reference = reference or (order.order_number if order is not None else None)
+    applied: Dict[int, int] = {}
+    with transaction.atomic():
+        rows: List[InventoryAdjustment] = []
+        for item_id in sorted(merged):  # fixed lock order across concurrent batches
+            applied[item_id] = change = _apply_delta(item_id, merged[item_id])
+            if change:
+                rows.append(InventoryAdjustment(
+                    item_id=item_id,
+                    adjustment_type=types[0] if change > 0 else types[1],
+                    quantity=abs(change),
+                    reference=reference,
+                    notes=notes,
+                    order=order,
+                    adjusted_by=user,
+                ))
+        InventoryAdjustment.objects.bulk_create(rows)
+        balances = dict(InventoryItem.objects.filter(pk__in=merged).values_list('id', 'quantity'))
+        transaction.on_commit(lambda: _clear_caches(merged))
+    return balances, applied
+
+
+def adjust(
+    lines: Sequence[Tuple[ItemRef, int]],
+    *,
+    user=None,
+    order: Optional[Order] = None,
+    reference: Optional[str] = None,
+    notes: Optional[str] = None,
+    types: Tuple[str, str] = ('addition', 'removal'),
+) -> Dict[int, int]:
+    """Apply signed quantity deltas to several items atomically.
+
+    `types` gives the ledger type for (positive, negative) deltas. Returns {item_id: new quantity}.
+    Zero deltas are ignored; deltas for the same item are merged.
+    """
+    balances, _applied = _adjust(lines, user, order, reference, notes, types)
+    return balances
+
+
+def adjust_by_name(name: str, brand: str, qty_delta: int, **kwargs) -> Tuple[bool, str, Optional[int]]:
+    """adjust() for a single item given by name+brand, with the (ok, status, remaining)
+    result shape of tracker.utils.adjust_inventory."""
+    try:
+        if not (name or '').strip():
+            return False, 'invalid', None
+        item = resolve_item(name, brand)
+        if not item:
+            return False, 'not_found', None
+        balances = adjust([(item, int(qty_delta))], **kwargs)
+        return True, 'ok', balances.get(item.pk, item.quantity)
+    except Exception as e:
+        logger.warning(f"Inventory adjustment failed for {name} ({brand}): {e}")
+        return False, str(e), None
+
+
+# ---- Order reservations ----------------------------------------------------
+
+def reserve_for_order(order: Order, user=None, item: Optional[InventoryItem] = None,
+                      strict: bool = False) -> Tuple[bool, str, Optional[int]]:
+    """Hold stock for a sales order's item/brand/quantity. Returns (ok, status, remaining).
+
+    Pass `item` when the caller already loaded it. With strict=True a shortfall raises
+    InsufficientStock and nothing is reserved; otherwise whatever is on hand is held.
+    """
+    qty = int(order.quantity or 0)
+    if order.type != 'sales' or qty <= 0:
+        return False, 'invalid', None
+    item = item or resolve_item(order.item_name, order.brand)
+    if not item:
+        return False, 'not_found', None
+    if InventoryReservation.objects.filter(order=order, item=item, status='active').exists():
+        return True, 'ok', InventoryItem.objects.filter(pk=item.pk).values_list('quantity', flat=True).first()
+    try:
+        with transaction.atomic():
+            balances, applied = _adjust([(item, -qty)], user, order, None, None, ('release', 'reservation'))
+            held = -applied.get(item.pk, 0)
+            if strict and held < qty:
+                raise InsufficientStock(item, qty, held)
+            if held:
+                InventoryReservation.objects.create(item=item, order=order, quantity=held)
+    except InsufficientStock:
+        raise
+    except Exception as e:
+        logger.warning(f"Failed to reserve stock for order {order.pk}: {e}")
+        return False, str(e), None
+    return True, 'ok', balances.get(item.pk, item.quantity)
+
+
+def consume_for_order(order: Order) -> int:
+    """Mark an order's active reservations as sold; stock stays deducted. Returns rows closed."""
+    return InventoryReservation.objects.filter(order=order, status='active').update(
+        status='consumed', closed_at=timezone.now()
+    )
+
+
+def release_for_order(order: Order, user=None) -> Dict[int, int]:
+    """Return an order's held stock (e.g. on cancellation). Returns {item_id: new quantity}."""
+    with transaction.atomic():
+        held = list(
+            InventoryReservation.objects.select_for_update()
+            .filter(order=order, status='active')
+            .values_list('id', 'item_id', 'quantity')
+        )
+        if not held:
+            return {}
+        InventoryReservation.objects.filter(pk__in=[h[0] for h in held]).update(
+            status='released', closed_at=timezone.now()
+        )
+        return adjust(
+            [(item_id, qty) for _id, item_id, qty in held],
+            user=user, order=order, types=('release', 'reservation'),
+        )
+
+
+# ---- Snapshots ----------------------------------------------------------------
+
+def take_snapshot(at: Optional[datetime] = None) -> int:
+    """Record the current balance of every item in one bulk insert."""
+    at = at or timezone.now()
+    rows = [
+        InventorySnapshot(item_id=item_id, quantity=qty, taken_at=at)
+        for item_id, qty in InventoryItem.objects.values_list('id', 'quantity')
+    ]
+    InventorySnapshot.objects.bulk_create(rows, batch_size=500)
+    logger.info(f"Inventory snapshot: {len(rows)} items at {at.isoformat()}")
+    return len(rows)
+
+
+def stock_at(when: datetime, item_ids: Optional[Iterable[int]] = None) -> Dict[int, int]:
+    """Balance of each item at `when`: nearest earlier snapshot plus ledger rows after it.
+
+    Items with no snapshot before `when` replay their whole ledger from zero, so the answer
+    is only exact for items whose every change went through the ledger.
+    """
+    items = InventoryItem.objects.all()
+    if item_ids is not None:
+        items = items.filter(pk__in=list(item_ids))
+    latest = InventorySnapshot.objects.filter(item=OuterRef('pk'), taken_at__lte=when).order_by('-taken_at')
+    starts = items.annotate(
+        snap_qty=Subquery(latest.values('quantity')[:1]),
+        snap_at=Subquery(latest.values('taken_at')[:1]),
+    ).values_list('id', 'snap_qty', 'snap_at')
+
+    balances: Dict[int, int] = {}
+    since: Dict[int, Optional[datetime]] = {}
+    for item_id, snap_qty, snap_at in starts:
+        balances[item_id] = snap_qty or 0
+        since[item_id] = snap_at
+    if not balances:
+        return {}
+
+    earliest = min((s for s in since.values() if s is not None), default=None)
+    ledger = InventoryAdjustment.objects.filter(item_id__in=balances, created_at__lte=when)
+    if earliest is not None and all(s is not None for s in since.values()):
+        ledger = ledger.filter(created_at__gt=earliest)
+    for item_id, kind, qty, created_at in ledger.values_list('item_id', 'adjustment_type', 'quantity', 'created_at'):
+        start = since[item_id]
+        if start is not None and created_at <= start:
+            continue
+        balances[item_id] += qty if kind in InventoryAdjustment.INCREASING_TYPES else -qty
+    return balances
+
@@ -0,0 +1,534 @@
+"""
+Bulk invoice ingestion from a ZIP upload or a directory of PDFs.
+
+The single-invoice flow (views_invoice_upload) extracts one PDF, shows it for review and
+creates the records when the user confirms. For month-end back-office entry this module
+runs the same extraction over many files and leaves only the doubtful ones for a person:
+
+  1. read the files (read_zip / read_directory), bounded by INVOICE_BATCH_MAX_FILES and
+     INVOICE_BATCH_MAX_FILE_MB
+  2. extract them with pdf_text_extractor in a process pool (INVOICE_BATCH_WORKERS)
+  3. match every invoice to a customer in a few set-based queries. The evidence is the
+     customer code (code_no), the vehicle plate (from the reference) and the phone. An
+     invoice is matched when all of the evidence it carries points at one customer. A
+     started order for the same customer and vehicle is linked, as in the single upload.
+  4. bulk-create the invoices and their line items in one transaction, then refresh
+     customer spending, organisation rollups and vehicle trends once (bulk_create skips
+     the Invoice signals)
+  5. everything that cannot be created safely is kept out and marked for review with a
+     reason (REVIEW_REASONS); write_report() turns those into the exceptions CSV
+
+Customers are never created here: an unknown customer is exactly the case the manual
+upload flow is for.
+
+A ZIP of up to a thousand PDFs takes far longer than a web worker may hold a request, so
+web uploads are only checked and stored (queue_upload) as an InvoiceUploadBatch; the
+scheduler's process_queued job runs them one at a time and keeps the per-file report rows
+on the batch, where the upload status endpoint reads them.
+"""
+
+import csv
+import logging
+import multiprocessing
+import os
+import zipfile
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.db import transaction
+from django.utils import timezone
+
+from tracker.models import Customer, Invoice, InvoiceLineItem, InvoiceUploadBatch, Order, Salesperson, Vehicle
+from tracker.utils import normalize_phone, phone_digits_sql, plate_from_reference
+from tracker.utils.order_type_detector import item_code_categories
+
+logger = logging.getLogger(__name__)
+
+REVIEW_REASONS = {
+    'unsupported_file': 'Not a PDF file',
+    'too_large': 'File is larger than INVOICE_BATCH_MAX_FILE_MB',
+    'extraction_failed': 'Could not extract invoice data',
+    'no_customer': 'No customer matches the code, plate or phone',
+    'ambiguous_customer': 'Several customers match the code, plate or phone',
+    'conflicting_customer': 'Code, plate and phone point to different customers',
+    'duplicate_invoice': 'Invoice number already exists',
+    'no_date': 'Invoice date missing or unreadable',
+    'no_amount': 'No total and no line items',
+}
+DATE_FORMATS = ('%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y', '%d-%m-%y', '%Y-%m-%d')
+REPORT_FIELDS = (
+    'file', 'status', 'reason', 'detail', 'invoice_number', 'invoice_date', 'total',
+    'customer_id', 'matched_by', 'order_id', 'invoice_id',
+)
+
+
+class BatchError(ValueError):
+    """The batch as a whole cannot be read (not a ZIP archive, too many files)."""
+
+
+@dataclass
+class BatchItem:
+    """One file of a batch and what became of it."""
+
+    name: str
+    data: Optional[bytes] = field(default=None, repr=False)
+    status: str = 'pending'  # 'created', 'ready' (dry run) or 'review'
+    reason: str = ''
+    detail: str = ''
+    header: dict = field(default_factory=dict, repr=False)
+    items: list = field(default_factory=list, repr=False)
+    invoice_number: str = ''
+    invoice_date: Optional[date] = None
+    total: Optional[Decimal] = None
+    customer_id: Optional[int] = None
+    matched_by: str = ''
+    plate: Optional[str] = None
+    vehicle_id: Optional[int] = None
+    order_id: Optional[int] = None
+    invoice_id: Optional[int] = None
+
+    def review(self, reason: str, detail: str = '') -> None:
+        self.status, self.reason, self.detail = 'review', reason, detail or REVIEW_REASONS[reason]
+
+    @property
+    def pending(self) -> bool:
+        return self.status == 'pending'
+
+    def report_row(self) -> dict:
+        row = {name: getattr(self, name, '') for name in REPORT_FIELDS if name != 'file'}
+        row['file'] = self.name
+        return {k: ('' if v is None else v) for k, v in row.items()}
+
+
+# ---- Reading ------------------------------------------------------------------
+
+def _max_bytes() -> int:
+    return getattr(settings, 'INVOICE_BATCH_MAX_FILE_MB', 20) * 1024 * 1024
+
+
+def _check_count(count: int) -> None:
+    limit = getattr(settings, 'INVOICE_BATCH_MAX_FILES', 1000)
+    if count > limit:
+        raise BatchError(f"{count} files in one batch; the limit is {limit} (INVOICE_BATCH_MAX_FILES)")
+
+
+def _skipped(name: str) -> bool:
+    base = os.path.basename(name)
+    return name.startswith('__MACOSX/') or base.startswith('.') or not base
+
+
+def _item(name: str, size: int, read: Callable[[], bytes]) -> BatchItem:
+    item = BatchItem(name)
+    if not name.lower().endswith('.pdf'):
+        item.review('unsupported_file')
+    elif size > _max_bytes():
+        item.review('too_large', f"{size // 1024} KB")
+    else:
+        item.data = read()
+    return item
+
+
+def read_zip(fileobj) -> List[BatchItem]:
+    """Files of a ZIP archive (path or file object), in archive order."""
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile as e:
+        raise BatchError(f"Not a ZIP archive: {e}")
+    with archive:
+        members = [m for m in archive.infolist() if not m.is_dir() and not _skipped(m.filename)]
+        _check_count(len(members))
+        return [_item(m.filename, m.file_size, partial(archive.read, m)) for m in members]
+
+
+def read_directory(path: str, recursive: bool = False) -> List[BatchItem]:
+    """Files of a directory, sorted by path."""
+    if not os.path.isdir(path):
+        raise BatchError(f"Not a directory: {path}")
+    paths = []
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.')) if recursive else []
+        paths.extend(os.path.join(root, f) for f in files if not _skipped(f))
+    _check_count(len(paths))
+
+    def read(p):
+        with open(p, 'rb') as fh:
+            return fh.read()
+
+    return [_item(os.path.relpath(p, path), os.path.getsize(p), partial(read, p)) for p in sorted(paths)]
+
+
+# ---- Extraction ---------------------------------------------------------------
+
+def _extract_one(extract: Callable, job: tuple) -> dict:
+    """Worker entry point (module level so it pickles)."""
+    name, data = job
+    try:
+        return extract(data, name)
+    except Exception as e:
+        return {'success': False, 'message': str(e)}
+
+
+def _init_worker() -> None:
+    # The files are already spread over processes, so OCR inside a worker stays in-process
+    settings.INVOICE_OCR_WORKERS = 1
+
+
+def _pool_context():
+    # fork keeps Django settings and test-defined extractors importable in the workers
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('fork' if 'fork' in methods else None)
+
+
+def extract_all(items: List[BatchItem], extract: Optional[Callable] = None, workers: Optional[int] = None) -> None:
+    """Extract the readable items in place; failures are marked for review."""
+    if extract is None:
+        from tracker.utils.pdf_text_extractor import extract_from_bytes as extract
+    if workers is None:
+        workers = getattr(settings, 'INVOICE_BATCH_WORKERS', 4)
+    todo = [item for item in items if item.pending]
+    jobs = [(item.name, item.data) for item in todo]
+    if workers <= 1 or len(jobs) <= 1:
+        results = [_extract_one(extract, job) for job in jobs]
+    else:
+        with _pool_context().Pool(processes=min(workers, len(jobs)), initializer=_init_worker) as pool:
+            results = pool.map(partial(_extract_one, extract), jobs, chunksize=1)
+    for item, result in zip(todo, results):
+        if not result.get('success'):
+            item.review('extraction_failed', result.get('message') or REVIEW_REASONS['extraction_failed'])
+            continue
+        item.header = result.get('header') or {}
+        item.items = result.get('items') or []
+
+
+# ---- Validation and matching --------------------------------------------------
+
+def _clean(value) -> str:
+    return str(value).strip() if value is not None else ''
+
+
+def _decimal(value) -> Decimal:
+    try:
+        return Decimal(_clean(value).replace(',', '') or '0')
+    except InvalidOperation:
+        return Decimal('0')
+
+
+def parse_invoice_date(value) -> Optional[date]:
+    text = _clean(value)
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+class InvoiceBatchImport:
+    """Create invoices for a batch of extracted files; see the module docstring."""
+
+    def __init__(self, branch=None, user=None, workers: Optional[int] = None, dry_run: bool = False,
+                 extract: Optional[Callable] = None, batch_size: int = 500):
+        self.branch = branch
+        self.user = user
+        self.workers = workers
+        self.dry_run = dry_run
+        self.extract = extract
+        self.batch_size = max(1, int(batch_size))
+
+    def run(self, items: List[BatchItem]) -> List[BatchItem]:
+        extract_all(items, self.extract, self.workers)
+        self._validate(items)
+        self._match_customers([i for i in items if i.pending])
+        self._match_orders([i for i in items if i.pending])
+        self._check_invoice_numbers([i for i in items if i.pending])
+        ready = [i for i in items if i.pending]
+        if self.dry_run:
+            for item in ready:
+                item.status = 'ready'
+        elif ready:
+            self._create(ready)
+        return items
+
+    def _customers(self):
+        qs = Customer.objects.all()
+        return qs.filter(branch=self.branch) if self.branch else qs
+
+    def _validate(self, items: Iterable[BatchItem]) -> None:
+        for item in items:
+            if not item.pending:
+                continue
+            header = item.header
+            item.invoice_number = _clean(header.get('invoice_no'))
+            item.invoice_date = parse_invoice_date(header.get('date'))
+            item.plate = plate_from_reference(header.get('reference'))
+            item.total = _decimal(header.get('total'))
+            if item.invoice_date is None:
+                item.review('no_date', f"Read {header.get('date')!r}" if header.get('date') else '')
+            elif not item.total and not any(_decimal(i.get('value')) for i in item.items):
+                item.review('no_amount')
+
+    def _match_customers(self, items: List[BatchItem]) -> None:
+        codes = {_clean(i.header.get('code_no')) for i in items} - {''}
+        plates = {i.plate for i in items if i.plate}
+        phones = {normalize_phone(_clean(i.header.get('phone'))) for i in items} - {''}
+
+        by_code = defaultdict(set)
+        for cid, code in self._customers().filter(code__in=codes).values_list('id', 'code'):
+            by_code[code].add(cid)
+        by_plate = defaultdict(set)
+        vehicle_ids = {}
+        vehicles = Vehicle.objects.filter(plate_number__in=plates)
+        if self.branch:
+            vehicles = vehicles.filter(customer__branch=self.branch)
+        for vid, cid, plate in vehicles.order_by('id').values_list('id', 'customer_id', 'plate_number'):
+            by_plate[plate.upper()].add(cid)
+            vehicle_ids.setdefault((cid, plate.upper()), vid)
+        by_phone = defaultdict(set)
+        matches = self._customers().annotate(phone_digits=phone_digits_sql()).filter(phone_digits__in=phones)
+        for cid, phone in matches.values_list('id', 'phone'):
+            if normalize_phone(phone) in phones:
+                by_phone[normalize_phone(phone)].add(cid)
+
+        for item in items:
+            evidence = [
+                (method, ids) for method, ids in (
+                    ('code', by_code.get(_clean(item.header.get('code_no')))),
+                    ('plate', by_plate.get(item.plate)),
+                    ('phone', by_phone.get(normalize_phone(_clean(item.header.get('phone'))))),
+                ) if ids
+            ]
+            if not evidence:
+                item.review('no_customer')
+                continue
+            common = set.intersection(*(ids for _, ids in evidence))
+            if not common:
+                item.review('conflicting_customer', '; '.join(f"{m}: {sorted(ids)}" for m, ids in evidence))
+            elif len(common) > 1:
+                item.review('ambiguous_customer', f"customers {sorted(common)}")
+            else:
+                item.customer_id = common.pop()
+                item.matched_by = '+'.join(m for m, _ in evidence)
+                item.vehicle_id = vehicle_ids.get((item.customer_id, item.plate))
+
+    def _match_orders(self, items: List[BatchItem]) -> None:
+        """Link started orders by customer and vehicle, like the single upload."""
+        vehicle_ids = {i.vehicle_id for i in items if i.vehicle_id}
+        if not vehicle_ids:
+            return
+        started = {}
+        qs = Order.objects.filter(status='created', vehicle_id__in=vehicle_ids)
+        if self.branch:
+            qs = qs.filter(branch=self.branch)
+        for oid, cid, vid in qs.order_by('created_at', 'id').values_list('id', 'customer_id', 'vehicle_id'):
+            started[(cid, vid)] = oid  # newest wins
+        for item in items:
+            item.order_id = started.get((item.customer_id, item.vehicle_id))
+
+    def _check_invoice_numbers(self, items: List[BatchItem]) -> None:
+        numbers = {i.invoice_number for i in items if i.invoice_number}
+        taken = set(Invoice.objects.filter(invoice_number__in=numbers).values_list('invoice_number', flat=True))
+        for item in items:
+            if not item.invoice_number:
+                continue
+            if item.invoice_number in taken:
+                item.review('duplicate_invoice', f"Invoice number {item.invoice_number} already exists")
+            taken.add(item.invoice_number)
+
+    def _new_invoice_numbers(self, count: int) -> List[str]:
+        """Sequential INV-<year>-NNNNN numbers, as Invoice.generate_invoice_number() assigns them."""
+        if not count:
+            return []
+        prefix = f"INV-{datetime.now().year}-"
+        seq = 0
+        for number in Invoice.objects.filter(invoice_number__startswith=prefix).values_list('invoice_number', flat=True):
+            try:
+                seq = max(seq, int(number[len(prefix):]))
+            except ValueError:
+                continue
+        return [f"{prefix}{seq + n:05d}" for n in range(1, count + 1)]
+
+    def _build_invoice(self, item: BatchItem, branch_id, salesperson) -> Invoice:
+        header = item.header
+        subtotal = _decimal(header.get('subtotal'))
+        tax = _decimal(header.get('tax'))
+        if not subtotal:
+            subtotal = sum((_decimal(i.get('value')) for i in item.items), Decimal('0'))
+        notes = [f"Bulk import: {item.name}"]
+        if _clean(header.get('delivery_terms')):
+            notes.append(f"Delivery: {_clean(header.get('delivery_terms'))}")
+        inv = Invoice(
+            invoice_number=item.invoice_number,
+            branch_id=branch_id,
+            order_id=item.order_id,
+            customer_id=item.customer_id,
+            vehicle_id=item.vehicle_id,
+            salesperson=salesperson,
+            invoice_date=item.invoice_date,
+            code_no=_clean(header.get('code_no'))[:128] or None,
+            reference=_clean(header.get('reference'))[:128] or None,
+            subtotal=subtotal,
+            tax_amount=tax,
+            total_amount=item.total or subtotal + tax,
+            notes=' | '.join(notes),
+            remarks=_clean(header.get('remarks')) or None,
+            attended_by=_clean(header.get('attended_by'))[:128] or None,
+            kind_attention=_clean(header.get('kind_attention'))[:128] or None,
+            created_by=self.user,
+        )
+        if item.data:
+            inv.document.save(os.path.basename(item.name), ContentFile(item.data), save=False)
+        return inv
+
+    def _line_items(self, item: BatchItem, invoice_id: int, salesperson, order_types: Dict[str, dict]):
+        seen = set()
+        for row in item.items:
+            description = _clean(row.get('description'))
+            if not description:
+                continue
+            code = _clean(row.get('code')) or None
+            qty = _decimal(row.get('qty') or 1)
+            rate = _decimal(row.get('rate'))
+            value = _decimal(row.get('value')) or qty * rate
+            key = (code or '', description.lower(), _clean(row.get('unit')), str(qty), str(rate), str(value))
+            if key in seen:
+                continue
+            seen.add(key)
+            order_type = order_types.get(code, {}).get('order_type', 'unspecified') if code else 'unspecified'
+            yield InvoiceLineItem(
+                invoice_id=invoice_id,
+                code=code,
+                description=description[:255],
+                quantity=qty,
+                unit=_clean(row.get('unit'))[:16] or None,
+                unit_price=rate,
+                line_total=value,
+                tax_rate=Decimal('0'),
+                tax_amount=Decimal('0'),
+                order_type=order_type,
+                salesperson=salesperson if order_type == 'sales' else None,
+            )
+
+    def _create(self, items: List[BatchItem]) -> None:
+        from . import vehicle_trends
+        from .customer_stats import refresh_spent_on_commit
+        from .org_rollups import queue_rebuild
+
+        missing = [i for i in items if not i.invoice_number]
+        for item, number in zip(missing, self._new_invoice_numbers(len(missing))):
+            item.invoice_number = number
+        customer_branch = dict(Customer.objects.filter(id__in={i.customer_id for i in items}).values_list('id', 'branch_id'))
+        salesperson = Salesperson.get_default()
+        order_types = item_code_categories([r.get('code') for i in items for r in i.items if r.get('code')])
+
+        with transaction.atomic():
+            Invoice.objects.bulk_create(
+                [self._build_invoice(i, self.branch.id if self.branch else customer_branch.get(i.customer_id), salesperson)
+                 for i in items],
+                batch_size=self.batch_size,
+            )
+            # Not every backend returns PKs from bulk_create (MySQL), so map numbers back in one query
+            ids = dict(Invoice.objects.filter(invoice_number__in=[i.invoice_number for i in items])
+                       .values_list('invoice_number', 'id'))
+            line_items = []
+            for item in items:
+                item.invoice_id = ids[item.invoice_number]
+                item.status = 'created'
+                line_items.extend(self._line_items(item, item.invoice_id, salesperson, order_types))
+            InvoiceLineItem.objects.bulk_create(line_items, batch_size=self.batch_size)
+
+            refresh_spent_on_commit({i.customer_id for i in items})
+            dates = defaultdict(set)
+            for item in items:
+                dates[item.customer_id].add(item.invoice_date)
+            for customer_id, moments in dates.items():
+                queue_rebuild(customer_id, *moments)
+            transaction.on_commit(vehicle_trends.invalidate)
+        logger.info(f"Bulk import created {len(items)} invoice(s) with {len(line_items)} line item(s)")
+
+
+def summarize(items: Iterable[BatchItem]) -> dict:
+    items = list(items)
+    return {
+        'files': len(items),
+        'statuses': dict(Counter(i.status for i in items)),
+        'reasons': dict(Counter(i.reason for i in items if i.status == 'review')),
+    }
+
+
+def write_report(items: Iterable[BatchItem], fh, exceptions_only: bool = True) -> int:
+    """Write the batch as CSV (by default only the files needing review); returns rows written."""
+    return write_report_rows((item.report_row() for item in items), fh, exceptions_only)
+
+
+def write_report_rows(rows: Iterable[dict], fh, exceptions_only: bool = True) -> int:
+    """write_report() for stored report rows (InvoiceUploadBatch.items)."""
+    writer = csv.DictWriter(fh, fieldnames=REPORT_FIELDS)
+    writer.writeheader()
+    written = 0
+    for row in rows:
+        if exceptions_only and row['status'] != 'review':
+            continue
+        writer.writerow(row)
+        written += 1
+    return written
+
+
+# ---- Web uploads --------------------------------------------------------------
+
+def queue_upload(fileobj, branch=None, user=None, dry_run: bool = False) -> InvoiceUploadBatch:
+    """Check an uploaded ZIP (archive and file count only) and store it for process_queued()."""
+    try:
+        with zipfile.ZipFile(fileobj) as archive:
+            _check_count(sum(1 for m in archive.infolist() if not m.is_dir() and not _skipped(m.filename)))
+    except zipfile.BadZipFile as e:
+        raise BatchError(f"Not a ZIP archive: {e}")
+    fileobj.seek(0)
+    batch = InvoiceUploadBatch(branch=branch, created_by=user, dry_run=dry_run)
+    batch.archive.save(os.path.basename(getattr(fileobj, 'name', '') or 'invoices.zip'), File(fileobj), save=False)
+    batch.save()
+    logger.info(f"Queued invoice upload {batch.pk} ({batch.archive.name})")
+    return batch
+
+
+def process(batch: InvoiceUploadBatch) -> InvoiceUploadBatch:
+    """Run a stored upload and record its outcome; the archive is deleted once it succeeds."""
+    try:
+        with batch.archive.open('rb') as fh:
+            items = read_zip(fh)
+        InvoiceBatchImport(branch=batch.branch, user=batch.created_by, dry_run=batch.dry_run).run(items)
+    except Exception as e:
+        logger.error(f"Invoice upload {batch.pk} failed: {e}", exc_info=True)
+        batch.status, batch.error = 'failed', str(e)
+    else:
+        batch.status, batch.summary, batch.items = 'done', summarize(items), [item.report_row() for item in items]
+        batch.archive.delete(save=False)
+    batch.finished_at = timezone.now()
+    batch.save()
+    return batch
+
+
+def process_queued() -> int:
+    """Scheduler job: process queued uploads oldest first; returns how many were processed."""
+    # The scheduler runs this job one instance at a time, so a batch still marked running
+    # was cut short by a restart
+    interrupted = InvoiceUploadBatch.objects.filter(status='running').update(
+        status='failed', error='Processing was interrupted; upload the archive again', finished_at=timezone.now())
+    if interrupted:
+        logger.warning(f"Marked {interrupted} interrupted invoice upload(s) as failed")
+    processed = 0
+    while True:
+        batch = InvoiceUploadBatch.objects.filter(status='queued').order_by('created_at', 'pk').first()
+        if batch is None:
+            return processed
+        if not InvoiceUploadBatch.objects.filter(pk=batch.pk, status='queued').update(
+                status='running', started_at=timezone.now()):
+            continue
+        batch.refresh_from_db()
+        process(batch)
+        processed += 1
@@ -0,0 +1,104 @@
+"""
+Filtered, keyset-paginated invoice listing.
+
+Invoices are ordered newest first by (invoice_date, id) and paged with
+tracker.utils.pagination.CursorPaginator, so every page costs the same regardless of
+how deep the user has scrolled (no OFFSET, no COUNT(*)). Rows load
+only the columns the list shows, with customer/order/salesperson joined in the same query.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_date
+
+from tracker.models import Invoice
+from tracker.utils.pagination import CursorPaginator
+
+logger = logging.getLogger(__name__)
+
+LIST_FIELDS = (
+    'id', 'invoice_number', 'invoice_date', 'status', 'total_amount', 'branch',
+    'customer', 'order', 'salesperson',
+    'customer__full_name', 'customer__phone',
+    'order__order_number',
+    'salesperson__name',
+)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvoiceBrowser:
+    """Build the invoice list queryset from request filters and fetch keyset pages.
+
+    Filters (all optional): date_from, date_to, status, salesperson (id),
+    customer (id), q (invoice number / customer name / phone), order (id).
+    Branch scoping is applied by the caller (scope_queryset) before passing `base`.
+    """
+
+    FILTER_KEYS = ('date_from', 'date_to', 'status', 'salesperson', 'customer', 'q')
+
+    def __init__(self, base: QuerySet, params: Dict[str, Any], order_id: Optional[int] = None):
+        self.base = base
+        self.order_id = order_id
+        self.filters = {k: (params.get(k) or '').strip() for k in self.FILTER_KEYS}
+
+    def queryset(self) -> QuerySet:
+        qs = self.base
+        f = self.filters
+        if self.order_id:
+            qs = qs.filter(order_id=self.order_id)
+        date_from = self._date(f['date_from'])
+        date_to = self._date(f['date_to'])
+        if date_from:
+            qs = qs.filter(invoice_date__gte=date_from)
+        if date_to:
+            qs = qs.filter(invoice_date__lte=date_to)
+        if f['status']:
+            qs = qs.filter(status=f['status'])
+        if f['salesperson'].isdigit():
+            qs = qs.filter(salesperson_id=int(f['salesperson']))
+        if f['customer'].isdigit():
+            qs = qs.filter(customer_id=int(f['customer']))
+        if f['q']:
+            qs = qs.filter(
+                Q(invoice_number__icontains=f['q'])
+                | Q(customer__full_name__icontains=f['q'])
+                | Q(customer__phone__icontains=f['q'])
+            )
+        return (
+            qs.select_related('customer', 'order', 'salesperson')
+            .only(*LIST_FIELDS)
+            .order_by('-invoice_date', '-id')
+        )
+
+    @staticmethod
+    def _date(value: str):
+        """The filter's date, or None when missing or not a real date (e.g. 2024-02-30), ignoring the filter."""
+        try:
+            return parse_date(value) if value else None
+        except ValueError:
+            return None
+
+    def page(self, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Invoice], Optional[str]]:
+        """Return (invoices, next_cursor); next_cursor is None on the last page."""
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        page = CursorPaginator(self.queryset(), ordering=('-invoice_date', '-id'), per_page=limit).page(cursor)
+        return page.object_list, page.next_cursor
+
+    @staticmethod
+    def serialize(invoice: Invoice) -> Dict[str, Any]:
+        return {
+            'id': invoice.id,
+            'invoice_number': invoice.invoice_number,
+            'invoice_date': invoice.invoice_date.isoformat() if invoice.invoice_date else None,
+            'status': invoice.status,
+            'status_display': invoice.get_status_display(),
+            'total_amount': float(invoice.total_amount or 0),
+            'customer_id': invoice.customer.id if invoice.customer_id else None,
+            'customer_name': invoice.customer.full_name if invoice.customer_id else '',
+            'order_id': invoice.order.id if invoice.order_id else None,
+            'order_number': invoice.order.order_number if invoice.order_id else None,
+            'salesperson': invoice.salesperson.name if invoice.salesperson_id else None,
+        }
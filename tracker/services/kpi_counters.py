@@ -0,0 +1,166 @@
+"""
+Cached KPI counters for list pages.
+
+The orders, customers and inquiries lists show header counts over the whole (branch-scoped)
+table. Those used to be 3-9 COUNT(*) queries on every page turn; here each counter set is a
+single conditional aggregate whose result is cached per (set, branch scope, day):
+  - write hooks (signals in tracker.signals) bump a per-set version so the next read recomputes
+  - entries also expire after KPI_CACHE_TTL seconds, which covers bulk .update() calls that
+    bypass signals
+  - refresh_all() recomputes every set for every branch (refresh_kpi_counters command). With a
+    shared cache (CACHE_SHARED) the scheduler runs it every few minutes so readers rarely hit a
+    cold cache. With the default per-process cache neither it nor the write hooks reach other
+    workers, so KPI_CACHE_TTL defaults to 30 seconds there and the scheduler skips it.
+"""
+
+import logging
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, QuerySet
+from django.utils import timezone
+
+from tracker.models import Branch, Customer, Order
+
+logger = logging.getLogger(__name__)
+
+KPI_CACHE_TTL = getattr(settings, 'KPI_CACHE_TTL', 300)
+
+ALL_BRANCHES = 'all'
+
+
+def _temp_customer_q(prefix: str = '') -> Q:
+    """Placeholder customers created from a bare plate number ("Plate X" / "PLATE_...")."""
+    return Q(**{f'{prefix}full_name__startswith': 'Plate ', f'{prefix}phone__startswith': 'PLATE_'})
+
+
+def _orders_base() -> QuerySet:
+    return Order.objects.exclude(_temp_customer_q('customer__'))
+
+
+def _orders_counts(qs: QuerySet, today) -> Dict[str, int]:
+    return qs.aggregate(
+        total_orders=Count('id'),
+        pending_orders=Count('id', filter=Q(status='created')),
+        active_orders=Count('id', filter=Q(status__in=['created', 'in_progress', 'overdue'])),
+        completed_today=Count('id', filter=Q(status='completed', completed_at__date=today)),
+        urgent_orders=Count('id', filter=Q(priority='urgent')),
+        overdue_count=Count('id', filter=Q(status='overdue')),
+    )
+
+
+def _started_counts(qs: QuerySet, today) -> Dict[str, int]:
+    counts = qs.aggregate(
+        started_total=Count('id', filter=Q(status__in=['created', 'in_progress', 'overdue'])),
+        started_pending=Count('id', filter=Q(status='in_progress')),
+        started_completed=Count('id', filter=Q(status='completed')),
+    )
+    try:
+        from tracker.models import DocumentScan
+    except ImportError:
+        # Document scanning is not part of every deployment
+        counts['documents_uploaded'] = 0
+    else:
+        counts['documents_uploaded'] = DocumentScan.objects.filter(
+            order__in=qs.filter(status__in=['created', 'in_progress', 'overdue']).values('id')
+        ).count()
+    return counts
+
+
+def _customers_counts(qs: QuerySet, today) -> Dict[str, int]:
+    return qs.aggregate(
+        total_customers=Count('id'),
+        active_customers=Count('id', filter=Q(last_visit__date=today)),
+        new_customers_today=Count('id', filter=Q(registration_date__date=today)),
+        returning_customers=Count('id', filter=Q(total_visits__gt=1)),
+    )
+
+
+def _inquiries_counts(qs: QuerySet, today) -> Dict[str, int]:
+    from tracker.services.inquiries import counts
+    return counts(qs, today)
+
+
+# name -> (base queryset factory, compute(qs, today), models whose writes invalidate it)
+COUNTER_SETS: Dict[str, tuple] = {
+    'orders': (_orders_base, _orders_counts, (Order,)),
+    'started_orders': (lambda: Order.objects.all(), _started_counts, (Order,)),
+    'customers': (lambda: Customer.objects.exclude(_temp_customer_q()), _customers_counts, (Customer,)),
+    'inquiries': (lambda: Order.objects.filter(type='inquiry'), _inquiries_counts, (Order,)),
+}
+
+
+def _version(name: str) -> int:
+    return cache.get_or_set(f'kpi:{name}:version', 1, None)
+
+
+def _key(name: str, scope, today) -> str:
+    return f'kpi:{name}:v{_version(name)}:{scope}:{today.isoformat()}'
+
+
+def scope_for(user, request=None) -> Optional[object]:
+    """Branch scope matching tracker.utils.scope_queryset: a branch id, ALL_BRANCHES,
+    or None when the user may not see anything (nothing is cached then)."""
+    from tracker.utils import get_user_branch
+
+    branch = get_user_branch(user)
+    if branch:
+        return branch.id
+    if not getattr(user, 'is_superuser', False):
+        return None
+    ref = (request.GET.get('branch') or '').strip() if request is not None else ''
+    if not ref:
+        return ALL_BRANCHES
+    if ref.isdigit():
+        return int(ref)
+    found = Branch.objects.filter(name__iexact=ref).values_list('id', flat=True).first()
+    return found if found else ALL_BRANCHES
+
+
+def _scoped(name: str, scope) -> QuerySet:
+    qs = COUNTER_SETS[name][0]()
+    return qs if scope == ALL_BRANCHES else qs.filter(branch_id=scope)
+
+
+def get_counts(name: str, scope, today=None) -> Dict[str, int]:
+    """Cached counters for one set and scope (see scope_for)."""
+    today = today or timezone.localdate()
+    _base, compute, _models = COUNTER_SETS[name]
+    if scope is None:
+        return {k: v or 0 for k, v in compute(_base().none(), today).items()}
+    key = _key(name, scope, today)
+    counts = cache.get(key)
+    if counts is None:
+        counts = {k: v or 0 for k, v in compute(_scoped(name, scope), today).items()}
+        cache.set(key, counts, KPI_CACHE_TTL)
+    return counts
+
+
+def invalidate(names: Optional[Iterable[str]] = None) -> None:
+    """Make the next read of the given sets (default: all) recompute."""
+    for name in names or COUNTER_SETS:
+        key = f'kpi:{name}:version'
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 2, None)
+
+
+def invalidate_for_model(model) -> None:
+    invalidate([name for name, (_b, _c, models) in COUNTER_SETS.items() if model in models])
+
+
+def refresh_all(names: Optional[Iterable[str]] = None) -> int:
+    """Recompute and store every set for every active branch and for all branches."""
+    today = timezone.localdate()
+    scopes = [ALL_BRANCHES] + list(Branch.objects.filter(is_active=True).values_list('id', flat=True))
+    refreshed = 0
+    for name in names or COUNTER_SETS:
+        _base, compute, _models = COUNTER_SETS[name]
+        for scope in scopes:
+            counts = {k: v or 0 for k, v in compute(_scoped(name, scope), today).items()}
+            cache.set(_key(name, scope, today), counts, KPI_CACHE_TTL)
+            refreshed += 1
+    logger.debug(f"Refreshed {refreshed} KPI counter entries")
+    return refreshed
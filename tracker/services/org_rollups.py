@@ -0,0 +1,300 @@
+"""
+Monthly rollups for organisation customers (government, NGO and company accounts).
+
+The organisation report used to aggregate every order of every organisation in the period
+(`Order.objects.filter(customer__in=<customer subquery>)`) on each page view and export.
+OrganizationMonthlyRollup keeps one row per customer and local calendar month instead:
+  - order and invoice signals (tracker.signals) queue the touched (customer, month) pairs and
+    rebuild() recomputes just those rows when the transaction commits, so however many times
+    an order is saved in one request its month is rebuilt once
+  - a customer whose type or branch changes has all of its months rebuilt (or dropped when it
+    is no longer an organisation)
+  - rebuild_all() backfills everything, for the first deploy and after bulk imports that skip
+    signals (`python manage.py rebuild_org_rollups`)
+  - archived orders and invoices (tracker.services.archive) still count, so moving history
+    out of the hot tables leaves the rows unchanged
+
+Periods are whole calendar months: a "30 days" filter covers the current and previous month,
+and any range, including all history, costs one indexed scan of the rollup table.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import (
+    Count, DateField, DecimalField, IntegerField, Max, OuterRef, Q, QuerySet, Subquery, Sum, Value,
+)
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from tracker.models import (
+    ArchivedInvoice, ArchivedOrder, Customer, Invoice, Order, OrganizationMonthlyRollup, Vehicle,
+)
+from tracker.utils.transactions import on_commit_batch
+
+logger = logging.getLogger(__name__)
+
+ORG_TYPES = ('government', 'ngo', 'company')
+
+# Invoices that do not count towards gross (same rule as customer_stats)
+EXCLUDED_INVOICE_STATUSES = ('cancelled',)
+
+COUNT_FIELDS = (
+    'orders', 'service_orders', 'sales_orders', 'inquiry_orders', 'completed_orders', 'cancelled_orders',
+    'invoice_count',
+)
+
+# Rolling periods offered by the report, in days; None means all history
+PERIODS = {'1month': 30, '3months': 90, '6months': 180, '1year': 365, '2years': 730, 'all': None}
+DEFAULT_PERIOD = '6months'
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + (month.month == 12), month.month % 12 + 1, 1)
+
+
+def _local_month(moment: Optional[datetime]) -> Optional[date]:
+    if moment is None:
+        return None
+    return month_start(timezone.localdate(moment) if timezone.is_aware(moment) else moment.date())
+
+
+def _month_bounds(start: date, end: date) -> Tuple[datetime, datetime]:
+    """Aware datetimes covering local months start..end inclusive."""
+    return (timezone.make_aware(datetime.combine(start, time.min)),
+            timezone.make_aware(datetime.combine(_next_month(end), time.min)))
+
+
+def parse_month(value: Optional[str]) -> Optional[date]:
+    """'YYYY-MM' (or a full ISO date) to the first of that month; None when blank or invalid."""
+    value = (value or '').strip()
+    if not value:
+        return None
+    try:
+        return month_start(date.fromisoformat(value if len(value) > 7 else f"{value}-01"))
+    except ValueError:
+        return None
+
+
+def period_months(period: str, today: Optional[date] = None,
+                  start: Optional[str] = None, end: Optional[str] = None) -> Tuple[Optional[date], date]:
+    """(first month, last month) for a named period or explicit YYYY-MM bounds.
+
+    Explicit bounds win over the period; a None first month means all history.
+    """
+    today = today or timezone.localdate()
+    last = parse_month(end) or month_start(today)
+    first = parse_month(start)
+    if first is None and not start:
+        days = PERIODS.get(period, PERIODS[DEFAULT_PERIOD])
+        first = month_start(today - timezone.timedelta(days=days)) if days is not None else None
+    if first and first > last:
+        first, last = last, first
+    return first, last
+
+
+# ---- Maintenance ---------------------------------------------------------------
+
+def rebuild(customer_ids: Iterable[int], start: Optional[date] = None, end: Optional[date] = None) -> int:
+    """Recompute the rollup rows of the given customers for months start..end (all if None).
+
+    Non-organisation customers end up with no rows. Returns the number of rows written.
+    """
+    ids = {int(i) for i in customer_ids if i}
+    if not ids:
+        return 0
+    tz = timezone.get_current_timezone()
+    org_ids = dict(Customer.objects.filter(pk__in=ids, customer_type__in=ORG_TYPES).values_list('pk', 'branch_id'))
+
+    order_sets = [Order.objects.filter(customer_id__in=org_ids), ArchivedOrder.objects.filter(customer_id__in=org_ids)]
+    invoice_sets = [model.objects.filter(customer_id__in=org_ids).exclude(status__in=EXCLUDED_INVOICE_STATUSES)
+                    for model in (Invoice, ArchivedInvoice)]
+    stale = OrganizationMonthlyRollup.objects.filter(customer_id__in=ids)
+    if start and end:
+        # Rows of customers that stopped being organisations go on their full rebuild
+        # (see queue_rebuild with no moments), so a monthly rebuild only touches organisations
+        if not org_ids:
+            return 0
+        stale = stale.filter(customer_id__in=org_ids)
+        lower, upper = _month_bounds(start, end)
+        order_sets = [qs.filter(created_at__gte=lower, created_at__lt=upper) for qs in order_sets]
+        invoice_sets = [qs.filter(invoice_date__gte=start, invoice_date__lt=_next_month(end)) for qs in invoice_sets]
+        stale = stale.filter(month__gte=start, month__lte=end)
+
+    rows: Dict[Tuple[int, date], OrganizationMonthlyRollup] = {}
+
+    def row(customer_id, month):
+        key = (customer_id, month)
+        if key not in rows:
+            rows[key] = OrganizationMonthlyRollup(customer_id=customer_id, month=month, branch_id=org_ids[customer_id])
+        return rows[key]
+
+    def later(current, moment):
+        return moment if moment and (current is None or moment > current) else current
+
+    for orders in order_sets if org_ids else ():
+        for r in (
+            orders.annotate(m=TruncMonth('created_at', tzinfo=tz, output_field=DateField()))
+            .values('customer_id', 'm')
+            .annotate(
+                orders=Count('id'),
+                service_orders=Count('id', filter=Q(type='service')),
+                sales_orders=Count('id', filter=Q(type='sales')),
+                inquiry_orders=Count('id', filter=Q(type='inquiry')),
+                completed_orders=Count('id', filter=Q(status='completed')),
+                cancelled_orders=Count('id', filter=Q(status='cancelled')),
+                last_order_at=Max('created_at'),
+            )
+            .order_by()
+        ):
+            rollup = row(r['customer_id'], r['m'])
+            for field in COUNT_FIELDS[:-1]:
+                setattr(rollup, field, getattr(rollup, field) + r[field])
+            rollup.last_order_at = later(rollup.last_order_at, r['last_order_at'])
+            rollup.last_activity_at = later(rollup.last_activity_at, r['last_order_at'])
+
+    for invoices in invoice_sets if org_ids else ():
+        for r in (
+            invoices.annotate(m=TruncMonth('invoice_date', output_field=DateField()))
+            .values('customer_id', 'm')
+            .annotate(n=Count('id'), gross=Sum('total_amount'), last=Max('created_at'))
+            .order_by()
+        ):
+            rollup = row(r['customer_id'], r['m'])
+            rollup.invoice_count += r['n']
+            rollup.invoice_gross += r['gross'] or Decimal('0')
+            rollup.last_activity_at = later(rollup.last_activity_at, r['last'])
+
+    with transaction.atomic():
+        stale.delete()
+        OrganizationMonthlyRollup.objects.bulk_create(rows.values(), batch_size=500)
+    return len(rows)
+
+
+def _flush_pending(pending: Dict[int, Optional[set]]) -> None:
+    """Rebuild a committed transaction's queued {customer id: months, or None for all months}."""
+    # Customers sharing the same month span are rebuilt together
+    groups: Dict[Tuple[Optional[date], Optional[date]], List[int]] = defaultdict(list)
+    for customer_id, months in pending.items():
+        groups[(min(months), max(months)) if months else (None, None)].append(customer_id)
+    for (start, end), ids in groups.items():
+        try:
+            rebuild(ids, start, end)
+        except Exception:
+            logger.exception(f"Failed to rebuild organisation rollups for customers {ids}")
+
+
+def queue_rebuild(customer_id: Optional[int], *moments) -> None:
+    """Rebuild the customer's months containing `moments` (datetimes or dates) on commit.
+
+    With no moments every month of the customer is rebuilt. Each transaction queues its
+    own batch (tracker.utils.transactions.on_commit_batch).
+    """
+    if not customer_id:
+        return
+    months = {_local_month(m) if isinstance(m, datetime) else month_start(m) for m in moments if m}
+    if moments and not months:
+        return
+
+    def add(pending: Dict[int, Optional[set]]) -> None:
+        if pending.get(customer_id, ()) is None:
+            return
+        if not moments:
+            pending[customer_id] = None
+        else:
+            pending.setdefault(customer_id, set()).update(months)
+
+    on_commit_batch(_flush_pending, dict, add)
+
+
+def rebuild_all(batch_size: int = 500) -> int:
+    """Rebuild every organisation's rollups and drop rows of non-organisation customers."""
+    OrganizationMonthlyRollup.objects.exclude(customer__customer_type__in=ORG_TYPES).delete()
+    ids = list(Customer.objects.filter(customer_type__in=ORG_TYPES).order_by('pk').values_list('pk', flat=True))
+    written = 0
+    for i in range(0, len(ids), batch_size):
+        written += rebuild(ids[i:i + batch_size])
+    logger.info(f"Rebuilt {written} organisation rollup rows for {len(ids)} customers")
+    return written
+
+
+# ---- Reading -------------------------------------------------------------------
+
+def org_filter(q: str = '', status: str = '', prefix: str = '') -> Q:
+    """Organisation customer filter of the report, optionally through a relation prefix."""
+    cond = Q(**{f'{prefix}customer_type__in': ORG_TYPES})
+    if q:
+        cond &= (
+            Q(**{f'{prefix}full_name__icontains': q}) | Q(**{f'{prefix}phone__icontains': q})
+            | Q(**{f'{prefix}email__icontains': q}) | Q(**{f'{prefix}organization_name__icontains': q})
+            | Q(**{f'{prefix}code__icontains': q})
+        )
+    if status == 'returning':
+        cond &= Q(**{f'{prefix}total_visits__gt': 1})
+    return cond
+
+
+def _in_range(start: Optional[date], end: date, prefix: str = '') -> Q:
+    cond = Q(**{f'{prefix}month__lte': end})
+    if start:
+        cond &= Q(**{f'{prefix}month__gte': start})
+    return cond
+
+
+def annotate_customers(customers: QuerySet, start: Optional[date], end: date) -> QuerySet:
+    """Add the report's per-customer period columns from the rollup table.
+
+    recent_orders_count, service/sales/inquiry/completed/cancelled_orders and invoice_gross
+    cover start..end; last_order_date is all-time; vehicles_count is a correlated count so it
+    is not multiplied by the rollup join.
+    """
+    in_range = _in_range(start, end, 'monthly_rollups__')
+
+    def total(field, output=IntegerField()):
+        zero = Value(Decimal('0') if isinstance(output, DecimalField) else 0)
+        return Coalesce(Sum(f'monthly_rollups__{field}', filter=in_range), zero, output_field=output)
+
+    vehicles = (
+        Vehicle.objects.filter(customer=OuterRef('pk')).order_by().values('customer')
+        .annotate(c=Count('id')).values('c')[:1]
+    )
+    return customers.annotate(
+        recent_orders_count=total('orders'),
+        service_orders=total('service_orders'),
+        sales_orders=total('sales_orders'),
+        inquiry_orders=total('inquiry_orders'),
+        completed_orders=total('completed_orders'),
+        cancelled_orders=total('cancelled_orders'),
+        invoice_gross=total('invoice_gross', DecimalField(max_digits=14, decimal_places=2)),
+        last_order_date=Max('monthly_rollups__last_order_at'),
+        last_activity=Max('monthly_rollups__last_activity_at'),
+        vehicles_count=Coalesce(Subquery(vehicles), 0),
+    )
+
+
+def monthly_series(rollups: QuerySet, start: Optional[date], end: date) -> List[dict]:
+    """Per-month totals across the given rollup rows, oldest first."""
+    totals = {f: Sum(f) for f in COUNT_FIELDS}
+    rows = (
+        rollups.filter(_in_range(start, end)).values('month')
+        .annotate(**totals, invoice_gross=Sum('invoice_gross'), last_activity=Max('last_activity_at'))
+        .order_by('month')
+    )
+    return [dict(r, invoice_gross=r['invoice_gross'] or Decimal('0')) for r in rows]
+
+
+def summarize(series: List[dict]) -> dict:
+    """Totals over a monthly_series() result."""
+    summary = {f: sum(r[f] for r in series) for f in COUNT_FIELDS}
+    summary['invoice_gross'] = sum((r['invoice_gross'] for r in series), Decimal('0'))
+    activity = [r['last_activity'] for r in series if r['last_activity']]
+    summary['last_activity'] = max(activity) if activity else None
+    return summary
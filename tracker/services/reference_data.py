@@ -0,0 +1,207 @@
+"""
+Versioned cache for reference data: service types, add-ons, inventory items, brands,
+salespersons, labour codes and branch working calendars.
+
+These lists change rarely but were re-queried (and re-serialised) on every form render and
+every modal open. Each dataset here is built once per version:
+  - every source model has a version counter in the cache; a dataset's key is made of the
+    versions of the models it reads, so bumping one model's version (invalidate(), called
+    from one post_save/post_delete receiver per model in tracker.signals) retires every
+    dataset built from it. clear_inventory_cache also bumps InventoryItem, which covers the
+    ledger's F() updates that bypass signals.
+  - the entry holds the rows, their JSON bytes and an ETag, so JSON endpoints write the
+    stored bytes instead of serialising the catalogue again (json_response) and answer
+    If-None-Match with 304
+  - the newest entry per dataset is also kept in process memory, so a warm read costs one
+    cache round-trip for the versions
+  - the versions only reach other processes through a shared cache (CACHE_SHARED). With the
+    default per-process cache a write in one gunicorn worker (or the scheduler) does not retire
+    another worker's entries, so REFDATA_CACHE_TTL defaults to seconds and bounds how long
+    they keep serving the old rows; the in-memory copy honours the same TTL
+"""
+
+import hashlib
+import json
+import logging
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Sum
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+
+from tracker.models import Branch, Brand, Holiday, InventoryItem, LabourCode, Salesperson, ServiceAddon, ServiceType
+
+logger = logging.getLogger(__name__)
+
+REFDATA_CACHE_TTL = getattr(settings, 'REFDATA_CACHE_TTL', 60 * 60 * 24)
+
+
+def _service_types() -> List[dict]:
+    return [
+        {'id': s.id, 'name': s.name, 'estimated_minutes': int(s.estimated_minutes or 0)}
+        for s in ServiceType.objects.filter(is_active=True).order_by('name')
+    ]
+
+
+def _service_addons() -> List[dict]:
+    return [
+        {'id': a.id, 'name': a.name, 'estimated_minutes': int(a.estimated_minutes or 0)}
+        for a in ServiceAddon.objects.filter(is_active=True).order_by('name')
+    ]
+
+
+def _inventory_items() -> List[dict]:
+    return [
+        {
+            'id': item.id,
+            'name': item.name,
+            'brand_id': item.brand_id,
+            'brand': item.brand.name if item.brand else 'Unbranded',
+            'quantity': item.quantity or 0,
+            'price': float(item.price or 0),
+        }
+        for item in InventoryItem.objects.select_related('brand').filter(is_active=True).order_by('brand__name', 'name')
+    ]
+
+
+def _inventory_totals() -> List[dict]:
+    rows = (
+        InventoryItem.objects
+        .annotate(brand_name=F('brand__name'))
+        .values('name', 'brand_name')
+        .annotate(total_quantity=Sum('quantity'))
+        .order_by('brand_name', 'name')
+    )
+    return [{'name': r['name'], 'brand': r['brand_name'], 'quantity': r['total_quantity'] or 0} for r in rows]
+
+
+def _brands() -> List[dict]:
+    return list(Brand.objects.filter(is_active=True).order_by('name').values('id', 'name'))
+
+
+def _salespersons() -> List[dict]:
+    return list(Salesperson.objects.filter(is_active=True).order_by('code').values('id', 'code', 'name', 'is_default'))
+
+
+def _labour_codes() -> List[dict]:
+    return [
+        {'id': lc.id, 'code': lc.code, 'item_name': lc.item_name, 'description': lc.description, 'brand': lc.brand or 'N/A'}
+        for lc in LabourCode.objects.filter(is_active=True).order_by('code')
+    ]
+
+
+def _working_calendars() -> List[dict]:
+    """One row per branch plus a branch_id None row holding the all-branch holidays."""
+    holidays: Dict[Optional[int], List[str]] = {}
+    for branch_id, day in Holiday.objects.order_by('date').values_list('branch_id', 'date'):
+        holidays.setdefault(branch_id, []).append(day.isoformat())
+    rows = [{'branch_id': None, 'holidays': holidays.get(None, [])}]
+    for b in Branch.objects.order_by('id').values('id', 'work_start', 'work_end', 'work_days'):
+        rows.append({
+            'branch_id': b['id'],
+            'start': b['work_start'].strftime('%H:%M:%S'),
+            'end': b['work_end'].strftime('%H:%M:%S'),
+            'work_days': b['work_days'],
+            'holidays': holidays.get(b['id'], []),
+        })
+    return rows
+
+
+# name -> (loader, models whose writes make it stale)
+DATASETS: Dict[str, Tuple[Callable[[], List[dict]], tuple]] = {
+    'service_types': (_service_types, (ServiceType,)),
+    'service_addons': (_service_addons, (ServiceAddon,)),
+    'inventory_items': (_inventory_items, (InventoryItem, Brand)),
+    'inventory_totals': (_inventory_totals, (InventoryItem, Brand)),
+    'brands': (_brands, (Brand,)),
+    'salespersons': (_salespersons, (Salesperson,)),
+    'labour_codes': (_labour_codes, (LabourCode,)),
+    'working_calendars': (_working_calendars, (Branch, Holiday)),
+}
+
+MODELS = tuple({m for _loader, models in DATASETS.values() for m in models})
+
+# name -> (cache key, entry, expiry on the time.monotonic() clock) for the newest entry this process has seen
+_local: Dict[str, Tuple[str, dict, float]] = {}
+
+
+def _version_key(model) -> str:
+    return f'refdata:version:{model._meta.label_lower}'
+
+
+def _key(name: str) -> str:
+    models = DATASETS[name][1]
+    keys = [_version_key(m) for m in models]
+    versions = cache.get_many(keys)
+    for k in keys:
+        if k not in versions:
+            # Start from a timestamp, not 1, so an emptied cache never matches _local's entry
+            stamp = int(time.time() * 1000)
+            cache.add(k, stamp, None)
+            versions[k] = cache.get(k, stamp)
+    return f'refdata:{name}:' + '.'.join(str(versions[k]) for k in keys)
+
+
+def _build(name: str) -> dict:
+    rows = DATASETS[name][0]()
+    body = json.dumps(rows, separators=(',', ':'), default=str).encode()
+    return {'rows': rows, 'json': body, 'etag': hashlib.md5(body).hexdigest()}
+
+
+def _entry(name: str) -> dict:
+    key = _key(name)
+    local = _local.get(name)
+    if local and local[0] == key and local[2] > time.monotonic():
+        return local[1]
+    entry = cache.get(key)
+    if entry is None:
+        entry = _build(name)
+        cache.set(key, entry, REFDATA_CACHE_TTL)
+    _local[name] = (key, entry, time.monotonic() + REFDATA_CACHE_TTL)
+    return entry
+
+
+def get(name: str) -> List[dict]:
+    """Rows of a dataset. Treat them as read-only: they are shared between requests."""
+    return _entry(name)['rows']
+
+
+def get_json(name: str) -> bytes:
+    return _entry(name)['json']
+
+
+def invalidate(models: Optional[Iterable] = None) -> None:
+    """Retire every dataset built from the given models (default: all)."""
+    for model in models or MODELS:
+        key = _version_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, int(time.time() * 1000), None)
+
+
+def json_response(request, parts: Dict[str, str], extra: Optional[dict] = None, status: int = 200) -> HttpResponse:
+    """JSON object whose `parts` keys hold datasets' stored bytes, plus small `extra` keys.
+
+    The ETag combines the datasets' ETags, so an unchanged catalogue answers 304 without
+    a body. Responses are private and must be revalidated on every use.
+    """
+    entries = {key: _entry(name) for key, name in parts.items()}
+    extra_json = json.dumps(extra or {}, separators=(',', ':'), sort_keys=True, default=str)
+    tag = hashlib.md5(
+        ('|'.join(f"{k}:{e['etag']}" for k, e in entries.items()) + extra_json).encode()
+    ).hexdigest()
+    etag = f'"{tag}"'
+
+    if etag in [t.strip() for t in request.headers.get('If-None-Match', '').split(',')]:
+        response = HttpResponseNotModified()
+    else:
+        chunks = [json.dumps(k).encode() + b':' + e['json'] for k, e in entries.items()]
+        chunks += [json.dumps(k).encode() + b':' + json.dumps(v, default=str).encode() for k, v in (extra or {}).items()]
+        response = HttpResponse(b'{' + b','.join(chunks) + b'}', content_type='application/json', status=status)
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,256 @@
+"""
+Single-request customer registration.
+
+The customer_register wizard spreads registration over four POSTs, reloading the
+catalogs each time and checking for duplicates with several queries. register() takes
+the whole payload at once:
+  - catalog references (inventory item, service types, add-ons) are resolved by id with
+    one query per catalog
+  - duplicates are found with one query across all branches, comparing phone digits
+    whatever separators were stored; a same-branch match is refused, other branches only
+    produce a warning
+  - customer, vehicle, order, stock reservation and the first visit are written in one
+    transaction, so a failure (e.g. not enough stock) leaves nothing behind
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from tracker.models import Branch, Customer, InventoryItem, Order, ServiceAddon, ServiceType, Vehicle
+from tracker.utils import normalize_phone, phone_digits_sql
+
+logger = logging.getLogger(__name__)
+
+ORDER_TYPES = ('service', 'sales', 'inquiry')
+
+
+class RegistrationError(ValueError):
+    """Invalid or conflicting registration payload; `status` is the HTTP status to return."""
+
+    def __init__(self, error: str, message: str, status: int = 400, **extra):
+        super().__init__(message)
+        self.error = error
+        self.message = message
+        self.status = status
+        self.extra = extra
+
+
+@dataclass
+class RegistrationResult:
+    customer: Customer
+    vehicle: Optional[Vehicle] = None
+    order: Optional[Order] = None
+    remaining_stock: Optional[int] = None
+    warnings: List[str] = field(default_factory=list)
+
+
+def _canonical_phone(phone: str) -> str:
+    """Digits in +255 form, so 0712 345 678 and +255 712 345 678 compare equal."""
+    digits = normalize_phone(phone or '')
+    if digits.startswith('0') and len(digits) == 10:
+        return '255' + digits[1:]
+    return digits
+
+
+def _phone_keys(phone: str) -> List[str]:
+    """Separator-free digits a stored spelling of this number can have (+255 and local 0 forms)."""
+    digits = normalize_phone(phone)
+    canonical = _canonical_phone(phone)
+    keys = {digits, canonical}
+    if canonical.startswith('255') and len(canonical) == 12:
+        keys.add('0' + canonical[3:])
+    return sorted(k for k in keys if k)
+
+
+def find_duplicates(full_name: str, phone: str, organization_name: Optional[str] = None,
+                    tax_number: Optional[str] = None) -> List[Customer]:
+    """Customers in any branch with the same identity, matching phones on their digits in one query."""
+    canonical = _canonical_phone(phone)
+    name = (full_name or '').strip().lower()
+    candidates = (Customer.objects.select_related('branch')
+                  .annotate(phone_digits=phone_digits_sql()).filter(phone_digits__in=_phone_keys(phone)))
+    matches = []
+    for c in candidates:
+        if (c.full_name or '').strip().lower() != name or _canonical_phone(c.phone) != canonical:
+            continue
+        if organization_name and (c.organization_name or '') != organization_name:
+            continue
+        if tax_number and (c.tax_number or '') != tax_number:
+            continue
+        matches.append(c)
+    return matches
+
+
+def _ids(values) -> List[int]:
+    if values in (None, ''):
+        return []
+    if not isinstance(values, (list, tuple)):
+        values = [values]
+    try:
+        return [int(v) for v in values]
+    except (TypeError, ValueError):
+        raise RegistrationError('invalid_reference', 'Catalog references must be numeric ids')
+
+
+def _resolve_catalogs(order_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Load every catalog row the order refers to, one query per catalog."""
+    order_type = order_data.get('type')
+    resolved: Dict[str, Any] = {'item': None, 'services': [], 'addons': []}
+    if order_type == 'sales':
+        item_ids = _ids(order_data.get('item_id'))
+        if len(item_ids) != 1:
+            raise RegistrationError('invalid_order', 'Sales orders need exactly one item_id')
+        items = InventoryItem.objects.select_related('brand').filter(is_active=True).in_bulk(item_ids)
+        if not items:
+            raise RegistrationError('invalid_reference', 'Selected item not found in inventory', status=404)
+        resolved['item'] = items[item_ids[0]]
+        addon_ids = _ids(order_data.get('addon_ids'))
+        if addon_ids:
+            resolved['addons'] = list(ServiceAddon.objects.filter(is_active=True, id__in=addon_ids))
+    elif order_type == 'service':
+        service_ids = _ids(order_data.get('service_ids'))
+        if service_ids:
+            resolved['services'] = list(ServiceType.objects.filter(is_active=True, id__in=service_ids))
+        if len(resolved['services']) != len(set(service_ids)):
+            raise RegistrationError('invalid_reference', 'One or more services were not found', status=404)
+    return resolved
+
+
+def _build_order(order_data: Dict[str, Any], catalogs: Dict[str, Any], customer: Customer,
+                 vehicle: Optional[Vehicle], branch: Optional[Branch]) -> Order:
+    order_type = order_data['type']
+    description = (order_data.get('description') or '').strip()
+    priority = order_data.get('priority') if order_data.get('priority') in dict(Order.PRIORITY_CHOICES) else 'medium'
+    order = Order(customer=customer, vehicle=vehicle, branch=branch, type=order_type,
+                  status='created', priority=priority)
+
+    if order_type == 'sales':
+        item = catalogs['item']
+        try:
+            quantity = int(order_data.get('quantity') or 0)
+        except (TypeError, ValueError):
+            quantity = 0
+        if quantity <= 0:
+            raise RegistrationError('invalid_order', 'Invalid quantity')
+        tire_type = (order_data.get('tire_type') or 'New').strip()
+        addon_names = [a.name for a in catalogs['addons']]
+        desc_addons = (", addons: " + ", ".join(addon_names)) if addon_names else ""
+        brand_name = item.brand.name if item.brand else ''
+        order.item_name = item.name
+        order.brand = brand_name
+        order.quantity = quantity
+        order.tire_type = tire_type
+        order.description = description or f"Tire Sales: {item.name} ({brand_name}) - {tire_type}{desc_addons}"
+        order.estimated_duration = sum(int(a.estimated_minutes or 0) for a in catalogs['addons']) or None
+    elif order_type == 'service':
+        names = [s.name for s in catalogs['services']]
+        desc_svcs = (", services: " + ", ".join(names)) if names else ""
+        order.description = description or f"Car Service{desc_svcs}"
+        try:
+            estimated = int(order_data['estimated_duration']) if order_data.get('estimated_duration') else None
+        except (TypeError, ValueError):
+            estimated = None
+        order.estimated_duration = estimated or sum(int(s.estimated_minutes or 0) for s in catalogs['services']) or None
+    else:
+        inquiry_type = (order_data.get('inquiry_type') or '').strip() or None
+        questions = (order_data.get('questions') or '').strip() or None
+        order.inquiry_type = inquiry_type
+        order.questions = questions
+        order.contact_preference = (order_data.get('contact_preference') or '').strip() or None
+        order.follow_up_date = parse_date(str(order_data.get('follow_up_date') or '')) or None
+        order.description = description or f"Inquiry: {inquiry_type} - {questions}"
+    return order
+
+
+def register(payload: Dict[str, Any], branch: Optional[Branch], user=None) -> RegistrationResult:
+    """Validate and create a customer with optional vehicle and order from one payload.
+
+    payload = {
+        "customer": {full_name, phone, customer_type, whatsapp?, email?, address?, notes?,
+                     organization_name?, tax_number?, personal_subtype?},
+        "vehicle": {plate_number, make?, model?, vehicle_type?},          # optional
+        "order": {type: service|sales|inquiry, description?, priority?,  # optional
+                  service: service_ids, estimated_duration?
+                  sales: item_id, quantity, tire_type?, addon_ids?
+                  inquiry: inquiry_type, questions, contact_preference?, follow_up_date?},
+    }
+    """
+    from tracker.forms import CustomerStep1Form
+    from tracker.services import inventory_ledger
+
+    form = CustomerStep1Form(data=payload.get('customer') or {})
+    if not form.is_valid():
+        raise RegistrationError('invalid_customer', 'Please correct the customer details',
+                                errors={k: [str(e) for e in v] for k, v in form.errors.items()})
+    data = form.cleaned_data
+    org_name = (data.get('organization_name') or '').strip() or None
+    tax_num = (data.get('tax_number') or '').strip() or None
+
+    vehicle_data = payload.get('vehicle') or {}
+    plate = (vehicle_data.get('plate_number') or '').strip().upper()
+    order_data = payload.get('order') or {}
+    if order_data and order_data.get('type') not in ORDER_TYPES:
+        raise RegistrationError('invalid_order', f"Order type must be one of: {', '.join(ORDER_TYPES)}")
+    catalogs = _resolve_catalogs(order_data) if order_data else {}
+
+    result_warnings = []
+    for dup in find_duplicates(data['full_name'], data['phone'], org_name, tax_num):
+        if branch is not None and dup.branch_id == branch.id:
+            raise RegistrationError('duplicate_customer', f"Customer '{dup.full_name}' already exists in your branch.",
+                                    status=409, customer_id=dup.id)
+        result_warnings.append(
+            f"A customer with the same identity exists in {dup.branch.name if dup.branch else 'another branch'}. "
+            f"A separate customer was created for your branch."
+        )
+
+    now = timezone.now()
+    with transaction.atomic():
+        customer = Customer.objects.create(
+            branch=branch,
+            full_name=data['full_name'].strip(),
+            phone=data['phone'].strip(),
+            whatsapp=data.get('whatsapp') or None,
+            email=data.get('email') or None,
+            address=(data.get('address') or '').strip() or None,
+            notes=(data.get('notes') or '').strip() or None,
+            customer_type=data.get('customer_type') or 'personal',
+            organization_name=org_name,
+            tax_number=tax_num,
+            personal_subtype=data.get('personal_subtype') or None,
+            arrival_time=now,
+            current_status='arrived',
+            # An order is this customer's first visit
+            last_visit=now if order_data else None,
+            total_visits=1 if order_data else 0,
+        )
+        vehicle = None
+        if plate:
+            vehicle = Vehicle.objects.create(
+                customer=customer,
+                plate_number=plate,
+                make=(vehicle_data.get('make') or '').strip() or None,
+                model=(vehicle_data.get('model') or '').strip() or None,
+                vehicle_type=(vehicle_data.get('vehicle_type') or '').strip() or None,
+            )
+        order = None
+        remaining = None
+        if order_data:
+            order = _build_order(order_data, catalogs, customer, vehicle, branch)
+            order.save()
+            if order.type == 'sales':
+                try:
+                    _ok, _status, remaining = inventory_ledger.reserve_for_order(
+                        order, user, item=catalogs['item'], strict=True
+                    )
+                except inventory_ledger.InsufficientStock as e:
+                    raise RegistrationError('insufficient_stock', f"Only {e.available} in stock for {e.item.name}",
+                                            status=409, available=e.available)
+
+    logger.info(f"Registered customer {customer.id}" + (f" with order {order.id}" if order else ""))
+    return RegistrationResult(customer=customer, vehicle=vehicle, order=order,
+                              remaining_stock=remaining, warnings=result_warnings)
@@ -0,0 +1,263 @@
+"""
+Per-request timing and SQL instrumentation (fed by tracker.middleware.RequestMetricsMiddleware).
+
+For every request the middleware measures wall time and, through
+connection.execute_wrapper, the number and total time of SQL statements. Statements are
+grouped by fingerprint (literals, placeholders and IN-lists collapsed) so a loop issuing the
+same query per row shows up as one fingerprint repeated N times.
+
+Per view (URL name) this module keeps, in process memory:
+  - histograms of wall time and query count, plus DB time and error counts
+  - the fingerprints most repeated within single requests (the N+1 candidates)
+Requests slower than REQUEST_METRICS_SLOW_MS or issuing more than
+REQUEST_METRICS_SLOW_QUERIES statements are logged to the 'tracker.slow_requests' logger
+(sampled by REQUEST_METRICS_SLOW_SAMPLE_RATE) and the latest REQUEST_METRICS_SLOW_KEEP are
+kept for the console page.
+
+The middleware publishes the request's recorder in the `current` ContextVar, and every
+database connection gets one execute_wrapper (installed when it connects) that hands its
+statements to that recorder. Under ASGI a request's queries run on other threads than the
+middleware: sync views and sync middleware on sync_to_async's thread, async views' ORM calls
+on tracker.utils.async_db's pool. Those threads run with the request's context, so their
+queries reach its recorder too.
+
+snapshot() and prometheus_text() export the data. Every worker process has its own
+numbers, so aggregate scrapes over workers (or run one worker) when comparing.
+"""
+
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger('tracker.slow_requests')
+
+DURATION_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+QUERY_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+TOP_FINGERPRINTS = 10  # Kept per view
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*(?:\?|%s|\d+|NULL)\s*,?)+\)', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql: str) -> str:
+    """SQL with literals and IN-lists collapsed, so per-row repeats of a query compare equal."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql).replace('%s', '?')
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def enabled() -> bool:
+    return getattr(settings, 'REQUEST_METRICS_ENABLED', True)
+
+
+class QueryRecorder:
+    """execute_wrapper callable collecting the statements of one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()  # raw SQL (placeholders, not values) -> executions
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+
+    def repeated(self, limit: int = 5) -> List[tuple]:
+        """(fingerprint, executions) for statements run more than once, most repeated first."""
+        counts = Counter()
+        for sql, n in self.statements.items():
+            counts[fingerprint(sql)] += n
+        return [(fp, n) for fp, n in counts.most_common(limit) if n > 1]
+
+
+# Recorder of the request being handled (set by the middleware)
+current: ContextVar[Optional[QueryRecorder]] = ContextVar('request_metrics_recorder', default=None)
+
+
+def _record_statement(execute, sql, params, many, context):
+    recorder = current.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install(sender=None, connection=None, **kwargs) -> None:
+    """connection_created receiver: count the connection's statements for the current request."""
+    if _record_statement not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_statement)
+
+
+class _Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)  # the last one is +Inf
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.total += value
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def cumulative(self) -> List[tuple]:
+        running, out = 0, []
+        for bound, n in zip(list(self.bounds) + ['+Inf'], self.buckets):
+            running += n
+            out.append((bound, running))
+        return out
+
+
+class _ViewStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.slow = 0
+        self.db_seconds = 0.0
+        self.duration = _Histogram(DURATION_BUCKETS_MS)
+        self.queries = _Histogram(QUERY_BUCKETS)
+        self.max_ms = 0.0
+        self.max_queries = 0
+        self.repeated: Dict[str, dict] = {}  # fingerprint -> {'max': per-request max, 'requests': n}
+
+    def as_dict(self) -> dict:
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'slow': self.slow,
+            'avg_ms': round(self.duration.total / self.requests, 1) if self.requests else 0,
+            'max_ms': round(self.max_ms, 1),
+            'avg_queries': round(self.queries.total / self.requests, 1) if self.requests else 0,
+            'max_queries': self.max_queries,
+            'db_ms': round(self.db_seconds * 1000, 1),
+            'duration_buckets': self.duration.cumulative(),
+            'query_buckets': self.queries.cumulative(),
+            'repeated_sql': sorted(
+                ({'fingerprint': fp, **v} for fp, v in self.repeated.items()),
+                key=lambda r: (-r['max'], -r['requests']),
+            ),
+        }
+
+
+_lock = threading.Lock()
+_views: Dict[str, _ViewStats] = {}
+_slow: deque = deque(maxlen=getattr(settings, 'REQUEST_METRICS_SLOW_KEEP', 100))
+_started_at = timezone.now()
+
+
+def record(view: str, method: str, path: str, status: int, seconds: float, recorder: QueryRecorder,
+           user: Optional[str] = None) -> None:
+    """Add one finished request to the per-view statistics (and the slow log if it qualifies)."""
+    ms = seconds * 1000
+    repeated = recorder.repeated()
+    slow = (ms >= getattr(settings, 'REQUEST_METRICS_SLOW_MS', 1000)
+            or recorder.count >= getattr(settings, 'REQUEST_METRICS_SLOW_QUERIES', 100))
+    with _lock:
+        stats = _views.get(view)
+        if stats is None:
+            stats = _views[view] = _ViewStats()
+        stats.requests += 1
+        stats.errors += status >= 500
+        stats.slow += slow
+        stats.db_seconds += recorder.seconds
+        stats.duration.observe(ms)
+        stats.queries.observe(recorder.count)
+        stats.max_ms = max(stats.max_ms, ms)
+        stats.max_queries = max(stats.max_queries, recorder.count)
+        for fp, n in repeated:
+            entry = stats.repeated.setdefault(fp, {'max': 0, 'requests': 0})
+            entry['max'] = max(entry['max'], n)
+            entry['requests'] += 1
+        if len(stats.repeated) > TOP_FINGERPRINTS * 2:
+            keep = sorted(stats.repeated.items(), key=lambda kv: (-kv[1]['max'], -kv[1]['requests']))[:TOP_FINGERPRINTS]
+            stats.repeated = dict(keep)
+
+    if slow and random.random() < getattr(settings, 'REQUEST_METRICS_SLOW_SAMPLE_RATE', 1.0):
+        entry = {
+            'at': timezone.now().isoformat(timespec='seconds'),
+            'view': view,
+            'method': method,
+            'path': path,
+            'status': status,
+            'ms': round(ms, 1),
+            'queries': recorder.count,
+            'db_ms': round(recorder.seconds * 1000, 1),
+            'user': user,
+            'repeated_sql': [{'fingerprint': fp, 'count': n} for fp, n in repeated],
+        }
+        _slow.appendleft(entry)
+        slow_logger.warning(json.dumps(entry))
+
+
+def snapshot() -> dict:
+    with _lock:
+        views = {name: stats.as_dict() for name, stats in _views.items()}
+        slow = list(_slow)
+    return {'since': _started_at.isoformat(timespec='seconds'), 'views': views, 'slow_requests': slow}
+
+
+def reset() -> None:
+    global _started_at
+    with _lock:
+        _views.clear()
+        _slow.clear()
+        _started_at = timezone.now()
+
+
+def _label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text() -> str:
+    """The histograms in the Prometheus text exposition format (version 0.0.4)."""
+    with _lock:
+        items = [(name, stats.as_dict(), stats) for name, stats in sorted(_views.items())]
+    lines = [
+        '# HELP tracker_request_duration_seconds Wall time of requests by view.',
+        '# TYPE tracker_request_duration_seconds histogram',
+    ]
+    for name, data, stats in items:
+        for bound, n in data['duration_buckets']:
+            le = bound if bound == '+Inf' else f"{bound / 1000:g}"
+            lines.append(f'tracker_request_duration_seconds_bucket{{view="{_label(name)}",le="{le}"}} {n}')
+        lines.append(f'tracker_request_duration_seconds_sum{{view="{_label(name)}"}} {stats.duration.total / 1000:.6f}')
+        lines.append(f'tracker_request_duration_seconds_count{{view="{_label(name)}"}} {data["requests"]}')
+    lines += [
+        '# HELP tracker_request_db_queries SQL statements per request by view.',
+        '# TYPE tracker_request_db_queries histogram',
+    ]
+    for name, data, stats in items:
+        for bound, n in data['query_buckets']:
+            lines.append(f'tracker_request_db_queries_bucket{{view="{_label(name)}",le="{bound}"}} {n}')
+        lines.append(f'tracker_request_db_queries_sum{{view="{_label(name)}"}} {stats.queries.total:g}')
+        lines.append(f'tracker_request_db_queries_count{{view="{_label(name)}"}} {data["requests"]}')
+    lines += [
+        '# HELP tracker_request_db_seconds_total Time spent in SQL by view.',
+        '# TYPE tracker_request_db_seconds_total counter',
+    ]
+    lines += [f'tracker_request_db_seconds_total{{view="{_label(name)}"}} {stats.db_seconds:.6f}' for name, _data, stats in items]
+    lines += [
+        '# HELP tracker_request_errors_total Requests answered with a 5xx status by view.',
+        '# TYPE tracker_request_errors_total counter',
+    ]
+    lines += [f'tracker_request_errors_total{{view="{_label(name)}"}} {data["errors"]}' for name, data, _stats in items]
+    return '\n'.join(lines) + '\n'
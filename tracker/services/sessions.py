@@ -0,0 +1,54 @@
+"""
+Session housekeeping.
+
+Django never deletes expired rows from django_session on its own, so the table grew with
+every login. clear_expired() runs daily from the scheduler (tracker.scheduler); Django's
+`python manage.py clearsessions` does the same on demand.
+
+check_engine() runs at startup (TrackerConfig.ready): the cached_db and cache engines keep
+sessions in the "sessions" cache, and a per-process cache there would let the other workers
+keep accepting a session after it was logged out or flushed in one of them.
+"""
+
+import logging
+from importlib import import_module
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENGINES = ('django.contrib.sessions.backends.cached_db', 'django.contrib.sessions.backends.cache')
+
+
+def clear_expired() -> int:
+    """Delete expired sessions; returns the number of django_session rows removed.
+
+    Rows are purged whatever SESSION_ENGINE is in use, so a deployment that moved to the
+    cache or signed-cookie backend still drains the table it left behind. Cache and file
+    backends then get their own clear_expired() call.
+    """
+    deleted, _ = Session.objects.filter(expire_date__lt=timezone.now()).delete()
+    store = import_module(settings.SESSION_ENGINE).SessionStore
+    if not issubclass(store, import_module('django.contrib.sessions.backends.db').SessionStore):
+        try:
+            store.clear_expired()
+        except NotImplementedError:
+            pass
+    logger.info(f"Cleared {deleted} expired sessions")
+    return deleted
+
+
+def check_engine() -> None:
+    """Refuse a cache-backed SESSION_ENGINE on a per-process cache when several workers serve requests."""
+    if settings.SESSION_ENGINE not in CACHE_ENGINES or getattr(settings, 'WEB_CONCURRENCY', 1) <= 1:
+        return
+    backend = settings.CACHES.get(settings.SESSION_CACHE_ALIAS, {}).get('BACKEND', '')
+    if backend.endswith('.LocMemCache'):
+        raise ImproperlyConfigured(
+            f"SESSION_ENGINE {settings.SESSION_ENGINE} with a LocMemCache '{settings.SESSION_CACHE_ALIAS}' cache "
+            f"and WEB_CONCURRENCY={settings.WEB_CONCURRENCY}: each worker would keep its own copy of every "
+            "session. Use SESSION_BACKEND=db, or a shared SESSION_CACHE_BACKEND (redis, memcached, file)."
+        )
@@ -0,0 +1,144 @@
+"""
+Query helpers for the started-orders dashboard.
+
+The dashboard used to iterate the whole filtered queryset in Python to group orders by
+plate and then ran separate count/group-by queries for its KPI cards. These helpers push
+that work into the database:
+  - started_order_counts(): all KPI counts in one conditional aggregate
+  - plate_summary(): one GROUP BY plate query that yields unique plates, per-plate
+    counts and the "repeated vehicles today" figure
+  - plate_groups_page(): plate-grouped pagination; orders for the plates on a page are
+    fetched ordered by (plate, started_at) and grouped while streaming
+"""
+
+from itertools import groupby
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from django.core.paginator import Paginator
+from django.db.models import Count, Max, Min, Q, QuerySet
+from django.utils.functional import cached_property
+
+ACTIVE_STATUSES = ('created', 'in_progress', 'overdue')
+UNKNOWN_PLATE = 'Unknown'
+
+
+def started_orders_filter(status_filter: str, search_query: str, today) -> Q:
+    """Q object describing the orders listed on the dashboard."""
+    if status_filter:
+        q = Q(status=status_filter)
+    else:
+        # Default: active orders (including overdue) + completed today
+        q = Q(status__in=ACTIVE_STATUSES) | Q(status='completed', completed_at__date=today)
+    if search_query:
+        q &= Q(vehicle__plate_number__icontains=search_query) | Q(customer__full_name__icontains=search_query)
+    return q
+
+
+def started_order_counts(base_orders: QuerySet, today, statuses: Iterable[str] = ACTIVE_STATUSES) -> Dict[str, int]:
+    """Total active orders and active orders created today, in a single query."""
+    statuses = list(statuses)
+    result = base_orders.aggregate(
+        total_started=Count('id', filter=Q(status__in=statuses)),
+        today_started=Count('id', filter=Q(status__in=statuses, created_at__date=today)),
+    )
+    return {k: v or 0 for k, v in result.items()}
+
+
+def plate_summary(base_orders: QuerySet, list_q: Q, today) -> Dict[str, object]:
+    """Compact per-plate summary over the listed orders plus today's orders.
+
+    Returns {'plates': [rows ordered by plate], 'unique_plates', 'listed_orders',
+    'repeated_vehicles_today'} where each row has plate, order_count, today_count,
+    active_count, first_started and last_started for the listed orders.
+    """
+    today_q = Q(created_at__date=today)
+    rows = (
+        base_orders.filter(list_q | today_q)
+        .values('vehicle__plate_number')
+        .annotate(
+            order_count=Count('id', filter=list_q),
+            today_count=Count('id', filter=today_q & Q(vehicle__isnull=False)),
+            active_count=Count('id', filter=list_q & Q(status__in=ACTIVE_STATUSES)),
+            first_started=Min('started_at', filter=list_q),
+            last_started=Max('started_at', filter=list_q),
+        )
+        .order_by('vehicle__plate_number')
+    )
+    plates = []
+    repeated_today = 0
+    listed = 0
+    for row in rows:
+        if row['today_count'] >= 2:
+            repeated_today += 1
+        if not row['order_count']:
+            continue
+        listed += row['order_count']
+        plates.append({
+            'plate': row['vehicle__plate_number'] or UNKNOWN_PLATE,
+            'has_vehicle': row['vehicle__plate_number'] is not None,
+            'order_count': row['order_count'],
+            'today_count': row['today_count'],
+            'active_count': row['active_count'],
+            'first_started': row['first_started'],
+            'last_started': row['last_started'],
+        })
+    return {
+        'plates': plates,
+        'unique_plates': len(plates),
+        'listed_orders': listed,
+        'repeated_vehicles_today': repeated_today,
+    }
+
+
+def iter_plate_groups(orders: QuerySet, chunk_size: int = 200) -> Iterator[tuple]:
+    """Yield (plate, [orders]) groups from a queryset ordered by plate, streaming rows."""
+    ordered = orders.order_by('vehicle__plate_number', 'started_at', 'id')
+    rows = ordered.iterator(chunk_size=chunk_size)
+    for plate, group in groupby(rows, key=lambda o: o.vehicle.plate_number if o.vehicle_id else UNKNOWN_PLATE):
+        yield plate, list(group)
+
+
+class KnownCountPaginator(Paginator):
+    """Paginator that reuses a count already computed elsewhere instead of issuing COUNT(*)."""
+
+    def __init__(self, object_list, per_page, count: int, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._known_count = count
+
+    @cached_property
+    def count(self):
+        return self._known_count
+
+
+def plate_groups_page(orders: QuerySet, summary: Dict[str, object], page_number, per_page: int = 20):
+    """Paginate by plate and return (page, groups).
+
+    `page` is a Page over the summary rows; `groups` is a list of
+    {'plate', 'summary', 'orders'} for the plates on that page.
+    """
+    plates: List[dict] = summary['plates']
+    paginator = Paginator(plates, per_page)
+    page = paginator.get_page(page_number)
+    page_rows = list(page.object_list)
+    if not page_rows:
+        return page, []
+
+    named = [r['plate'] for r in page_rows if r['has_vehicle']]
+    plate_q = Q(vehicle__plate_number__in=named)
+    if any(not r['has_vehicle'] for r in page_rows):
+        plate_q |= Q(vehicle__isnull=True)
+    by_plate = {r['plate']: r for r in page_rows}
+    groups = [
+        {'plate': plate, 'summary': by_plate.get(plate), 'orders': group}
+        for plate, group in iter_plate_groups(orders.filter(plate_q))
+    ]
+    return page, groups
+
+
+def paginate_orders(orders: QuerySet, page_number, per_page: int, count: Optional[int] = None):
+    """Flat pagination; pass `count` when it is already known to skip the COUNT query."""
+    if count is None:
+        paginator = Paginator(orders, per_page)
+    else:
+        paginator = KnownCountPaginator(orders, per_page, count)
+    return paginator.get_page(page_number)
@@ -0,0 +1,138 @@
+"""
+Vehicle spending trends for the vehicle tracking analytics tab.
+
+api_vehicle_analytics used to load every invoice of the branch, filter the date range and
+group by day/week/month in Python, then re-query the invoices with an id__in list of every
+id in range. Here each part of the response is one grouped query over
+invoice_date BETWEEN start AND end, which the (branch, invoice_date, id) and
+(invoice_date, id) indexes cover:
+  - trends: TruncDay/TruncWeek/TruncMonth with Sum(total_amount), Count(id) and
+    Count(vehicle, distinct=True)
+  - spending_by_type: grouped by the linked order's type
+  - top_vehicles: grouped by vehicle, with the plate and owner joined in
+
+The whole result is cached per (branch scope, period, start, end). Invoice writes
+(tracker.signals) bump a version so the next read recomputes; bulk writes that bypass
+signals call invalidate() themselves, and entries expire after VEHICLE_TRENDS_CACHE_TTL.
+The version lives in the default cache, so with a per-process cache a write made in one
+process (a web worker, or the scheduler processing bulk uploads) reaches the others only
+through that TTL, which then defaults to 30 seconds.
+"""
+
+import logging
+from datetime import date
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, QuerySet, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+
+from tracker.models import Invoice
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {
+    'daily': TruncDay,
+    'weekly': TruncWeek,  # Weeks start on Monday
+    'monthly': TruncMonth,
+}
+DEFAULT_PERIOD = 'monthly'
+ALL_BRANCHES = 'all'
+VEHICLE_TRENDS_CACHE_TTL = getattr(settings, 'VEHICLE_TRENDS_CACHE_TTL', 600)
+_VERSION_KEY = 'vehicle_trends:version'
+
+
+def invoices_in_range(branch_id, start: date, end: date) -> QuerySet:
+    qs = Invoice.objects.filter(invoice_date__range=(start, end))
+    return qs if branch_id in (None, ALL_BRANCHES) else qs.filter(branch_id=branch_id)
+
+
+def _float(value) -> float:
+    return float(value or 0)
+
+
+def trends(qs: QuerySet, period: str = DEFAULT_PERIOD) -> List[dict]:
+    trunc = PERIODS.get(period, PERIODS[DEFAULT_PERIOD])
+    rows = (
+        qs.annotate(bucket=trunc('invoice_date'))
+        .values('bucket')
+        .annotate(total=Sum('total_amount'), invoices=Count('id'), vehicles=Count('vehicle', distinct=True))
+        .order_by('bucket')
+    )
+    return [
+        {
+            'date': row['bucket'].isoformat() if row['bucket'] else '',
+            'total_amount': _float(row['total']),
+            'invoice_count': row['invoices'],
+            'vehicle_count': row['vehicles'],
+        }
+        for row in rows
+    ]
+
+
+def spending_by_type(qs: QuerySet) -> List[dict]:
+    rows = (
+        qs.filter(order__type__isnull=False)
+        .values('order__type')
+        .annotate(total=Sum('total_amount'), count=Count('id'))
+        .order_by('-total')
+    )
+    return [
+        {
+            'type': row['order__type'],
+            'total': _float(row['total']),
+            'count': row['count'],
+            'average': _float(row['total']) / row['count'] if row['count'] else 0,
+        }
+        for row in rows
+    ]
+
+
+def top_vehicles(qs: QuerySet, limit: int = 10) -> List[dict]:
+    """Vehicles with the highest invoiced total in the range."""
+    rows = (
+        qs.filter(vehicle__isnull=False)
+        .values('vehicle_id', 'vehicle__plate_number', 'vehicle__customer__full_name')
+        .annotate(total=Sum('total_amount'), count=Count('id'))
+        .order_by('-total', 'vehicle_id')[:limit]
+    )
+    return [
+        {
+            'plate_number': row['vehicle__plate_number'],
+            'customer_name': row['vehicle__customer__full_name'],
+            'total_spent': _float(row['total']),
+            'invoice_count': row['count'],
+            'average_per_invoice': _float(row['total']) / row['count'] if row['count'] else 0,
+        }
+        for row in rows
+    ]
+
+
+def _version() -> int:
+    return cache.get_or_set(_VERSION_KEY, 1, None)
+
+
+def analytics(branch_id, start: date, end: date, period: str = DEFAULT_PERIOD) -> Dict[str, list]:
+    """Trends, spending by order type and top vehicles for one branch (None = all) and range."""
+    period = period if period in PERIODS else DEFAULT_PERIOD
+    scope = branch_id or ALL_BRANCHES
+    key = f"vehicle_trends:v{_version()}:{scope}:{period}:{start.isoformat()}:{end.isoformat()}"
+    data = cache.get(key)
+    if data is None:
+        qs = invoices_in_range(scope, start, end)
+        data = {
+            'trends': trends(qs, period),
+            'spending_by_type': spending_by_type(qs),
+            'top_vehicles': top_vehicles(qs),
+        }
+        cache.set(key, data, VEHICLE_TRENDS_CACHE_TTL)
+    return data
+
+
+def invalidate() -> None:
+    """Make the next read of every cached range recompute."""
+    try:
+        cache.incr(_VERSION_KEY)
+    except ValueError:
+        cache.set(_VERSION_KEY, 2, None)
@@ -32,3 +32,111 @@ def on_user_login_failed(sender, credentials, request, **kwargs):
     ua = (request.META.get('HTTP_USER_AGENT') if request else '') or ''
     ua = ua[:200]
     add_audit_log(None, 'login_failed', f'Username: {username} from {ip or "?"} UA: {ua}')
+
+
+# ---- KPI counter invalidation ----------------------------------------------
+
+from django.db.models.signals import post_delete, post_save  # noqa: E402
+
+from .models import Customer, Order  # noqa: E402
+
+
+@receiver([post_save, post_delete], sender=Order)
+@receiver([post_save, post_delete], sender=Customer)
+def on_kpi_source_changed(sender, **kwargs):
+    from .services.kpi_counters import invalidate_for_model
+    invalidate_for_model(sender)
+
+
+# ---- Reference-data cache invalidation ---------------------------------------
+
+from .models import Branch, Brand, Holiday, InventoryItem, LabourCode, Salesperson, ServiceAddon, ServiceType  # noqa: E402
+
+
+@receiver([post_save, post_delete], sender=ServiceType)
+@receiver([post_save, post_delete], sender=ServiceAddon)
+@receiver([post_save, post_delete], sender=InventoryItem)
+@receiver([post_save, post_delete], sender=Brand)
+@receiver([post_save, post_delete], sender=Salesperson)
+@receiver([post_save, post_delete], sender=LabourCode)
+@receiver([post_save, post_delete], sender=Branch)
+@receiver([post_save, post_delete], sender=Holiday)
+def on_reference_data_changed(sender, **kwargs):
+    from .services.reference_data import invalidate
+    invalidate([sender])
+
+
+# ---- Customer spending (total_spent) -----------------------------------------
+
+from django.db.models.signals import post_init  # noqa: E402
+
+from .models import Invoice  # noqa: E402
+
+
+@receiver(post_init, sender=Invoice)
+def remember_invoice_customer(sender, instance, **kwargs):
+    # Lets post_save refresh the previous customer too when an invoice is reassigned
+    instance._stats_customer_id = instance.__dict__.get('customer_id')
+
+
+@receiver([post_save, post_delete], sender=Invoice)
+def on_invoice_changed(sender, instance, **kwargs):
+    from .services.customer_stats import refresh_spent_on_commit
+    refresh_spent_on_commit({instance.customer_id, getattr(instance, '_stats_customer_id', None)})
+    instance._stats_customer_id = instance.customer_id
+
+
+# ---- Vehicle spending trends ---------------------------------------------------
+
+@receiver([post_save, post_delete], sender=Invoice)
+def on_vehicle_trend_source_changed(sender, **kwargs):
+    from .services.vehicle_trends import invalidate
+    invalidate()
+
+
+# ---- Organisation monthly rollups --------------------------------------------
+
+def _customer_type_of(instance):
+    # Uses the customer already loaded on the instance, if any; None means unknown
+    customer = instance._state.fields_cache.get('customer')
+    return customer.customer_type if customer is not None else None
+
+
+@receiver(post_init, sender=Order)
+@receiver(post_init, sender=Invoice)
+def remember_rollup_key(sender, instance, **kwargs):
+    # The (customer, month) a row counted towards before this save, so moving it updates both
+    data = instance.__dict__
+    instance._rollup_key = (data.get('customer_id'), data.get('created_at' if sender is Order else 'invoice_date'))
+
+
+@receiver([post_save, post_delete], sender=Order)
+@receiver([post_save, post_delete], sender=Invoice)
+def on_rollup_source_changed(sender, instance, **kwargs):
+    from .services.org_rollups import ORG_TYPES, queue_rebuild
+
+    moment = instance.created_at if sender is Order else instance.invoice_date
+    old_customer, old_moment = getattr(instance, '_rollup_key', (None, None))
+    instance._rollup_key = (instance.customer_id, moment)
+    customer_type = _customer_type_of(instance)
+    if old_customer in (None, instance.customer_id) and customer_type is not None and customer_type not in ORG_TYPES:
+        return
+    if old_customer and old_customer != instance.customer_id:
+        queue_rebuild(old_customer, old_moment)
+        queue_rebuild(instance.customer_id, moment)
+    else:
+        queue_rebuild(instance.customer_id, moment, old_moment)
+
+
+@receiver(post_init, sender=Customer)
+def remember_customer_rollup_state(sender, instance, **kwargs):
+    instance._rollup_state = (instance.__dict__.get('customer_type'), instance.__dict__.get('branch_id'))
+
+
+@receiver(post_save, sender=Customer)
+def on_customer_rollup_state_changed(sender, instance, created, **kwargs):
+    state = (instance.customer_type, instance.branch_id)
+    if not created and state != getattr(instance, '_rollup_state', state):
+        from .services.org_rollups import queue_rebuild
+        queue_rebuild(instance.pk)
+    instance._rollup_state = state
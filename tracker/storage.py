@@ -0,0 +1,180 @@
+"""
+Static files storage for production builds.
+
+collectstatic with this backend:
+  1. minifies CSS/JS as it writes them (skipping files that are already *.min.*),
+  2. writes content-hashed copies plus staticfiles.json (ManifestStaticFilesStorage),
+  3. pre-generates .gz (and .br when the `brotli` package is installed) siblings
+     so StaticAssetMiddleware can serve them without compressing per request.
+
+Missing files referenced from CSS/templates fall back to their unhashed name instead
+of aborting the build, since several vendor stylesheets point at assets we don't ship.
+"""
+
+import contextlib
+import gzip
+import hashlib
+import io
+import logging
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli  # optional; gzip is always produced
+except ImportError:  # pragma: no cover - depends on environment
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Extensions that are already compressed (or too small to be worth it)
+INCOMPRESSIBLE_EXTENSIONS = {
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.jfif', '.ico',
+    '.woff', '.woff2', '.zip', '.gz', '.br', '.mp4', '.mp3', '.pdf',
+}
+MIN_COMPRESS_SIZE = 1024
+# Only keep a compressed variant if it saves at least 5%
+MIN_COMPRESS_RATIO = 0.95
+# css_html_js_minify is regex-heavy and takes minutes on the 1.3MB theme stylesheet;
+# larger files go through the fast conservative stripper instead.
+LIBRARY_CSS_MAX_BYTES = 200 * 1024
+
+_CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+_CSS_SPACE_RE = re.compile(r'\s+')
+_CSS_PUNCT_RE = re.compile(r'\s*([{};,])\s*')
+
+
+def _strip_css(css: str) -> str:
+    """Conservative CSS minifier: drop comments and collapse whitespace.
+    Used when css_html_js_minify cannot parse a stylesheet (e.g. space-separated rgb()).
+    """
+    css = _CSS_COMMENT_RE.sub('', css)
+    css = _CSS_SPACE_RE.sub(' ', css)
+    css = _CSS_PUNCT_RE.sub(r'\1', css)
+    return css.replace(';}', '}').strip()
+
+
+def minify_source(name: str, text: str) -> str:
+    """Return minified CSS/JS source for `name`, or the original text if it can't be minified safely."""
+    lower = name.lower()
+    if '.min.' in lower:
+        return text
+    kinds = getattr(settings, 'STATICFILES_MINIFY', ('css', 'js'))
+    try:
+        from css_html_js_minify import css_minify, js_minify
+    except ImportError:  # pragma: no cover - dependency listed in requirements
+        css_minify = js_minify = None
+
+    if lower.endswith('.css') and 'css' in kinds:
+        if css_minify and len(text) <= LIBRARY_CSS_MAX_BYTES:
+            try:
+                # The library prints deprecation chatter to stdout
+                with contextlib.redirect_stdout(io.StringIO()):
+                    return css_minify(text, comments=False)
+            except Exception:
+                pass
+        return _strip_css(text)
+
+    if lower.endswith('.js') and 'js' in kinds and js_minify:
+        # js_minify only understands ES5; leave template literals / modules untouched
+        if '`' in text or re.search(r'^\s*(import|export)\s', text, re.M):
+            return text
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                return js_minify(text)
+        except Exception:
+            return text
+    return text
+
+
+def compress_variants(data: bytes) -> dict:
+    """Return {'.gz': bytes, '.br': bytes} for variants that are worth keeping."""
+    variants = {}
+    if len(data) < MIN_COMPRESS_SIZE:
+        return variants
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gz) < len(data) * MIN_COMPRESS_RATIO:
+        variants['.gz'] = gz
+    if brotli is not None:
+        br = brotli.compress(data, quality=11)
+        if len(br) < len(data) * MIN_COMPRESS_RATIO:
+            variants['.br'] = br
+    return variants
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage that minifies on copy and precompresses hashed output."""
+
+    manifest_strict = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # digest -> minified text; post_process rewrites adjustable CSS several times per build
+        self._minified = {}
+
+    def _minify(self, name: str, text: str) -> str:
+        key = hashlib.md5(text.encode('utf-8')).hexdigest()
+        result = self._minified.get(key)
+        if result is None:
+            result = minify_source(name, text)
+            self._minified[key] = result
+            self._minified[hashlib.md5(result.encode('utf-8')).hexdigest()] = result
+        return result
+
+    def _save(self, name, content):
+        # Both the collectstatic copy and the hashed copies written by post_process go through
+        # here; post_process reads from the *source* files, so minify on every save.
+        if name.lower().endswith(('.css', '.js')):
+            try:
+                content.seek(0)
+                raw = content.read()
+                text = raw.decode('utf-8') if isinstance(raw, bytes) else raw
+            except (UnicodeDecodeError, AttributeError):
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+            else:
+                minified = self._minify(name, text)
+                content = ContentFile(minified.encode('utf-8'))
+        return super()._save(name, content)
+
+    def hashed_name(self, name, content=None, filename=None):
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            # Referenced file doesn't exist (broken vendor url() or missing build); keep the plain name
+            logger.debug("Static file %s not found; serving unhashed name", filename or name)
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            return
+        hashed = []
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed.append(hashed_name)
+            yield name, hashed_name, processed
+
+        # Compress both the hashed and original names so unhashed fallbacks are served compressed too
+        for name in sorted(set(hashed) | set(paths)):
+            self.compress_file(name)
+
+    def compress_file(self, name: str) -> bool:
+        """Write precompressed siblings for `name`. Returns True if any variant was written."""
+        if os.path.splitext(name)[1].lower() in INCOMPRESSIBLE_EXTENSIONS:
+            return False
+        try:
+            with self.open(name) as fh:
+                data = fh.read()
+        except OSError:
+            return False
+        written = False
+        for suffix, blob in compress_variants(data).items():
+            target = name + suffix
+            if self.exists(target):
+                self.delete(target)
+            super()._save(target, ContentFile(blob))
+            written = True
+        return written
@@ -0,0 +1,118 @@
+from datetime import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from tracker.models import (
+    ArchivedInvoice, ArchivedOrder, Branch, Customer, InventoryItem, InventoryReservation, Invoice, InvoiceLineItem,
+    Order, OrderInvoiceLink, OrganizationMonthlyRollup, Vehicle,
+)
+from tracker.services import archive, customer_stats
+
+NOW = timezone.make_aware(datetime(2026, 6, 1, 12, 0))
+
+
+def local(year, month, day):
+    return timezone.make_aware(datetime(year, month, day, 10, 0))
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        self.customer = Customer.objects.create(branch=self.branch, full_name='Fleet Desk', phone='0700000001',
+                                                customer_type='company', organization_name='Haulage Ltd')
+        self.vehicle = Vehicle.objects.create(customer=self.customer, plate_number='T123ABC')
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(self.user)
+
+    def _order(self, when, status='completed', **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Order.objects.create(branch=self.branch, customer=self.customer, vehicle=self.vehicle, type='service',
+                                        status=status, created_at=when, completed_at=when, **kwargs)
+
+    def _invoice(self, number, when, amount, order=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            invoice = Invoice.objects.create(branch=self.branch, customer=self.customer, vehicle=self.vehicle, order=order,
+                                             invoice_number=number, invoice_date=when.date(), total_amount=amount,
+                                             status='issued')
+            InvoiceLineItem.objects.create(invoice=invoice, description='Tyre', quantity=1, unit_price=amount)
+        Invoice.objects.filter(pk=invoice.pk).update(created_at=when, total_amount=amount)
+        return invoice
+
+    def _archive(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return archive.archive(days=365, now=NOW, **kwargs)
+
+    def _derived(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            customer_stats.recompute([self.customer.pk])
+        customer = Customer.objects.get(pk=self.customer.pk)
+        rollups = sorted(OrganizationMonthlyRollup.objects.filter(customer=self.customer)
+                         .values_list('month', 'orders', 'completed_orders', 'invoice_count', 'invoice_gross'))
+        return customer.total_spent, customer.total_visits, customer.last_visit, rollups
+
+    def test_archives_old_groups_only_and_keeps_derived_data(self):
+        old = self._order(local(2024, 2, 10))
+        old_invoice = self._invoice('INV-OLD', local(2024, 2, 10), Decimal('100.00'), order=old)
+        linked = self._order(local(2024, 3, 1))
+        young_invoice = self._invoice('INV-YOUNG', local(2026, 1, 5), Decimal('40.00'))
+        OrderInvoiceLink.objects.create(order=linked, invoice=young_invoice)
+        open_order = self._order(local(2024, 4, 1), status='in_progress')
+        reserved = self._order(local(2024, 5, 1))
+        item = InventoryItem.objects.create(name='Tyre', quantity=5)
+        InventoryReservation.objects.create(item=item, order=reserved, quantity=1, status='active')
+        before = self._derived()
+
+        self.assertEqual(self._archive(dry_run=True), {'orders': 1, 'invoices': 1})
+        self.assertEqual(self._archive(), {'orders': 1, 'invoices': 1})
+        self.assertEqual(Customer.objects.get(pk=self.customer.pk).total_spent, before[0])  # From the delete signals
+
+        self.assertFalse(Order.objects.filter(pk=old.pk).exists())
+        self.assertEqual(set(Order.objects.values_list('pk', flat=True)), {linked.pk, open_order.pk, reserved.pk})
+        row = ArchivedInvoice.objects.get(pk=old_invoice.pk)
+        self.assertEqual((row.group, row.order_id, row.total_amount), (f'o{old.pk}', old.pk, Decimal('100.00')))
+        self.assertEqual(ArchivedOrder.objects.get(pk=old.pk).group, row.group)
+        self.assertEqual(self._derived(), before)
+        self.assertEqual(self._archive(), {'orders': 0, 'invoices': 0})
+
+        # Restoring brings back the order, invoice and line items under their own ids
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(archive.restore([row.group]), (1, 1))
+        restored = Invoice.objects.get(pk=old_invoice.pk)
+        self.assertEqual((restored.order_id, restored.line_items.count()), (old.pk, 1))
+        self.assertFalse(ArchivedOrder.objects.exists())
+        self.assertEqual(self._derived(), before)
+
+    def test_read_through(self):
+        old = self._order(local(2024, 2, 10))
+        invoice = self._invoice('INV-OLD', local(2024, 2, 10), Decimal('100.00'), order=old)
+        recent = self._order(local(2026, 5, 1))
+        self._archive()
+
+        page = self.client.get(reverse('tracker:customer_detail', args=[self.customer.pk]))
+        self.assertEqual([o.pk for o in page.context['orders']], [recent.pk, old.pk])
+        self.assertTrue(page.context['orders'][1].is_archived)
+        self.assertContains(page, 'INV-OLD')
+
+        detail = self.client.get(reverse('tracker:order_detail', args=[old.pk]))
+        self.assertTemplateUsed(detail, 'tracker/archived_record.html')
+        self.assertContains(detail, old.order_number)
+        self.assertContains(detail, 'INV-OLD')
+        self.assertContains(self.client.get(reverse('tracker:invoice_detail', args=[invoice.pk])), 'Tyre')
+        self.assertEqual(self.client.get(reverse('tracker:order_detail', args=[10 ** 6])).status_code, 404)
+
+        history = self.client.get(reverse('tracker:api_vehicle_history', args=[self.vehicle.pk])).json()
+        self.assertEqual([(o['id'], o['archived']) for o in history['orders']], [(recent.pk, False), (old.pk, True)])
+        self.assertEqual(history['invoices'][0]['invoice_number'], 'INV-OLD')
+
+    def test_command(self):
+        self._order(local(2024, 2, 10))
+        out = StringIO()
+        call_command('archive_history', '--days', '365', '--dry-run', stdout=out)
+        self.assertIn('Would archive 1 orders and 0 invoices', out.getvalue())
+        self.assertFalse(ArchivedOrder.objects.exists())
@@ -0,0 +1,71 @@
+import asyncio
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import AsyncClient, TransactionTestCase
+from django.urls import reverse
+
+from tracker import views
+from tracker.models import Branch, Customer, Order
+from tracker.services import request_metrics
+
+
+class AsyncPollingTests(TransactionTestCase):
+    """Polls run their queries on tracker.utils.async_db's pool threads, so test data must be committed."""
+
+    def setUp(self):
+        request_metrics.reset()
+        self.addCleanup(request_metrics.reset)
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        branch = Branch.objects.create(name='Main', code='B1')
+        self.customer = Customer.objects.create(branch=branch, full_name='Pat Driver', phone='0710000001')
+        self.order = Order.objects.create(branch=branch, customer=self.customer, type='sales', status='completed')
+
+    def test_sync_client_still_works(self):
+        self.client.force_login(self.user)
+        data = self.client.get(reverse('tracker:api_order_status', args=[self.order.pk])).json()
+        self.assertEqual((data['id'], data['status']), (self.order.pk, 'completed'))
+        data = self.client.get(reverse('tracker:api_customers_summary'), {'ids': str(self.customer.pk)}).json()
+        self.assertIn(str(self.customer.pk), data['customers'])
+
+    async def test_asgi_polls(self):
+        client = AsyncClient()
+        anonymous = await client.get(reverse('tracker:api_order_status', args=[self.order.pk]))
+        self.assertEqual(anonymous.status_code, 302)
+
+        await asyncio.get_running_loop().run_in_executor(None, client.force_login, self.user)
+        response = await client.get(reverse('tracker:api_order_status', args=[self.order.pk]))
+        self.assertEqual(response.json()['status'], 'completed')
+        self.assertEqual((await client.get(reverse('tracker:api_order_status', args=[10 ** 6]))).status_code, 404)
+        summary = (await client.get(reverse('tracker:api_notifications_summary'))).json()
+        self.assertTrue(summary['success'])
+
+        stats = request_metrics.snapshot()['views']['tracker:api_order_status']
+        self.assertEqual(stats['requests'], 3)
+        self.assertGreater(stats['max_queries'], 0)  # Counted on the pool threads
+
+    async def test_asgi_counts_queries_of_sync_views(self):
+        client = AsyncClient()
+        await asyncio.get_running_loop().run_in_executor(None, client.force_login, self.user)
+        response = await client.get(reverse('tracker:api_invoice_list'))
+        self.assertEqual(response.status_code, 200)
+
+        stats = request_metrics.snapshot()['views']['tracker:api_invoice_list']
+        self.assertGreater(stats['max_queries'], 1)  # The session, the user and the invoices
+
+    async def test_waiting_polls_do_not_block_each_other(self):
+        client = AsyncClient()
+        await asyncio.get_running_loop().run_in_executor(None, client.force_login, self.user)
+
+        def slow_payload(pk):
+            time.sleep(0.3)  # A slow database
+            return {'success': True, 'id': pk}
+
+        url = reverse('tracker:api_order_status', args=[self.order.pk])
+        with mock.patch.object(views, 'order_status_payload', slow_payload):
+            started = time.perf_counter()
+            responses = await asyncio.gather(*(client.get(url) for _ in range(6)))
+            elapsed = time.perf_counter() - started
+        self.assertEqual({r.status_code for r in responses}, {200})
+        self.assertLess(elapsed, 6 * 0.3 / 2)
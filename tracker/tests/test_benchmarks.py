@@ -0,0 +1,20 @@
+from django.test import TestCase
+
+from tracker.benchmarks import compare, load_baseline, run_benchmarks, seed_dataset
+
+
+class QueryCountRegressionTests(TestCase):
+    """Fails when a benchmarked view issues more queries than recorded in tracker/benchmarks/baseline.json.
+
+    Refresh the baseline with: python manage.py run_benchmarks --scale small --update-baseline
+    """
+
+    def test_query_counts_within_baseline(self):
+        baseline = load_baseline().get('small')
+        self.assertTrue(baseline, "no 'small' baseline recorded")
+        ctx = seed_dataset('small')
+        results = run_benchmarks(ctx, repeat=1)
+        self.assertEqual(set(results), set(baseline))
+        # Timing and memory depend on the machine; only query counts are enforced here
+        problems = compare(results, baseline, time_ratio=0, memory_ratio=0)
+        self.assertEqual(problems, [])
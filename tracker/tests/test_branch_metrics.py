@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from tracker.models import Branch, Customer, Order
+
+
+class BranchMetricsApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.main = Branch.objects.create(name='Main', code='M1', region='Coast')
+        self.sub = Branch.objects.create(name='Sub', code='S1', region='Coast', parent=self.main)
+        self.other = Branch.objects.create(name='Other', code='O1', region='Lake')
+        for branch, statuses in [
+            (self.main, ['completed', 'created', 'overdue']),
+            (self.sub, ['in_progress', 'cancelled']),
+            (self.other, ['completed']),
+        ]:
+            customer = Customer.objects.create(branch=branch, full_name=f'C {branch.code}', phone=f'07000{branch.id}')
+            for status in statuses:
+                Order.objects.create(branch=branch, customer=customer, type='service', status=status)
+        old = Order.objects.filter(branch=self.other).first()
+        Order.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=90))
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(self.user)
+        self.url = reverse('tracker:api_branch_metrics')
+
+    def _count_queries(self, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(self.url, params)
+        return len(ctx.captured_queries), resp
+
+    def test_query_count_is_constant(self):
+        before, resp = self._count_queries(nocache='1')
+        for i in range(10):
+            Branch.objects.create(name=f'Extra {i}', code=f'X{i}')
+        after, _ = self._count_queries(nocache='1')
+        self.assertEqual(before, after)
+        data = resp.json()
+        totals = {row['branch']['code']: row['totals'] for row in data['branches']}
+        self.assertEqual(totals['M1'], {
+            'orders': 3, 'completed': 1, 'in_progress': 1, 'cancelled': 0, 'overdue': 1, 'new_customers': 1,
+        })
+        self.assertEqual(totals['S1']['in_progress'], 1)
+        self.assertEqual(totals['O1']['orders'], 0)
+
+    def test_custom_range_and_rollups(self):
+        start = (timezone.localdate() - timedelta(days=120)).isoformat()
+        resp = self.client.get(self.url, {'start': start, 'group': 'parent'})
+        data = resp.json()
+        self.assertEqual(data['period'], 'custom')
+        rollups = {g['name']: g['totals'] for g in data['rollups']}
+        self.assertEqual(rollups['Main']['orders'], 5)
+        self.assertEqual(rollups['Other']['orders'], 1)
+
+        resp = self.client.get(self.url, {'group': 'region'})
+        rollups = {g['name']: g['totals'] for g in resp.json()['rollups']}
+        self.assertEqual(rollups['Coast']['cancelled'], 1)
+
+    def test_cached_response_and_bad_input(self):
+        uncached, _ = self._count_queries()
+        cached, _ = self._count_queries()
+        self.assertEqual(uncached - cached, 2)  # grouped orders and customers queries skipped
+        self.assertEqual(self.client.get(self.url, {'start': '2024-13-01'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'group': 'city'}).status_code, 400)
@@ -0,0 +1,80 @@
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from tracker.models import Branch, Customer, Order
+from tracker.services import charts
+from tracker.utils.chart_utils import fill_months
+from tracker.views import customer_groups
+
+RENDERED = []
+
+
+def fake_renderer(data, title):
+    RENDERED.append(title)
+    return b'\x89PNG' + title.encode()
+
+
+@override_settings(CHART_RENDER_WORKERS=0)
+class ChartServiceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        RENDERED.clear()
+        patcher = mock.patch.dict(charts.RENDERERS, {'monthly_trend': fake_renderer})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user('clerk', password='pw')
+        self.client.force_login(self.user)
+        self.points = [{'month': '2024-01', 'orders': 3}, {'month': '2024-03', 'orders': 1}]
+
+    def test_image_is_rendered_once_and_cacheable(self):
+        url = charts.chart_url('monthly_trend', self.points, title='Fleet')
+        self.assertEqual(url, charts.chart_url('monthly_trend', list(self.points), title='Fleet'))
+        self.assertNotEqual(url, charts.chart_url('monthly_trend', self.points, title='Other'))
+        self.assertEqual(RENDERED, [])
+
+        first = self.client.get(url)
+        self.assertEqual((first.status_code, first['Content-Type'], first.content), (200, 'image/png', b'\x89PNGFleet'))
+        self.assertIn('immutable', first['Cache-Control'])
+        self.client.get(url)
+        self.assertEqual(RENDERED, ['Fleet'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(reverse('tracker:chart_image', args=['0' * 32])).status_code, 404)
+        forged = charts.chart_key('monthly_trend', self.points, title='Forged').rsplit(':', 1)[0] + ':' + 'A' * 27
+        self.assertEqual(self.client.get(reverse('tracker:chart_image', args=[forged])).status_code, 404)
+
+    def test_any_process_can_render_from_the_url(self):
+        url = charts.chart_url('monthly_trend', self.points, title='Fleet')
+        cache.clear()  # Another worker: nothing of this chart in its cache
+        self.assertEqual(self.client.get(url).content, b'\x89PNGFleet')
+
+    @override_settings(CHART_RENDER_WORKERS=2)
+    def test_background_render(self):
+        key = charts.request_chart('monthly_trend', self.points, title='Async')
+        self.assertEqual(charts.get_png(key, timeout=10), b'\x89PNGAsync')
+        self.assertEqual(RENDERED, ['Async'])
+
+    def test_customer_groups_links_charts_unless_disabled(self):
+        branch = Branch.objects.create(name='B1', code='B1')
+        customer = Customer.objects.create(branch=branch, full_name='Fleet Desk', phone='0700000001', customer_type='company')
+        Order.objects.create(branch=branch, customer=customer, type='service', created_at=timezone.now())
+        request = RequestFactory().get('/customer-groups/')
+        request.user = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+
+        response = customer_groups(request)
+        self.assertContains(response, reverse('tracker:chart_image', args=['x']).rsplit('/', 1)[0])
+        self.assertEqual(RENDERED, [])  # nothing rendered while building the page
+        with override_settings(SERVER_CHARTS_DISABLED=['customer_groups']):
+            self.assertNotContains(customer_groups(request), '/charts/')
+
+    def test_fill_months(self):
+        self.assertEqual(fill_months(self.points), [
+            {'month': date(2024, 1, 1), 'orders': 3},
+            {'month': date(2024, 2, 1), 'orders': 0},
+            {'month': date(2024, 3, 1), 'orders': 1},
+        ])
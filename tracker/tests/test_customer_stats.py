@@ -0,0 +1,95 @@
+import threading
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from tracker.models import Branch, Customer, Invoice, Order
+from tracker.services import CustomerService, customer_stats
+
+
+class CustomerStatsTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        self.customer = Customer.objects.create(branch=self.branch, full_name='Pat Driver', phone='0700000001')
+
+    def _invoice(self, customer, total, number, status='issued'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Invoice.objects.create(branch=self.branch, customer=customer, invoice_number=number,
+                                          total_amount=Decimal(total), status=status)
+
+    def test_visit_counts_once_per_day_in_one_update(self):
+        stale = Customer.objects.get(pk=self.customer.pk)
+        with self.assertNumQueries(1):
+            CustomerService.update_customer_visit(self.customer)
+        # A second order the same day through a stale instance does not count again
+        CustomerService.update_customer_visit(stale)
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.total_visits, 1)
+
+        Customer.objects.filter(pk=self.customer.pk).update(last_visit=timezone.now() - timedelta(days=1))
+        customer_stats.record_visit(self.customer.pk)
+        self.customer.refresh_from_db()
+        self.assertEqual((self.customer.total_visits, self.customer.current_status), (2, 'arrived'))
+
+    def test_total_spent_follows_invoice_writes(self):
+        other = Customer.objects.create(branch=self.branch, full_name='Sam Caller', phone='0700000002')
+        first = self._invoice(self.customer, '100.00', 'INV-1')
+        self._invoice(self.customer, '50.50', 'INV-2')
+        self._invoice(self.customer, '999.00', 'INV-3', status='cancelled')
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.total_spent, Decimal('150.50'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.customer = other
+            first.save()
+            first.save()  # several saves in one transaction refresh once on commit
+        self.assertEqual(Customer.objects.get(pk=self.customer.pk).total_spent, Decimal('50.50'))
+        self.assertEqual(Customer.objects.get(pk=other.pk).total_spent, Decimal('100.00'))
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(Customer.objects.get(pk=other.pk).total_spent, Decimal('0'))
+
+    def test_each_transaction_flushes_only_its_own_customers(self):
+        other_started, other_done = threading.Event(), threading.Event()
+
+        def other_transaction():
+            try:
+                with transaction.atomic():
+                    customer_stats.refresh_spent_on_commit([10 ** 6])
+                    other_started.set()
+                    other_done.wait(10)
+                    transaction.set_rollback(True)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=other_transaction)
+        thread.start()
+        other_started.wait(10)
+        try:
+            with self.captureOnCommitCallbacks() as callbacks:
+                customer_stats.refresh_spent_on_commit([self.customer.pk])
+                customer_stats.refresh_spent_on_commit([self.customer.pk, None])
+        finally:
+            other_done.set()
+            thread.join()
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(callbacks[0].items, {self.customer.pk})
+
+    def test_recompute_rebuilds_from_orders_and_invoices(self):
+        now = timezone.now()
+        for days_ago in (0, 0, 3):
+            order = Order.objects.create(branch=self.branch, customer=self.customer, type='service')
+            Order.objects.filter(pk=order.pk).update(created_at=now - timedelta(days=days_ago))
+        Invoice.objects.bulk_create([Invoice(customer=self.customer, invoice_number='INV-9', total_amount=Decimal('70'))])
+        untouched = Customer.objects.create(branch=self.branch, full_name='No Orders', phone='0700000003', total_visits=4)
+        Customer.objects.filter(pk=self.customer.pk).update(total_visits=17, total_spent=0, last_visit=None)
+
+        call_command('recompute_customer_stats', stdout=open('/dev/null', 'w'))
+        self.customer.refresh_from_db()
+        self.assertEqual((self.customer.total_visits, self.customer.total_spent), (2, Decimal('70')))
+        self.assertIsNotNone(self.customer.last_visit)
+        self.assertEqual(Customer.objects.get(pk=untouched.pk).total_visits, 4)
@@ -0,0 +1,71 @@
+from unittest import mock
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from tracker import db_router
+from tracker.middleware import ReadYourWritesMiddleware
+from tracker.models import Order
+
+REPLICA = {'reporting': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': 'reporting.sqlite3'}}
+
+
+class ReportingRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = db_router.ReportingRouter()
+        self.factory = RequestFactory()
+        db_router._lag_cache.clear()
+        self.addCleanup(db_router._lag_cache.clear)
+
+    def test_without_replica_everything_uses_the_primary(self):
+        with db_router.reporting_reads(self.factory.get('/')) as alias:
+            self.assertIsNone(alias)
+            self.assertEqual(self.router.db_for_read(Order), 'default')
+
+    @mock.patch.dict(settings.DATABASES, REPLICA)
+    def test_reporting_reads_go_to_the_replica_until_the_view_writes(self):
+        with mock.patch.object(db_router, '_measure_lag', return_value=2.0):
+            with db_router.reporting_reads(self.factory.get('/')) as alias:
+                self.assertEqual(alias, 'reporting')
+                self.assertEqual(self.router.db_for_read(Order), 'reporting')
+                self.assertEqual(self.router.db_for_write(Order), 'default')
+                self.assertEqual(self.router.db_for_read(Order), 'default')
+        self.assertEqual(self.router.db_for_read(Order), 'default')
+        self.assertFalse(self.router.allow_migrate('reporting', 'tracker'))
+
+        @db_router.reporting_view
+        def view(request):
+            return HttpResponse(self.router.db_for_read(Order))
+
+        self.assertEqual(view(self.factory.get('/')).content, b'reporting')
+        pinned = self.factory.get('/')
+        pinned.COOKIES[db_router.PIN_COOKIE] = '1'
+        self.assertEqual(view(pinned).content, b'default')
+
+    @mock.patch.dict(settings.DATABASES, REPLICA)
+    def test_lagging_or_broken_replica_falls_back(self):
+        request = self.factory.get('/')
+        with self.settings(REPORTING_DB_MAX_LAG=30, REPORTING_LAG_CHECK_SECONDS=0):
+            with mock.patch.object(db_router, '_measure_lag', return_value=45.0):
+                self.assertIsNone(db_router.read_alias_for(request))
+            with mock.patch.object(db_router, '_measure_lag', return_value=None):  # Replication stopped
+                self.assertIsNone(db_router.read_alias_for(request))
+            with mock.patch.object(db_router, '_measure_lag', side_effect=OSError('refused')), \
+                    self.assertLogs('tracker.db_router', 'WARNING'):
+                self.assertIsNone(db_router.read_alias_for(request))
+
+        # The lag check is cached between requests
+        db_router._lag_cache.clear()
+        with mock.patch.object(db_router, '_measure_lag', return_value=0.0) as measure:
+            db_router.read_alias_for(request)
+            db_router.read_alias_for(request)
+        self.assertEqual(measure.call_count, 1)
+
+    def test_writes_pin_the_browser_to_the_primary(self):
+        middleware = ReadYourWritesMiddleware(lambda request: HttpResponse(status=302))
+        with mock.patch.dict(settings.DATABASES, REPLICA):
+            response = middleware(self.factory.post('/orders/new/'))
+            self.assertEqual(response.cookies[db_router.PIN_COOKIE]['max-age'], settings.REPORTING_PIN_SECONDS)
+            self.assertNotIn(db_router.PIN_COOKIE, middleware(self.factory.get('/')).cookies)
+        self.assertNotIn(db_router.PIN_COOKIE, middleware(self.factory.post('/orders/new/')).cookies)
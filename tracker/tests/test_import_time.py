@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from django.test import SimpleTestCase
+from django.urls import resolve, reverse
+
+from tracker.utils.lazy import LazyView
+
+PROJECT_DIR = Path(__file__).resolve().parents[2]
+
+# What a worker does before serving its first request
+STARTUP = (
+    "import django; django.setup(); "
+    "from django.urls import resolve, reverse; "
+    "resolve(reverse('tracker:dashboard')); resolve(reverse('tracker:labour_codes_list'))"
+)
+
+# Only specific views need these; none may load at startup
+HEAVY_MODULES = ('pandas', 'numpy', 'matplotlib', 'reportlab', 'PyPDF2', 'fitz', 'PIL', 'pytesseract', 'tracker.views')
+
+# Total import time of django.setup() + URL resolution, in ms (override for slow CI machines)
+BUDGET_MS = int(os.environ.get('IMPORT_TIME_BUDGET_MS', '1500'))
+
+
+def startup_imports():
+    """{module: cumulative µs} for top-level imports reported by `python -X importtime`."""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='pos_tracker.settings')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP],
+        cwd=PROJECT_DIR, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    modules, top_level = {}, {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _self, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative)
+        if not name.startswith('  '):
+            top_level[name.strip()] = int(cumulative)
+    return modules, top_level
+
+
+class ImportTimeTests(SimpleTestCase):
+    def test_startup_skips_heavy_modules_and_stays_within_budget(self):
+        modules, top_level = startup_imports()
+        loaded = [m for m in HEAVY_MODULES if m in modules]
+        self.assertEqual(loaded, [], f"imported at startup: {loaded}")
+        total_ms = sum(top_level.values()) / 1000
+        slowest = sorted(top_level.items(), key=lambda kv: -kv[1])[:5]
+        self.assertLessEqual(total_ms, BUDGET_MS, f"startup imports took {total_ms:.0f} ms; slowest: {slowest}")
+
+    def test_lazy_urls_resolve_to_the_real_views(self):
+        match = resolve(reverse('tracker:organization'))
+        self.assertIsInstance(match.func, LazyView)
+        self.assertEqual(match.func.resolve().__name__, 'organization_management')
+        # Attributes Django checks before calling the view come from the real one
+        self.assertTrue(resolve(reverse('tracker:create_service_type')).func.csrf_exempt)
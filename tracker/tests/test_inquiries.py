@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from tracker.models import Branch, Customer, InquiryNote, Order
+from tracker.services import inquiries, kpi_counters
+
+
+class InquiriesWorkspaceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        self.customer = Customer.objects.create(branch=self.branch, full_name='Pat Driver', phone='0700000001')
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(self.user)
+        today = timezone.localdate()
+        self.new = self._inquiry('created', follow_up=today)
+        self.pending = self._inquiry('in_progress', follow_up=today - timedelta(days=2))
+        self.done = self._inquiry('completed', follow_up=today - timedelta(days=2))
+
+    def _inquiry(self, status, follow_up=None):
+        inquiry = Order.objects.create(branch=self.branch, customer=self.customer, type='inquiry',
+                                       inquiry_type='Pricing', questions='How much?')
+        # Order.save() completes inquiries, so set the workflow state directly
+        Order.objects.filter(pk=inquiry.pk).update(status=status, follow_up_date=follow_up)
+        inquiry.refresh_from_db()
+        return inquiry
+
+    def test_counts_in_one_query(self):
+        with self.assertNumQueries(1):
+            stats = inquiries.counts(Order.objects.filter(type='inquiry'))
+        self.assertEqual(stats, {
+            'total': 3, 'new': 1, 'in_progress': 1, 'resolved': 1,
+            'follow_up_required': 3, 'follow_up_due_today': 1, 'follow_up_overdue': 2,
+        })
+
+    def test_latest_notes_for_a_page_in_one_query(self):
+        for i, inquiry in enumerate([self.new, self.new, self.pending]):
+            note = InquiryNote.objects.create(inquiry=inquiry, content=f'note {i}', created_by=self.user)
+            InquiryNote.objects.filter(pk=note.pk).update(created_at=timezone.now() + timedelta(minutes=i))
+        page = [self.new, self.pending, self.done]
+        with self.assertNumQueries(1):
+            inquiries.attach_latest_notes(page)
+            authors = [i.latest_note.created_by.username for i in page if i.latest_note]
+        self.assertEqual([i.latest_note.content if i.latest_note else None for i in page], ['note 1', 'note 2', None])
+        self.assertEqual(authors, ['admin', 'admin'])
+
+    def test_bulk_resolve_writes_notes_and_refreshes_stats(self):
+        url = reverse('tracker:api_inquiry_bulk_action')
+        before = kpi_counters.get_counts('inquiries', kpi_counters.ALL_BRANCHES)
+        self.assertEqual(before['resolved'], 1)
+
+        response = self.client.post(url, {
+            'action': 'mark_resolved', 'inquiry_ids[]': [self.new.pk, self.pending.pk, self.done.pk],
+        })
+        self.assertEqual(response.json()['message'], '2 inquiry(ies) marked as resolved')
+        self.assertEqual(InquiryNote.objects.filter(note_type='status_change').count(), 2)
+        after = kpi_counters.get_counts('inquiries', kpi_counters.ALL_BRANCHES)
+        self.assertEqual((after['resolved'], after['follow_up_overdue']), (3, 0))
+
+    def test_bulk_note_moves_new_inquiries_along(self):
+        url = reverse('tracker:api_inquiry_bulk_action')
+        response = self.client.post(url, {
+            'action': 'add_note', 'content': 'Called back', 'inquiry_ids[]': [self.new.pk, self.pending.pk],
+        })
+        self.assertTrue(response.json()['success'])
+        self.new.refresh_from_db()
+        self.assertEqual(self.new.status, 'in_progress')
+        notes = self.client.get(reverse('tracker:api_inquiry_notes', args=[self.new.pk])).json()['notes']
+        self.assertEqual([(n['content'], n['created_by']) for n in notes], [('Called back', 'admin')])
+
+        empty = self.client.post(url, {'action': 'add_note', 'content': ' ', 'inquiry_ids[]': [self.new.pk]})
+        self.assertEqual(empty.status_code, 400)
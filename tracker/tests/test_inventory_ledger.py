@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from tracker.models import (
+    Branch, Brand, Customer, InventoryAdjustment, InventoryItem, InventoryReservation, Order, Profile,
+)
+from tracker.services import inventory_ledger
+from tracker.utils import adjust_inventory
+
+
+class InventoryLedgerTests(TestCase):
+    def setUp(self):
+        self.brand = Brand.objects.create(name='Michelin')
+        self.tyre = InventoryItem.objects.create(name='Tyre 205/55R16', brand=self.brand, quantity=10)
+        self.valve = InventoryItem.objects.create(name='Valve', brand=self.brand, quantity=3)
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        self.customer = Customer.objects.create(branch=self.branch, full_name='Pat Driver', phone='0700000001')
+
+    def _sales_order(self, qty):
+        return Order.objects.create(
+            branch=self.branch, customer=self.customer, type='sales', status='created',
+            item_name=self.tyre.name, brand=self.brand.name, quantity=qty,
+        )
+
+    def test_batch_adjust_writes_ledger_and_clamps_at_zero(self):
+        balances = inventory_ledger.adjust([(self.tyre, -4), (self.valve, -5), (self.tyre, 1)], reference='JOB-1')
+        self.assertEqual(balances, {self.tyre.pk: 7, self.valve.pk: 0})
+        rows = {r.item_id: r for r in InventoryAdjustment.objects.filter(reference='JOB-1')}
+        self.assertEqual((rows[self.tyre.pk].adjustment_type, rows[self.tyre.pk].quantity), ('removal', 3))
+        # Only the 3 valves on hand were taken, and the ledger says so
+        self.assertEqual((rows[self.valve.pk].adjustment_type, rows[self.valve.pk].quantity), ('removal', 3))
+
+    def test_stale_instances_do_not_lose_updates(self):
+        stale = InventoryItem.objects.get(pk=self.tyre.pk)
+        adjust_inventory(self.tyre.name, 'michelin', -2)
+        inventory_ledger.adjust([(stale, -3)])
+        self.tyre.refresh_from_db()
+        self.assertEqual(self.tyre.quantity, 5)
+        self.assertEqual(adjust_inventory('Missing', 'Michelin', 1), (False, 'not_found', None))
+
+    def test_reservation_lifecycle(self):
+        done = self._sales_order(2)
+        ok, _, remaining = inventory_ledger.reserve_for_order(done)
+        self.assertEqual((ok, remaining), (True, 8))
+        # Reserving twice holds the stock once
+        inventory_ledger.reserve_for_order(done)
+        self.assertEqual(InventoryReservation.objects.get(order=done).quantity, 2)
+        inventory_ledger.consume_for_order(done)
+
+        cancelled = self._sales_order(3)
+        inventory_ledger.reserve_for_order(cancelled)
+        self.assertEqual(inventory_ledger.release_for_order(cancelled), {self.tyre.pk: 8})
+        self.assertEqual(
+            dict(InventoryReservation.objects.values_list('order_id', 'status')),
+            {done.pk: 'consumed', cancelled.pk: 'released'},
+        )
+        self.assertEqual(inventory_ledger.release_for_order(cancelled), {})
+
+    def test_stock_at_uses_snapshot_plus_later_ledger(self):
+        start = timezone.now()
+        inventory_ledger.adjust([(self.tyre, -4)])
+        inventory_ledger.take_snapshot(start + timedelta(seconds=1))
+        InventoryAdjustment.objects.update(created_at=start)
+        inventory_ledger.adjust([(self.tyre, 5)])
+        InventoryAdjustment.objects.filter(adjustment_type='addition').update(created_at=start + timedelta(seconds=2))
+
+        self.assertEqual(inventory_ledger.stock_at(start + timedelta(seconds=1), [self.tyre.pk]), {self.tyre.pk: 6})
+        self.assertEqual(inventory_ledger.stock_at(start + timedelta(seconds=3), [self.tyre.pk]), {self.tyre.pk: 11})
+        # No snapshot yet: replay the ledger from zero
+        self.assertEqual(inventory_ledger.stock_at(start - timedelta(seconds=1), [self.valve.pk]), {self.valve.pk: 0})
+
+
+class StockManagementViewTests(TestCase):
+    def test_adjustment_form_applies_ledger_delta(self):
+        item = InventoryItem.objects.create(name='Tyre', brand=Brand.objects.create(name='B'), quantity=4)
+        user = User.objects.create_superuser('admin', 'a@example.com', 'pw')
+        Profile.objects.get_or_create(user=user)
+        self.client.force_login(user)
+        resp = self.client.post(reverse('tracker:inventory_stock_management'), {
+            'item': item.pk, 'adjustment_type': 'addition', 'quantity': 6, 'reference': 'PO-9',
+        })
+        self.assertEqual(resp.status_code, 302)
+        item.refresh_from_db()
+        self.assertEqual(item.quantity, 10)
+        adj = InventoryAdjustment.objects.get(item=item)
+        self.assertEqual((adj.reference, adj.adjusted_by, adj.delta), ('PO-9', user, 6))
@@ -0,0 +1,169 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from tracker.models import Branch, Customer, Invoice, InvoiceLineItem, InvoiceUploadBatch, Order, Vehicle
+from tracker.services import invoice_batch
+
+
+def fake_extract(data, name):
+    """Stands in for pdf_text_extractor: the 'PDF' is '%PDF' + JSON of the extraction result."""
+    payload = json.loads(data[4:])
+    if payload is None:
+        return {'success': False, 'message': 'No readable text found in PDF.'}
+    return {'success': True, 'header': payload['header'], 'items': payload.get('items', [])}
+
+
+def pdf(header=None, items=()):
+    return b'%PDF' + json.dumps(None if header is None else {'header': header, 'items': list(items)}).encode()
+
+
+def header(invoice_no, **fields):
+    return {'invoice_no': invoice_no, 'date': '28/02/2024', 'total': 118.0, **fields}
+
+
+TYRE = {'description': 'Tyre 205/55R16', 'qty': 2, 'code': '4101', 'unit': 'PCS', 'rate': 50.0, 'value': 100.0}
+
+
+class InvoiceBatchTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media, INVOICE_BATCH_WORKERS=1)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.branch = Branch.objects.create(name='Main', code='B1')
+        self.fleet = Customer.objects.create(branch=self.branch, full_name='Fleet Ltd', phone='0711000001',
+                                             code='C-100', customer_type='company')
+        self.walkin = Customer.objects.create(branch=self.branch, full_name='Sam Walker', phone='+255 712 000 002')
+        self.truck = Vehicle.objects.create(customer=self.fleet, plate_number='T290EJF')
+        self.started = Order.objects.create(branch=self.branch, customer=self.fleet, vehicle=self.truck,
+                                            type='service', status='created')
+
+    def run_batch(self, files, **kwargs):
+        items = [invoice_batch.BatchItem(name, data) for name, data in files.items()]
+        return invoice_batch.InvoiceBatchImport(extract=fake_extract, workers=1, **kwargs).run(items)
+
+    def test_matches_creates_and_reports_exceptions(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            items = self.run_batch({
+                'by_code_and_plate.pdf': pdf(header('PI-1', code_no='C-100', reference='FOR T 290 EJF', subtotal=100.0, tax=18.0),
+                                             [TYRE, TYRE]),
+                'by_phone.pdf': pdf(header('PI-2', phone='255712000002')),
+                'conflict.pdf': pdf(header('PI-3', code_no='C-100', phone='+255712000002')),
+                'unknown.pdf': pdf(header('PI-4', phone='0799999999')),
+                'unreadable.pdf': pdf(None),
+                'no_date.pdf': pdf(header('PI-5', code_no='C-100', date='')),
+                'duplicate.pdf': pdf(header('PI-1', code_no='C-100')),
+            })
+        result = {i.name: (i.status, i.reason) for i in items}
+        self.assertEqual(result, {
+            'by_code_and_plate.pdf': ('created', ''),
+            'by_phone.pdf': ('created', ''),
+            'conflict.pdf': ('review', 'conflicting_customer'),
+            'unknown.pdf': ('review', 'no_customer'),
+            'unreadable.pdf': ('review', 'extraction_failed'),
+            'no_date.pdf': ('review', 'no_date'),
+            'duplicate.pdf': ('review', 'duplicate_invoice'),
+        })
+
+        inv = Invoice.objects.get(invoice_number='PI-1')
+        self.assertEqual((inv.customer, inv.vehicle, inv.order, inv.branch), (self.fleet, self.truck, self.started, self.branch))
+        self.assertEqual((inv.invoice_date, inv.subtotal, inv.tax_amount, inv.total_amount),
+                         (date(2024, 2, 28), Decimal('100'), Decimal('18'), Decimal('118')))
+        self.assertTrue(inv.document.name.startswith('invoices/by_code_and_plate'))
+        self.assertEqual(list(inv.line_items.values_list('code', 'quantity', 'line_total', 'order_type')),
+                         [('4101', Decimal('2'), Decimal('100'), 'sales')])  # duplicate line dropped
+        self.assertEqual(items[0].matched_by, 'code+plate')
+        self.assertEqual(Invoice.objects.get(invoice_number='PI-2').customer, self.walkin)
+        self.fleet.refresh_from_db()
+        self.assertEqual(self.fleet.total_spent, Decimal('118'))
+
+        report = io.StringIO()
+        self.assertEqual(invoice_batch.write_report(items, report), 5)
+        self.assertIn('conflict.pdf,review,conflicting_customer', report.getvalue())
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        def batch(n, offset):
+            return {f'{offset + i}.pdf': pdf(header(f'PI-{offset + i}', code_no='C-100'), [TYRE]) for i in range(n)}
+
+        with CaptureQueriesContext(connection) as small:
+            self.run_batch(batch(2, 0))
+        with CaptureQueriesContext(connection) as large:
+            self.run_batch(batch(20, 100))
+        self.assertEqual(Invoice.objects.count(), 22)
+        self.assertEqual(InvoiceLineItem.objects.count(), 22)
+        self.assertLessEqual(len(large), len(small))
+
+    def test_dry_run_writes_nothing_and_generates_no_numbers(self):
+        items = self.run_batch({'a.pdf': pdf(header('', code_no='C-100'))}, dry_run=True)
+        self.assertEqual((items[0].status, items[0].customer_id), ('ready', self.fleet.id))
+        self.assertFalse(Invoice.objects.exists())
+
+        items = self.run_batch({'a.pdf': pdf(header('', code_no='C-100'))})
+        self.assertTrue(items[0].invoice_number.startswith('INV-'))
+
+    def test_process_pool_keeps_file_order(self):
+        items = [invoice_batch.BatchItem(f'{n}.pdf', pdf(header(f'PI-{n}'))) for n in range(5)]
+        invoice_batch.extract_all(items, fake_extract, workers=2)
+        self.assertEqual([i.header['invoice_no'] for i in items], [f'PI-{n}' for n in range(5)])
+
+    def test_zip_upload_and_command(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zf:
+            zf.writestr('march/PI-7.pdf', pdf(header('PI-7', code_no='C-100')))
+            zf.writestr('march/notes.txt', 'not an invoice')
+            zf.writestr('__MACOSX/march/._PI-7.pdf', 'resource fork')
+        archive.seek(0)
+        archive.name = 'march.zip'
+
+        user = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(user)
+        response = self.client.post(reverse('tracker:api_bulk_invoice_upload'), {'file': archive})
+        # The request only stores the archive; the scheduler job does the work
+        self.assertEqual(response.status_code, 202)
+        status_url = response.json()['status_url']
+        self.assertEqual(self.client.get(status_url).json()['status'], 'queued')
+        self.assertFalse(Invoice.objects.filter(invoice_number='PI-7').exists())
+
+        with self.captureOnCommitCallbacks(execute=True), self._fake_extractor():
+            self.assertEqual(invoice_batch.process_queued(), 1)
+        data = self.client.get(status_url).json()
+        self.assertEqual(data['status'], 'done')
+        self.assertEqual(data['summary'], {'files': 2, 'statuses': {'created': 1, 'review': 1}, 'reasons': {'unsupported_file': 1}})
+        self.assertEqual(Invoice.objects.get(invoice_number='PI-7').created_by, user)
+        self.assertFalse(InvoiceUploadBatch.objects.get().archive)  # Deleted once processed
+        report = self.client.get(status_url, {'report': 'csv'})
+        self.assertIn('march/notes.txt,review,unsupported_file', report.content.decode())
+        self.assertEqual(self.client.post(reverse('tracker:api_bulk_invoice_upload'),
+                                          {'file': io.BytesIO(b'not a zip')}).status_code, 400)
+
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder, ignore_errors=True)
+        for name, content in (('PI-8.pdf', pdf(header('PI-8', code_no='C-100'))), ('PI-9.pdf', pdf(header('PI-9')))):
+            with open(os.path.join(folder, name), 'wb') as fh:
+                fh.write(content)
+        out = io.StringIO()
+        report = os.path.join(folder, 'exceptions.csv')
+        with self._fake_extractor():
+            call_command('import_invoices', folder, '--branch', 'B1', '--report', report, stdout=out)
+        self.assertIn('1 invoice(s) created, 1 need review', out.getvalue())
+        with open(report) as fh:
+            self.assertIn('PI-9.pdf,review,no_customer', fh.read())
+
+    def _fake_extractor(self):
+        return mock.patch('tracker.utils.pdf_text_extractor.extract_from_bytes', fake_extract)
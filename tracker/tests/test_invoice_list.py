@@ -0,0 +1,77 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from tracker.models import Branch, Customer, Invoice, Order, Profile
+
+
+class InvoiceListTests(TestCase):
+    def setUp(self):
+        self.b1 = Branch.objects.create(name='B1', code='B1')
+        self.b2 = Branch.objects.create(name='B2', code='B2')
+        c1 = Customer.objects.create(branch=self.b1, full_name='Alice Buyer', phone='0700000001')
+        c2 = Customer.objects.create(branch=self.b2, full_name='Bob Other', phone='0700000002')
+        order = Order.objects.create(branch=self.b1, customer=c1, type='sales', status='created')
+        start = date(2024, 1, 1)
+        for i in range(7):
+            # Two invoices share each date so the id tiebreaker matters
+            Invoice.objects.create(
+                invoice_number=f'INV-{i:03d}', branch=self.b1, customer=c1, order=order if i % 2 else None,
+                invoice_date=start + timedelta(days=i // 2), status='paid' if i % 3 == 0 else 'issued',
+            )
+        Invoice.objects.create(invoice_number='INV-OTHER', branch=self.b2, customer=c2, invoice_date=start)
+        self.user = User.objects.create_user('clerk', password='pw')
+        Profile.objects.create(user=self.user, branch=self.b1)
+        self.client.force_login(self.user)
+        self.api = reverse('tracker:api_invoice_list')
+
+    def test_keyset_pages_cover_branch_invoices_once(self):
+        seen, cursor = [], None
+        while True:
+            params = {'limit': 3}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get(self.api, params).json()
+            seen.extend(inv['invoice_number'] for inv in data['invoices'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        expected = list(
+            Invoice.objects.filter(branch=self.b1).order_by('-invoice_date', '-id').values_list('invoice_number', flat=True)
+        )
+        self.assertEqual(seen, expected)
+        self.assertNotIn('INV-OTHER', seen)
+
+    def test_filters(self):
+        data = self.client.get(self.api, {'status': 'paid'}).json()
+        self.assertEqual({i['invoice_number'] for i in data['invoices']}, {'INV-000', 'INV-003', 'INV-006'})
+        data = self.client.get(self.api, {'date_from': '2024-01-03', 'q': 'alice'}).json()
+        self.assertEqual({i['invoice_number'] for i in data['invoices']}, {'INV-004', 'INV-005', 'INV-006'})
+
+    def test_impossible_dates_are_ignored(self):
+        everything = {i['invoice_number'] for i in self.client.get(self.api).json()['invoices']}
+        for params in ({'date_from': '2024-13-01'}, {'date_to': '2024-02-30'}, {'date_from': 'yesterday'}):
+            with self.subTest(params=params):
+                resp = self.client.get(self.api, params)
+                self.assertEqual(resp.status_code, 200)
+                self.assertEqual({i['invoice_number'] for i in resp.json()['invoices']}, everything)
+                self.assertEqual(self.client.get(reverse('tracker:invoice_list'), params).status_code, 200)
+
+    def test_list_page_query_count_does_not_grow_with_rows(self):
+        url = reverse('tracker:invoice_list')
+        with CaptureQueriesContext(connection) as before:
+            resp = self.client.get(url)
+        self.assertContains(resp, 'INV-006')
+        self.assertNotContains(resp, 'INV-OTHER')
+
+        customer = Customer.objects.filter(branch=self.b1).first()
+        order = Order.objects.filter(branch=self.b1).first()
+        for i in range(20):
+            Invoice.objects.create(invoice_number=f'INV-X{i}', branch=self.b1, customer=customer, order=order)
+        with CaptureQueriesContext(connection) as after:
+            self.client.get(url)
+        self.assertEqual(len(before.captured_queries), len(after.captured_queries))
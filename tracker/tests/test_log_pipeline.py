@@ -0,0 +1,123 @@
+import json
+import logging
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from tracker.utils import log_pipeline
+
+
+class BlockingHandler(logging.Handler):
+    """Collects records; blocks while `gate` is clear, like a handler stuck on a slow disk."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.busy = threading.Event()
+
+    def emit(self, record):
+        self.busy.set()
+        self.gate.wait(5)
+        self.records.append(record)
+
+
+class LogPipelineTests(SimpleTestCase):
+    def make_logger(self, name):
+        logger = logging.getLogger(f'tracker.tests.log_pipeline.{name}')
+        logger.propagate = False
+        logger.setLevel(logging.DEBUG)
+        self.addCleanup(setattr, logger, 'handlers', [])
+        self.addCleanup(setattr, logger, 'filters', [])
+        return logger
+
+    def test_queue_handler_writes_in_background_and_never_blocks(self):
+        target = BlockingHandler()
+        handler = log_pipeline.QueueListenerHandler([target], maxsize=5)
+        self.addCleanup(handler.close)
+        logger = self.make_logger('queue')
+        logger.addHandler(handler)
+
+        target.gate.clear()  # The "disk" stalls: the first record holds the listener thread
+        logger.info('order %s', 0)
+        self.assertTrue(target.busy.wait(5))
+        for n in range(1, 20):
+            logger.info('order %s', n)
+        self.assertEqual(handler.dropped, 20 - 5 - 1)
+        target.gate.set()
+        handler.stop()
+        self.assertEqual([r.getMessage() for r in target.records[:2]], ['order 0', 'order 1'])
+        self.assertEqual(len(target.records), 6)
+
+        handler.dropped = 0
+        try:
+            raise KeyError('missing')
+        except KeyError:
+            logger.exception('failed for %s', 'PI-1')
+        handler.stop()
+        record = target.records[-1]
+        self.assertEqual((record.msg, record.args, record.exc_info), ('failed for PI-1', None, None))
+        self.assertIn("KeyError: 'missing'", record.exc_text)
+
+    def test_targets_must_be_configured_first(self):
+        # What dictConfig passes when "cfg://handlers.x" names a handler it has not built yet
+        with self.assertRaises(ValueError):
+            log_pipeline.QueueListenerHandler([{'class': 'logging.NullHandler'}])
+
+    def test_json_formatter(self):
+        formatter = log_pipeline.JsonFormatter()
+        record = logging.makeLogRecord({'name': 'tracker.x', 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                                        'msg': 'invoice %s', 'args': ('PI-1',), 'order_id': 7})
+        data = json.loads(formatter.format(record))
+        self.assertEqual((data['level'], data['logger'], data['message'], data['order_id']),
+                         ('WARNING', 'tracker.x', 'invoice PI-1', 7))
+        self.assertNotIn('args', data)
+        self.assertNotIn('exc', data)
+
+    def test_rate_limit_filter(self):
+        logger = self.make_logger('rate')
+        handler = BlockingHandler()
+        logger.addHandler(handler)
+        logger.addFilter(log_pipeline.RateLimitFilter(rate=3, per=60))
+
+        def detect(value, level=logging.INFO):
+            logger.log(level, 'Order type detection: %s', value)  # One call site
+
+        with mock.patch('tracker.utils.log_pipeline.time.monotonic', return_value=1000.0):
+            for n in range(10):
+                detect(n)
+            logger.info('Other message')
+            detect('always kept', logging.WARNING)
+        self.assertEqual(len(handler.records), 5)
+
+        with mock.patch('tracker.utils.log_pipeline.time.monotonic', return_value=1061.0):
+            detect('next window')
+        self.assertEqual(handler.records[-1].suppressed, 7)
+        self.assertIn('[7 similar suppressed]', handler.records[-1].getMessage())
+
+    def test_rate_limit_filter_groups_f_string_messages_by_call_site(self):
+        from tracker.utils import order_type_detector
+
+        logger = logging.getLogger(order_type_detector.__name__)
+        handler = BlockingHandler()
+        self.addCleanup(logger.removeHandler, handler)
+        logger.addHandler(handler)
+        with mock.patch.object(logger, 'filters', [log_pipeline.RateLimitFilter(rate=3, per=60)]), \
+                mock.patch.object(logger, 'propagate', False), \
+                mock.patch('tracker.models.LabourCode.objects') as labour_codes:
+            labour_codes.filter.return_value.values.return_value = []
+            for n in range(10):
+                order_type_detector.determine_order_type_from_codes([f'41{n:02d}'])
+        detections = [r.getMessage() for r in handler.records if r.getMessage().startswith('Order type detection')]
+        self.assertEqual(len(detections), 3)
+        self.assertIn("codes=['4102']", detections[-1])
+
+    def test_sample_filter(self):
+        sample = log_pipeline.SampleFilter(rate=0.25)
+        info = logging.makeLogRecord({'levelno': logging.INFO})
+        error = logging.makeLogRecord({'levelno': logging.ERROR})
+        with mock.patch('tracker.utils.log_pipeline.random.random', side_effect=[0.1, 0.5]):
+            self.assertEqual([sample.filter(info), sample.filter(info)], [True, False])
+        self.assertTrue(sample.filter(error))
@@ -0,0 +1,134 @@
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from tracker.models import Branch, Customer, Invoice, Order, OrganizationMonthlyRollup
+from tracker.services import org_rollups
+
+
+def local(year, month, day):
+    return timezone.make_aware(datetime(year, month, day, 10, 0))
+
+
+class OrganizationRollupTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        self.org = Customer.objects.create(branch=self.branch, full_name='Fleet Desk', phone='0700000001',
+                                           customer_type='government', organization_name='Ministry of Works')
+        self.person = Customer.objects.create(branch=self.branch, full_name='Pat Driver', phone='0700000002',
+                                              customer_type='personal')
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(self.user)
+
+    def _order(self, customer, when, type='service'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Order.objects.create(branch=self.branch, customer=customer, type=type, created_at=when)
+
+    def _rows(self, customer):
+        return {r.month: r for r in OrganizationMonthlyRollup.objects.filter(customer=customer)}
+
+    def test_order_and_invoice_writes_update_their_month(self):
+        self._order(self.org, local(2024, 1, 31))
+        self._order(self.org, local(2024, 1, 2), type='sales')
+        order = self._order(self.org, local(2024, 3, 5))
+        self._order(self.person, local(2024, 1, 3))
+        with self.captureOnCommitCallbacks(execute=True):
+            Invoice.objects.create(branch=self.branch, customer=self.org, invoice_number='INV-1',
+                                   invoice_date=date(2024, 3, 9), total_amount=Decimal('250.00'), status='issued')
+
+        rows = self._rows(self.org)
+        self.assertEqual(set(rows), {date(2024, 1, 1), date(2024, 3, 1)})
+        jan = rows[date(2024, 1, 1)]
+        self.assertEqual((jan.orders, jan.service_orders, jan.sales_orders), (2, 1, 1))
+        self.assertEqual((rows[date(2024, 3, 1)].invoice_gross, rows[date(2024, 3, 1)].branch_id),
+                         (Decimal('250.00'), self.branch.id))
+        self.assertFalse(OrganizationMonthlyRollup.objects.filter(customer=self.person).exists())
+
+        # Moving an order to another month rebuilds both months
+        order.created_at = local(2024, 1, 20)
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+        rows = self._rows(self.org)
+        self.assertEqual(rows[date(2024, 1, 1)].orders, 3)
+        self.assertEqual(rows[date(2024, 3, 1)].orders, 0)
+
+        # A customer that stops being an organisation drops out
+        self.org.customer_type = 'personal'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.org.save()
+        self.assertEqual(self._rows(self.org), {})
+
+    def test_each_transaction_rebuilds_only_its_own_months(self):
+        other_started, other_done = threading.Event(), threading.Event()
+
+        def other_transaction():
+            try:
+                with transaction.atomic():
+                    org_rollups.queue_rebuild(self.person.pk)
+                    other_started.set()
+                    other_done.wait(10)
+                    transaction.set_rollback(True)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=other_transaction)
+        thread.start()
+        other_started.wait(10)
+        try:
+            with self.captureOnCommitCallbacks() as callbacks:
+                org_rollups.queue_rebuild(self.org.pk, local(2024, 1, 31))
+                org_rollups.queue_rebuild(self.org.pk, date(2024, 3, 5))
+        finally:
+            other_done.set()
+            thread.join()
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(callbacks[0].items, {self.org.pk: {date(2024, 1, 1), date(2024, 3, 1)}})
+
+    def test_rebuild_all_matches_incremental_rows(self):
+        for when in (local(2023, 11, 1), local(2024, 2, 14), local(2024, 2, 15)):
+            self._order(self.org, when)
+        incremental = {m: (r.orders, r.last_order_at) for m, r in self._rows(self.org).items()}
+        OrganizationMonthlyRollup.objects.all().delete()
+        call_command('rebuild_org_rollups', stdout=StringIO())
+        rebuilt = {m: (r.orders, r.last_order_at) for m, r in self._rows(self.org).items()}
+        self.assertEqual(rebuilt, incremental)
+
+    def test_page_export_and_api_read_the_rollups(self):
+        today = timezone.localdate()
+        now = timezone.now()
+        self._order(self.org, now)
+        self._order(self.org, now, type='inquiry')
+        self._order(self.org, local(2015, 6, 1))
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('tracker:organization'), {'period': '1month'})
+        report = [q['sql'] for q in captured.captured_queries if 'tracker_organizationmonthlyrollup' in q['sql']]
+        # Paginator count, page rows and chart series; no per-request scan of the orders table
+        self.assertEqual(len(report), 3)
+        self.assertFalse(any('tracker_order"' in sql for sql in report))
+        row = response.context['customers'][0]
+        self.assertEqual((row.recent_orders_count, row.inquiry_orders, row.vehicles_count), (2, 1, 0))
+
+        csv_rows = self.client.get(reverse('tracker:organization_export'), {'period': 'all'}).content.decode().splitlines()
+        self.assertEqual(csv_rows[1].split(',')[6], '3')
+
+        data = self.client.get(reverse('tracker:api_organization_rollup'), {'start': '2015-01', 'end': today.strftime('%Y-%m')}).json()
+        self.assertEqual(data['start'], '2015-01')
+        self.assertEqual([m['month'] for m in data['months']], ['2015-06', today.strftime('%Y-%m')])
+        self.assertEqual((data['totals']['orders'], data['totals']['inquiry_orders']), (3, 1))
+
+    def test_period_months(self):
+        today = date(2024, 3, 15)
+        self.assertEqual(org_rollups.period_months('1month', today), (date(2024, 2, 1), date(2024, 3, 1)))
+        self.assertEqual(org_rollups.period_months('all', today), (None, date(2024, 3, 1)))
+        self.assertEqual(org_rollups.period_months('1month', today, start='2020-05', end='2019-01'),
+                         (date(2019, 1, 1), date(2020, 5, 1)))
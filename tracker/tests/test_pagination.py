@@ -0,0 +1,123 @@
+import importlib
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from tracker import scheduler
+from tracker.models import Branch, Customer, Order, Profile
+from tracker.services import kpi_counters
+from tracker.utils.pagination import CursorPaginator, decode_cursor, encode_cursor
+
+
+class CursorPaginatorTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        self.customer = Customer.objects.create(branch=self.branch, full_name='Pat Driver', phone='0700000001')
+        base = timezone.now()
+        for i in range(7):
+            order = Order.objects.create(branch=self.branch, customer=self.customer, type='service', status='created')
+            # Pairs share a timestamp so the id tiebreaker decides their order
+            Order.objects.filter(pk=order.pk).update(created_at=base - timedelta(hours=i // 2))
+        self.expected = list(Order.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def test_forward_then_back(self):
+        paginator = CursorPaginator(Order.objects.all(), ordering=('-created_at', '-id'), per_page=3)
+        pages, page = [], paginator.page()
+        self.assertFalse(page.has_previous)
+        while True:
+            pages.append([o.id for o in page])
+            if not page.has_next:
+                break
+            page = paginator.page(page.next_cursor)
+        self.assertEqual([i for p in pages for i in p], self.expected)
+        self.assertEqual([len(p) for p in pages], [3, 3, 1])
+
+        back = paginator.page(page.previous_cursor)
+        self.assertEqual([o.id for o in back], pages[1])
+        back = paginator.page(back.previous_cursor)
+        self.assertEqual([o.id for o in back], pages[0])
+        self.assertFalse(back.has_previous)
+        self.assertTrue(back.has_next)
+
+    def test_bad_cursor_starts_from_first_page(self):
+        paginator = CursorPaginator(Order.objects.all(), ordering=('-created_at', '-id'), per_page=3)
+        self.assertEqual([o.id for o in paginator.page('not-a-cursor')], self.expected[:3])
+        self.assertIsNone(decode_cursor('!!!'))
+        values, direction = decode_cursor(encode_cursor([timezone.now(), 5], 'prev'))
+        self.assertEqual((values[1], direction), (5, 'prev'))
+
+
+class KpiCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        self.other = Branch.objects.create(name='B2', code='B2')
+        self.customer = Customer.objects.create(branch=self.branch, full_name='Pat Driver', phone='0700000001')
+        # Inquiries are completed on save, so set their status directly
+        new = Order.objects.create(branch=self.branch, customer=self.customer, type='inquiry')
+        done = Order.objects.create(branch=self.other, customer=self.customer, type='inquiry')
+        Order.objects.filter(pk=new.pk).update(status='created')
+        Order.objects.filter(pk=done.pk).update(status='completed')
+
+    def test_counts_are_scoped_cached_and_invalidated_by_writes(self):
+        counts = kpi_counters.get_counts('inquiries', self.branch.id)
+        self.assertEqual((counts['total'], counts['new'], counts['resolved']), (1, 1, 0))
+        self.assertEqual(kpi_counters.get_counts('inquiries', kpi_counters.ALL_BRANCHES)['total'], 2)
+        with self.assertNumQueries(0):
+            kpi_counters.get_counts('inquiries', self.branch.id)
+
+        # Saving an order bumps the version through the signal hook
+        Order.objects.create(branch=self.branch, customer=self.customer, type='inquiry')
+        self.assertEqual(kpi_counters.get_counts('inquiries', self.branch.id)['total'], 2)
+
+    def test_refresh_all_warms_every_branch(self):
+        kpi_counters.refresh_all(['inquiries'])
+        with self.assertNumQueries(0):
+            self.assertEqual(kpi_counters.get_counts('inquiries', self.other.id)['resolved'], 1)
+
+    def test_no_scope_counts_nothing(self):
+        self.assertEqual(kpi_counters.get_counts('customers', None)['total_customers'], 0)
+
+    def test_scheduled_refresh_only_with_a_shared_cache(self):
+        self.addCleanup(importlib.reload, scheduler)
+        for shared, expected in ((False, False), (True, True)):
+            with override_settings(CACHE_SHARED=shared):
+                jobs = [job_id for job_id, _path, _trigger in importlib.reload(scheduler).JOBS]
+            self.assertEqual('refresh_kpi_counters' in jobs, expected)
+
+
+class ListViewPagingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        for i in range(25):
+            Customer.objects.create(branch=self.branch, full_name=f'Customer {i:02d}', phone=f'07000001{i:02d}')
+        self.user = User.objects.create_user('clerk', password='pw')
+        Profile.objects.create(user=self.user, branch=self.branch)
+        self.client.force_login(self.user)
+
+    def test_customers_list_walks_with_cursor(self):
+        url = reverse('tracker:customers_list')
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(len(first.context['customers']), 20)
+        self.assertEqual(first.context['total_customers'], 25)
+        second = self.client.get(url, {'cursor': first.context['customers'].next_cursor})
+        self.assertEqual(len(second.context['customers']), 5)
+        self.assertFalse(second.context['customers'].has_next)
+        ids = {c.id for c in first.context['customers']} | {c.id for c in second.context['customers']}
+        self.assertEqual(len(ids), 25)
+
+    def test_orders_and_inquiries_pages_render(self):
+        customer = Customer.objects.filter(branch=self.branch).first()
+        for _ in range(3):
+            Order.objects.create(branch=self.branch, customer=customer, type='service', status='created')
+        for params in ({}, {'view': 'started'}, {'view': 'started', 'sort_by': 'plate_number'}):
+            resp = self.client.get(reverse('tracker:orders_list'), params)
+            self.assertEqual(resp.status_code, 200)
+        resp = self.client.get(reverse('tracker:inquiries'))
+        self.assertEqual(resp.status_code, 200)
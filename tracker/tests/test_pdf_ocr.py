@@ -0,0 +1,96 @@
+import io
+import time
+
+import fitz
+import numpy as np
+from PIL import Image, ImageDraw
+from django.test import SimpleTestCase, override_settings
+
+from tracker.utils import pdf_ocr
+from tracker.utils.pdf_text_extractor import extract_from_bytes
+
+INVOICE_TEXT = "Invoice No: PI-4471\nDate: 12/03/2024\nGross Value 354.00\n"
+
+
+class StubEngine(pdf_ocr.OCREngine):
+    """Returns canned text; records nothing so it pickles into pool workers."""
+
+    name = 'stub'
+
+    def image_to_text(self, image, timeout=None):
+        return INVOICE_TEXT if image.getextrema() != (255, 255) else ''
+
+
+class SlowTallPageEngine(StubEngine):
+    def image_to_text(self, image, timeout=None):
+        if image.height > 300:
+            time.sleep(10)
+        return super().image_to_text(image, timeout)
+
+
+def _text_lines_image(width=600, height=300, angle=0.0):
+    img = Image.new('L', (width, height), 200)
+    draw = ImageDraw.Draw(img)
+    for y in range(40, height - 40, 30):
+        draw.rectangle([40, y, width - 40, y + 8], fill=20)
+    return img.rotate(angle, fillcolor=200) if angle else img
+
+
+def _scanned_pdf(*sizes):
+    """Image-only PDF (no text layer), one page per (width, height)."""
+    doc = fitz.open()
+    for width, height in sizes:
+        buf = io.BytesIO()
+        _text_lines_image(width, height).save(buf, format='PNG')
+        page = doc.new_page(width=width, height=height)
+        page.insert_image(page.rect, stream=buf.getvalue())
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+class PreprocessTests(SimpleTestCase):
+    def test_otsu_splits_two_tones(self):
+        gray = np.array([[30] * 10 + [220] * 30], dtype=np.uint8)
+        self.assertTrue(30 <= pdf_ocr.otsu_threshold(gray) < 220)
+        self.assertEqual(set(np.unique(pdf_ocr.binarize(gray))), {0, 255})
+
+    def test_deskew_levels_rotated_text_rows(self):
+        skewed = pdf_ocr.binarize(np.asarray(_text_lines_image(angle=3)))
+        self.assertAlmostEqual(pdf_ocr.estimate_skew(skewed), -3.0, delta=0.5)
+        self.assertAlmostEqual(pdf_ocr.estimate_skew(pdf_ocr.deskew(skewed)), 0.0, delta=0.5)
+
+    def test_rgb_input_is_grayscaled(self):
+        rgb = np.zeros((4, 4, 3), dtype=np.uint8)
+        rgb[..., 0] = 255
+        self.assertEqual(pdf_ocr.to_grayscale(rgb).shape, (4, 4))
+
+
+@override_settings(INVOICE_OCR_ENABLED=True, INVOICE_OCR_ENGINE='tracker.tests.test_pdf_ocr.StubEngine',
+                   INVOICE_OCR_WORKERS=1, INVOICE_OCR_DPI=72)
+class OcrFallbackTests(SimpleTestCase):
+    def test_scanned_pdf_goes_through_line_parser(self):
+        result = extract_from_bytes(_scanned_pdf((300, 200)), 'scan.pdf')
+        self.assertTrue(result['success'])
+        self.assertTrue(result['ocr_available'])
+        self.assertEqual(result['header']['invoice_no'], 'PI-4471')
+        self.assertEqual(result['header']['total'], 354.0)
+
+    def test_image_upload_uses_ocr(self):
+        buf = io.BytesIO()
+        _text_lines_image().save(buf, format='PNG')
+        result = extract_from_bytes(buf.getvalue(), 'photo.png')
+        self.assertEqual(result['header']['invoice_no'], 'PI-4471')
+
+    @override_settings(INVOICE_OCR_ENABLED=False)
+    def test_disabled_keeps_previous_errors(self):
+        self.assertEqual(extract_from_bytes(_scanned_pdf((300, 200)), 'scan.pdf')['error'], 'pdf_extraction_failed')
+        self.assertEqual(extract_from_bytes(b'\x89PNG....', 'photo.png')['error'], 'image_file_not_supported')
+
+    def test_pool_skips_pages_that_time_out(self):
+        pages = pdf_ocr.ocr_document(
+            _scanned_pdf((300, 200), (300, 400), (300, 200)),
+            engine=SlowTallPageEngine(), workers=2, timeout=2,
+        )
+        self.assertEqual([p['page_num'] for p in pages], [1, 3])
+        self.assertEqual(pages[0]['lines'][0], 'Invoice No: PI-4471')
@@ -0,0 +1,73 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from tracker.forms import OrderForm
+from tracker.models import Brand, InventoryItem, Salesperson, ServiceType
+from tracker.services import inventory_ledger, reference_data
+
+
+class ReferenceDataTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.brand = Brand.objects.create(name='Michelin')
+        self.tyre = InventoryItem.objects.create(name='Tyre 205/55R16', brand=self.brand, quantity=10, price=120)
+        ServiceType.objects.create(name='Oil change', estimated_minutes=30)
+        ServiceType.objects.create(name='Old service', estimated_minutes=10, is_active=False)
+        Salesperson.objects.create(code='346', name='Maria Shayo', is_default=True)
+        self.user = User.objects.create_user('clerk', password='pw')
+        self.client.force_login(self.user)
+
+    def test_warm_reads_skip_the_database_and_writes_invalidate(self):
+        self.assertEqual([s['name'] for s in reference_data.get('service_types')], ['Oil change'])
+        OrderForm()
+        with self.assertNumQueries(0):
+            # Service types, add-ons and items all come from the cache once warm
+            OrderForm()
+        ServiceType.objects.create(name='Alignment', estimated_minutes=40)
+        self.assertEqual([s['name'] for s in reference_data.get('service_types')], ['Alignment', 'Oil change'])
+
+    def test_entries_expire_for_writes_made_by_other_processes(self):
+        reference_data.get('service_types')
+        # Another worker's write: its invalidation never reaches this process's cache
+        ServiceType.objects.filter(name='Oil change').update(name='Oil & filter')
+        self.assertEqual(reference_data.get('service_types')[0]['name'], 'Oil change')
+        with mock.patch.object(reference_data.time, 'monotonic', return_value=reference_data.time.monotonic() + 3600):
+            cache.delete(reference_data._key('service_types'))  # Expired on the same TTL
+            self.assertEqual(reference_data.get('service_types')[0]['name'], 'Oil & filter')
+
+    def test_ledger_updates_refresh_inventory_lists(self):
+        before = self.client.get(reverse('tracker:api_inventory_items')).json()
+        self.assertEqual(before['items'], [{'name': 'Tyre 205/55R16', 'brand': 'Michelin', 'quantity': 10}])
+        # The ledger uses queryset.update(), so only clear_inventory_cache sees the change
+        with self.captureOnCommitCallbacks(execute=True):
+            inventory_ledger.adjust([(self.tyre, -4)])
+        after = self.client.get(reverse('tracker:api_inventory_items')).json()
+        self.assertEqual(after['items'][0]['quantity'], 6)
+        self.assertEqual(reference_data.get('inventory_items')[0]['quantity'], 6)
+
+    def test_etag_revalidation(self):
+        url = reverse('tracker:api_invoices_inventory')
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()['items'][0]['price'], 120.0)
+        self.assertIn('no-cache', first['Cache-Control'])
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual((again.status_code, again.content), (304, b''))
+
+        self.brand.name = 'BFGoodrich'
+        self.brand.save()
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.json()['items'][0]['brand'], 'BFGoodrich')
+
+    def test_endpoint_shapes_are_unchanged(self):
+        data = self.client.get(reverse('tracker:api_get_salespersons')).json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['salespersons'][0]['code'], '346')
+        data = self.client.get(reverse('tracker:api_service_types')).json()
+        self.assertEqual(set(data), {'service_types', 'service_addons', 'inventory_items', 'labour_codes'})
+        self.assertEqual(data['inventory_items'][0]['brand'], 'Michelin')
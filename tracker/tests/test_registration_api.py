@@ -0,0 +1,121 @@
+import json
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from tracker.models import (
+    Branch, Brand, Customer, InventoryItem, InventoryReservation, Order, Profile, ServiceAddon, ServiceType, Vehicle,
+)
+from tracker.services import registration
+
+
+class RegistrationApiTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        self.other = Branch.objects.create(name='B2', code='B2')
+        self.brand = Brand.objects.create(name='Michelin')
+        self.tyre = InventoryItem.objects.create(name='Tyre 205/55R16', brand=self.brand, quantity=5)
+        self.oil = ServiceType.objects.create(name='Oil change', estimated_minutes=30)
+        self.brakes = ServiceType.objects.create(name='Brakes', estimated_minutes=45)
+        self.balancing = ServiceAddon.objects.create(name='Balancing', estimated_minutes=20)
+        self.user = User.objects.create_user('clerk', password='pw')
+        Profile.objects.create(user=self.user, branch=self.branch)
+        self.client.force_login(self.user)
+        self.url = reverse('tracker:api_customer_register')
+
+    def _post(self, order=None, vehicle=None, **customer):
+        payload = {'customer': {'full_name': 'Pat Driver', 'phone': '0712 345 678', 'customer_type': 'personal',
+                                'personal_subtype': 'owner', **customer}}
+        if vehicle is not None:
+            payload['vehicle'] = vehicle
+        if order is not None:
+            payload['order'] = order
+        return self.client.post(self.url, data=json.dumps(payload), content_type='application/json')
+
+    def test_sales_registration_reserves_stock(self):
+        resp = self._post(vehicle={'plate_number': 't123abc', 'make': 'Toyota'},
+                          order={'type': 'sales', 'item_id': self.tyre.id, 'quantity': 2, 'addon_ids': [self.balancing.id]})
+        self.assertEqual(resp.status_code, 201)
+        data = resp.json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['remaining_stock'], 3)
+        order = Order.objects.get(pk=data['order_id'])
+        self.assertEqual(order.description, 'Tire Sales: Tyre 205/55R16 (Michelin) - New, addons: Balancing')
+        self.assertEqual((order.estimated_duration, order.vehicle.plate_number), (20, 'T123ABC'))
+        self.assertTrue(InventoryReservation.objects.filter(order=order, quantity=2, status='active').exists())
+        customer = order.customer
+        self.assertEqual((customer.branch, customer.total_visits), (self.branch, 1))
+        self.assertIsNotNone(customer.last_visit)
+
+    def test_service_and_inquiry_orders(self):
+        resp = self._post(order={'type': 'service', 'service_ids': [self.oil.id, self.brakes.id]})
+        self.assertEqual(resp.status_code, 201)
+        order = Order.objects.get(pk=resp.json()['order_id'])
+        self.assertEqual(order.estimated_duration, 75)
+        self.assertIn('Oil change', order.description)
+
+        resp = self._post(full_name='Sam Caller',
+                          order={'type': 'inquiry', 'inquiry_type': 'Pricing', 'questions': 'Cost of 4 tyres?',
+                                 'follow_up_date': '2030-01-15'})
+        self.assertEqual(resp.status_code, 201)
+        order = Order.objects.get(pk=resp.json()['order_id'])
+        self.assertEqual(order.description, 'Inquiry: Pricing - Cost of 4 tyres?')
+        self.assertEqual(str(order.follow_up_date), '2030-01-15')
+
+    def test_duplicate_in_branch_is_refused_other_branch_warns(self):
+        existing = Customer.objects.create(branch=self.branch, full_name='Pat Driver', phone='+255712345678')
+        resp = self._post(full_name='pat driver')
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual((resp.json()['error'], resp.json()['customer_id']), ('duplicate_customer', existing.id))
+
+        Customer.objects.filter(pk=existing.pk).update(branch=self.other)
+        resp = self._post()
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(len(resp.json()['warnings']), 1)
+
+    def test_duplicates_match_phones_stored_with_any_separators(self):
+        for stored in ('0712-345-678', '(0712)345678', '0712.345.678', '+255 (712) 345-678', '255712345678'):
+            with self.subTest(stored=stored):
+                existing = Customer.objects.create(branch=self.branch, full_name='Pat Driver', phone=stored)
+                resp = self._post()
+                self.assertEqual(resp.status_code, 409)
+                self.assertEqual(resp.json()['customer_id'], existing.id)
+                existing.delete()
+
+        # Other country codes are stored by imports; the API form only accepts Tanzanian numbers
+        existing = Customer.objects.create(branch=self.other, full_name='Pat Driver', phone='+254 (722) 000-111')
+        self.assertEqual(registration.find_duplicates('Pat Driver', '254-722-000-111'), [existing])
+        self.assertEqual(registration.find_duplicates('Pat Driver', '0722 000 111'), [])  # Not the same number
+
+    def test_insufficient_stock_rolls_everything_back(self):
+        resp = self._post(vehicle={'plate_number': 'T999XYZ'},
+                          order={'type': 'sales', 'item_id': self.tyre.id, 'quantity': 9})
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual((resp.json()['error'], resp.json()['available']), ('insufficient_stock', 5))
+        self.assertFalse(Customer.objects.exists())
+        self.assertFalse(Vehicle.objects.exists())
+        self.assertFalse(Order.objects.exists())
+        self.tyre.refresh_from_db()
+        self.assertEqual(self.tyre.quantity, 5)
+
+    def test_validation_errors(self):
+        resp = self._post(phone='12345')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('phone', resp.json()['errors'])
+        self.assertEqual(self._post(order={'type': 'service', 'service_ids': [9999]}).status_code, 404)
+        self.assertEqual(self._post(order={'type': 'repair'}).status_code, 400)
+        resp = self.client.post(self.url, data='not json', content_type='application/json')
+        self.assertEqual(resp.json()['error'], 'invalid_json')
+        self.assertFalse(Customer.objects.exists())
+
+    def test_query_count_is_bounded(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self._post(vehicle={'plate_number': 'T555AAA'},
+                              order={'type': 'sales', 'item_id': self.tyre.id, 'quantity': 1,
+                                     'addon_ids': [self.balancing.id]})
+        self.assertEqual(resp.status_code, 201)
+        # Middleware + session/auth take 8; catalogs, duplicate check and writes are constant
+        self.assertLessEqual(len(ctx), 26)
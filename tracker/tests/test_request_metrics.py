@@ -0,0 +1,83 @@
+import json
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from tracker.models import Branch, Customer
+from tracker.services import request_metrics
+
+
+class FingerprintTests(TestCase):
+    def test_literals_and_in_lists_collapse(self):
+        self.assertEqual(
+            request_metrics.fingerprint('SELECT * FROM "c"  WHERE "id" = 12 AND name = \'O\'\'Neil\''),
+            'SELECT * FROM "c" WHERE "id" = ? AND name = ?',
+        )
+        self.assertEqual(
+            request_metrics.fingerprint('SELECT 1 FROM t WHERE id IN (%s, %s, %s)'),
+            request_metrics.fingerprint('SELECT 1 FROM t WHERE id IN (%s)'),
+        )
+        self.assertNotEqual(request_metrics.fingerprint('SELECT a FROM t1'), request_metrics.fingerprint('SELECT a FROM t2'))
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        request_metrics.reset()
+        self.addCleanup(request_metrics.reset)
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        branch = Branch.objects.create(name='Main', code='B1')
+        self.customers = [Customer.objects.create(branch=branch, full_name=f'C{n}', phone=f'07100000{n:02d}') for n in range(4)]
+
+    def test_middleware_counts_queries_and_repeated_sql(self):
+        self.client.force_login(self.admin)
+        with override_settings(REQUEST_METRICS_SLOW_QUERIES=1, REQUEST_METRICS_SLOW_MS=10 ** 6), \
+                self.assertLogs('tracker.slow_requests', 'WARNING') as logs:
+            self.client.get(reverse('tracker:request_metrics'))
+
+        # Stand-in for an N+1 loop: same statement per row, different parameters
+        recorder = request_metrics.QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            for customer in self.customers:
+                Customer.objects.filter(pk=customer.pk).exists()
+        request_metrics.record('tracker:loop', 'GET', '/loop/', 200, 0.05, recorder)
+
+        data = request_metrics.snapshot()
+        page = data['views']['tracker:request_metrics']
+        self.assertEqual(page['requests'], 1)
+        self.assertGreater(page['max_queries'], 0)
+        self.assertEqual(page['query_buckets'][-1], ('+Inf', 1))
+        loop = data['views']['tracker:loop']
+        self.assertEqual(loop['max_queries'], 4)
+        self.assertEqual(loop['repeated_sql'][0]['max'], 4)
+        self.assertEqual(loop['duration_buckets'][3], (100, 1))  # 50ms lands in the <=100ms bucket
+
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual((entry['view'], entry['user'], entry['status']), ('tracker:request_metrics', 'admin', 200))
+        self.assertEqual(data['slow_requests'][0]['path'], reverse('tracker:request_metrics'))
+
+    def test_exports_and_superuser_only(self):
+        staff = User.objects.create_user('staff', 'staff@example.com', 'pw', is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(reverse('tracker:request_metrics')).status_code, 302)
+
+        self.client.force_login(self.admin)
+        self.client.get(reverse('tracker:dashboard'))
+        text = self.client.get(reverse('tracker:request_metrics'), {'format': 'prometheus'}).content.decode()
+        self.assertIn('# TYPE tracker_request_duration_seconds histogram', text)
+        self.assertIn('tracker_request_duration_seconds_count{view="tracker:dashboard"} 1', text)
+        self.assertIn('tracker_request_db_queries_bucket{view="tracker:dashboard",le="+Inf"} 1', text)
+
+        data = self.client.get(reverse('tracker:request_metrics'), {'format': 'json'}).json()
+        self.assertIn('tracker:dashboard', data['views'])
+        self.assertContains(self.client.get(reverse('tracker:request_metrics')), 'tracker:dashboard')
+
+        self.client.post(reverse('tracker:request_metrics'), {'action': 'reset'})
+        self.assertEqual(set(request_metrics.snapshot()['views']), {'tracker:request_metrics'})
+
+    @override_settings(REQUEST_METRICS_ENABLED=False)
+    def test_disabled(self):
+        self.client.force_login(self.admin)
+        self.client.get(reverse('tracker:dashboard'))
+        self.assertEqual(request_metrics.snapshot()['views'], {})
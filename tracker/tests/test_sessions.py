@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from tracker.scheduler import JOBS
+from tracker.services import sessions
+
+
+class SessionHousekeepingTests(TestCase):
+    def test_clear_expired_removes_only_expired_rows(self):
+        now = timezone.now()
+        Session.objects.create(session_key='old', session_data='', expire_date=now - timedelta(days=1))
+        Session.objects.create(session_key='live', session_data='', expire_date=now + timedelta(days=1))
+        with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies'):
+            self.assertEqual(sessions.clear_expired(), 1)
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['live'])
+        self.assertIn('tracker.services.sessions.clear_expired', [path for _id, path, _trigger in JOBS])
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+    def test_wizard_step_writes_session_once_and_reads_from_cache(self):
+        user = User.objects.create_user('clerk', password='pw')
+        self.client.force_login(user)
+        url = reverse('tracker:customer_register')
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post(url, {'step': 2, 'intent': 'service'})
+        self.assertEqual(resp.status_code, 302)
+        session_sql = [q['sql'] for q in ctx.captured_queries if 'django_session' in q['sql']]
+        self.assertEqual(len(session_sql), 1)
+        self.assertEqual(self.client.session['reg_step2'], {'intent': 'service'})
+
+    def test_cache_engines_need_a_shared_cache_with_several_workers(self):
+        locmem = {**settings.CACHES, 'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        shared = {**settings.CACHES, 'sessions': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                                                  'LOCATION': '/tmp/sessions'}}
+        with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db', CACHES=locmem):
+            with override_settings(WEB_CONCURRENCY=1):
+                sessions.check_engine()
+            with override_settings(WEB_CONCURRENCY=4), self.assertRaises(ImproperlyConfigured):
+                sessions.check_engine()
+        with override_settings(WEB_CONCURRENCY=4):
+            with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db', CACHES=shared):
+                sessions.check_engine()
+            with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db', CACHES=locmem):
+                sessions.check_engine()
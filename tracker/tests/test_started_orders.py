@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from tracker.models import Branch, Customer, Order, Vehicle
+from tracker.services.started_orders import (
+    plate_groups_page, plate_summary, started_order_counts, started_orders_filter,
+)
+
+
+class StartedOrdersHelperTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        self.customer = Customer.objects.create(branch=self.branch, full_name='John Doe', phone='0700111222')
+        self.v1 = Vehicle.objects.create(customer=self.customer, plate_number='T100AAA')
+        self.v2 = Vehicle.objects.create(customer=self.customer, plate_number='T200BBB')
+        now = timezone.now()
+        for i, (vehicle, status) in enumerate([
+            (self.v1, 'created'), (self.v1, 'in_progress'), (self.v2, 'in_progress'),
+            (None, 'created'), (self.v2, 'cancelled'),
+        ]):
+            Order.objects.create(
+                branch=self.branch, customer=self.customer, vehicle=vehicle,
+                type='service', status=status, started_at=now - timedelta(minutes=i),
+            )
+        self.today = timezone.now().date()
+        self.base = Order.objects.filter(branch=self.branch)
+
+    def test_counts_and_summary(self):
+        with self.assertNumQueries(1):
+            counts = started_order_counts(self.base, self.today)
+        self.assertEqual(counts, {'total_started': 4, 'today_started': 4})
+
+        list_q = started_orders_filter('', '', self.today)
+        with self.assertNumQueries(1):
+            summary = plate_summary(self.base, list_q, self.today)
+        self.assertEqual(summary['unique_plates'], 3)
+        self.assertEqual(summary['listed_orders'], 4)
+        # T100AAA and T200BBB (cancelled counts too) each have 2 orders today
+        self.assertEqual(summary['repeated_vehicles_today'], 2)
+
+    def test_plate_groups_page(self):
+        list_q = started_orders_filter('', '', self.today)
+        summary = plate_summary(self.base, list_q, self.today)
+        page, groups = plate_groups_page(self.base.filter(list_q), summary, 1, per_page=2)
+        self.assertEqual(page.paginator.num_pages, 2)
+        # Groups follow the summary's plate ordering (NULL placement is backend-specific)
+        self.assertEqual([g['plate'] for g in groups], [r['plate'] for r in summary['plates'][:2]])
+        by_plate = {g['plate']: g for g in groups}
+        if 'T100AAA' in by_plate:
+            self.assertEqual(len(by_plate['T100AAA']['orders']), 2)
+            self.assertEqual(by_plate['T100AAA']['summary']['order_count'], 2)
+
+    def test_dashboard_renders_flat_and_grouped(self):
+        user = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(user)
+        url = reverse('tracker:started_orders_dashboard')
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['unique_plates'], 3)
+        resp = self.client.get(url, {'group': 'plate'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, 'T200BBB')
@@ -0,0 +1,143 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.utils.http import http_date
+
+from tracker.middleware import StaticAssetMiddleware
+
+STYLESHEET = '/* Theme */\n.logo {\n    background: url("../img/logo.png");\n}\n' + ''.join(
+    f'.col-{n} {{\n    width: {n}%;\n    float: left;\n}}\n' for n in range(1, 60)
+)
+
+
+class StaticBuildTests(SimpleTestCase):
+    """collectstatic with tracker.storage.CompressedManifestStaticFilesStorage, into a temporary STATIC_ROOT."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.source = os.path.join(self.tmp, 'src')
+        self.root = os.path.join(self.tmp, 'root')
+        templates = os.path.join(self.tmp, 'templates')
+        for path, content in (
+            ('src/css/app.css', STYLESHEET),
+            ('src/css/vendor.css', '.icon { background: url("missing.png"); }'),
+            ('src/img/logo.png', '\x89PNG' + 'x' * 2000),
+            ('src/js/unused.js', 'var unused = 1;'),
+            ('templates/base.html', "{% load static %}<link href=\"{% static 'css/app.css' %}\">"),
+        ):
+            os.makedirs(os.path.dirname(os.path.join(self.tmp, path)), exist_ok=True)
+            with open(os.path.join(self.tmp, path), 'w', encoding='latin-1') as fh:
+                fh.write(content)
+        overrides = override_settings(
+            STATIC_ROOT=self.root, STATICFILES_DIRS=[self.source],
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],  # Not the admin's files
+            TEMPLATES=[{'BACKEND': 'django.template.backends.django.DjangoTemplates', 'DIRS': [templates]}],
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def read(self, name, mode='r'):
+        with open(os.path.join(self.root, name), mode) as fh:
+            return fh.read()
+
+    def test_build_hashes_minifies_and_precompresses(self):
+        out = StringIO()
+        call_command('build_static', verbosity=0, stdout=out)
+
+        paths = json.loads(self.read('staticfiles.json'))['paths']
+        css, logo = paths['css/app.css'], paths['img/logo.png']
+        self.assertRegex(css, r'^css/app\.[0-9a-f]{12}\.css$')
+        hashed_css = self.read(css)
+        self.assertIn(f'../img/{os.path.basename(logo)}', hashed_css)  # url() points at the hashed image
+        self.assertNotIn('/* Theme */', hashed_css)
+        self.assertLess(len(hashed_css), len(STYLESHEET))
+        self.assertIn('missing.png', self.read(paths['css/vendor.css']))  # Broken references keep their name
+
+        self.assertEqual(gzip.decompress(self.read(css + '.gz', 'rb')).decode(), hashed_css)
+        self.assertTrue(os.path.exists(os.path.join(self.root, 'css/app.css.gz')))
+        self.assertFalse(os.path.exists(os.path.join(self.root, logo + '.gz')))  # Already compressed
+        self.assertFalse(os.path.exists(os.path.join(self.root, paths['css/vendor.css'] + '.gz')))  # Too small
+
+        report = out.getvalue()
+        self.assertIn('js/unused.js', report)
+        self.assertNotIn('img/logo.png', report)  # Referenced through app.css
+
+
+class StaticAssetMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.root = os.path.join(self.tmp, 'static')
+        self.body = b'body { color: red; }' * 100
+        for name, data in (
+            ('css/app.0123456789ab.css', self.body),
+            ('css/app.0123456789ab.css.gz', b'gzip bytes'),
+            ('css/app.0123456789ab.css.br', b'brotli bytes'),
+            ('css/app.css', self.body),
+            ('staticfiles.json', json.dumps({'paths': {'css/app.css': 'css/app.0123456789ab.css'}}).encode()),
+            ('../secret.txt', b'not static'),
+        ):
+            path = os.path.join(self.root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as fh:
+                fh.write(data)
+        overrides = override_settings(STATIC_ROOT=self.root, STATIC_URL='/static/', SERVE_STATIC_FILES=True)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.middleware = StaticAssetMiddleware(lambda request: HttpResponse('from the view'))
+        self.factory = RequestFactory()
+
+    def get(self, path, **headers):
+        response = self.middleware(self.factory.get(path, **headers))
+        if hasattr(response, 'streaming_content'):
+            response.data = b''.join(response.streaming_content)
+            response.close()
+        return response
+
+    def test_precompressed_variant_follows_accept_encoding(self):
+        url = '/static/css/app.0123456789ab.css'
+        for accept, encoding, body in (
+            ('gzip, deflate, br', 'br', b'brotli bytes'),
+            ('gzip', 'gzip', b'gzip bytes'),
+            ('', None, self.body),
+        ):
+            with self.subTest(accept=accept):
+                response = self.get(url, HTTP_ACCEPT_ENCODING=accept)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.get('Content-Encoding'), encoding)
+                self.assertEqual(response.data, body)
+                self.assertEqual(response['Content-Type'], 'text/css')
+                self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_hashed_names_are_cached_for_a_year(self):
+        self.assertEqual(self.get('/static/css/app.0123456789ab.css')['Cache-Control'],
+                         'public, max-age=31536000, immutable')
+        self.assertEqual(self.get('/static/css/app.css')['Cache-Control'], 'public, max-age=3600')
+
+    def test_conditional_requests_get_304(self):
+        url = '/static/css/app.css'
+        response = self.get(url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        self.assertEqual(self.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        self.assertEqual(self.get(url, HTTP_IF_NONE_MATCH='"other"', HTTP_IF_MODIFIED_SINCE=http_date(0)).status_code, 200)
+
+    def test_paths_outside_static_root_are_not_served(self):
+        for path in ('/static/../secret.txt', '/static/css/../../secret.txt', '/static/missing.css', '/static/css/'):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path).content, b'from the view')
+
+    def test_only_get_and_head_when_enabled(self):
+        request = self.factory.post('/static/css/app.css')
+        self.assertEqual(self.middleware(request).content, b'from the view')
+        with override_settings(SERVE_STATIC_FILES=False):
+            middleware = StaticAssetMiddleware(lambda request: HttpResponse('from the view'))
+        self.assertEqual(middleware(self.factory.get('/static/css/app.css')).content, b'from the view')
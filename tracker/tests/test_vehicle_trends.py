@@ -0,0 +1,91 @@
+import random
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from tracker.models import Branch, Customer, Invoice, Order, Vehicle
+from tracker.services import vehicle_trends
+
+
+class VehicleTrendsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        rng = random.Random(45)
+        self.branches = [Branch.objects.create(name=f'B{n}', code=f'B{n}') for n in range(2)]
+        self.vehicles = []
+        for n in range(6):
+            customer = Customer.objects.create(branch=self.branches[n % 2], full_name=f'Owner {n}', phone=f'07000000{n:02d}')
+            self.vehicles.append(Vehicle.objects.create(customer=customer, plate_number=f'T{n:03d}ABC'))
+        self.order = Order.objects.create(branch=self.branches[0], customer=self.vehicles[0].customer, type='service')
+        invoices = []
+        for n in range(120):
+            vehicle = rng.choice(self.vehicles + [None])
+            customer = vehicle.customer if vehicle else self.vehicles[0].customer
+            invoices.append(Invoice(
+                invoice_number=f'T-{n}', branch=customer.branch, customer=customer, vehicle=vehicle,
+                order=self.order if n % 10 == 0 else None,
+                invoice_date=date(2024, 1, 1) + timedelta(days=rng.randint(0, 120)),
+                total_amount=Decimal(rng.randint(10, 500)),
+            ))
+        Invoice.objects.bulk_create(invoices)
+        self.start, self.end = date(2024, 1, 15), date(2024, 3, 31)
+
+    def expected_trends(self, branch_id, period):
+        """The grouping the view used to do in Python."""
+        buckets = defaultdict(lambda: {'total_amount': Decimal('0'), 'invoice_count': 0, 'vehicles': set()})
+        for inv in Invoice.objects.all():
+            if not (self.start <= inv.invoice_date <= self.end) or (branch_id and inv.branch_id != branch_id):
+                continue
+            day = inv.invoice_date
+            key = {'daily': day, 'weekly': day - timedelta(days=day.weekday())}.get(period, day.replace(day=1))
+            buckets[key]['total_amount'] += inv.total_amount
+            buckets[key]['invoice_count'] += 1
+            if inv.vehicle_id:
+                buckets[key]['vehicles'].add(inv.vehicle_id)
+        return [
+            {'date': k.isoformat(), 'total_amount': float(v['total_amount']), 'invoice_count': v['invoice_count'],
+             'vehicle_count': len(v['vehicles'])}
+            for k, v in sorted(buckets.items())
+        ]
+
+    def test_grouped_trends_match_python_grouping(self):
+        for branch_id in (None, self.branches[1].id):
+            for period in ('daily', 'weekly', 'monthly'):
+                with self.subTest(branch=branch_id, period=period):
+                    qs = vehicle_trends.invoices_in_range(branch_id, self.start, self.end)
+                    self.assertEqual(vehicle_trends.trends(qs, period), self.expected_trends(branch_id, period))
+
+        qs = vehicle_trends.invoices_in_range(None, self.start, self.end)
+        top = vehicle_trends.top_vehicles(qs, limit=3)
+        totals = defaultdict(Decimal)
+        for vid, amount in qs.filter(vehicle__isnull=False).values_list('vehicle_id', 'total_amount'):
+            totals[vid] += amount
+        self.assertEqual([t['total_spent'] for t in top], sorted(map(float, totals.values()), reverse=True)[:3])
+        by_type = vehicle_trends.spending_by_type(qs)
+        self.assertEqual([(t['type'], t['count']) for t in by_type], [('service', qs.filter(order=self.order).count())])
+
+    def test_results_are_cached_until_an_invoice_changes(self):
+        first = vehicle_trends.analytics(None, self.start, self.end, 'weekly')
+        with self.assertNumQueries(0):
+            self.assertEqual(vehicle_trends.analytics(None, self.start, self.end, 'weekly'), first)
+
+        Invoice.objects.create(invoice_number='T-new', branch=self.branches[0], customer=self.vehicles[0].customer,
+                               vehicle=self.vehicles[0], invoice_date=self.start, total_amount=Decimal('1000'))
+        refreshed = vehicle_trends.analytics(None, self.start, self.end, 'weekly')
+        self.assertEqual(sum(t['invoice_count'] for t in refreshed['trends']),
+                         sum(t['invoice_count'] for t in first['trends']) + 1)
+
+    def test_api_response(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        response = self.client.get(reverse('tracker:api_vehicle_analytics'), {
+            'period': 'monthly', 'start_date': self.start.isoformat(), 'end_date': self.end.isoformat(),
+        })
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['trends'], self.expected_trends(None, 'monthly'))
+        self.assertEqual(set(data['top_vehicles'][0]), {'plate_number', 'customer_name', 'total_spent', 'invoice_count', 'average_per_invoice'})
@@ -0,0 +1,109 @@
+import random
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from tracker.models import Branch, Holiday, Order, Customer
+from tracker.utils.time_utils import calculate_estimated_duration
+from tracker.utils.working_hours import WorkingCalendar, calendar_for, working_minutes_for_orders
+
+
+def day_walk(started_at, completed_at, work_start_hour=8, work_end_hour=17, weekmask='1111111', holidays=()):
+    """The original day-by-day implementation, extended with working days and holidays."""
+    if not started_at or not completed_at:
+        return None
+    tz = timezone.get_current_timezone()
+    started_at = timezone.localtime(started_at, tz)
+    completed_at = timezone.localtime(completed_at, tz)
+    if completed_at <= started_at:
+        return 0
+    total_seconds = 0
+    current_day = started_at.date()
+    while current_day <= completed_at.date():
+        if weekmask[current_day.weekday()] == '1' and current_day not in holidays:
+            day_start = timezone.make_aware(datetime.combine(current_day, time(work_start_hour)), tz)
+            day_end = timezone.make_aware(datetime.combine(current_day, time(work_end_hour)), tz)
+            interval_start = max(started_at, day_start)
+            interval_end = min(completed_at, day_end)
+            if interval_end > interval_start:
+                total_seconds += (interval_end - interval_start).total_seconds()
+        current_day += timedelta(days=1)
+    return int(total_seconds // 60)
+
+
+def random_moment(rng, around):
+    return around + timedelta(seconds=rng.randint(-40 * 86400, 40 * 86400))
+
+
+class WorkingHoursPropertyTests(SimpleTestCase):
+    """Randomised comparisons with the day-by-day implementation (fixed seeds, reproducible)."""
+
+    base = timezone.make_aware(datetime(2024, 2, 27, 12, 0))
+
+    def test_matches_day_walk_for_random_windows_and_spans(self):
+        rng = random.Random(43)
+        for _ in range(1500):
+            start_hour = rng.randint(0, 20)
+            end_hour = rng.randint(0, 23)
+            a, b = random_moment(rng, self.base), random_moment(rng, self.base)
+            if rng.random() < 0.2:
+                b = a + timedelta(minutes=rng.randint(0, 600))
+            with self.subTest(a=a, b=b, window=(start_hour, end_hour)):
+                self.assertEqual(
+                    calculate_estimated_duration(a, b, start_hour, end_hour),
+                    day_walk(a, b, start_hour, end_hour),
+                )
+
+    def test_calendars_with_working_days_and_holidays(self):
+        rng = random.Random(7)
+        for _ in range(300):
+            weekmask = ''.join(rng.choice('01') for _ in range(7))
+            holidays = {self.base.date() + timedelta(days=rng.randint(-40, 40)) for _ in range(rng.randint(0, 6))}
+            calendar = WorkingCalendar(start=time(7), end=time(16), weekmask=weekmask, holidays=tuple(holidays))
+            starts = [random_moment(rng, self.base) for _ in range(8)]
+            ends = [random_moment(rng, self.base) for _ in range(8)]
+            expected = [day_walk(a, b, 7, 16, weekmask, holidays) for a, b in zip(starts, ends)]
+            self.assertEqual([calendar.minutes_between(a, b) for a, b in zip(starts, ends)], expected)
+            self.assertEqual(calendar.minutes_between_many(starts, ends).tolist(), expected)
+
+    def test_batch_handles_missing_and_reversed_pairs(self):
+        calendar = WorkingCalendar()
+        start = timezone.make_aware(datetime(2024, 3, 1, 9, 0))
+        result = calendar.minutes_between_many([start, None, start], [start + timedelta(days=14), start, start - timedelta(hours=1)])
+        self.assertEqual(result[0], day_walk(start, start + timedelta(days=14)))
+        self.assertTrue(np.isnan(result[1]))
+        self.assertEqual(result[2], 0)
+
+    def test_split_intervals_add_up(self):
+        rng = random.Random(11)
+        calendar = WorkingCalendar(weekmask='1111100')
+        for _ in range(300):
+            a, b, c = sorted(random_moment(rng, self.base).replace(second=0) for _ in range(3))
+            self.assertEqual(calendar.minutes_between(a, c), calendar.minutes_between(a, b) + calendar.minutes_between(b, c))
+
+
+class BranchCalendarTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_branch_calendar_and_orders(self):
+        branch = Branch.objects.create(name='B1', code='B1', work_start=time(9), work_end=time(13), work_days='1111100')
+        Holiday.objects.create(date=date(2024, 3, 4), name='Company day')  # a Monday, all branches
+        calendar = calendar_for(branch)
+        self.assertEqual((calendar.start, calendar.end, calendar.weekmask), (time(9), time(13), '1111100'))
+        with self.assertNumQueries(0):
+            calendar_for(branch.id)
+
+        customer = Customer.objects.create(branch=branch, full_name='Pat Driver', phone='0700000001')
+        # Friday 10:00 to Tuesday 10:00: Fri 3h, weekend and Monday holiday off, Tue 1h
+        started = timezone.make_aware(datetime(2024, 3, 1, 10, 0))
+        order = Order.objects.create(branch=branch, customer=customer, type='service', started_at=started,
+                                     completed_at=started + timedelta(days=4))
+        self.assertEqual(order.calculate_estimated_duration(), 4 * 60)
+        self.assertEqual(working_minutes_for_orders([order]).tolist(), [240.0])
+
+        Holiday.objects.all().delete()
+        self.assertEqual(order.calculate_estimated_duration(), 8 * 60)
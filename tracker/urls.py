@@ -2,23 +2,26 @@ from django.urls import path, include
 from django.contrib.auth import views as auth_views
 from django.views.generic import RedirectView
 from django.contrib.auth.views import LogoutView
-from . import views
-from .views import CustomLoginView, CustomLogoutView
-from .views_api_fix import api_customer_groups_data_fixed
-from . import branch_metrics as views_branch
-from . import views_start_order
-from . import views_invoice
-from . import views_invoice_upload
-from . import views_vehicle_tracking
-from . import views_labour_codes
-from . import views_delay_analytics
+from .utils.lazy import LazyView, LazyViews
+
+# View modules are imported on the first request to one of their URLs (see tracker.utils.lazy),
+# so loading the URLconf does not pull in pandas, reportlab, PyPDF2 and friends
+views = LazyViews('tracker.views')
+views_branch = LazyViews('tracker.branch_metrics')
+views_start_order = LazyViews('tracker.views_start_order')
+views_invoice = LazyViews('tracker.views_invoice')
+views_invoice_upload = LazyViews('tracker.views_invoice_upload')
+views_vehicle_tracking = LazyViews('tracker.views_vehicle_tracking')
+views_async = LazyViews('tracker.views_async')
+views_labour_codes = LazyViews('tracker.views_labour_codes')
+views_delay_analytics = LazyViews('tracker.views_delay_analytics')
 
 app_name = "tracker"
 
 urlpatterns = [
     # Authentication
-    path('login/', CustomLoginView.as_view(), name='login'),
-    path('logout/', CustomLogoutView.as_view(), name='logout'),
+    path('login/', views.CustomLoginView.as_view(), name='login'),
+    path('logout/', views.CustomLogoutView.as_view(), name='logout'),
     
     # Main app
     path("", views.dashboard, name="dashboard"),
@@ -26,6 +29,7 @@ urlpatterns = [
     path("customers/search/", views.customers_search, name="customers_search"),
     path("customers/quick-create/", views.customers_quick_create, name="customers_quick_create"),
     path("customers/register/", views.customer_register, name="customer_register"),
+    path("api/customers/register/", views.api_customer_register, name="api_customer_register"),
     path("customers/export/", views.customers_export, name="customers_export"),
     path("customers/<int:pk>/", views.customer_detail, name="customer_detail"),
     path("customers/<int:pk>/request-access/", views.request_customer_access, name="request_customer_access"),
@@ -37,10 +41,11 @@ urlpatterns = [
     path("customer-groups/", views.customer_groups_advanced, name="customer_groups"),
     path("customer-groups/advanced/", views.customer_groups_advanced, name="customer_groups_advanced"),
     path("api/customer-groups-data/", views.api_customer_groups_data, name="api_customer_groups_data"),
-    path("api/customer-groups-data-fixed/", api_customer_groups_data_fixed, name="api_customer_groups_data_fixed"),
+    path("api/customer-groups-data-fixed/", LazyView("tracker.views_api_fix.api_customer_groups_data_fixed"), name="api_customer_groups_data_fixed"),
     path("customer-groups/export/", views.customer_groups_export, name="customer_groups_export"),
+    path("charts/<str:key>.png", views.chart_image, name="chart_image"),
     path("api/customer-groups/data/", views.customer_groups_data, name="customer_groups_data"),
-    path("api/customers/summary/", views.api_customers_summary, name="api_customers_summary"),
+    path("api/customers/summary/", views_async.api_customers_summary, name="api_customers_summary"),
     path("api/customers/list/", views.api_customers_list, name="api_customers_list"),
 
     path("orders/", views.orders_list, name="orders_list"),
@@ -56,8 +61,8 @@ urlpatterns = [
     path("orders/<int:pk>/sign-document/", views.sign_order_document, name="order_sign_document"),
     path("orders/<int:pk>/sign-existing-document/", views.sign_existing_document, name="sign_existing_document"),
     path("attachments/<int:att_id>/delete/", views.delete_order_attachment, name="delete_order_attachment"),
-    path("api/orders/<int:pk>/status/", views.api_order_status, name="api_order_status"),
-    path("api/orders/statuses/", views.api_orders_statuses, name="api_orders_statuses"),
+    path("api/orders/<int:pk>/status/", views_async.api_order_status, name="api_order_status"),
+    path("api/orders/statuses/", views_async.api_orders_statuses, name="api_orders_statuses"),
     path("api/orders/<int:pk>/invoice-totals/", views.api_order_invoice_totals, name="api_order_invoice_totals"),
     path("api/orders/<int:pk>/save-delay-reason/", views.api_save_delay_reason, name="api_save_delay_reason"),
     path("orders/<int:pk>/cancel/", views.cancel_order, name="cancel_order"),
@@ -104,6 +109,7 @@ urlpatterns = [
     # Admin-only Organization Management
     path("organization/", views.organization_management, name="organization"),
     path("organization/export/", views.organization_export, name="organization_export"),
+    path("api/organization/rollup/", views.api_organization_rollup, name="api_organization_rollup"),
 
     # Vehicle management
     path("vehicles/<int:customer_id>/add/", views.vehicle_add, name="vehicle_add"),
@@ -115,6 +121,7 @@ urlpatterns = [
     path("vehicles/tracking/dashboard/", views_vehicle_tracking.vehicle_tracking_dashboard, name="vehicle_tracking_dashboard"),
     path("api/vehicles/tracking/data/", views_vehicle_tracking.api_vehicle_tracking_data, name="api_vehicle_tracking_data"),
     path("api/vehicles/analytics/", views_vehicle_tracking.api_vehicle_analytics, name="api_vehicle_analytics"),
+    path("api/vehicles/<int:pk>/history/", views_vehicle_tracking.api_vehicle_history, name="api_vehicle_history"),
 
     # Labour Codes Management
     path("labour-codes/", views_labour_codes.labour_codes_list, name="labour_codes_list"),
@@ -134,6 +141,7 @@ urlpatterns = [
     # Internal admin console: system settings and tools
     path("console/settings/", views.system_settings, name="system_settings"),
     path("console/audit-logs/", views.audit_logs, name="audit_logs"),
+    path("console/request-metrics/", views.request_metrics, name="request_metrics"),
     path("console/backup/", views.backup_restore, name="backup_restore"),
 
     path("login/", views.CustomLoginView.as_view(), name="login"),
@@ -150,11 +158,11 @@ urlpatterns = [
     path("api/brands/<int:pk>/update/", views.update_brand, name="api_update_brand"),
     path("api/customers/<int:customer_id>/vehicles/", views.api_customer_vehicles, name="api_customer_vehicles"),
     # Notifications summary (canonical)
-    path("api/notifications/summary/", views.api_notifications_summary, name="api_notifications_summary"),
+    path("api/notifications/summary/", views_async.api_notifications_summary, name="api_notifications_summary"),
     # Aliases to tolerate typos/missing trailing slash
-    path("api/notifications/summary", views.api_notifications_summary),
-    path("api/notification/summary/", views.api_notifications_summary, name="api_notifications_summary_singular"),
-    path("api/notification/summary", views.api_notifications_summary),
+    path("api/notifications/summary", views_async.api_notifications_summary),
+    path("api/notification/summary/", views_async.api_notifications_summary, name="api_notifications_summary_singular"),
+    path("api/notification/summary", views_async.api_notifications_summary),
     path("api/customers/check-exists/", views.api_check_customer_exists, name="api_check_customer_exists"),
     path("api/customers/check-duplicate/", views.api_check_customer_duplicate, name="api_check_customer_duplicate"),
     path("api/service-distribution/", views.api_service_distribution, name="api_service_distribution"),
@@ -181,6 +189,8 @@ urlpatterns = [
     # Invoice upload (two-step process)
     path("api/invoices/extract-preview/", views_invoice_upload.api_extract_invoice_preview, name="api_extract_invoice_preview"),
     path("api/invoices/create-from-upload/", views_invoice_upload.api_create_invoice_from_upload, name="api_create_invoice_from_upload"),
+    path("api/invoices/bulk-upload/", views_invoice_upload.api_bulk_invoice_upload, name="api_bulk_invoice_upload"),
+    path("api/invoices/bulk-upload/<int:pk>/", views_invoice_upload.api_invoice_upload_batch, name="api_invoice_upload_batch"),
     path("api/salespersons/", views_invoice_upload.api_get_salespersons, name="api_get_salespersons"),
     path("invoices/<int:pk>/", views_invoice.invoice_detail, name="invoice_detail"),
     path("invoices/<int:pk>/print/", views_invoice.invoice_print, name="invoice_print"),
@@ -192,6 +202,7 @@ urlpatterns = [
     path("invoices/", views_invoice.invoice_list, name="invoice_list"),
     path("invoices/order/<int:order_id>/", views_invoice.invoice_list, name="invoice_list_for_order"),
     path("api/invoices/recent/", views_invoice.api_recent_invoices, name="api_invoices_recent"),
+    path("api/invoices/list/", views_invoice.api_invoice_list, name="api_invoice_list"),
     path("api/invoices/inventory/", views_invoice.api_inventory_for_invoice, name="api_invoices_inventory"),
 
     # Delay Reason Analytics
@@ -11,6 +11,8 @@ from urllib import request, parse
 import re
 
 from django.core.cache import cache
+from django.db.models import F, Value
+from django.db.models.functions import Replace
 from django.utils import timezone
 
 
@@ -79,6 +81,32 @@ def normalize_phone(phone: str) -> str:
     except Exception:
         return str(phone)
 
+
+def phone_digits_sql(field: str = 'phone'):
+    """The phone column with the usual separators removed: normalize_phone() in SQL, for set-based matching."""
+    expr = F(field)
+    for char in (' ', '-', '+', '(', ')', '.'):
+        expr = Replace(expr, Value(char), Value(''))
+    return expr
+
+
+_PLATE_PATTERNS = (
+    re.compile(r'^[A-Z]{1,3}\s*-?\s*\d{1,4}[A-Z]?$'),
+    re.compile(r'^[A-Z]{1,3}\d{3,4}$'),
+    re.compile(r'^\d{1,4}[A-Z]{2,3}$'),
+    re.compile(r'^[A-Z]\s*\d{1,4}\s*[A-Z]{2,3}$'),
+)
+
+
+def plate_from_reference(reference: str | None) -> str | None:
+    """Vehicle plate in an invoice reference such as "FOR T 290 EJF", or None."""
+    ref = (reference or '').strip().upper()
+    if ref.startswith('FOR'):
+        ref = ref[3:].strip()
+    if ref and any(p.match(ref) for p in _PLATE_PATTERNS):
+        return ref.replace('-', '').replace(' ', '')
+    return None
+
 # ---- Audit log helpers ----------------------------------------------------
 
 def add_audit_log(user=None, action: str | None = None, details: str | None = None, **kwargs) -> None:
@@ -181,7 +209,11 @@ def scope_queryset(qs, user, request=None):
 
 def clear_inventory_cache(name: str | None = None, brand: str | None = None) -> None:
     try:
-        cache.delete('api_inv_items_v1')
+        from tracker.models import InventoryItem
+        from tracker.services import reference_data
+
+        # Stock changes made with queryset.update() never reach the model signals
+        reference_data.invalidate([InventoryItem])
         cache.delete('dashboard_metrics_v1')
         if name:
             cache.delete(f'api_inv_brands_{name}')
@@ -195,27 +227,10 @@ def clear_inventory_cache(name: str | None = None, brand: str | None = None) ->
         pass
 
 
-def adjust_inventory(name: str, brand: str, qty_delta: int) -> tuple[bool, str, int | None]:
+def adjust_inventory(name: str, brand: str, qty_delta: int, **kwargs) -> tuple[bool, str, int | None]:
     """Adjust inventory by name+brand with qty_delta (negative to deduct, positive to restock).
     Returns (ok, status, remaining_qty). status in {ok, not_found, invalid}.
+    Recorded in the inventory ledger; kwargs (user, order, reference, notes) are passed through.
     """
-    try:
-        # Import from the parent app package (not from inside utils)
-        from ..models import InventoryItem  # type: ignore
-        name = (name or '').strip()
-        brand = (brand or '').strip()
-        if not name:
-            return False, 'invalid', None
-        # Resolve by brand name (case-insensitive)
-        item = InventoryItem.objects.filter(name=name, brand__name__iexact=brand).first()
-        if not item:
-            return False, 'not_found', None
-        new_qty = item.quantity + int(qty_delta)
-        if new_qty < 0:
-            new_qty = 0
-        item.quantity = new_qty
-        item.save()
-        clear_inventory_cache(name, brand)
-        return True, 'ok', new_qty
-    except Exception as e:
-        return False, str(e), None
+    from ..services.inventory_ledger import adjust_by_name
+    return adjust_by_name(name, brand, qty_delta, **kwargs)
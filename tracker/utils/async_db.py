@@ -0,0 +1,62 @@
+"""
+Database access from async views (ASGI mode, see pos_tracker.asgi).
+
+Under ASGI an async view holds no thread while it waits, which is what lets one worker
+serve hundreds of polling tabs. Its ORM calls still block, so run() sends them to a
+bounded pool of ASYNC_DB_THREADS threads:
+  - the pool caps how many connections the pollers open, whatever the number of tabs
+  - sync_to_async's default (thread_sensitive) would funnel every call of a request
+    through one thread; the pool lets different requests' queries run side by side
+  - each call closes connections that are broken or past CONN_MAX_AGE before and after
+    running, as Django does around a sync request
+  - sync_to_async runs each call with the request's context, so tracker.services.request_metrics
+    counts its queries
+
+async_login_required is @login_required for async views: Django 4.2's decorator calls the
+view synchronously, and request.user loads the user from the database on first access.
+"""
+
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.db import close_old_connections
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=getattr(settings, 'ASYNC_DB_THREADS', 8),
+                                           thread_name_prefix='async-db')
+        return _executor
+
+
+def _call(func: Callable, args, kwargs):
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run(func: Callable, *args, **kwargs):
+    """await func(*args, **kwargs) on the database thread pool."""
+    return await sync_to_async(_call, thread_sensitive=False, executor=executor())(func, args, kwargs)
+
+
+def async_login_required(view):
+    """Redirect anonymous users to the login page, like @login_required, for an async view."""
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if not await run(lambda: request.user.is_authenticated):
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapper
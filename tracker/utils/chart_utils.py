@@ -1,83 +1,96 @@
+"""
+Server-side chart images (matplotlib).
+
+Rendering goes through matplotlib's object API (Figure + Agg canvas) rather than pyplot,
+which keeps global state and is not safe in the chart worker threads
+(tracker.services.charts). matplotlib is imported on first render, not at module load.
+"""
+
 import base64
+from datetime import date, datetime
 from io import BytesIO
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import pandas as pd
-from django.utils import timezone
-import numpy as np
+from typing import List, Sequence
 
-def generate_monthly_trend_chart(monthly_data, title, width=10, height=6):
+
+def _month(value) -> date:
+    if isinstance(value, datetime):
+        return value.date().replace(day=1)
+    if isinstance(value, date):
+        return value.replace(day=1)
+    return date.fromisoformat(str(value)[:7] + '-01')
+
+
+def fill_months(monthly_data: Sequence[dict]) -> List[dict]:
+    """Points for every month between the first and last, missing months at 0 orders."""
+    counts = {}
+    for point in monthly_data:
+        month = _month(point['month'])
+        counts[month] = counts.get(month, 0) + int(point.get('orders') or 0)
+    if not counts:
+        return []
+    month, last = min(counts), max(counts)
+    filled = []
+    while month <= last:
+        filled.append({'month': month, 'orders': counts.get(month, 0)})
+        month = date(month.year + (month.month == 12), month.month % 12 + 1, 1)
+    return filled
+
+
+def render_monthly_trend_png(monthly_data, title, width=10, height=6) -> bytes:
     """
-    Generate a monthly trend chart from the given data
-    
+    Render a monthly trend line chart as PNG bytes.
+
     Args:
-        monthly_data: List of dicts with 'month' and 'orders' keys
+        monthly_data: List of dicts with 'month' (date, datetime or 'YYYY-MM') and 'orders'
         title: Chart title
         width: Figure width in inches
         height: Figure height in inches
-        
-    Returns:
-        Base64 encoded PNG image
     """
-    if not monthly_data:
-        return None
-        
-    # Convert to DataFrame for easier manipulation
-    df = pd.DataFrame(monthly_data)
-    
-    # Ensure we have datetime objects
-    df['month'] = pd.to_datetime(df['month'])
-    
-    # Create a complete date range to ensure all months are shown
-    date_range = pd.date_range(
-        start=df['month'].min(),
-        end=df['month'].max(),
-        freq='MS'  # Month Start frequency
-    )
-    
-    # Reindex to include all months in the range
-    df = df.set_index('month').reindex(date_range).fillna(0).reset_index()
-    df = df.rename(columns={'index': 'month'})
-    
-    # Create the plot
-    plt.style.use('seaborn')
-    plt.rcParams['font.family'] = 'sans-serif'
-    
-    fig, ax = plt.subplots(figsize=(width, height))
-    
-    # Plot the data
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    import matplotlib.dates as mdates
+
+    points = fill_months(monthly_data)
+    fig = Figure(figsize=(width, height))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
     ax.plot(
-        df['month'], 
-        df['orders'], 
-        marker='o', 
+        [p['month'] for p in points],
+        [p['orders'] for p in points],
+        marker='o',
         linewidth=2,
         color='#4361ee',
         markersize=8,
         markerfacecolor='white',
         markeredgewidth=2
     )
-    
+
     # Format the x-axis to show month and year
     ax.xaxis.set_major_formatter(mdates.DateFormatter('%b %Y'))
     ax.xaxis.set_major_locator(mdates.MonthLocator(interval=1))
-    
-    # Rotate and align the x-axis labels
-    plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
-    
-    # Add grid
+    for label in ax.get_xticklabels():
+        label.set_rotation(45)
+        label.set_horizontalalignment('right')
+
     ax.grid(True, linestyle='--', alpha=0.7)
-    
-    # Set labels and title
     ax.set_xlabel('Month', fontsize=12, labelpad=10)
     ax.set_ylabel('Number of Orders', fontsize=12, labelpad=10)
     ax.set_title(title, fontsize=14, pad=20, fontweight='bold')
-    
-    # Adjust layout to prevent label cutoff
-    plt.tight_layout()
-    
-    # Save to base64 string
+    fig.tight_layout()
+
     buffer = BytesIO()
-    plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-    plt.close()
-    
-    return base64.b64encode(buffer.getvalue()).decode('utf-8')
+    fig.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
+    return buffer.getvalue()
+
+
+def generate_monthly_trend_chart(monthly_data, title, width=10, height=6):
+    """
+    Generate a monthly trend chart from the given data
+
+    Returns:
+        Base64 encoded PNG image, or None when there is no data
+    """
+    if not monthly_data:
+        return None
+    return base64.b64encode(render_monthly_trend_png(monthly_data, title, width, height)).decode('utf-8')
@@ -0,0 +1,73 @@
+"""
+Lookup-free code allocation for customers.
+
+Codes are ULID-style: a millisecond timestamp followed by random bits, both encoded
+in Crockford base32, e.g. CUST01JAB3KQ7RZX4M2C9D. Within a process the random part is
+incremented when two codes share a millisecond, so codes are strictly increasing and
+never repeat; across processes 40 random bits per millisecond make a clash practically
+impossible (the unique index on Customer.code remains the backstop).
+
+Because no existence query is needed, codes can be assigned in memory for bulk_create.
+"""
+
+import os
+import threading
+import time
+
+CROCKFORD_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+CUSTOMER_CODE_PREFIX = 'CUST'
+
+TIMESTAMP_CHARS = 10  # 50 bits, enough for ms timestamps until the year 10889
+RANDOM_CHARS = 8      # 40 bits
+_RANDOM_MAX = (1 << (RANDOM_CHARS * 5)) - 1
+
+
+def _encode(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        value, rem = divmod(value, 32)
+        chars.append(CROCKFORD_ALPHABET[rem])
+    return ''.join(reversed(chars))
+
+
+class MonotonicCodeAllocator:
+    """Thread-safe generator of sortable, unique codes with a fixed prefix."""
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_rand = 0
+
+    def _next_parts(self) -> tuple[int, int]:
+        ms = time.time_ns() // 1_000_000
+        if ms <= self._last_ms:
+            # Same (or earlier, after a clock step back) millisecond: keep ordering by bumping randomness
+            ms = self._last_ms
+            rand = self._last_rand + 1
+            if rand > _RANDOM_MAX:
+                ms += 1
+                rand = int.from_bytes(os.urandom(5), 'big') >> 1
+        else:
+            # Leave headroom for increments within the millisecond
+            rand = int.from_bytes(os.urandom(5), 'big') >> 1
+        self._last_ms, self._last_rand = ms, rand
+        return ms, rand
+
+    def allocate(self) -> str:
+        with self._lock:
+            ms, rand = self._next_parts()
+        return f"{self.prefix}{_encode(ms, TIMESTAMP_CHARS)}{_encode(rand, RANDOM_CHARS)}"
+
+    def allocate_many(self, count: int) -> list[str]:
+        with self._lock:
+            parts = [self._next_parts() for _ in range(count)]
+        return [f"{self.prefix}{_encode(ms, TIMESTAMP_CHARS)}{_encode(rand, RANDOM_CHARS)}" for ms, rand in parts]
+
+
+customer_codes = MonotonicCodeAllocator(CUSTOMER_CODE_PREFIX)
+
+
+def generate_customer_code() -> str:
+    """Return a new unique customer code without touching the database."""
+    return customer_codes.allocate()
@@ -100,7 +100,11 @@ def clear_audit_logs() -> None:
 
 def clear_inventory_cache(name: str | None = None, brand: str | None = None) -> None:
     try:
-        cache.delete('api_inv_items_v1')
+        from tracker.models import InventoryItem
+        from tracker.services import reference_data
+
+        # Stock changes made with queryset.update() never reach the model signals
+        reference_data.invalidate([InventoryItem])
         cache.delete('dashboard_metrics_v1')
         if name:
             cache.delete(f'api_inv_brands_{name}')
@@ -114,27 +118,10 @@ def clear_inventory_cache(name: str | None = None, brand: str | None = None) ->
         pass
 
 
-def adjust_inventory(name: str, brand: str, qty_delta: int) -> tuple[bool, str, int | None]:
+def adjust_inventory(name: str, brand: str, qty_delta: int, **kwargs) -> tuple[bool, str, int | None]:
     """Adjust inventory by name+brand with qty_delta (negative to deduct, positive to restock).
     Returns (ok, status, remaining_qty). status in {ok, not_found, invalid}.
+    Recorded in the inventory ledger; kwargs (user, order, reference, notes) are passed through.
     """
-    try:
-        # NOTE: now inside tracker.utils package, so import from parent
-        from ..models import InventoryItem
-        name = (name or '').strip()
-        brand = (brand or '').strip()
-        if not name:
-            return False, 'invalid', None
-        # Resolve by brand name (case-insensitive)
-        item = InventoryItem.objects.filter(name=name, brand__name__iexact=brand).first()
-        if not item:
-            return False, 'not_found', None
-        new_qty = item.quantity + int(qty_delta)
-        if new_qty < 0:
-            new_qty = 0
-        item.quantity = new_qty
-        item.save()
-        clear_inventory_cache(name, brand)
-        return True, 'ok', new_qty
-    except Exception as e:
-        return False, str(e), None
+    from ..services.inventory_ledger import adjust_by_name
+    return adjust_by_name(name, brand, qty_delta, **kwargs)
@@ -9,17 +9,10 @@ try:
 except Exception:
     pytesseract = None
 
-try:
-    import cv2
-    import numpy as np
-except Exception:
-    cv2 = None
-    np = None
-
 logger = logging.getLogger(__name__)
 
-# Check if dependencies are available
-OCR_AVAILABLE = pytesseract is not None and cv2 is not None
+# Check if dependencies are available (preprocessing is NumPy/Pillow only, see pdf_ocr)
+OCR_AVAILABLE = pytesseract is not None
 
 
 def _image_from_bytes(file_bytes):
@@ -27,22 +20,13 @@ def _image_from_bytes(file_bytes):
 
 
 def preprocess_image_pil(img_pil):
-    """Convert PIL image -> OpenCV -> simple preprocessing -> back to PIL"""
-    if cv2 is None or np is None:
-        return img_pil
-    arr = np.array(img_pil)
-    # Convert to gray
-    gray = cv2.cvtColor(arr, cv2.COLOR_RGB2GRAY)
-    # Resize if too small
-    h, w = gray.shape[:2]
-    if w < 1000:
-        scale = 1000.0 / w
-        gray = cv2.resize(gray, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_LINEAR)
-    # Denoise and threshold
-    blur = cv2.medianBlur(gray, 3)
-    _, th = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-    # Convert back to PIL
-    return Image.fromarray(th)
+    """Grayscale, upscale small images, Otsu threshold and deskew (NumPy/Pillow only)"""
+    import numpy as np
+    from tracker.utils.pdf_ocr import preprocess
+    if img_pil.width < 1000:
+        scale = 1000.0 / img_pil.width
+        img_pil = img_pil.resize((1000, int(img_pil.height * scale)), Image.BILINEAR)
+    return Image.fromarray(preprocess(np.asarray(img_pil)))
 
 
 def ocr_image(img_pil):
@@ -59,8 +43,6 @@ def ocr_image(img_pil):
     """
     if pytesseract is None:
         raise RuntimeError('pytesseract is not available. Please install: pip install pytesseract')
-    if cv2 is None:
-        raise RuntimeError('OpenCV is not available. Please install: pip install opencv-python')
 
     try:
         # Simple config: treat as single column text but allow some detection
@@ -0,0 +1,110 @@
+"""
+Deferred imports for worker startup.
+
+Every gunicorn worker and management command imports tracker.urls, and through it every
+view module. Heavy libraries (pandas, numpy, matplotlib, PIL, PyPDF2, reportlab, PyMuPDF)
+are only needed by a few views, so they are not imported at module load:
+  - lazy_import() returns a module whose code runs on first attribute access
+  - LazyViews / LazyView stand in for view modules in urls.py; the view module is imported
+    the first time one of its URLs is requested, not when the URLconf is loaded
+
+tracker.tests.test_import_time keeps `django.setup()` plus URL resolution within a budget.
+"""
+
+import importlib
+import importlib.util
+import sys
+from types import ModuleType
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.module_loading import import_string
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Module `name`, executed on first attribute access (importlib.util.LazyLoader).
+
+    Raises ImportError right away if the module is not installed, like a normal import.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def is_available(name: str) -> bool:
+    """Whether an optional dependency is installed, without importing it."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class LazyView:
+    """URLconf callback that imports its view on the first request.
+
+    Attributes Django reads before calling a view (csrf_exempt, view_class, ...) are taken
+    from the real view and so also trigger the import; the URL resolver only needs
+    __module__/__name__/__qualname__, which are known without importing.
+    """
+
+    # Looked up by URLResolver._populate() via hasattr(); answering them would import the view
+    _UNRESOLVED = ('view_class', 'view_initkwargs')
+    # Coroutine markers asgiref/inspect look for; set on this object when the view is async
+    _COROUTINE_MARKERS = ('_is_coroutine', '_is_coroutine_marker')
+
+    def __init__(self, path: str, initkwargs: Optional[dict] = None):
+        module, _, name = path.rpartition('.')
+        self.__module__ = module
+        self.__name__ = self.__qualname__ = name
+        self._path = path
+        self._initkwargs = initkwargs
+        self._view = None
+
+    def as_view(self, **initkwargs) -> 'LazyView':
+        return LazyView(self._path, initkwargs)
+
+    def resolve(self):
+        if self._view is None:
+            view = import_string(self._path)
+            view = view.as_view(**self._initkwargs) if self._initkwargs is not None else view
+            if iscoroutinefunction(view):
+                markcoroutinefunction(self)
+            self._view = view
+        return self._view
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        if attr in self._COROUTINE_MARKERS:
+            self.resolve()
+            if attr in self.__dict__:
+                return self.__dict__[attr]
+            raise AttributeError(attr)
+        if attr.startswith('__') or (attr in self._UNRESOLVED and self._view is None):
+            raise AttributeError(attr)
+        return getattr(self.resolve(), attr)
+
+    def __repr__(self):
+        return f"<LazyView {self._path}>"
+
+
+class LazyViews:
+    """Stand-in for a view module in urls.py: `views = LazyViews('tracker.views')`,
+    then `views.dashboard` and `views.LoginView.as_view()` work as before."""
+
+    def __init__(self, module: str):
+        self._module = module
+
+    def __getattr__(self, name: str) -> LazyView:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return LazyView(f"{self._module}.{name}")
@@ -0,0 +1,178 @@
+"""
+Logging building blocks used by settings.LOGGING.
+
+Request threads should never wait on disk. The root logger therefore has a single
+QueueListenerHandler. It only puts a prepared copy of the record on a bounded in-memory
+queue. A QueueListener thread then hands the record to the real handlers (log file,
+console). If the queue is full because the disk cannot keep up, records are dropped and
+counted rather than blocking the caller.
+
+Hot paths (order type detection, invoice extraction, vehicle tracking) log at INFO on
+every call. RateLimitFilter lets through at most `rate` records per logging call site
+(logger, file and line) every `per` seconds. SampleFilter keeps a fixed share of records. Neither filter
+ever drops WARNING or above.
+
+JsonFormatter writes one JSON object per line. The object holds the usual record fields,
+any `extra=` values and the formatted traceback.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Attributes every LogRecord has; anything else on a record came from `extra=`
+_RECORD_FIELDS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, message, process, thread, extras, exc."""
+
+    def format(self, record):
+        data = {
+            'ts': datetime.fromtimestamp(record.created, dt_timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'process': record.process,
+            'thread': record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exc'] = record.exc_text
+        if record.stack_info:
+            data['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)  # Waits for room: stopping must not lose the queued records
+
+
+class QueueListenerHandler(QueueHandler):
+    """Enqueue records and write them to the named handlers from a background thread.
+
+    `handlers` are other handlers of the same LOGGING config as "cfg://handlers.<name>".
+    dictConfig builds handlers in name order, so this one's name must sort after theirs.
+    The listener thread starts with the first record. It is restarted in a forked child,
+    because the parent's thread does not survive the fork.
+    """
+
+    def __init__(self, handlers, maxsize=10000):
+        targets = [handlers[i] for i in range(len(handlers))]  # Indexing resolves the cfg:// references
+        if not all(isinstance(target, logging.Handler) for target in targets):
+            raise ValueError(f'{type(self).__name__} targets must be built first: refer to them as '
+                             f'"cfg://handlers.<name>" and give this handler a name sorting after theirs')
+        super().__init__(queue.Queue(maxsize))
+        self.targets = targets
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        atexit.register(self.stop)
+
+    def start(self):
+        with self._start_lock:
+            if self._listener is not None and self._pid == os.getpid():
+                return
+            if self._pid is not None and self._pid != os.getpid():
+                self.queue = queue.Queue(self.maxsize)  # The parent's queue may hold records it will write itself
+            self._listener = _Listener(self.queue, *self.targets, respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def stop(self):
+        with self._start_lock:
+            if self._listener is not None and self._pid == os.getpid():
+                self._listener.stop()  # Writes out what is still queued
+            self._listener = None
+
+    def prepare(self, record):
+        """A picklable copy with the message merged and the traceback pre-formatted."""
+        record = logging.makeLogRecord(vars(record))
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record):
+        if self._listener is None or self._pid != os.getpid():
+            self.start()
+        super().emit(record)
+
+    def close(self):
+        self.stop()
+        super().close()
+
+
+class RateLimitFilter(logging.Filter):
+    """Pass at most `rate` records per logging call site every `per` seconds.
+
+    Records are grouped by the line that logged them rather than by message, since the hot
+    paths build their messages with f-strings. Only applies below WARNING. The first record
+    let through after a suppression carries the count in its `suppressed` attribute and in
+    the message.
+    """
+
+    def __init__(self, rate=10, per=60.0):
+        super().__init__()
+        self.rate = int(rate)
+        self.per = float(per)
+        self._windows = {}  # (logger, file, line) -> [window start, passed, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.per:
+                suppressed = window[2] if window else 0
+                if len(self._windows) > 1000:
+                    self._windows.clear()
+                self._windows[key] = window = [now, 0, 0]
+            else:
+                suppressed = 0
+            if window[1] >= self.rate:
+                window[2] += 1
+                return False
+            window[1] += 1
+        if suppressed:
+            record.suppressed = suppressed
+            record.msg = f'{record.msg} [{suppressed} similar suppressed]'
+        return True
+
+
+class SampleFilter(logging.Filter):
+    """Keep a `rate` share (0..1) of records below WARNING."""
+
+    def __init__(self, rate=0.1):
+        super().__init__()
+        self.rate = float(rate)
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or random.random() < self.rate
@@ -136,6 +136,68 @@ def _normalize_category_to_order_type(category: str) -> str:
         return 'labour'
 
 
+def item_code_categories(item_codes):
+    """
+    Helper function to get category information for item codes.
+    Queries LabourCode for each code and returns category and order type.
+
+    Args:
+        item_codes: List of item codes extracted from invoice
+
+    Returns:
+        Dict mapping code -> {category, order_type, color_class}
+    """
+    from tracker.models import LabourCode
+
+    if not item_codes:
+        return {}
+
+    # Clean codes
+    cleaned_codes = [str(code).strip() for code in item_codes if code]
+    if not cleaned_codes:
+        return {}
+
+    # Query database
+    found_codes = LabourCode.objects.filter(
+        code__in=cleaned_codes,
+        is_active=True
+    ).values('code', 'category')
+
+    result = {}
+    found_code_set = set()
+
+    for row in found_codes:
+        code = row['code']
+        category = row['category']
+        order_type = _normalize_category_to_order_type(category)
+
+        # Assign color based on order type
+        color_map = {
+            'labour': 'badge-labour',
+            'service': 'badge-service',
+            'sales': 'badge-sales',
+            'unspecified': 'badge-unspecified',
+        }
+
+        result[code] = {
+            'category': category,
+            'order_type': order_type,
+            'color_class': color_map.get(order_type, 'badge-secondary')
+        }
+        found_code_set.add(code)
+
+    # Add unmapped codes as 'sales'
+    for code in cleaned_codes:
+        if code not in found_code_set:
+            result[code] = {
+                'category': 'Sales',
+                'order_type': 'sales',
+                'color_class': 'badge-sales'
+            }
+
+    return result
+
+
 def get_mixed_order_status_display(order_type: str, order_types_found: List[str] = None, categories: List[str] = None) -> str:
     """
     Generate a display string for order status showing types and categories.
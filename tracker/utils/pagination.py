@@ -0,0 +1,167 @@
+"""
+Keyset ("cursor") pagination for large list views.
+
+Instead of OFFSET/LIMIT, a page continues from the last row of the previous page:
+    WHERE (sort_key, id) < (last_sort_key, last_id) ORDER BY sort_key DESC, id DESC LIMIT n+1
+so deep pages cost the same as the first one and no COUNT(*) is needed. The position is
+passed around as an opaque, URL-safe cursor string.
+
+Usage:
+    paginator = CursorPaginator(qs, ordering=('-created_at', '-id'), per_page=20)
+    page = paginator.page(request.GET.get('cursor'))
+    # page.object_list, page.has_next, page.next_cursor, page.has_previous, page.previous_cursor
+
+The sort key must be non-null (annotate with Coalesce for nullable columns) and the
+last ordering field must be unique, normally 'id'/'-id'.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence
+
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+def _encode_value(value: Any) -> list:
+    if isinstance(value, datetime):
+        return ['dt', value.isoformat()]
+    if isinstance(value, date):
+        return ['d', value.isoformat()]
+    if isinstance(value, Decimal):
+        return ['dec', str(value)]
+    return ['v', value]
+
+
+def _decode_value(item: list) -> Any:
+    kind, raw = item
+    if kind == 'dt':
+        return parse_datetime(raw)
+    if kind == 'd':
+        return parse_date(raw)
+    if kind == 'dec':
+        return Decimal(raw)
+    return raw
+
+
+def encode_cursor(values: Sequence[Any], direction: str = 'next') -> str:
+    payload = json.dumps({'k': [_encode_value(v) for v in values], 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]):
+    """Return (values, direction) or None for a missing/malformed cursor."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        values = [_decode_value(item) for item in payload['k']]
+        direction = payload.get('d', 'next')
+        if any(v is None for v in values) or direction not in ('next', 'prev'):
+            return None
+        return values, direction
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def _resolve(obj: Any, path: str) -> Any:
+    for part in path.split('__'):
+        obj = getattr(obj, part)
+    return obj
+
+
+class CursorPage:
+    """One page of results; iterable like a Django Page."""
+
+    def __init__(self, object_list: List[Any], next_cursor: Optional[str], previous_cursor: Optional[str]):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self) -> bool:
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def __bool__(self) -> bool:
+        return bool(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+
+class CursorPaginator:
+    def __init__(self, queryset: QuerySet, ordering: Sequence[str] = ('-created_at', '-id'), per_page: int = 20):
+        if len(ordering) < 2:
+            raise ValueError("ordering needs a sort key and a unique tiebreaker, e.g. ('-created_at', '-id')")
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.fields = [o.lstrip('-') for o in self.ordering]
+        self.descending = [o.startswith('-') for o in self.ordering]
+        self.per_page = max(1, int(per_page))
+
+    def _after(self, values: Sequence[Any], reverse: bool) -> Q:
+        """Rows strictly after `values` in the page order (or before it when reverse)."""
+        condition = Q()
+        for i in range(len(self.fields) - 1, -1, -1):
+            # Lexicographic: past the cursor on field i, or equal on it and past it on the later fields
+            op = 'lt' if self.descending[i] != reverse else 'gt'
+            step = Q(**{f"{self.fields[i]}__{op}": values[i]})
+            if i < len(self.fields) - 1:
+                step |= Q(**{self.fields[i]: values[i]}) & condition
+            condition = step
+        return condition
+
+    def _key(self, obj: Any) -> list:
+        return [_resolve(obj, f) for f in self.fields]
+
+    def page(self, cursor: Optional[str] = None) -> CursorPage:
+        decoded = decode_cursor(cursor)
+        qs = self.queryset
+        reverse = False
+        if decoded:
+            values, direction = decoded
+            if len(values) != len(self.fields):
+                decoded = None
+            else:
+                reverse = direction == 'prev'
+                qs = qs.filter(self._after(values, reverse))
+
+        if reverse:
+            qs = qs.order_by(*[f if desc else f"-{f}" for f, desc in zip(self.fields, self.descending)])
+        else:
+            qs = qs.order_by(*self.ordering)
+
+        # One extra row tells us whether there is more in the direction of travel
+        rows = list(qs[:self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            # Going back, the row the cursor pointed at is still ahead of this page
+            has_next, has_previous = True, more
+        else:
+            has_next, has_previous = more, decoded is not None
+        next_cursor = encode_cursor(self._key(rows[-1]), 'next') if rows and has_next else None
+        previous_cursor = encode_cursor(self._key(rows[0]), 'prev') if rows and has_previous else None
+        return CursorPage(rows, next_cursor, previous_cursor)
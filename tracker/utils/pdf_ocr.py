@@ -0,0 +1,236 @@
+"""
+OCR fallback for scanned invoices.
+
+pdf_text_extractor.extract_from_bytes only reads embedded text; scanned PDFs and photos
+have none. This module turns those into the same pages_data shape
+({'page_num', 'text', 'lines'}) so they go through the existing line parser:
+
+  1. rasterise each PDF page with PyMuPDF at INVOICE_OCR_DPI (images are loaded with Pillow)
+  2. preprocess with NumPy/Pillow only: grayscale, Otsu threshold, deskew
+  3. OCR pages in a process pool, each page bounded by INVOICE_OCR_PAGE_TIMEOUT
+
+The engine is pluggable (INVOICE_OCR_ENGINE, a dotted path to an OCREngine subclass) so
+the pipeline can run against a stub in tests and in environments without tesseract.
+"""
+
+from __future__ import annotations
+
+import io
+import logging
+import multiprocessing
+from functools import lru_cache
+from typing import List, Optional, Sequence
+
+import numpy as np
+from PIL import Image, ImageSequence
+
+try:
+    import fitz
+except ImportError:
+    fitz = None
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+# ---- Engines ----------------------------------------------------------------
+
+class OCREngine:
+    """Turns one preprocessed page (black text on white, mode 'L') into text.
+
+    Engines are pickled into worker processes, so keep their state small.
+    """
+
+    name = 'base'
+
+    def is_available(self) -> bool:
+        return True
+
+    def image_to_text(self, image: Image.Image, timeout: Optional[int] = None) -> str:
+        raise NotImplementedError
+
+
+@lru_cache(maxsize=1)
+def _tesseract_available() -> bool:
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+class TesseractEngine(OCREngine):
+    name = 'tesseract'
+
+    def __init__(self, lang: str = 'eng', config: str = '--psm 6'):
+        self.lang = lang
+        self.config = config
+
+    def is_available(self) -> bool:
+        return _tesseract_available()
+
+    def image_to_text(self, image: Image.Image, timeout: Optional[int] = None) -> str:
+        import pytesseract
+        return pytesseract.image_to_string(image, lang=self.lang, config=self.config, timeout=timeout or 0)
+
+
+def get_engine(path: Optional[str] = None) -> OCREngine:
+    return import_string(path or getattr(settings, 'INVOICE_OCR_ENGINE', 'tracker.utils.pdf_ocr.TesseractEngine'))()
+
+
+# ---- Preprocessing (NumPy/Pillow only) ----------------------------------------
+
+def to_grayscale(pixels: np.ndarray) -> np.ndarray:
+    """uint8 luma image from a 2-D gray or 3-D RGB(A) array."""
+    if pixels.ndim == 2:
+        return pixels.astype(np.uint8, copy=False)
+    rgb = pixels[..., :3].astype(np.float32)
+    return np.clip(rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32), 0, 255).astype(np.uint8)
+
+
+def otsu_threshold(gray: np.ndarray) -> int:
+    """Threshold that maximises the between-class variance of the histogram."""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    weight_bg = np.cumsum(hist)
+    weight_fg = weight_bg[-1] - weight_bg
+    cum_mass = np.cumsum(hist * np.arange(256))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_bg = cum_mass / weight_bg
+        mean_fg = (cum_mass[-1] - cum_mass) / weight_fg
+        between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(np.nan_to_num(between)))
+
+
+def binarize(gray: np.ndarray) -> np.ndarray:
+    """Black (0) text on white (255) using Otsu's threshold."""
+    return np.where(gray > otsu_threshold(gray), 255, 0).astype(np.uint8)
+
+
+def estimate_skew(binary: np.ndarray, max_angle: float = 5.0, step: float = 0.5) -> float:
+    """Rotation (degrees, counter-clockwise) that makes text rows horizontal.
+
+    Projection-profile search: text lines produce the sharpest row-sum profile when level.
+    Runs on a downscaled copy so it costs a few milliseconds per page.
+    """
+    ink = Image.fromarray(np.where(binary < 128, 255, 0).astype(np.uint8))
+    if ink.width > 800:
+        ink = ink.resize((800, max(1, round(ink.height * 800 / ink.width))), Image.NEAREST)
+    best_angle, best_score = 0.0, -1.0
+    for angle in np.arange(-max_angle, max_angle + step / 2, step):
+        profile = np.asarray(ink.rotate(float(angle), resample=Image.NEAREST, fillcolor=0), dtype=np.float64).sum(axis=1)
+        score = float(np.sum(np.diff(profile) ** 2))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+
+def deskew(binary: np.ndarray, max_angle: float = 5.0, step: float = 0.5) -> np.ndarray:
+    angle = estimate_skew(binary, max_angle, step)
+    if abs(angle) < step / 2:
+        return binary
+    rotated = Image.fromarray(binary).rotate(angle, resample=Image.NEAREST, expand=True, fillcolor=255)
+    return np.asarray(rotated, dtype=np.uint8)
+
+
+def preprocess(pixels: np.ndarray) -> np.ndarray:
+    return deskew(binarize(to_grayscale(pixels)))
+
+
+# ---- Page sources -------------------------------------------------------------
+
+def rasterize_pdf(file_bytes: bytes, dpi: int, max_pages: int) -> List[np.ndarray]:
+    """Grayscale pixel arrays for the first max_pages pages of a PDF."""
+    if fitz is None:
+        raise RuntimeError('PyMuPDF is required to rasterise PDFs')
+    pages = []
+    doc = fitz.open(stream=file_bytes, filetype='pdf')
+    try:
+        for index in range(min(doc.page_count, max_pages)):
+            pix = doc[index].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+            rows = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)
+            pages.append(rows[:, :pix.width].copy())
+    finally:
+        doc.close()
+    return pages
+
+
+def load_image_pages(file_bytes: bytes, max_pages: int) -> List[np.ndarray]:
+    """Pixel arrays for an image upload (every frame of a multi-page TIFF)."""
+    with Image.open(io.BytesIO(file_bytes)) as img:
+        return [np.asarray(frame.convert('L')) for _i, frame in zip(range(max_pages), ImageSequence.Iterator(img))]
+
+
+# ---- OCR --------------------------------------------------------------------------
+
+def _ocr_page(engine: OCREngine, page_num: int, pixels: np.ndarray, timeout: Optional[int]) -> tuple:
+    """Worker entry point (module level so it pickles)."""
+    page = Image.fromarray(preprocess(pixels))
+    return page_num, engine.image_to_text(page, timeout=timeout)
+
+
+def _pool_context():
+    # fork keeps Django settings and test-defined engines importable in the workers
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('fork' if 'fork' in methods else None)
+
+
+def ocr_pages(pages: Sequence[np.ndarray], engine: OCREngine, workers: int = 1,
+              timeout: Optional[int] = None) -> List[dict]:
+    """OCR page arrays into pages_data; pages that fail or time out are skipped."""
+    texts = {}
+    if workers <= 1 or len(pages) <= 1:
+        for num, pixels in enumerate(pages, start=1):
+            try:
+                texts[num] = _ocr_page(engine, num, pixels, timeout)[1]
+            except Exception as e:
+                logger.warning(f"OCR failed on page {num}: {e}")
+    else:
+        with _pool_context().Pool(processes=min(workers, len(pages))) as pool:
+            pending = [(num, pool.apply_async(_ocr_page, (engine, num, pixels, timeout)))
+                       for num, pixels in enumerate(pages, start=1)]
+            for num, result in pending:
+                try:
+                    texts[num] = result.get(timeout=timeout)[1]
+                except multiprocessing.TimeoutError:
+                    logger.warning(f"OCR timed out on page {num} after {timeout}s")
+                except Exception as e:
+                    logger.warning(f"OCR failed on page {num}: {e}")
+        # Leaving the with-block terminates workers still stuck on a timed-out page
+
+    pages_data = []
+    for num in sorted(texts):
+        lines = [line.strip() for line in (texts[num] or '').split('\n') if line.strip()]
+        if lines:
+            pages_data.append({'page_num': num, 'text': texts[num], 'lines': lines})
+    return pages_data
+
+
+def ocr_document(file_bytes: bytes, *, is_pdf: bool = True, engine: Optional[OCREngine] = None,
+                 dpi: Optional[int] = None, workers: Optional[int] = None,
+                 timeout: Optional[int] = None) -> List[dict]:
+    """pages_data for a scanned PDF or image, or [] when OCR is disabled/unavailable."""
+    if not getattr(settings, 'INVOICE_OCR_ENABLED', True):
+        return []
+    engine = engine or get_engine()
+    if not engine.is_available():
+        logger.info(f"OCR engine '{engine.name}' is not available; skipping OCR fallback")
+        return []
+    max_pages = getattr(settings, 'INVOICE_OCR_MAX_PAGES', 10)
+    try:
+        if is_pdf:
+            pages = rasterize_pdf(file_bytes, dpi or getattr(settings, 'INVOICE_OCR_DPI', 300), max_pages)
+        else:
+            pages = load_image_pages(file_bytes, max_pages)
+    except Exception as e:
+        logger.warning(f"Could not render document for OCR: {e}")
+        return []
+    pages_data = ocr_pages(
+        pages, engine,
+        workers=workers if workers is not None else getattr(settings, 'INVOICE_OCR_WORKERS', 2),
+        timeout=timeout if timeout is not None else getattr(settings, 'INVOICE_OCR_PAGE_TIMEOUT', 60),
+    )
+    logger.info(f"OCR ({engine.name}) read {len(pages_data)} of {len(pages)} pages")
+    return pages_data
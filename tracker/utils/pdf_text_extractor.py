@@ -70,9 +70,22 @@ def extract_text_from_pdf(file_bytes) -> list:
     raise RuntimeError('PDF extraction failed with both PyMuPDF and PyPDF2')
 
 def extract_text_from_image(file_bytes) -> str:
-    """Extract text from image file."""
-    logger.info("Image file detected. OCR not available. Manual entry required.")
-    return ""
+    """Extract text from image file (empty when no OCR engine is available)."""
+    from tracker.utils.pdf_ocr import ocr_document
+    pages_data = ocr_document(file_bytes, is_pdf=False)
+    if not pages_data:
+        logger.info("Image file detected. OCR not available. Manual entry required.")
+    return '\n'.join(page['text'] for page in pages_data)
+
+
+def _ocr_fallback(file_bytes, is_pdf: bool) -> list:
+    """pages_data read by OCR for scans/images; [] when OCR is off or finds nothing."""
+    try:
+        from tracker.utils.pdf_ocr import ocr_document
+        return ocr_document(file_bytes, is_pdf=is_pdf)
+    except Exception as e:
+        logger.warning(f"OCR fallback failed: {e}")
+        return []
 
 def parse_invoice_data(pages_data: list) -> dict:
     """Parse invoice data from extracted pages with multi-page support."""
@@ -805,38 +818,47 @@ def extract_from_bytes(file_bytes, filename: str = '') -> dict:
     is_pdf = filename.lower().endswith('.pdf') or (len(file_bytes) > 4 and file_bytes[:4] == b'%PDF')
     is_image = filename.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.tiff', '.bmp'))
 
+    used_ocr = False
     if is_image:
-        return {
-            'success': False, 'error': 'image_file_not_supported', 
-            'message': 'Image files are not supported.', 'ocr_available': False,
-            'header': {}, 'items': [], 'raw_text': ''
-        }
-
-    if not is_pdf:
+        pages_data = _ocr_fallback(file_bytes, is_pdf=False)
+        if not pages_data:
+            return {
+                'success': False, 'error': 'image_file_not_supported', 
+                'message': 'Image files are not supported.', 'ocr_available': False,
+                'header': {}, 'items': [], 'raw_text': ''
+            }
+        used_ocr = True
+    elif not is_pdf:
         return {
             'success': False, 'error': 'unsupported_file_type',
             'message': 'Please upload a PDF file.', 'ocr_available': False,
             'header': {}, 'items': [], 'raw_text': ''
         }
-
-    # Extract text from PDF with page separation
-    try:
-        pages_data = extract_text_from_pdf(file_bytes)
-        all_text = '\n'.join([page['text'] for page in pages_data])
-    except Exception as e:
-        logger.error(f"PDF text extraction failed: {e}")
-        return {
-            'success': False, 'error': 'pdf_extraction_failed',
-            'message': f'Could not extract text from PDF: {str(e)}', 'ocr_available': False,
-            'header': {}, 'items': [], 'raw_text': ''
-        }
-
-    if not pages_data:
-        return {
-            'success': False, 'error': 'no_text_extracted',
-            'message': 'No readable text found in PDF.', 'ocr_available': False,
-            'header': {}, 'items': [], 'raw_text': ''
-        }
+    else:
+        # Extract text from PDF with page separation; scanned PDFs have none, so fall back to OCR
+        try:
+            pages_data = extract_text_from_pdf(file_bytes)
+        except Exception as e:
+            pages_data = _ocr_fallback(file_bytes, is_pdf=True)
+            if not pages_data:
+                logger.error(f"PDF text extraction failed: {e}")
+                return {
+                    'success': False, 'error': 'pdf_extraction_failed',
+                    'message': f'Could not extract text from PDF: {str(e)}', 'ocr_available': False,
+                    'header': {}, 'items': [], 'raw_text': ''
+                }
+            used_ocr = True
+
+        if not pages_data:
+            pages_data = _ocr_fallback(file_bytes, is_pdf=True)
+            used_ocr = bool(pages_data)
+        if not pages_data:
+            return {
+                'success': False, 'error': 'no_text_extracted',
+                'message': 'No readable text found in PDF.', 'ocr_available': False,
+                'header': {}, 'items': [], 'raw_text': ''
+            }
+    all_text = '\n'.join([page['text'] for page in pages_data])
 
     # Parse extracted text to structured invoice data
     try:
@@ -927,7 +949,7 @@ def extract_from_bytes(file_bytes, filename: str = '') -> dict:
                 'header': header,
                 'items': formatted_items,
                 'raw_text': all_text,
-                'ocr_available': False,
+                'ocr_available': used_ocr,
                 'message': 'Invoice data extracted successfully - CORRECTED LINE ITEMS'
             }
         else:
@@ -935,7 +957,7 @@ def extract_from_bytes(file_bytes, filename: str = '') -> dict:
                 'success': False,
                 'error': 'parsing_failed',
                 'message': 'Could not extract structured data from PDF.',
-                'ocr_available': False,
+                'ocr_available': used_ocr,
                 'header': {},
                 'items': [],
                 'raw_text': all_text
@@ -947,7 +969,7 @@ def extract_from_bytes(file_bytes, filename: str = '') -> dict:
             'success': False,
             'error': 'parsing_failed',
             'message': 'Could not extract structured data from PDF.',
-            'ocr_available': False,
+            'ocr_available': used_ocr,
             'header': {},
             'items': [],
             'raw_text': all_text
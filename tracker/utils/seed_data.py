@@ -0,0 +1,269 @@
+"""
+Synthetic data generators shared by seed_bulk_data.py and the benchmark suite.
+
+All helpers take an optional `rng` (random.Random) so a dataset can be reproduced
+exactly, and a `log` callable for progress output (print by default). Orders and
+invoices are written with bulk_create so large scales stay fast.
+"""
+
+import random
+from datetime import timedelta
+from decimal import Decimal
+from uuid import uuid4
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from tracker.models import (
+    Branch, Brand, Customer, DelayReason, InventoryItem, Invoice, InvoiceLineItem, Order, Profile, Vehicle,
+)
+from tracker.services import CustomerImportService
+
+FIRST_NAMES = ['John', 'Sarah', 'Michael', 'David', 'Grace', 'Robert', 'Emily', 'James', 'Linda', 'Paul',
+               'Anna', 'Mark', 'Olivia', 'Daniel', 'Susan', 'Peter', 'Nora', 'Victor', 'Helen', 'Sam']
+LAST_NAMES = ['Smith', 'Johnson', 'Brown', 'Wilson', 'Okello', 'Nakato', 'Kayiwa', 'Mugisha', 'Kato', 'Nsubuga']
+MAKES = ['Toyota', 'Nissan', 'Mitsubishi', 'Isuzu', 'Mercedes', 'Volvo']
+MODELS = ['Camry', 'Corolla', 'Hilux', 'Prado', 'Canter', 'Actros', 'CRV', 'Civic']
+VEHICLE_TYPES = ['sedan', 'suv', 'truck', 'van', 'bus']
+SERVICE_TYPES = ['Oil Change', 'Brake Service', 'Tire Rotation', 'Engine Tune-up', 'Battery Replacement', 'Wheel Alignment']
+
+
+def ensure_branches(count=20, rng=None, log=print, with_users=True):
+    rng = rng or random
+    log(f"Creating {count} branches and branch users (password=myuser123)")
+    branches = []
+    regions = ['Central', 'Northern', 'Eastern', 'Western', 'Kampala Metro']
+    for i in range(1, count + 1):
+        name = f"Branch {i}"
+        code = f"B{i:02d}"
+        region = rng.choice(regions)
+        branch, created = Branch.objects.get_or_create(name=name, defaults={'code': code, 'region': region, 'is_active': True})
+        branches.append(branch)
+        if created:
+            log(f"  Created branch: {name} ({code})")
+        if not with_users:
+            continue
+        # Create a user for the branch with password myuser123
+        username = f"{name.replace(' ', '').lower()}"
+        if not User.objects.filter(username=username).exists():
+            user = User.objects.create_user(username=username, password='myuser123')
+            # Create profile and link branch
+            Profile.objects.create(user=user, branch=branch)
+            log(f"    Created user: {username} (password=myuser123)")
+    return branches
+
+
+def ensure_brands_and_inventory(min_items=20, rng=None, log=print):
+    rng = rng or random
+    log("Creating brands and inventory items...")
+    brand_names = ['Michelin', 'Bridgestone', 'Goodyear', 'Continental', 'Pirelli', 'Dunlop', 'Hankook']
+    tire_types = ['All Season', 'Summer', 'Winter', 'Performance', 'Off-Road']
+    sizes = ['195/65R15', '205/55R16', '225/45R17', '235/40R18', '245/35R19']
+
+    brands = []
+    for bn in brand_names:
+        brand, _ = Brand.objects.get_or_create(name=bn, defaults={'description': f'{bn} tires'})
+        brands.append(brand)
+
+    inventory_items = []
+    # Create items per brand until we reach min_items
+    while len(inventory_items) < min_items:
+        brand = rng.choice(brands)
+        t = rng.choice(tire_types)
+        size = rng.choice(sizes)
+        name = f"{t} {size}"
+        item, created = InventoryItem.objects.get_or_create(
+            name=name, brand=brand,
+            defaults={
+                'quantity': rng.randint(5, 200),
+                'price': rng.randint(60, 400),
+                'cost_price': rng.randint(30, 250),
+                'reorder_level': rng.randint(5, 20),
+                'location': f"Rack {rng.randint(1, 12)}"
+            }
+        )
+        if item not in inventory_items:
+            inventory_items.append(item)
+            if created:
+                log(f"  Created inventory: {brand.name} - {name}")
+        # avoid infinite loops by breaking if many duplicates
+        if len(inventory_items) > min_items * 2:
+            break
+
+    log(f"  Total inventory items: {len(inventory_items)}")
+    return brands, inventory_items
+
+
+def ensure_customers_and_vehicles(min_customers=20, rng=None, log=print, branches=None):
+    rng = rng or random
+    log(f"Creating {min_customers} customers and vehicles")
+
+    # Build rows in memory and import them in batches (codes are allocated without lookups)
+    rows_by_branch = {}
+    phones = []
+    for i in range(min_customers):
+        fn = rng.choice(FIRST_NAMES)
+        ln = rng.choice(LAST_NAMES)
+        full = f"{fn} {ln}"
+        phone = f"+25670{rng.randint(1000000, 9999999)}"
+        phones.append(phone)
+        reg_days = rng.randint(5, 365 * 2)
+        base = {
+            'full_name': full,
+            'phone': phone,
+            'email': f"{fn.lower()}.{ln.lower()}{rng.randint(1, 99)}@example.com",
+            'customer_type': rng.choice(['personal', 'company', 'ngo', 'government']),
+            'registration_date': timezone.now() - timedelta(days=reg_days),
+            'address': f"Plot {rng.randint(1, 999)}, {rng.choice(['Kampala', 'Entebbe', 'Jinja', 'Mbarara'])} Road",
+        }
+        branch = rng.choice(branches) if branches else None
+        rows = rows_by_branch.setdefault(branch, [])
+        # Each customer gets 1-3 vehicles (one row per vehicle)
+        for _ in range(rng.randint(1, 3)):
+            rows.append({
+                **base,
+                'plate_number': f"U{rng.choice('ABC')}{rng.randint(100, 999)}{rng.choice('ABC')}",
+                'make': rng.choice(MAKES),
+                'model': rng.choice(MODELS),
+                'vehicle_type': rng.choice(VEHICLE_TYPES),
+            })
+
+    created = vehicles_created = 0
+    for branch, rows in rows_by_branch.items():
+        stats = CustomerImportService(branch=branch, batch_size=1000).import_rows(rows)
+        created += stats['customers_created']
+        vehicles_created += stats['vehicles_created']
+    log(f"  Created {created} customers and {vehicles_created} vehicles")
+
+    customers = list(Customer.objects.filter(phone__in=phones))
+    vehicles = list(Vehicle.objects.filter(customer__in=customers))
+
+    return customers, vehicles
+
+
+def ensure_orders(customers, vehicles, inventory_items, min_orders=20, rng=None, log=print, batch_size=1000):
+    """Create orders spread over the last year, with delay reasons on some long-running ones."""
+    rng = rng or random
+    log(f"Creating {min_orders} orders spread across time")
+    order_types = ['service', 'sales', 'inquiry']
+    statuses_all = ['created', 'in_progress', 'overdue', 'completed', 'cancelled']
+    statuses_no_completed = ['created', 'in_progress', 'overdue', 'cancelled']
+    priorities = ['low', 'medium', 'high', 'urgent']
+    delay_reasons = list(DelayReason.objects.filter(is_active=True))
+    vehicles_by_customer = {}
+    for v in vehicles:
+        vehicles_by_customer.setdefault(v.customer_id, []).append(v)
+
+    now = timezone.now()
+    orders = []
+    for _ in range(min_orders):
+        cust = rng.choice(customers)
+        own = vehicles_by_customer.get(cust.id)
+        vehicle = rng.choice(own) if own else None
+        otype = rng.choice(order_types)
+
+        # Choose status: if service or sales -> do NOT use completed
+        if otype in ('service', 'sales'):
+            status = rng.choice(statuses_no_completed)
+        else:
+            status = rng.choice(statuses_all)
+
+        days_ago = rng.randint(1, 365 * 1)  # within last year
+        created_at = now - timedelta(days=days_ago, hours=rng.randint(0, 23), minutes=rng.randint(0, 59))
+
+        order = Order(
+            order_number=f"ORD{created_at:%Y%m%d%H%M%S}{uuid4().hex[:6].upper()}",
+            branch_id=cust.branch_id,
+            customer=cust,
+            vehicle=vehicle,
+            type=otype,
+            status=status,
+            priority=rng.choice(priorities),
+            created_at=created_at,
+        )
+        if otype == 'service':
+            order.description = f"{rng.choice(SERVICE_TYPES)} for {vehicle.make if vehicle else 'vehicle'}"
+        elif otype == 'sales':
+            item = rng.choice(inventory_items)
+            order.item_name = item.name
+            order.brand = item.brand.name if item.brand else None
+            order.quantity = rng.randint(1, 6)
+            order.description = f"Sale of {item.name}"
+        else:
+            # Inquiries are always completed on save; bulk_create skips save(), so mirror it here
+            order.inquiry_type = rng.choice(['Pricing', 'Appointment', 'Services', 'General'])
+            order.questions = 'Can I book an appointment?'
+            order.status = 'completed'
+            order.completed_at = order.completion_date = created_at
+
+        if otype != 'inquiry' and status in ('in_progress', 'overdue'):
+            order.started_at = created_at + timedelta(minutes=rng.randint(10, 120))
+            if status == 'overdue' and delay_reasons:
+                order.delay_reason = rng.choice(delay_reasons)
+                order.delay_reason_reported_at = order.started_at + timedelta(hours=rng.randint(9, 30))
+                order.exceeded_9_hours = True
+        orders.append(order)
+
+    Order.objects.bulk_create(orders, batch_size=batch_size)
+    log(f"  Total orders created: {len(orders)}")
+    return len(orders)
+
+
+def ensure_invoices(customers, vehicles, inventory_items, count=20, rng=None, log=print, batch_size=1000):
+    """Create invoices with 1-4 line items each, dated over the last year."""
+    rng = rng or random
+    log(f"Creating {count} invoices with line items")
+    vehicles_by_customer = {}
+    for v in vehicles:
+        vehicles_by_customer.setdefault(v.customer_id, []).append(v)
+
+    today = timezone.localdate()
+    invoices = []
+    lines_by_number = {}
+    for _ in range(count):
+        cust = rng.choice(customers)
+        own = vehicles_by_customer.get(cust.id)
+        number = f"BENCH-{uuid4().hex[:12].upper()}"
+        lines = []
+        for _ in range(rng.randint(1, 4)):
+            item = rng.choice(inventory_items)
+            qty = Decimal(rng.randint(1, 4))
+            price = Decimal(item.price or rng.randint(60, 400))
+            total = qty * price
+            lines.append(InvoiceLineItem(
+                code=f"{rng.randint(10000, 99999)}",
+                description=item.name,
+                inventory_item=item,
+                quantity=qty,
+                unit_price=price,
+                line_total=total,
+                tax_rate=Decimal('18'),
+                tax_amount=(total * Decimal('0.18')).quantize(Decimal('0.01')),
+                order_type=rng.choice(['sales', 'service', 'labour']),
+            ))
+        subtotal = sum(l.line_total for l in lines)
+        tax = sum(l.tax_amount for l in lines)
+        invoices.append(Invoice(
+            invoice_number=number,
+            branch_id=cust.branch_id,
+            customer=cust,
+            vehicle=rng.choice(own) if own else None,
+            status=rng.choice(['issued', 'paid', 'draft']),
+            invoice_date=today - timedelta(days=rng.randint(0, 365)),
+            subtotal=subtotal,
+            tax_amount=tax,
+            total_amount=subtotal + tax,
+        ))
+        lines_by_number[number] = lines
+
+    Invoice.objects.bulk_create(invoices, batch_size=batch_size)
+    # Not every backend returns PKs from bulk_create, so map numbers back in one query
+    ids = dict(Invoice.objects.filter(invoice_number__in=list(lines_by_number)).values_list('invoice_number', 'id'))
+    line_items = []
+    for number, lines in lines_by_number.items():
+        for line in lines:
+            line.invoice_id = ids[number]
+            line_items.append(line)
+    InvoiceLineItem.objects.bulk_create(line_items, batch_size=batch_size)
+    log(f"  Total invoices created: {len(invoices)} ({len(line_items)} line items)")
+    return len(invoices)
@@ -3,7 +3,7 @@ Time utilities for calculating order duration and overdue status.
 Overdue threshold: 2 calendar hours (simple calculation).
 """
 
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 from django.utils import timezone
 
 
@@ -143,65 +143,26 @@ def estimate_completion_time(started_at: datetime, estimated_minutes: int = None
     }
 
 
-def calculate_estimated_duration(started_at: datetime, completed_at: datetime, work_start_hour: int = 8, work_end_hour: int = 17) -> int | None:
+def calculate_estimated_duration(started_at: datetime, completed_at: datetime, work_start_hour: int = 8, work_end_hour: int = 17, calendar=None) -> int | None:
     """
     Calculate duration in minutes between two datetimes, counting ONLY working hours.
 
-    Working window: [work_start_hour:00, work_end_hour:00) local time (default 08:00-17:00).
+    Working window: [work_start_hour:00, work_end_hour:00) local time (default 08:00-17:00),
+    every day, unless a WorkingCalendar (tracker.utils.working_hours, e.g. a branch's
+    calendar_for(branch)) is passed. Computed in closed form, not day by day.
 
     Args:
         started_at: Start datetime
         completed_at: End datetime
         work_start_hour: Start of working day (hour, 0-23)
         work_end_hour: End of working day (hour, 0-23)
+        calendar: Optional WorkingCalendar overriding the hours above
 
     Returns:
         Integer minutes within working windows, or None if inputs are missing.
     """
-    if not started_at or not completed_at:
-        return None
-
-    # Ensure timezone-aware and use current timezone for working-window boundaries
-    tz = timezone.get_current_timezone()
-
-    if timezone.is_naive(started_at):
-        started_at = timezone.make_aware(started_at, tz)
-    else:
-        started_at = timezone.localtime(started_at, tz)
-
-    if timezone.is_naive(completed_at):
-        completed_at = timezone.make_aware(completed_at, tz)
-    else:
-        completed_at = timezone.localtime(completed_at, tz)
-
-    # If end precedes start, return zero minutes
-    if completed_at <= started_at:
-        return 0
-
-    # Iterate day by day and sum overlap with working window
-    total_seconds = 0
-
-    current_day = started_at.date()
-    end_day = completed_at.date()
-
-    # Helper to build aware datetime for a specific day and hour
-    from datetime import time as dtime
-
-    while current_day <= end_day:
-        day_start_naive = datetime.combine(current_day, dtime(hour=work_start_hour, minute=0))
-        day_end_naive = datetime.combine(current_day, dtime(hour=work_end_hour, minute=0))
-        day_start = timezone.make_aware(day_start_naive, tz)
-        day_end = timezone.make_aware(day_end_naive, tz)
-
-        # Determine overlap interval for this day
-        interval_start = max(started_at, day_start)
-        interval_end = min(completed_at, day_end)
-
-        if interval_end > interval_start:
-            total_seconds += (interval_end - interval_start).total_seconds()
-
-        # Next day
-        current_day = current_day + timedelta(days=1)
+    from .working_hours import WorkingCalendar
 
-    # Convert to whole minutes
-    return int(total_seconds // 60)
+    if calendar is None:
+        calendar = WorkingCalendar(start=time(work_start_hour), end=time(work_end_hour))
+    return calendar.minutes_between(started_at, completed_at)
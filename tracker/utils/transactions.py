@@ -0,0 +1,48 @@
+"""
+Per-transaction batching of on_commit work.
+
+Write hooks that queue work for commit (customer spending, organisation rollups) used to
+collect it in module-level containers shared by every thread: one transaction's commit
+flushed ids queued by another that had not committed yet, and that one's own flush then
+found nothing. on_commit_batch() keeps the batch on the callback instead, so it belongs to
+the transaction (on this thread's connection) that registered it, and a rolled-back
+transaction or savepoint drops its batch along with the callback.
+"""
+
+from typing import Callable, Generic, Optional, TypeVar
+
+from django.db import transaction
+
+T = TypeVar('T')
+
+
+class _Batch(Generic[T]):
+    """The on_commit callback: flush(items), once."""
+
+    def __init__(self, flush: Callable[[T], object], items: T):
+        self.flush = flush
+        self.items = items
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        self.flush(self.items)
+
+
+def on_commit_batch(flush: Callable[[T], object], new: Callable[[], T], add: Callable[[T], None],
+                    using: Optional[str] = None) -> None:
+    """add() to the current transaction's batch for `flush`, which runs once with it on commit.
+
+    The first call in a transaction creates the batch with new() and registers
+    flush(batch); later calls in the same transaction add to that batch. Outside a
+    transaction flush runs straight away, as transaction.on_commit does.
+    """
+    connection = transaction.get_connection(using)
+    if connection.in_atomic_block:
+        for _savepoints, func, _robust in connection.run_on_commit:
+            if isinstance(func, _Batch) and func.flush is flush and not func.done:
+                add(func.items)
+                return
+    items = new()
+    add(items)
+    transaction.on_commit(_Batch(flush, items), using=using)
@@ -0,0 +1,177 @@
+"""
+Working-hours durations in closed form.
+
+The working time between two moments is W(end) - W(start), where W(t) is the working
+time from a fixed Monday up to t:
+
+    W(t) = working_days_before(date(t)) * window + clamp(time_of_day(t) - start, 0, window)
+
+(the second term only on working days). working_days_before() is whole weeks times the
+working days per week, plus the leading days of the last partial week, minus holidays
+before the date, found by bisection. The cost no longer depends on how many days an order
+spans. minutes_between_many() evaluates the same formula over NumPy arrays with
+numpy.busday_count / is_busday for analytics over many orders.
+
+Times are local wall-clock times in the current time zone (Asia/Riyadh has no DST).
+Branch calendars (working window, working days and holidays) come from the Branch and
+Holiday models through the reference-data cache: calendar_for(branch).
+"""
+
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Optional, Sequence, Tuple
+
+from django.utils import timezone
+
+# Any Monday; W(t) is measured from here (dates before it give negative counts, which cancel)
+_EPOCH = date(2000, 1, 3)
+_EPOCH64 = '2000-01-03'
+
+
+def _seconds(t: time) -> int:
+    return t.hour * 3600 + t.minute * 60 + t.second
+
+
+@dataclass(frozen=True)
+class WorkingCalendar:
+    start: time = time(8, 0)
+    end: time = time(17, 0)
+    weekmask: str = '1111111'  # Monday to Sunday, '1' = working day
+    holidays: Tuple[date, ...] = ()
+    _working_holidays: Tuple[date, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if len(self.weekmask) != 7 or set(self.weekmask) - {'0', '1'}:
+            raise ValueError(f"Invalid weekmask: {self.weekmask!r}")
+        # Holidays on non-working weekdays change nothing; keep the rest sorted for bisection
+        working = tuple(sorted({d for d in self.holidays if self.weekmask[d.weekday()] == '1'}))
+        object.__setattr__(self, '_working_holidays', working)
+
+    @property
+    def window_seconds(self) -> int:
+        return max(0, _seconds(self.end) - _seconds(self.start))
+
+    def is_working_day(self, day: date) -> bool:
+        if self.weekmask[day.weekday()] != '1':
+            return False
+        i = bisect_left(self._working_holidays, day)
+        return not (i < len(self._working_holidays) and self._working_holidays[i] == day)
+
+    def working_days_before(self, day: date) -> int:
+        """Working days in [_EPOCH, day); negative for days before _EPOCH."""
+        weeks, rest = divmod((day - _EPOCH).days, 7)
+        return weeks * self.weekmask.count('1') + self.weekmask[:rest].count('1') - bisect_left(self._working_holidays, day)
+
+    def _working_seconds_until(self, moment: datetime) -> float:
+        day = moment.date()
+        total = self.working_days_before(day) * self.window_seconds
+        if self.is_working_day(day):
+            into_day = (moment - datetime.combine(day, time.min)).total_seconds() - _seconds(self.start)
+            total += min(max(into_day, 0), self.window_seconds)
+        return total
+
+    def minutes_between(self, start: Optional[datetime], end: Optional[datetime], tz=None) -> Optional[int]:
+        """Whole working minutes between two datetimes; None if either is missing."""
+        if not start or not end:
+            return None
+        start, end = _local(start, tz), _local(end, tz)
+        if end <= start:
+            return 0
+        return int((self._working_seconds_until(end) - self._working_seconds_until(start)) // 60)
+
+    def minutes_between_many(self, starts: Sequence, ends: Sequence, tz=None):
+        """Working minutes for pairs of datetimes, as a float64 NumPy array.
+
+        starts/ends are equal-length sequences of datetimes (aware or naive local); a missing
+        value (None/NaT) gives NaN, an end before its start gives 0.
+        """
+        import numpy as np
+
+        start64, end64 = _local64(starts, tz), _local64(ends, tz)
+        if start64.shape != end64.shape:
+            raise ValueError("starts and ends must have the same length")
+        missing = np.isnat(start64) | np.isnat(end64)
+        start64 = np.where(missing, np.datetime64(_EPOCH64, 'us'), start64)
+        end64 = np.where(missing, np.datetime64(_EPOCH64, 'us'), end64)
+        worked = self._working_seconds_until64(end64) - self._working_seconds_until64(start64)
+        minutes = np.floor_divide(np.maximum(worked, 0), 60)
+        return np.where(missing, np.nan, minutes)
+
+    def _working_seconds_until64(self, moments):
+        import numpy as np
+
+        if '1' not in self.weekmask:
+            # numpy rejects a weekmask without working days; nothing is ever worked
+            return np.zeros(moments.shape)
+        days = moments.astype('datetime64[D]')
+        holidays = np.array(self._working_holidays, dtype='datetime64[D]')
+        full = np.busday_count(np.datetime64(_EPOCH64, 'D'), days, weekmask=self.weekmask, holidays=holidays)
+        into_day = (moments - days).astype('timedelta64[us]').astype(np.int64) / 1e6 - _seconds(self.start)
+        partial = np.clip(into_day, 0, self.window_seconds)
+        partial = np.where(np.is_busday(days, weekmask=self.weekmask, holidays=holidays), partial, 0)
+        return full.astype(np.float64) * self.window_seconds + partial
+
+
+DEFAULT_CALENDAR = WorkingCalendar()
+
+
+def _local(moment: datetime, tz=None) -> datetime:
+    """Naive local wall-clock time of `moment`."""
+    tz = tz or timezone.get_current_timezone()
+    if timezone.is_aware(moment):
+        return timezone.localtime(moment, tz).replace(tzinfo=None)
+    return moment
+
+
+def _local64(values: Sequence, tz=None):
+    import numpy as np
+
+    if isinstance(values, np.ndarray) and np.issubdtype(values.dtype, np.datetime64):
+        # Already wall-clock datetime64 values
+        return values.astype('datetime64[us]')
+    return np.array(
+        [np.datetime64(_local(v, tz), 'us') if v is not None else np.datetime64('NaT', 'us') for v in values],
+        dtype='datetime64[us]',
+    )
+
+
+def calendar_for(branch=None) -> WorkingCalendar:
+    """Working calendar of a branch (instance or id); the default calendar without one.
+
+    Built from the cached 'working_calendars' reference dataset, so it costs no query
+    when warm; all-branch holidays apply to every branch.
+    """
+    from tracker.services import reference_data
+
+    branch_id = getattr(branch, 'pk', branch)
+    rows = {r['branch_id']: r for r in reference_data.get('working_calendars')}
+    common = rows[None]['holidays']
+    row = rows.get(branch_id)
+    if row is None:
+        return WorkingCalendar(holidays=tuple(date.fromisoformat(d) for d in common)) if common else DEFAULT_CALENDAR
+    return WorkingCalendar(
+        start=time.fromisoformat(row['start']),
+        end=time.fromisoformat(row['end']),
+        weekmask=row['work_days'],
+        holidays=tuple(date.fromisoformat(d) for d in common + row['holidays']),
+    )
+
+
+def working_minutes_for_orders(orders, start_field: str = 'started_at', end_field: str = 'completed_at'):
+    """Working minutes per order (NumPy array, NaN where a timestamp is missing), each order
+    measured on its branch's calendar. `orders` is any iterable of objects or dicts with
+    branch_id and the two timestamp fields."""
+    import numpy as np
+
+    rows = list(orders)
+    get = (lambda r, k: r[k]) if rows and isinstance(rows[0], dict) else getattr
+    result = np.full(len(rows), np.nan)
+    by_branch = {}
+    for i, row in enumerate(rows):
+        by_branch.setdefault(get(row, 'branch_id'), []).append(i)
+    for branch_id, idx in by_branch.items():
+        result[idx] = calendar_for(branch_id).minutes_between_many(
+            [get(rows[i], start_field) for i in idx], [get(rows[i], end_field) for i in idx]
+        )
+    return result
@@ -28,15 +28,13 @@ from django.core.exceptions import ValidationError
 from django.db.models.deletion import ProtectedError
 from .models import Profile, Customer, Order, Vehicle, InventoryItem, CustomerNote, Brand, Branch, OrderAttachment, OrderAttachmentSignature, ServiceType, ServiceAddon, InquiryNote, Invoice
 from django.core.paginator import Paginator
+from .db_router import reporting_view
 from .utils import add_audit_log, get_audit_logs, clear_audit_logs, scope_queryset, get_user_branch
+from .utils.pagination import CursorPaginator
 from .services import OrderService
-from .utils.pdf_signature import (
-    embed_signature_in_pdf,
-    SignatureEmbedError,
-    build_signed_filename,
-    embed_signature_in_image,
-    build_signed_name,
-)
+from .utils.lazy import lazy_import
+# PIL, PyPDF2 and reportlab load on the first signing request, not at worker startup
+pdf_signature = lazy_import('tracker.utils.pdf_signature')
 from datetime import datetime, timedelta
 
 
@@ -150,29 +148,30 @@ class CustomLogoutView(LogoutView):
         return super().dispatch(request, *args, **kwargs)
 
 
-@login_required
-def api_order_status(request: HttpRequest, pk: int):
+# Polling endpoints: served by the async views in tracker.views_async, which run these on
+# the database thread pool (tracker.utils.async_db)
+
+def order_status_payload(pk: int):
+    """api_order_status body; None when the order does not exist."""
     _mark_overdue_orders()
-    try:
-        o = Order.objects.get(pk=pk)
-        data = {
-            'success': True,
-            'id': o.id,
-            'status': o.status,
-            'status_display': o.get_status_display(),
-            'estimated_duration': o.estimated_duration,
-            'actual_duration': o.actual_duration,
-            'created_at': o.created_at,
-            'started_at': o.started_at,
-            'completed_at': o.completed_at,
-            'cancelled_at': o.cancelled_at,
-        }
-        return JsonResponse(data)
-    except Order.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Not found'}, status=404)
+    o = Order.objects.filter(pk=pk).first()
+    if o is None:
+        return None
+    return {
+        'success': True,
+        'id': o.id,
+        'status': o.status,
+        'status_display': o.get_status_display(),
+        'estimated_duration': o.estimated_duration,
+        'actual_duration': o.actual_duration,
+        'created_at': o.created_at,
+        'started_at': o.started_at,
+        'completed_at': o.completed_at,
+        'cancelled_at': o.cancelled_at,
+    }
 
-@login_required
-def api_orders_statuses(request: HttpRequest):
+
+def orders_statuses_payload(request: HttpRequest) -> dict:
     _mark_overdue_orders()
     ids_param = request.GET.get('ids') or ''
     try:
@@ -190,7 +189,7 @@ def api_orders_statuses(request: HttpRequest):
             'completed_at': o.completed_at,
             'cancelled_at': o.cancelled_at,
         }
-    return JsonResponse({'success': True, 'orders': out})
+    return {'success': True, 'orders': out}
 
 @login_required
 def api_order_invoice_totals(request: HttpRequest, pk: int):
@@ -303,8 +302,14 @@ def api_service_distribution(request: HttpRequest):
 
 @login_required
 def dashboard(request: HttpRequest):
-    # Normalize statuses before computing metrics
+    # Normalize statuses before computing metrics; done here so the metrics themselves can
+    # read from the reporting database (a write would keep the view on the primary)
     _mark_overdue_orders()
+    return _dashboard(request)
+
+
+@reporting_view
+def _dashboard(request: HttpRequest):
     # Always calculate fresh metrics for accurate data
     today = timezone.localdate()
 
@@ -877,21 +882,21 @@ def customers_list(request: HttpRequest):
         # Returning: customers with more than 1 total visit
         qs = qs.filter(total_visits__gt=1)
 
-    # KPI calculations for header
-    active_customers = customers_qs.filter(last_visit__date=today_date).count()
-    new_customers_today = customers_qs.filter(registration_date__date=today_date).count()
-    returning_customers = customers_qs.filter(total_visits__gt=1).count()
+    # KPI calculations for header (cached counter set, one aggregate when cold)
+    from .services import kpi_counters
+    customer_kpis = kpi_counters.get_counts('customers', kpi_counters.scope_for(request.user, request), today_date)
 
-    paginator = Paginator(qs, 20)
-    page = request.GET.get('page')
-    customers = paginator.get_page(page)
+    customers = CursorPaginator(qs, ordering=('-registration_date', '-id'), per_page=20).page(request.GET.get('cursor'))
+    page_params = request.GET.copy()
+    page_params.pop('cursor', None)
+    page_params.pop('page', None)
     branches = list(Branch.objects.filter(is_active=True).order_by('name').values_list('name', flat=True))
     return render(request, "tracker/customers_list.html", {
         "customers": customers,
         "q": q,
-        "active_customers": active_customers,
-        "new_customers_today": new_customers_today,
-        "returning_customers": returning_customers,
+        **customer_kpis,
+        "is_filtered": bool(q or f_type or f_status),
+        "page_query": page_params.urlencode(),
         "branches": branches,
     })
 
@@ -964,11 +969,11 @@ def customers_search(request: HttpRequest):
     return JsonResponse({"results": data})
 
 
-@login_required
-def api_customers_summary(request: HttpRequest):
+def customers_summary_payload(request: HttpRequest) -> dict:
+    """api_customers_summary body (see tracker.views_async)."""
     ids = (request.GET.get('ids') or '').strip()
     if not ids:
-        return JsonResponse({'success': False, 'error': 'ids required'})
+        return {'success': False, 'error': 'ids required'}
     try:
         id_list = [int(x) for x in ids.split(',') if x.isdigit()]
     except Exception:
@@ -981,7 +986,7 @@ def api_customers_summary(request: HttpRequest):
             'total_visits': c.total_visits or 0,
             'customer_type': c.customer_type or 'personal',
         }
-    return JsonResponse({'success': True, 'customers': payload})
+    return {'success': True, 'customers': payload}
 
 
 @login_required
@@ -1159,35 +1164,16 @@ def customer_register(request: HttpRequest):
         return errors
     
     def get_template_context(step, form, **kwargs):
-        # Get inventory items for new single dropdown system
-        inventory_items = InventoryItem.objects.select_related('brand').filter(is_active=True, brand__isnull=False).order_by('brand__name', 'name')
-        
-        # Build item data mapping for JavaScript
-        item_data = {}
-        for item in inventory_items:
-            if item.name and item.brand:
-                item_data[str(item.id)] = {
-                    'name': item.name,
-                    'brand': item.brand.name,
-                    'quantity': item.quantity
-                }
-        
-        # Load dynamic service types and sales add-ons for steps that need them
-        try:
-            from .models import ServiceType, ServiceAddon
-            svc_qs = ServiceType.objects.filter(is_active=True).order_by('name')
-            addon_qs = ServiceAddon.objects.filter(is_active=True).order_by('name')
-            service_types = [{
-                'name': s.name,
-                'estimated_minutes': int(s.estimated_minutes or 0)
-            } for s in svc_qs]
-            sales_addons = [{
-                'name': a.name,
-                'estimated_minutes': int(a.estimated_minutes or 0)
-            } for a in addon_qs]
-        except Exception:
-            service_types = []
-            sales_addons = []
+        from .services import reference_data
+
+        # Branded items for the single item dropdown, and the id -> details map for JavaScript
+        inventory_items = [i for i in reference_data.get('inventory_items') if i['brand_id']]
+        item_data = {
+            str(i['id']): {'name': i['name'], 'brand': i['brand'], 'quantity': i['quantity']}
+            for i in inventory_items if i['name']
+        }
+        service_types = reference_data.get('service_types')
+        sales_addons = reference_data.get('service_addons')
 
         context = {
             'step': step,
@@ -1197,7 +1183,7 @@ def customer_register(request: HttpRequest):
             'step2': request.session.get('reg_step2', {}),
             'step3': request.session.get('reg_step3', {}),
             'today': timezone.now().date(),
-            'brands': Brand.objects.filter(is_active=True),
+            'brands': reference_data.get('brands'),
             'inventory_items': inventory_items,
             'item_data_json': json.dumps(item_data),
             'service_types': service_types,
@@ -1459,7 +1445,6 @@ def customer_register(request: HttpRequest):
 
                 # Continue to next step (don't create yet, just save to session)
                 request.session["reg_step1"] = form.cleaned_data
-                request.session.save()
 
                 if is_ajax:
                     return json_response(True)
@@ -1473,7 +1458,6 @@ def customer_register(request: HttpRequest):
             form = CustomerStep2Form(request.POST)
             if form.is_valid():
                 request.session["reg_step2"] = form.cleaned_data
-                request.session.save()
                 intent = form.cleaned_data.get("intent")
                 # If inquiry, skip service type selection and go to step 4
                 next_step = 4 if intent == "inquiry" else 3
@@ -1499,7 +1483,6 @@ def customer_register(request: HttpRequest):
                     'questions': request.POST.get('questions') or '',
                 }
                 request.session['reg_step3'] = step3_data
-                request.session.save()
                 if is_ajax:
                     return json_response(True, next_step=4)
                 return redirect(f"{reverse('tracker:customer_register')}?step=4")
@@ -1542,7 +1525,6 @@ def customer_register(request: HttpRequest):
                         'estimated_duration': request.POST.get('estimated_duration', '').strip(),
                     })
                 request.session["reg_step3"] = step3_data
-                request.session.save()
                 
                 if is_ajax:
                     return json_response(True, next_step=4)
@@ -1717,9 +1699,9 @@ def customer_register(request: HttpRequest):
                                 estimated_duration=est_minutes or None
                             )
 
-                            # Adjust inventory
-                            from .utils import adjust_inventory
-                            adjust_inventory(item.name, item.brand.name, -qty_int)
+                            # Hold the stock for this order in the inventory ledger
+                            from .services import inventory_ledger
+                            inventory_ledger.reserve_for_order(o, request.user)
                             
                         except InventoryItem.DoesNotExist:
                             if is_ajax:
@@ -1849,38 +1831,17 @@ def customer_register(request: HttpRequest):
     context["step2"] = session_step2
     context["step3"] = request.session.get("reg_step3", {})
     context["today"] = timezone.now().date()
-    # Get brands and inventory items for all steps
-    context["brands"] = Brand.objects.filter(is_active=True)
-    inventory_items = InventoryItem.objects.select_related('brand').filter(is_active=True, brand__isnull=False).order_by('brand__name', 'name')
+    # Get brands, inventory items and service catalogs for all steps
+    from .services import reference_data
+    context["brands"] = reference_data.get('brands')
+    inventory_items = [i for i in reference_data.get('inventory_items') if i['brand_id']]
     context["inventory_items"] = inventory_items
-
-    # Build item data mapping for JavaScript
-    item_data = {}
-    for item in inventory_items:
-        if item.name and item.brand:
-            item_data[str(item.id)] = {
-                'name': item.name,
-                'brand': item.brand.name,
-                'quantity': item.quantity
-            }
-    context["item_data_json"] = json.dumps(item_data)
-
-    # Dynamic service types and sales add-ons
-    try:
-        from .models import ServiceType, ServiceAddon
-        svc_qs = ServiceType.objects.filter(is_active=True).order_by('name')
-        addon_qs = ServiceAddon.objects.filter(is_active=True).order_by('name')
-        context["service_types"] = [{
-            'name': s.name,
-            'estimated_minutes': int(s.estimated_minutes or 0)
-        } for s in svc_qs]
-        context["sales_addons"] = [{
-            'name': a.name,
-            'estimated_minutes': int(a.estimated_minutes or 0)
-        } for a in addon_qs]
-    except Exception:
-        context["service_types"] = []
-        context["sales_addons"] = []
+    context["item_data_json"] = json.dumps({
+        str(i['id']): {'name': i['name'], 'brand': i['brand'], 'quantity': i['quantity']}
+        for i in inventory_items if i['name']
+    })
+    context["service_types"] = reference_data.get('service_types')
+    context["sales_addons"] = reference_data.get('service_addons')
 
     context["service_offers"] = [
         'Oil Change', 'Engine Diagnostics', 'Brake Repair', 'Tire Rotation',
@@ -1936,6 +1897,55 @@ def customer_register(request: HttpRequest):
     return render(request, "tracker/customer_register.html", context)
 
 
+@login_required
+@require_http_methods(["POST"])
+def api_customer_register(request: HttpRequest):
+    """Register a customer (plus optional vehicle and order) from one JSON payload.
+
+    See tracker.services.registration.register for the payload shape.
+    """
+    from .services import registration
+
+    try:
+        payload = json.loads(request.body or b'{}')
+    except (ValueError, TypeError):
+        return JsonResponse({'success': False, 'error': 'invalid_json', 'message': 'Request body must be JSON'}, status=400)
+    if not isinstance(payload, dict):
+        return JsonResponse({'success': False, 'error': 'invalid_json', 'message': 'Request body must be a JSON object'}, status=400)
+
+    try:
+        result = registration.register(payload, get_user_branch(request.user), user=request.user)
+    except registration.RegistrationError as e:
+        body = {'success': False, 'error': e.error, 'message': e.message, **e.extra}
+        if e.error == 'duplicate_customer':
+            body['redirect_url'] = reverse('tracker:customer_detail', kwargs={'pk': e.extra['customer_id']}) + '?flash=existing_customer'
+        return JsonResponse(body, status=e.status)
+    except Exception as e:
+        logger.error(f"Error registering customer via API: {e}")
+        return JsonResponse({'success': False, 'error': 'server_error', 'message': str(e)}, status=500)
+
+    customer, order = result.customer, result.order
+    try:
+        add_audit_log(request.user, 'customer_register', f"Registered customer {customer.full_name} ({customer.code}) via API")
+    except Exception:
+        pass
+    redirect_url = (
+        reverse('tracker:order_detail', kwargs={'pk': order.id}) if order
+        else reverse('tracker:customer_detail', kwargs={'pk': customer.id})
+    )
+    return JsonResponse({
+        'success': True,
+        'customer_id': customer.id,
+        'customer_code': customer.code,
+        'vehicle_id': result.vehicle.id if result.vehicle else None,
+        'order_id': order.id if order else None,
+        'order_number': order.order_number if order else None,
+        'remaining_stock': result.remaining_stock,
+        'warnings': result.warnings,
+        'redirect_url': redirect_url,
+    }, status=201)
+
+
 # Service settings: types and add-ons
 @login_required
 
@@ -2050,7 +2060,7 @@ def create_order_for_customer(request: HttpRequest, pk: int):
     This endpoint receives a customer ID and creates an order for that customer.
     It prevents duplicate customer creation by enforcing the customer relationship.
     """
-    from .utils import adjust_inventory
+    from .services import inventory_ledger
     customers_qs = scope_queryset(Customer.objects.all(), request.user, request)
     c = get_object_or_404(customers_qs, pk=pk)
 
@@ -2158,8 +2168,7 @@ def create_order_for_customer(request: HttpRequest, pk: int):
 
             # Deduct inventory after save
             if o.type == 'sales':
-                qty_int = int(o.quantity or 0)
-                ok, _, remaining = adjust_inventory(o.item_name, o.brand, -qty_int)
+                ok, _, remaining = inventory_ledger.reserve_for_order(o, request.user)
                 if ok:
                     messages.success(request, f"Order created. Remaining stock for {o.item_name} ({o.brand}): {remaining}")
                 else:
@@ -2174,21 +2183,9 @@ def create_order_for_customer(request: HttpRequest, pk: int):
         form.fields["vehicle"].queryset = c.vehicles.all()
 
     # Dynamic service types and add-ons for order form
-    try:
-        from .models import ServiceType, ServiceAddon
-        svc_qs = ServiceType.objects.filter(is_active=True).order_by('name')
-        addon_qs = ServiceAddon.objects.filter(is_active=True).order_by('name')
-        service_types = [{
-            'name': s.name,
-            'estimated_minutes': int(s.estimated_minutes or 0)
-        } for s in svc_qs]
-        sales_addons = [{
-            'name': a.name,
-            'estimated_minutes': int(a.estimated_minutes or 0)
-        } for a in addon_qs]
-    except Exception:
-        service_types = []
-        sales_addons = []
+    from .services import reference_data
+    service_types = reference_data.get('service_types')
+    sales_addons = reference_data.get('service_addons')
 
     return render(request, "tracker/order_create.html", {
         "customer": c,
@@ -2199,6 +2196,7 @@ def create_order_for_customer(request: HttpRequest, pk: int):
 
 
 @login_required
+@reporting_view
 def customer_groups(request: HttpRequest):
     """Advanced customer groups page with detailed analytics and insights"""
     from django.db.models import Count, Sum, Avg, Max, Min, Q, F
@@ -2211,11 +2209,9 @@ def customer_groups(request: HttpRequest):
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest' and request.GET.get('load_group') != '1':
         return customer_groups_data(request)
         
-    # Optional server-side chart generation (matplotlib may be unavailable in some envs)
-    try:
-        from tracker.utils.chart_utils import generate_monthly_trend_chart
-    except Exception:
-        generate_monthly_trend_chart = None
+    # Server-side chart images are rendered in the background and linked by URL
+    from .services import charts
+    server_charts = charts.enabled('customer_groups')
     
     # Get filter parameters
     selected_group = request.GET.get('group', 'all')
@@ -2509,14 +2505,14 @@ def customer_groups(request: HttpRequest):
             series = [int(d.get('orders') or 0) for d in monthly_data_list]
             monthly_chart_data[customer_type] = {'labels': labels, 'series': series, 'title': f"{display_name} - Monthly Order Trends"}
         
-        # Generate the chart image (if generator available)
-        if monthly_data_list and callable(generate_monthly_trend_chart):
-            chart_title = f"{display_name} - Monthly Order Trends"
-            chart_image = generate_monthly_trend_chart(
-                monthly_data_list,
-                title=chart_title
+        # Chart image URL; identical data maps to the same cached image
+        if monthly_data_list and server_charts:
+            points = [{'month': d['month'].strftime('%Y-%m'), 'orders': int(d.get('orders') or 0)}
+                      for d in monthly_data_list if d['month']]
+            monthly_charts[customer_type] = charts.chart_url(
+                'monthly_trend', points, title=f"{display_name} - Monthly Order Trends"
             )
-            monthly_charts[customer_type] = chart_image
+            customer_groups[customer_type]['chart_url'] = monthly_charts[customer_type]
     
     # Initialize variables with default values if not defined
     total_revenue = getattr(customers_base.aggregate(total=Sum('total_spent')), 'total', 0) or 0
@@ -2541,7 +2537,6 @@ def customer_groups(request: HttpRequest):
         'revenue_growth': revenue_growth,
         'orders_growth': orders_growth,
         'customers_growth': customers_growth,
-        'chart_image': chart_image if 'chart_image' in locals() else None,
     }
     
     # If it's an AJAX request, return JSON response
@@ -2592,6 +2587,26 @@ def customer_groups(request: HttpRequest):
     return render(request, 'tracker/customer_groups.html', context)
 
 @login_required
+def chart_image(request: HttpRequest, key: str):
+    """PNG for a chart registered by tracker.services.charts; content-addressed, so cacheable."""
+    from .services import charts
+
+    etag = f'"{key}"'
+    headers = {'ETag': etag, 'Cache-Control': f'private, max-age={charts.CHART_CACHE_TTL}, immutable'}
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponse(status=304)
+    else:
+        png = charts.get_png(key)
+        if png is None:
+            raise http.Http404('Chart not available')
+        response = HttpResponse(png, content_type='image/png')
+    for name, value in headers.items():
+        response[name] = value
+    return response
+
+
+@login_required
+@reporting_view
 def customer_groups_advanced(request: HttpRequest):
     """Advanced customer groups page with AJAX functionality"""
     branches = list(Branch.objects.filter(is_active=True).order_by('name').values_list('name', flat=True))
@@ -2704,6 +2719,7 @@ def api_customer_groups_data(request: HttpRequest):
     })
 
 @login_required
+@reporting_view
 def customer_groups_data(request: HttpRequest):
     """API endpoint for AJAX requests to get customer groups data"""
     from django.db.models import Count, Sum, Avg, Q, F
@@ -2856,37 +2872,13 @@ def orders_list(request: HttpRequest):
         start_year = now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
         orders = orders.filter(created_at__gte=start_year)
 
-    # Get counts for stats
-    # Exclude temporary customers (those with full_name starting with "Plate " and phone starting with "PLATE_")
-    base_orders_qs = scope_queryset(Order.objects.all(), request.user, request).exclude(
-        customer__full_name__startswith='Plate ',
-        customer__phone__startswith='PLATE_'
-    )
-    total_orders = base_orders_qs.count()
-    pending_orders = base_orders_qs.filter(status="created").count()
-    active_orders = base_orders_qs.filter(status__in=["created", "in_progress", "overdue"]).count()
-    completed_today = base_orders_qs.filter(status="completed", completed_at__date=timezone.localdate()).count()
-    urgent_orders = base_orders_qs.filter(priority="urgent").count()
-    # Overdue KPI: respect user branch scoping and optional admin branch filter
-    overdue_count = base_orders_qs.filter(status="overdue").count()
+    # Header KPIs come from the cached counter sets (one aggregate each when cold)
+    from .services import kpi_counters
+    kpi_scope = kpi_counters.scope_for(request.user, request)
+    order_kpis = kpi_counters.get_counts('orders', kpi_scope)
+    started_kpis = kpi_counters.get_counts('started_orders', kpi_scope)
     revenue_today = 0
 
-    # Get started orders KPIs (for the Started Orders view)
-    started_orders_qs = scope_queryset(Order.objects.filter(status__in=['created', 'in_progress', 'overdue']), request.user, request)
-    started_total = started_orders_qs.count()
-    started_pending = started_orders_qs.filter(status='in_progress').count()
-    started_completed = scope_queryset(Order.objects.filter(status='completed'), request.user, request).count()
-
-    # Calculate documents uploaded (document_scans count)
-    documents_uploaded = 0
-    try:
-        from .models import DocumentScan
-        documents_uploaded = DocumentScan.objects.filter(
-            order__in=started_orders_qs
-        ).count()
-    except Exception:
-        pass
-
     # Fetch started orders if view mode is 'started'
     started_orders = []
     if view_mode == "started":
@@ -2894,6 +2886,7 @@ def orders_list(request: HttpRequest):
         started_status = request.GET.get("status", "all")
         started_sort = request.GET.get("sort_by", "-started_at")
 
+        started_orders_qs = scope_queryset(Order.objects.filter(status__in=['created', 'in_progress', 'overdue']), request.user, request)
         started_list_qs = started_orders_qs.select_related("customer", "vehicle")
 
         if started_status != "all":
@@ -2902,24 +2895,29 @@ def orders_list(request: HttpRequest):
         if plate_search:
             started_list_qs = started_list_qs.filter(vehicle__plate_number__istartswith=plate_search)
 
+        # Keyset ordering: a non-null sort key plus id as tiebreaker
         if started_sort == "plate_number":
-            started_list_qs = started_list_qs.order_by("vehicle__plate_number")
+            started_list_qs = started_list_qs.annotate(sort_plate=Coalesce('vehicle__plate_number', Value('')))
+            started_ordering = ("sort_plate", "id")
         elif started_sort == "customer_name":
-            started_list_qs = started_list_qs.order_by("customer__full_name")
+            started_ordering = ("customer__full_name", "id")
         elif started_sort == "started_at":
-            started_list_qs = started_list_qs.annotate(sort_time=Coalesce('started_at', 'created_at')).order_by("sort_time")
+            started_list_qs = started_list_qs.annotate(sort_time=Coalesce('started_at', 'created_at'))
+            started_ordering = ("sort_time", "id")
         else:
-            started_list_qs = started_list_qs.annotate(sort_time=Coalesce('started_at', 'created_at')).order_by("-sort_time")
+            started_list_qs = started_list_qs.annotate(sort_time=Coalesce('started_at', 'created_at'))
+            started_ordering = ("-sort_time", "-id")
 
-        started_orders_list = started_list_qs
-        paginator = Paginator(started_orders_list, 20)
-        page = request.GET.get('page')
-        started_orders = paginator.get_page(page)
+        started_orders = CursorPaginator(started_list_qs, ordering=started_ordering, per_page=20).page(request.GET.get('cursor'))
+        # The regular table is hidden in this mode; don't load every order into it
+        orders = []
     else:
-        # For regular view, paginate regular orders
-        paginator = Paginator(orders, 20)
-        page = request.GET.get('page')
-        orders = paginator.get_page(page)
+        # For regular view, page through orders newest first without OFFSET/COUNT
+        orders = CursorPaginator(orders, ordering=("-created_at", "-id"), per_page=20).page(request.GET.get('cursor'))
+
+    page_params = request.GET.copy()
+    page_params.pop('cursor', None)
+    page_params.pop('page', None)
 
     branches = list(Branch.objects.filter(is_active=True).order_by('name').values_list('name', flat=True))
 
@@ -2933,17 +2931,10 @@ def orders_list(request: HttpRequest):
         "order_view_mode": view_mode,
         "status": status,
         "type": type_filter,
-        "total_orders": total_orders,
-        "pending_orders": pending_orders,
-        "active_orders": active_orders,
-        "completed_today": completed_today,
-        "urgent_orders": urgent_orders,
-        "overdue_count": overdue_count,
+        **order_kpis,
+        **started_kpis,
         "revenue_today": revenue_today,
-        "started_total": started_total,
-        "started_pending": started_pending,
-        "started_completed": started_completed,
-        "documents_uploaded": documents_uploaded,
+        "page_query": page_params.urlencode(),
         "branches": branches,
         "salespersons": salespersons,
         "plate_search": (request.GET.get("plate_search") or ""),
@@ -2958,42 +2949,18 @@ def orders_list(request: HttpRequest):
             form = OrderForm()
             form.fields['vehicle'].queryset = c.vehicles.all()
             # Provide dynamic service types and add-ons
-            try:
-                from .models import ServiceType, ServiceAddon
-                svc_qs = ServiceType.objects.filter(is_active=True).order_by('name')
-                addon_qs = ServiceAddon.objects.filter(is_active=True).order_by('name')
-                service_types = [{
-                    'name': s.name,
-                    'estimated_minutes': int(s.estimated_minutes or 0)
-                } for s in svc_qs]
-                sales_addons = [{
-                    'name': a.name,
-                    'estimated_minutes': int(a.estimated_minutes or 0)
-                } for a in addon_qs]
-            except Exception:
-                service_types = []
-                sales_addons = []
+            from .services import reference_data
+            service_types = reference_data.get('service_types')
+            sales_addons = reference_data.get('service_addons')
             return render(request, "tracker/order_create.html", {"customer": c, "form": form, "service_types": service_types, "sales_addons": sales_addons})
         form = OrderForm()
         try:
             form.fields['vehicle'].queryset = Vehicle.objects.none()
         except Exception:
             pass
-        try:
-            from .models import ServiceType, ServiceAddon
-            svc_qs = ServiceType.objects.filter(is_active=True).order_by('name')
-            addon_qs = ServiceAddon.objects.filter(is_active=True).order_by('name')
-            service_types = [{
-                'name': s.name,
-                'estimated_minutes': int(s.estimated_minutes or 0)
-            } for s in svc_qs]
-            sales_addons = [{
-                'name': a.name,
-                'estimated_minutes': int(a.estimated_minutes or 0)
-            } for a in addon_qs]
-        except Exception:
-            service_types = []
-            sales_addons = []
+        from .services import reference_data
+        service_types = reference_data.get('service_types')
+        sales_addons = reference_data.get('service_addons')
         return render(request, "tracker/order_create.html", {"form": form, "service_types": service_types, "sales_addons": sales_addons})
 
     # Handle POST (AJAX or standard form submit)
@@ -3079,9 +3046,8 @@ def orders_list(request: HttpRequest):
         )
         remaining = None
         if order.type == 'sales':
-            from .utils import adjust_inventory
-            qty_int = int(order.quantity or 0)
-            ok, status, rem = adjust_inventory(order.item_name, order.brand, -qty_int)
+            from .services import inventory_ledger
+            ok, status, rem = inventory_ledger.reserve_for_order(order, request.user)
             remaining = rem if ok else None
         return JsonResponse({'success': True, 'message': 'Order created successfully', 'order_id': order.id, 'remaining': remaining})
 
@@ -3143,9 +3109,8 @@ def orders_list(request: HttpRequest):
             estimated_duration=o.estimated_duration,
         )
         if o.type == 'sales':
-            from .utils import adjust_inventory
-            qty_int = int(o.quantity or 0)
-            ok, status, remaining = adjust_inventory(o.item_name, o.brand, -qty_int)
+            from .services import inventory_ledger
+            ok, status, remaining = inventory_ledger.reserve_for_order(o, request.user)
             if ok:
                 messages.success(request, f"Order created. Remaining stock for {o.item_name} ({o.brand}): {remaining}")
             else:
@@ -3308,6 +3273,13 @@ def customer_detail(request: HttpRequest, pk: int):
     notes = customer.note_entries.all().order_by('-created_at')
     invoices = customer.invoices.all().order_by('-invoice_date', '-created_at')
 
+    # Old history lives in the archive tables; list it with the rest, flagged is_archived
+    from tracker.services import archive
+    archived_orders = scope_queryset(customer.archived_orders.all(), request.user, request)
+    orders = archive.with_archived(orders, archive.archived_orders(archived_orders), key=lambda o: o.created_at)
+    invoices = archive.with_archived(invoices, archive.archived_invoices(customer.archived_invoices.all()),
+                                     key=lambda i: (i.invoice_date, i.created_at))
+
     return render(request, "tracker/customer_detail.html", {
         'customer': customer,
         'orders': orders,
@@ -3372,7 +3344,15 @@ def request_customer_access(request: HttpRequest, pk: int):
 @login_required
 def order_detail(request: HttpRequest, pk: int):
     orders_qs = scope_queryset(Order.objects.all(), request.user, request)
-    order = get_object_or_404(orders_qs, pk=pk)
+    order = orders_qs.filter(pk=pk).first()
+    if order is None:
+        # Archived orders are shown read-only
+        from tracker.models import ArchivedOrder
+        from tracker.services import archive
+        archived = archive.find_order(pk, scope_queryset(ArchivedOrder.objects.all(), request.user, request))
+        if archived is None:
+            raise http.Http404('No Order matches the given query.')
+        return render(request, 'tracker/archived_record.html', archive.detail_context(archived))
     # Auto-progress created -> in_progress after 10 minutes
     try:
         order.auto_progress_if_elapsed()
@@ -3680,12 +3660,12 @@ def complete_order(request: HttpRequest, pk: int):
                     pass
                 pdf_bytes = att.read()
                 if is_job_card:
-                    signed_pdf_bytes = embed_signature_in_pdf(pdf_bytes, signature_bytes, preset='job_card')
+                    signed_pdf_bytes = pdf_signature.embed_signature_in_pdf(pdf_bytes, signature_bytes, preset='job_card')
                 else:
-                    signed_pdf_bytes = embed_signature_in_pdf(pdf_bytes, signature_bytes)
-                signed_name = build_signed_filename(att.name)
+                    signed_pdf_bytes = pdf_signature.embed_signature_in_pdf(pdf_bytes, signature_bytes)
+                signed_name = pdf_signature.build_signed_filename(att.name)
                 signed_attachment = ContentFile(signed_pdf_bytes, name=signed_name)
-            except SignatureEmbedError as exc:
+            except pdf_signature.SignatureEmbedError as exc:
                 messages.error(request, str(exc))
                 return redirect('tracker:order_detail', pk=o.id)
             except Exception:
@@ -3713,12 +3693,12 @@ def complete_order(request: HttpRequest, pk: int):
                     pass
                 img_bytes = att.read()
                 if is_job_card:
-                    out_bytes = embed_signature_in_image(img_bytes, signature_bytes, preset='job_card')
+                    out_bytes = pdf_signature.embed_signature_in_image(img_bytes, signature_bytes, preset='job_card')
                 else:
-                    out_bytes = embed_signature_in_image(img_bytes, signature_bytes)
-                out_name = build_signed_name(att.name)
+                    out_bytes = pdf_signature.embed_signature_in_image(img_bytes, signature_bytes)
+                out_name = pdf_signature.build_signed_name(att.name)
                 signed_attachment = ContentFile(out_bytes, name=out_name)
-            except SignatureEmbedError as exc:
+            except pdf_signature.SignatureEmbedError as exc:
                 messages.error(request, str(exc))
                 return redirect('tracker:order_detail', pk=o.id)
             except Exception:
@@ -3753,16 +3733,16 @@ def complete_order(request: HttpRequest, pk: int):
     reference_time = o.started_at or o.created_at
     o.actual_duration = int(max(0, (now - reference_time).total_seconds() // 60))
 
-    # Calculate estimated_duration using working hours (8 AM - 5 PM)
+    # Calculate estimated_duration using the branch's working hours (default 8 AM - 5 PM)
     if o.started_at:
-        from .utils.time_utils import calculate_estimated_duration
-        estimated_mins = calculate_estimated_duration(o.started_at, o.completed_at)
+        estimated_mins = o.calculate_estimated_duration()
         if estimated_mins is not None:
             o.estimated_duration = estimated_mins
 
-    if o.type == 'sales' and (o.quantity or 0) > 0 and o.item_name and o.brand:
-        from .utils import adjust_inventory
-        adjust_inventory(o.item_name, o.brand, (o.quantity or 0))
+    if o.type == 'sales':
+        # The stock was taken when the order was created; completing keeps it taken
+        from .services import inventory_ledger
+        inventory_ledger.consume_for_order(o)
 
     # Supporting attachments are independent; do not auto-embed signature into them during completion
 
@@ -3829,15 +3809,15 @@ def sign_order_document(request: HttpRequest, pk: int):
         pdf_bytes = pdf_file.read()
         preset = 'job_card' if (request.POST.get('completion_doc_type') or '').strip().lower() in {'job_card','jobcard','job card'} else None
         if preset:
-            signed_pdf_bytes = embed_signature_in_pdf(pdf_bytes, signature_bytes, preset=preset)
+            signed_pdf_bytes = pdf_signature.embed_signature_in_pdf(pdf_bytes, signature_bytes, preset=preset)
         else:
-            signed_pdf_bytes = embed_signature_in_pdf(pdf_bytes, signature_bytes)
-    except SignatureEmbedError as exc:
+            signed_pdf_bytes = pdf_signature.embed_signature_in_pdf(pdf_bytes, signature_bytes)
+    except pdf_signature.SignatureEmbedError as exc:
         return JsonResponse({'success': False, 'error': str(exc)}, status=400)
     except Exception:
         return JsonResponse({'success': False, 'error': 'Unable to sign the document.'}, status=500)
 
-    signed_name = build_signed_filename(pdf_file.name)
+    signed_name = pdf_signature.build_signed_filename(pdf_file.name)
 
     signed_content = ContentFile(signed_pdf_bytes, name=signed_name)
     order.completion_attachment.save(signed_name, signed_content, save=False)
@@ -3857,9 +3837,9 @@ def sign_order_document(request: HttpRequest, pk: int):
     order.signed_by = request.user
     order.signed_at = now
 
-    if order.type == 'sales' and (order.quantity or 0) > 0 and order.item_name and order.brand:
-        from .utils import adjust_inventory
-        adjust_inventory(order.item_name, order.brand, (order.quantity or 0))
+    if order.type == 'sales':
+        from .services import inventory_ledger
+        inventory_ledger.consume_for_order(order)
 
     order.save(update_fields=['status', 'completed_at', 'completion_date', 'actual_duration', 'signed_by', 'signed_at'])
 
@@ -3951,14 +3931,14 @@ def sign_existing_document(request: HttpRequest, pk: int):
     # Perform embedding
     try:
         if is_pdf:
-            out = embed_signature_in_pdf(src_bytes, signature_bytes, preset='job_card' if use_job_card else None)
-            out_name = build_signed_filename(src_name)
+            out = pdf_signature.embed_signature_in_pdf(src_bytes, signature_bytes, preset='job_card' if use_job_card else None)
+            out_name = pdf_signature.build_signed_filename(src_name)
             out_content = ContentFile(out, name=out_name)
         else:
-            out = embed_signature_in_image(src_bytes, signature_bytes, preset='job_card' if use_job_card else None)
-            out_name = build_signed_name(src_name)
+            out = pdf_signature.embed_signature_in_image(src_bytes, signature_bytes, preset='job_card' if use_job_card else None)
+            out_name = pdf_signature.build_signed_name(src_name)
             out_content = ContentFile(out, name=out_name)
-    except SignatureEmbedError as exc:
+    except pdf_signature.SignatureEmbedError as exc:
         messages.error(request, str(exc))
         return redirect('tracker:order_detail', pk=order.id)
     except Exception:
@@ -4007,6 +3987,9 @@ def cancel_order(request: HttpRequest, pk: int):
     o.cancelled_at = now
     o.cancellation_reason = reason
     o.save(update_fields=['status', 'cancelled_at', 'cancellation_reason'])
+    if o.type == 'sales':
+        from .services import inventory_ledger
+        inventory_ledger.release_for_order(o, request.user)
     try:
         add_audit_log(request.user, 'order_cancelled', f"Order {o.order_number} cancelled: {reason}")
     except Exception:
@@ -4126,8 +4109,8 @@ def sign_supporting_documents(request: HttpRequest, pk: int):
 
     if filename_lower.endswith('.pdf'):
         try:
-            signed_bytes = embed_signature_in_pdf(doc_bytes, signature_bytes)
-            signed_name = build_signed_filename(attachment.filename())
+            signed_bytes = pdf_signature.embed_signature_in_pdf(doc_bytes, signature_bytes)
+            signed_name = pdf_signature.build_signed_filename(attachment.filename())
             signed_file_content = ContentFile(signed_bytes, name=signed_name)
         except Exception as e:
             logger.error(f"Failed to embed signature in PDF: {e}")
@@ -4136,8 +4119,8 @@ def sign_supporting_documents(request: HttpRequest, pk: int):
         image_exts = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
         if any(filename_lower.endswith(ext) for ext in image_exts):
             try:
-                signed_bytes = embed_signature_in_image(doc_bytes, signature_bytes)
-                signed_name = build_signed_name(attachment.filename())
+                signed_bytes = pdf_signature.embed_signature_in_image(doc_bytes, signature_bytes)
+                signed_name = pdf_signature.build_signed_name(attachment.filename())
                 signed_file_content = ContentFile(signed_bytes, name=signed_name)
             except Exception as e:
                 logger.error(f"Failed to embed signature in image: {e}")
@@ -4377,6 +4360,7 @@ def remove_invoice_link(request: HttpRequest, pk: int):
 
 
 @login_required
+@reporting_view
 def customers_export(request: HttpRequest):
     q = request.GET.get('q','').strip()
     qs = scope_queryset(Customer.objects.all().order_by('-registration_date'), request.user, request)
@@ -4392,6 +4376,7 @@ def customers_export(request: HttpRequest):
     return response
 
 @login_required
+@reporting_view
 def orders_export(request: HttpRequest):
     status = request.GET.get('status','all')
     type_ = request.GET.get('type','all')
@@ -4410,6 +4395,7 @@ def orders_export(request: HttpRequest):
     return response
 
 @login_required
+@reporting_view
 def customer_groups_export(request: HttpRequest):
     """Export filtered customer group data to CSV"""
     from datetime import timedelta
@@ -4618,35 +4604,9 @@ def api_recent_orders(request: HttpRequest):
 @login_required
 def api_inventory_items(request: HttpRequest):
     """API endpoint to get all inventory items with their brands"""
-    from django.db.models import Sum, F
-    
-    cache_key = "api_inv_items_v2"
-    data = cache.get(cache_key)
-    
-    if not data:
-        # Get items with their brand names and total quantities
-        items = (
-            InventoryItem.objects
-            .annotate(brand_name=F('brand__name'))
-            .values('name', 'brand_name')
-            .annotate(total_quantity=Sum('quantity'))
-            .order_by('brand_name', 'name')
-        )
-        
-        # Format the response
-        formatted_items = [
-            {
-                'name': item['name'],
-                'brand': item['brand_name'],
-                'quantity': item['total_quantity'] or 0
-            }
-            for item in items
-        ]
-        
-        data = {"items": formatted_items}
-        cache.set(cache_key, data, 300)  # Cache for 5 minutes
-        
-    return JsonResponse(data)
+    from .services import reference_data
+
+    return reference_data.json_response(request, {'items': 'inventory_totals'})
 
 @login_required
 def api_inventory_brands(request: HttpRequest):
@@ -4952,9 +4912,8 @@ def api_customer_vehicles(request: HttpRequest, customer_id: int):
     except Customer.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Customer not found'}, status=404)
 
-@login_required
-def api_notifications_summary(request: HttpRequest):
-    """Return notification summary for header dropdown: today's visitors, low stock, overdue orders"""
+def notifications_summary_payload(request: HttpRequest) -> dict:
+    """Notification summary for the header dropdown: today's visitors, low stock, overdue orders (see tracker.views_async)"""
     from datetime import timedelta
     stock_threshold = int(request.GET.get('stock_threshold', 5) or 5)
 
@@ -5011,7 +4970,7 @@ def api_notifications_summary(request: HttpRequest):
     } for o in overdue_qs[:8]]
 
     total_new = todays_count + low_count + overdue_count
-    return JsonResponse({
+    return {
         'success': True,
         'counts': {
             'today_visitors': todays_count,
@@ -5024,7 +4983,7 @@ def api_notifications_summary(request: HttpRequest):
             'low_stock': low_stock,
             'overdue_orders': overdue,
         }
-    })
+    }
 
 # Permissions
 is_manager = user_passes_test(lambda u: u.is_authenticated and (u.is_superuser or u.groups.filter(name='manager').exists()))
@@ -5211,19 +5170,19 @@ def inventory_stock_management(request: HttpRequest):
     if request.method == 'POST':
         form = InventoryAdjustmentForm(request.POST)
         if form.is_valid():
-            adjustment = form.save(commit=False)
-            adjustment.user = request.user
-            adjustment.save()
-            
-            # Update the inventory item quantity
-            item = adjustment.item
-            if adjustment.adjustment_type == 'add':
-                item.quantity += adjustment.quantity
-            else:
-                item.quantity = max(0, item.quantity - adjustment.quantity)  # Prevent negative quantities
-            item.save()
+            # Ledger row + F() delta in one transaction; removals stop at zero
+            from .services import inventory_ledger
+            data = form.cleaned_data
+            item = data['item']
+            qty = data['quantity'] if data['adjustment_type'] == 'addition' else -data['quantity']
+            balances = inventory_ledger.adjust(
+                [(item, qty)],
+                user=request.user,
+                reference=data.get('reference'),
+                notes=data.get('notes'),
+            )
             
-            messages.success(request, f'Stock level updated for {item.name}')
+            messages.success(request, f'Stock level updated for {item.name}: {balances.get(item.pk, item.quantity)} in stock')
             return redirect('tracker:inventory_stock_management')
     else:
         form = InventoryAdjustmentForm()
@@ -5526,9 +5485,17 @@ def inventory_edit(request: HttpRequest, pk: int):
     from .forms import InventoryItemForm
     item = get_object_or_404(InventoryItem, pk=pk)
     if request.method == 'POST':
+        old_quantity = item.quantity
         form = InventoryItemForm(request.POST, instance=item)
         if form.is_valid():
-            item = form.save()
+            item = form.save(commit=False)
+            # Quantity edits go through the ledger as a delta so concurrent sales aren't overwritten
+            delta = int(item.quantity or 0) - old_quantity
+            item.save(update_fields=[f.name for f in InventoryItem._meta.concrete_fields
+                                     if not f.primary_key and f.name not in ('quantity', 'created_at')])
+            from .services import inventory_ledger
+            balances = inventory_ledger.adjust([(item, delta)], user=request.user, notes='Edited on inventory form')
+            item.quantity = balances.get(item.pk, old_quantity)
             from .utils import clear_inventory_cache
             clear_inventory_cache(item.name, item.brand)
             try:
@@ -5561,48 +5528,41 @@ def inventory_delete(request: HttpRequest, pk: int):
     return render(request, 'tracker/inventory_delete.html', { 'item': item })
 
 # Admin-only: Organization Management
+def _organization_filters(request: HttpRequest):
+    """Shared query parameters of the organisation page, export and API."""
+    from .services import org_rollups
+
+    q = request.GET.get('q', '').strip()
+    status = request.GET.get('status', '')
+    time_period = request.GET.get('period', org_rollups.DEFAULT_PERIOD)
+    if time_period not in org_rollups.PERIODS:
+        time_period = org_rollups.DEFAULT_PERIOD
+    start_month, end_month = org_rollups.period_months(
+        time_period, start=request.GET.get('start'), end=request.GET.get('end')
+    )
+    return q, status, time_period, start_month, end_month
+
+
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
+@reporting_view
 def organization_management(request: HttpRequest):
-    org_types = ['government', 'ngo', 'company']
-    q = request.GET.get('q','').strip()
-    status = request.GET.get('status','')
-    sort_by = request.GET.get('sort','last_order_date')
-    time_period = request.GET.get('period','6months')
+    from .models import OrganizationMonthlyRollup
+    from .services import org_rollups
 
-    # Period
-    today = timezone.now().date()
-    if time_period == '1month':
-        start_date = today - timezone.timedelta(days=30)
-    elif time_period == '3months':
-        start_date = today - timezone.timedelta(days=90)
-    elif time_period == '1year':
-        start_date = today - timezone.timedelta(days=365)
-    else:
-        start_date = today - timezone.timedelta(days=180)
-
-    base = scope_queryset(Customer.objects.filter(customer_type__in=org_types), request.user, request)
-    if q:
-        base = base.filter(Q(full_name__icontains=q) | Q(phone__icontains=q) | Q(email__icontains=q) | Q(organization_name__icontains=q) | Q(code__icontains=q))
+    q, status, time_period, start_month, end_month = _organization_filters(request)
+    sort_by = request.GET.get('sort','last_order_date')
 
-    customers_qs = base.annotate(
-        recent_orders_count=Count('orders', filter=Q(orders__created_at__date__gte=start_date)),
-        last_order_date=Max('orders__created_at'),
-        service_orders=Count('orders', filter=Q(orders__type='service', orders__created_at__date__gte=start_date)),
-        sales_orders=Count('orders', filter=Q(orders__type='sales', orders__created_at__date__gte=start_date)),
-        inquiry_orders=Count('orders', filter=Q(orders__type='inquiry', orders__created_at__date__gte=start_date)),
-        completed_orders=Count('orders', filter=Q(orders__status='completed', orders__created_at__date__gte=start_date)),
-        cancelled_orders=Count('orders', filter=Q(orders__status='cancelled', orders__created_at__date__gte=start_date)),
-        vehicles_count=Count('vehicles', distinct=True)
-    )
+    base = scope_queryset(Customer.objects.filter(org_rollups.org_filter(q)), request.user, request)
+    customers_qs = org_rollups.annotate_customers(base, start_month, end_month)
 
     if status == 'returning':
         customers_qs = customers_qs.filter(total_visits__gt=1)
 
     if sort_by in ['recent_orders_count','total_spent','last_order_date','vehicles_count','completed_orders']:
-        customers_qs = customers_qs.order_by(f'-{sort_by}')
+        customers_qs = customers_qs.order_by(F(sort_by).desc(nulls_last=True), '-id')
     else:
-        customers_qs = customers_qs.order_by('-last_order_date')
+        customers_qs = customers_qs.order_by(F('last_order_date').desc(nulls_last=True), '-id')
 
     paginator = Paginator(customers_qs, 20)
     page = request.GET.get('page')
@@ -5613,21 +5573,19 @@ def organization_management(request: HttpRequest):
     counts = {row['customer_type']: row['c'] for row in type_counts}
     total_org = sum(counts.values()) if counts else 0
 
-    # Charts
-    orders_scope = scope_queryset(Order.objects.filter(customer__in=base, created_at__date__gte=start_date), request.user, request)
-    if status == 'returning':
-        orders_scope = orders_scope.filter(customer__total_visits__gt=1)
-    type_dist = {r['type']: r['c'] for r in orders_scope.values('type').annotate(c=Count('id'))}
-    from django.db.models.functions import TruncMonth
-    month_rows = orders_scope.annotate(m=TruncMonth('created_at')).values('m').annotate(c=Count('id')).order_by('m')
-    trend_labels = [(r['m'].strftime('%Y-%m') if r['m'] else '') for r in month_rows]
-    trend_values = [r['c'] for r in month_rows]
+    # Charts, from the monthly rollups of the same organisations (joined, not a customer__in subquery)
+    rollups = scope_queryset(
+        OrganizationMonthlyRollup.objects.filter(org_rollups.org_filter(q, status, prefix='customer__')),
+        request.user, request,
+    )
+    series = org_rollups.monthly_series(rollups, start_month, end_month)
+    totals = org_rollups.summarize(series)
     charts = {
         'type': {
             'labels': ['Service','Sales','inquiry'],
-            'values': [type_dist.get('service',0), type_dist.get('sales',0), type_dist.get('inquiry',0)]
+            'values': [totals['service_orders'], totals['sales_orders'], totals['inquiry_orders']]
         },
-        'trend': {'labels': trend_labels, 'values': trend_values}
+        'trend': {'labels': [r['month'].strftime('%Y-%m') for r in series], 'values': [r['orders'] for r in series]}
     }
 
     return render(request, 'tracker/organization.html', {
@@ -5638,40 +5596,20 @@ def organization_management(request: HttpRequest):
         'status': status,
         'sort_by': sort_by,
         'time_period': time_period,
-        'start_date': start_date,
-        'end_date': today,
+        'start_date': start_month or (series[0]['month'] if series else end_month),
+        'end_date': timezone.localdate(),
         'charts_json': json.dumps(charts),
     })
 
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
+@reporting_view
 def organization_export(request: HttpRequest):
-    org_types = ['government','ngo','company']
-    q = request.GET.get('q','').strip()
-    status = request.GET.get('status','')
-    time_period = request.GET.get('period','6months')
-    today = timezone.now().date()
-    if time_period == '1month':
-        start_date = today - timezone.timedelta(days=30)
-    elif time_period == '3months':
-        start_date = today - timezone.timedelta(days=90)
-    elif time_period == '1year':
-        start_date = today - timezone.timedelta(days=365)
-    else:
-        start_date = today - timezone.timedelta(days=180)
+    from .services import org_rollups
 
-    base = scope_queryset(Customer.objects.filter(customer_type__in=org_types), request.user, request)
-    if q:
-        base = base.filter(Q(full_name__icontains=q) | Q(phone__icontains=q) | Q(email__icontains=q) | Q(organization_name__icontains=q) | Q(code__icontains=q))
-    qs = base.annotate(
-        recent_orders_count=Count('orders', filter=Q(orders__created_at__date__gte=start_date)),
-        last_order_date=Max('orders__created_at'),
-        service_orders=Count('orders', filter=Q(orders__type='service', orders__created_at__date__gte=start_date)),
-        sales_orders=Count('orders', filter=Q(orders__type='sales', orders__created_at__date__gte=start_date)),
-        inquiry_orders=Count('orders', filter=Q(orders__type='inquiry', orders__created_at__date__gte=start_date)),
-        completed_orders=Count('orders', filter=Q(orders__status='completed', orders__created_at__date__gte=start_date)),
-        vehicles_count=Count('vehicles', distinct=True),
-    )
+    q, status, time_period, start_month, end_month = _organization_filters(request)
+    base = scope_queryset(Customer.objects.filter(org_rollups.org_filter(q)), request.user, request)
+    qs = org_rollups.annotate_customers(base, start_month, end_month).order_by('pk')
     if status == 'returning':
         qs = qs.filter(total_visits__gt=1)
 
@@ -5679,8 +5617,8 @@ def organization_export(request: HttpRequest):
     resp = HttpResponse(content_type='text/csv')
     resp['Content-Disposition'] = 'attachment; filename="organization_customers.csv"'
     w = csv.writer(resp)
-    w.writerow(['Code','Organization','Contact','Phone','Type','Visits','Orders (period)','Service','Sales','Consult','Completed','Vehicles','Last Order'])
-    for c in qs.iterator():
+    w.writerow(['Code','Organization','Contact','Phone','Type','Visits','Orders (period)','Service','Sales','Consult','Completed','Vehicles','Last Order','Invoiced (period)','Last Activity'])
+    for c in qs.iterator(chunk_size=500):
         w.writerow([
             c.code,
             c.organization_name or '',
@@ -5694,10 +5632,53 @@ def organization_export(request: HttpRequest):
             c.inquiry_orders,
             c.completed_orders,
             c.vehicles_count,
-            c.last_order_date.isoformat() if c.last_order_date else ''
+            c.last_order_date.isoformat() if c.last_order_date else '',
+            c.invoice_gross,
+            c.last_activity.isoformat() if c.last_activity else '',
         ])
     return resp
 
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def api_organization_rollup(request: HttpRequest):
+    """Monthly order/invoice totals for organisation customers.
+
+    Query parameters: period (1month … 2years, all) or start/end as YYYY-MM, q, status,
+    branch, and customer (one customer id). Served from the monthly rollup table, so
+    multi-year ranges cost the same as a single month.
+    """
+    from .models import OrganizationMonthlyRollup
+    from .services import org_rollups
+
+    q, status, time_period, start_month, end_month = _organization_filters(request)
+    rollups = scope_queryset(
+        OrganizationMonthlyRollup.objects.filter(org_rollups.org_filter(q, status, prefix='customer__')),
+        request.user, request,
+    )
+    customer_id = (request.GET.get('customer') or '').strip()
+    if customer_id:
+        if not customer_id.isdigit():
+            return JsonResponse({'success': False, 'message': 'Invalid customer'}, status=400)
+        rollups = rollups.filter(customer_id=int(customer_id))
+
+    def as_json(row):
+        row = dict(row)
+        if row.get('month'):
+            row['month'] = row['month'].strftime('%Y-%m')
+        row['invoice_gross'] = float(row['invoice_gross'])
+        row['last_activity'] = row['last_activity'].isoformat() if row['last_activity'] else None
+        return row
+
+    series = org_rollups.monthly_series(rollups, start_month, end_month)
+    return JsonResponse({
+        'success': True,
+        'period': time_period,
+        'start': start_month.strftime('%Y-%m') if start_month else None,
+        'end': end_month.strftime('%Y-%m'),
+        'months': [as_json(r) for r in series],
+        'totals': as_json(org_rollups.summarize(series)),
+    })
+
 @login_required
 @user_passes_test(lambda u: u.is_superuser or u.is_staff)
 def users_list(request: HttpRequest):
@@ -5931,25 +5912,26 @@ def inquiries(request: HttpRequest):
             status__in=['created', 'in_progress']
         )
 
-    # Pagination
-    paginator = Paginator(queryset, 12)  # Show 12 inquiries per page
-    page = request.GET.get('page')
-    inquiries = paginator.get_page(page)
-
-    # Statistics
-    base_queryset = scope_queryset(Order.objects.filter(type='inquiry'), request.user, request)
-    stats = {
-        'new': base_queryset.filter(status='created').count(),
-        'in_progress': base_queryset.filter(status='in_progress').count(),
-        'resolved': base_queryset.filter(status='completed').count(),
-    }
-    # Add total count for the template
+    # Keyset pagination, 12 inquiries per page
+    inquiries = CursorPaginator(queryset, ordering=('-created_at', '-id'), per_page=12).page(request.GET.get('cursor'))
+    page_params = request.GET.copy()
+    page_params.pop('cursor', None)
+    page_params.pop('page', None)
+
+    # Newest note per inquiry on this page, one query for the whole page
+    from .services import inquiries as inquiries_service, kpi_counters
+    inquiries_service.attach_latest_notes(inquiries.object_list)
+
+    # Statistics (cached counter set: status and follow-up counts in one aggregate)
+    stats = dict(kpi_counters.get_counts('inquiries', kpi_counters.scope_for(request.user, request)))
+    # Total shown on the page covers the three workflow states
     stats['total'] = stats['new'] + stats['in_progress'] + stats['resolved']
 
     context = {
         'inquiries': inquiries,
         'stats': stats,
         'today': timezone.localdate(),
+        'page_query': page_params.urlencode(),
     }
 
     return render(request, 'tracker/inquiries.html', context)
@@ -5960,7 +5942,10 @@ def inquiry_detail(request: HttpRequest, pk: int):
     """Get inquiry details for modal view"""
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         try:
-            inquiry = get_object_or_404(Order, pk=pk, type='inquiry')
+            from .services import inquiries as inquiries_service
+
+            inquiry = get_object_or_404(Order.objects.select_related('customer'), pk=pk, type='inquiry')
+            notes = inquiries_service.timeline(inquiry)
 
             data = {
                 'id': inquiry.id,
@@ -5976,7 +5961,8 @@ def inquiry_detail(request: HttpRequest, pk: int):
                 'status_display': inquiry.get_status_display(),
                 'created_at': inquiry.created_at.isoformat(),
                 'follow_up_date': inquiry.follow_up_date.isoformat() if inquiry.follow_up_date else None,
-                'responses': [],  # In a real app, you'd have a related model for responses
+                'responses': [n for n in notes if n['type'] == 'response'],
+                'notes': notes,
             }
 
             return JsonResponse(data)
@@ -6276,25 +6262,12 @@ def api_add_inquiry_note(request: HttpRequest, pk: int):
 @login_required
 def api_inquiry_notes(request: HttpRequest, pk: int):
     """API endpoint to get inquiry notes/timeline"""
-    from .models import InquiryNote
+    from .services import inquiries as inquiries_service
 
     inquiry = get_object_or_404(Order, pk=pk, type='inquiry')
 
-    # Get all notes (only show non-visible notes to staff)
-    notes = InquiryNote.objects.filter(inquiry=inquiry)
-
-    notes_data = [
-        {
-            'id': note.id,
-            'type': note.note_type,
-            'type_display': note.get_note_type_display(),
-            'content': note.content,
-            'created_by': note.created_by.first_name or note.created_by.username if note.created_by else 'System',
-            'created_at': note.created_at.isoformat(),
-            'is_visible_to_customer': note.is_visible_to_customer
-        }
-        for note in notes
-    ]
+    # All notes with their authors in one query
+    notes_data = inquiries_service.timeline(inquiry)
 
     return JsonResponse({
         'success': True,
@@ -6312,17 +6285,24 @@ def api_inquiry_bulk_action(request: HttpRequest):
     if not inquiry_ids or not action:
         return JsonResponse({'success': False, 'message': 'Invalid parameters'}, status=400)
 
+    from .services import inquiries as inquiries_service
+
     try:
-        inquiries = Order.objects.filter(pk__in=inquiry_ids, type='inquiry')
+        inquiries = scope_queryset(Order.objects.filter(pk__in=inquiry_ids, type='inquiry'), request.user, request)
 
         if action == 'mark_resolved':
-            count = inquiries.update(status='completed', completed_at=timezone.now())
+            count = inquiries_service.set_status(inquiries, 'completed', request.user)
             message = f'{count} inquiry(ies) marked as resolved'
 
         elif action == 'mark_pending':
-            count = inquiries.update(status='in_progress')
+            count = inquiries_service.set_status(inquiries, 'in_progress', request.user)
             message = f'{count} inquiry(ies) marked as pending'
 
+        elif action == 'add_note':
+            count = inquiries_service.add_note(inquiries, request.POST.get('content', ''), request.user,
+                                               note_type=request.POST.get('note_type') or 'note')
+            message = f'Note added to {count} inquiry(ies)'
+
         elif action == 'export_csv':
             response = HttpResponse(content_type='text/csv')
             response['Content-Disposition'] = 'attachment; filename="inquiries.csv"'
@@ -6330,7 +6310,7 @@ def api_inquiry_bulk_action(request: HttpRequest):
             writer = csv.writer(response)
             writer.writerow(['ID', 'Customer', 'Type', 'Status', 'Priority', 'Created', 'Follow-up Date'])
 
-            for inq in inquiries:
+            for inq in inquiries.select_related('customer'):
                 writer.writerow([
                     inq.id,
                     inq.customer.full_name,
@@ -6553,6 +6533,39 @@ def audit_logs(request: HttpRequest):
     }
     return render(request, 'tracker/audit_logs.html', context)
 
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def request_metrics(request: HttpRequest):
+    """Per-view timings, query counts and repeated SQL recorded by RequestMetricsMiddleware (this process only)."""
+    from .services import request_metrics as metrics
+
+    if request.method == 'POST' and request.POST.get('action') == 'reset':
+        metrics.reset()
+        add_audit_log(request.user, 'request_metrics_reset', 'Reset request metrics')
+        messages.success(request, 'Request metrics reset')
+        return redirect('tracker:request_metrics')
+
+    fmt = request.GET.get('format', '')
+    if fmt == 'prometheus':
+        return HttpResponse(metrics.prometheus_text(), content_type='text/plain; version=0.0.4; charset=utf-8')
+    data = metrics.snapshot()
+    if fmt == 'json':
+        return JsonResponse(data)
+
+    sort = request.GET.get('sort', 'avg_queries')
+    if sort not in ('requests', 'avg_ms', 'max_ms', 'avg_queries', 'max_queries', 'db_ms', 'slow'):
+        sort = 'avg_queries'
+    views_list = sorted(({'name': name, **stats} for name, stats in data['views'].items()),
+                        key=lambda v: v[sort], reverse=True)
+    context = {
+        'views': views_list,
+        'slow_requests': data['slow_requests'],
+        'since': data['since'],
+        'sort': sort,
+        'enabled': metrics.enabled(),
+    }
+    return render(request, 'tracker/request_metrics.html', context)
+
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
 def backup_restore(request: HttpRequest):
@@ -0,0 +1,41 @@
+"""
+Async polling endpoints.
+
+Every open order page polls api_order_status every 12s, the customers list polls
+api_customers_summary every 20s and every page polls api_notifications_summary every
+5 minutes. Under WSGI each poll holds a worker for its whole duration, database time
+included. These views await their database work on tracker.utils.async_db's bounded
+thread pool instead, so under ASGI (pos_tracker.asgi) a waiting poll holds no worker.
+They behave the same under WSGI, where Django runs them in a per-request event loop.
+
+The response bodies are built by the *_payload functions in tracker.views.
+"""
+
+from django.http import JsonResponse
+
+from . import views
+from .utils import async_db
+from .utils.async_db import async_login_required
+
+
+@async_login_required
+async def api_order_status(request, pk):
+    data = await async_db.run(views.order_status_payload, pk)
+    if data is None:
+        return JsonResponse({'success': False, 'error': 'Not found'}, status=404)
+    return JsonResponse(data)
+
+
+@async_login_required
+async def api_orders_statuses(request):
+    return JsonResponse(await async_db.run(views.orders_statuses_payload, request))
+
+
+@async_login_required
+async def api_customers_summary(request):
+    return JsonResponse(await async_db.run(views.customers_summary_payload, request))
+
+
+@async_login_required
+async def api_notifications_summary(request):
+    return JsonResponse(await async_db.run(views.notifications_summary_payload, request))
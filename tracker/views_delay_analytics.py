@@ -17,6 +17,7 @@ from django.utils import timezone
 from django.contrib import messages
 
 from .models import Order, DelayReason, DelayReasonCategory, User, Branch
+from .db_router import reporting_view
 from .utils import get_user_branch
 
 logger = logging.getLogger(__name__)
@@ -30,6 +31,7 @@ def _get_category_display(category_code):
 
 @login_required
 @permission_required('tracker.view_order', raise_exception=True)
+@reporting_view
 def delay_analytics_dashboard(request):
     """Main delay analytics dashboard with overview and filters"""
     user_branch = get_user_branch(request.user)
@@ -108,6 +110,7 @@ def delay_analytics_dashboard(request):
 
 @login_required
 @require_http_methods(["GET"])
+@reporting_view
 def api_delay_analytics_summary(request):
     """API endpoint for delay analytics summary statistics - Query directly from DelayReason table"""
     user_branch = get_user_branch(request.user)
@@ -227,6 +230,7 @@ def api_delay_analytics_summary(request):
 
 @login_required
 @require_http_methods(["GET"])
+@reporting_view
 def api_delay_reasons_breakdown(request):
     """API endpoint for delay reasons breakdown by category - Query from DelayReason table"""
     user_branch = get_user_branch(request.user)
@@ -297,6 +301,7 @@ def api_delay_reasons_breakdown(request):
 
 @login_required
 @require_http_methods(["GET"])
+@reporting_view
 def api_delay_trends(request):
     """API endpoint for delay trends over time - Query from Order table with delay_reason"""
     user_branch = get_user_branch(request.user)
@@ -373,6 +378,7 @@ def api_delay_trends(request):
 
 @login_required
 @require_http_methods(["GET"])
+@reporting_view
 def api_delay_by_order_type(request):
     """API endpoint for delay breakdown by order type - Query from Order table"""
     user_branch = get_user_branch(request.user)
@@ -428,6 +434,7 @@ def api_delay_by_order_type(request):
 
 @login_required
 @require_http_methods(["GET"])
+@reporting_view
 def api_delay_by_user(request):
     """API endpoint for delay breakdown by user/team member - Query from Order table"""
     user_branch = get_user_branch(request.user)
@@ -493,6 +500,7 @@ def api_delay_by_user(request):
 
 @login_required
 @require_http_methods(["GET"])
+@reporting_view
 def api_delay_impact_analysis(request):
     """API endpoint for delay impact analysis (revenue, time, customer impact)"""
     user_branch = get_user_branch(request.user)
@@ -565,6 +573,7 @@ def api_delay_impact_analysis(request):
 
 @login_required
 @require_http_methods(["GET"])
+@reporting_view
 def api_delay_recommendations(request):
     """API endpoint for AI-generated recommendations based on delay patterns"""
     user_branch = get_user_branch(request.user)
@@ -658,6 +667,7 @@ def api_delay_recommendations(request):
 
 @login_required
 @require_http_methods(["GET"])
+@reporting_view
 def api_all_delay_reasons(request):
     """API endpoint to fetch all delay reasons from database with their submission counts - Query from Order table"""
     user_branch = get_user_branch(request.user)
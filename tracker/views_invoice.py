@@ -11,14 +11,14 @@ from django.utils import timezone
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.http import Http404, JsonResponse, HttpResponse
 from django.views.decorators.http import require_http_methods
 from django.db import transaction
 
-from .models import Invoice, InvoiceLineItem, InvoicePayment, Order, Customer, Vehicle, InventoryItem
+from .models import ArchivedInvoice, Invoice, InvoiceLineItem, InvoicePayment, Order, Customer, Vehicle, InventoryItem
 from .forms import InvoiceLineItemForm, InvoicePaymentForm
-from .utils import get_user_branch
-from .services import OrderService, CustomerService, VehicleService
+from .utils import get_user_branch, scope_queryset
+from .services import OrderService, CustomerService, VehicleService, archive
 
 logger = logging.getLogger(__name__)
 
@@ -686,9 +686,25 @@ def api_upload_extract_invoice(request):
 
 
 
+def _invoice_or_archived(pk):
+    """The invoice, or a read-only instance of it from the archive (documents stay in storage)."""
+    invoice = Invoice.objects.filter(pk=pk).first()
+    if invoice is None:
+        archived = archive.find_invoice(pk)
+        if archived is None:
+            raise Http404('No Invoice matches the given query.')
+        invoice = archive.instances(archived)[0]
+    return invoice
+
+
 @login_required
 def invoice_detail(request, pk):
     """View invoice details and manage line items/payments"""
+    if not Invoice.objects.filter(pk=pk).exists():
+        archived = archive.find_invoice(pk, scope_queryset(ArchivedInvoice.objects.all(), request.user, request))
+        if archived is None:
+            raise Http404('No Invoice matches the given query.')
+        return render(request, 'tracker/archived_record.html', archive.detail_context(archived))
     invoice = get_object_or_404(Invoice, pk=pk)
 
     if request.method == 'POST':
@@ -750,23 +766,70 @@ def invoice_detail(request, pk):
 
 @login_required
 def invoice_list(request, order_id=None):
-    """List invoices for an order or all invoices"""
+    """List invoices (optionally for one order), newest first, with filters and keyset pagination.
+
+    The first page is rendered server-side; further pages are appended from
+    api_invoice_list using the `next_cursor` value (see services.invoice_browser).
+    """
+    from .models import Branch, Salesperson
+    from .services.invoice_browser import InvoiceBrowser
+
     if order_id:
-        invoices = Invoice.objects.filter(order_id=order_id)
-        order = get_object_or_404(Order, pk=order_id)
+        order = get_object_or_404(scope_queryset(Order.objects.all(), request.user, request).only('id', 'order_number'), pk=order_id)
         title = f'Invoices for Order {order.order_number}'
     else:
-        invoices = Invoice.objects.all()
         order = None
         title = 'All Invoices'
-    
+
+    browser = InvoiceBrowser(scope_queryset(Invoice.objects.all(), request.user, request), request.GET, order_id=order_id)
+    invoices, next_cursor = browser.page(request.GET.get('cursor'))
+
+    # Only superusers without a branch can switch branch (scope_queryset honours ?branch=)
+    branches = None
+    if request.user.is_superuser and not get_user_branch(request.user):
+        branches = Branch.objects.filter(is_active=True).only('id', 'name').order_by('name')
+
     return render(request, 'tracker/invoice_list.html', {
         'invoices': invoices,
+        'next_cursor': next_cursor,
+        'filters': browser.filters,
+        'branch_filter': request.GET.get('branch', ''),
+        'branches': branches,
+        'salespersons': Salesperson.objects.filter(is_active=True).only('id', 'name').order_by('name'),
+        'status_choices': Invoice.STATUS_CHOICES,
         'order': order,
         'title': title,
     })
 
 
+@login_required
+@require_http_methods(["GET"])
+def api_invoice_list(request):
+    """JSON page of invoices for infinite scroll.
+
+    Accepts the same filters as invoice_list plus `cursor`, `limit` and `order`.
+    Returns {'success', 'invoices': [...], 'next_cursor'}; next_cursor is null on the last page.
+    """
+    from .services.invoice_browser import InvoiceBrowser, DEFAULT_PAGE_SIZE
+
+    order_id = request.GET.get('order')
+    limit = request.GET.get('limit')
+    browser = InvoiceBrowser(
+        scope_queryset(Invoice.objects.all(), request.user, request),
+        request.GET,
+        order_id=int(order_id) if order_id and order_id.isdigit() else None,
+    )
+    invoices, next_cursor = browser.page(
+        request.GET.get('cursor'),
+        limit=int(limit) if limit and limit.isdigit() else DEFAULT_PAGE_SIZE,
+    )
+    return JsonResponse({
+        'success': True,
+        'invoices': [InvoiceBrowser.serialize(inv) for inv in invoices],
+        'next_cursor': next_cursor,
+    })
+
+
 @login_required
 def invoice_print(request, pk):
     """Display invoice in print-friendly format"""
@@ -818,21 +881,13 @@ def invoice_pdf(request, pk):
 @require_http_methods(["GET"])
 def api_inventory_for_invoice(request):
     """API endpoint to fetch inventory items for invoice line items"""
+    from .services import reference_data
+
     try:
-        items = InventoryItem.objects.select_related('brand').filter(is_active=True).order_by('brand__name', 'name')
-        data = []
-        for item in items:
-            brand_name = item.brand.name if item.brand else 'Unbranded'
-            data.append({
-                'id': item.id,
-                'name': item.name,
-                'brand': brand_name,
-                'quantity': item.quantity or 0,
-                'price': float(item.price or 0),
-            })
-        return JsonResponse({'items': data})
+        return reference_data.json_response(request, {'items': 'inventory_items'})
     except Exception as e:
         logger.error(f"Error fetching inventory items: {e}")
+        return JsonResponse({'items': []}, status=500)
 
 
 @login_required
@@ -895,7 +950,7 @@ def invoice_finalize(request, pk):
 @require_http_methods(["GET"])
 def invoice_document_download(request, pk):
     """Download uploaded invoice document"""
-    invoice = get_object_or_404(Invoice, pk=pk)
+    invoice = _invoice_or_archived(pk)
 
     # Verify user has access to this invoice
     user_branch = get_user_branch(request.user)
@@ -927,7 +982,7 @@ def invoice_document_download(request, pk):
 @require_http_methods(["GET"])
 def invoice_document_view(request, pk):
     """View uploaded invoice document inline (for images and PDFs)"""
-    invoice = get_object_or_404(Invoice, pk=pk)
+    invoice = _invoice_or_archived(pk)
 
     # Verify user has access to this invoice
     user_branch = get_user_branch(request.user)
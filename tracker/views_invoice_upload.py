@@ -15,13 +15,15 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
+from django.urls import reverse
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
 from django.db import transaction
 
-from .models import Order, Customer, Vehicle, Invoice, InvoiceLineItem, InvoicePayment, Branch, Salesperson
+from .models import Order, Customer, Vehicle, Invoice, InvoiceLineItem, InvoicePayment, Branch, Salesperson, InvoiceUploadBatch
 from .utils import get_user_branch
 from .services import OrderService, CustomerService, VehicleService
+from .utils.order_type_detector import item_code_categories as _get_item_code_categories
 
 logger = logging.getLogger(__name__)
 
@@ -30,12 +32,10 @@ logger = logging.getLogger(__name__)
 @require_http_methods(["GET"])
 def api_get_salespersons(request):
     """API endpoint to fetch all active salespersons."""
+    from .services import reference_data
+
     try:
-        salespersons = Salesperson.objects.filter(is_active=True).order_by('code').values('id', 'code', 'name', 'is_default')
-        return JsonResponse({
-            'success': True,
-            'salespersons': list(salespersons)
-        })
+        return reference_data.json_response(request, {'salespersons': 'salespersons'}, extra={'success': True})
     except Exception as e:
         logger.error(f"Error fetching salespersons: {e}")
         return JsonResponse({
@@ -110,69 +110,6 @@ def _save_with_retry(instance, update_fields=None, retries=5, delay=0.2):
     return False
 
 
-def _get_item_code_categories(item_codes):
-    """
-    Helper function to get category information for item codes.
-    Queries LabourCode for each code and returns category and order type.
-
-    Args:
-        item_codes: List of item codes extracted from invoice
-
-    Returns:
-        Dict mapping code -> {category, order_type, color_class}
-    """
-    from tracker.models import LabourCode
-    from tracker.utils.order_type_detector import _normalize_category_to_order_type
-
-    if not item_codes:
-        return {}
-
-    # Clean codes
-    cleaned_codes = [str(code).strip() for code in item_codes if code]
-    if not cleaned_codes:
-        return {}
-
-    # Query database
-    found_codes = LabourCode.objects.filter(
-        code__in=cleaned_codes,
-        is_active=True
-    ).values('code', 'category')
-
-    result = {}
-    found_code_set = set()
-
-    for row in found_codes:
-        code = row['code']
-        category = row['category']
-        order_type = _normalize_category_to_order_type(category)
-
-        # Assign color based on order type
-        color_map = {
-            'labour': 'badge-labour',
-            'service': 'badge-service',
-            'sales': 'badge-sales',
-            'unspecified': 'badge-unspecified',
-        }
-
-        result[code] = {
-            'category': category,
-            'order_type': order_type,
-            'color_class': color_map.get(order_type, 'badge-secondary')
-        }
-        found_code_set.add(code)
-
-    # Add unmapped codes as 'sales'
-    for code in cleaned_codes:
-        if code not in found_code_set:
-            result[code] = {
-                'category': 'Sales',
-                'order_type': 'sales',
-                'color_class': 'badge-sales'
-            }
-
-    return result
-
-
 @login_required
 @require_http_methods(["POST"])
 def api_extract_invoice_preview(request):
@@ -1223,3 +1160,74 @@ def api_create_invoice_from_upload(request):
             'success': False,
             'message': f'Error: {str(e)}'
         })
+
+
+@login_required
+@require_http_methods(["POST"])
+def api_bulk_invoice_upload(request):
+    """
+    Bulk ingestion: queue an uploaded ZIP archive of invoice PDFs.
+
+    POST parameters:
+      - file: ZIP archive of invoice PDFs
+      - dry_run (optional): '1' to extract and match without creating anything
+
+    Only the archive itself is checked here; the scheduler extracts and creates the
+    invoices (tracker.services.invoice_batch.process_queued). The response (202) carries
+    the batch id and status_url, which reports progress and the per-file results.
+    """
+    from .services import invoice_batch
+
+    uploaded = request.FILES.get('file')
+    if not uploaded:
+        return JsonResponse({'success': False, 'message': 'No file uploaded'}, status=400)
+    try:
+        batch = invoice_batch.queue_upload(
+            uploaded,
+            branch=get_user_branch(request.user),
+            user=request.user,
+            dry_run=request.POST.get('dry_run') in ('1', 'true', 'yes'),
+        )
+    except invoice_batch.BatchError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+    return JsonResponse({
+        'success': True,
+        'batch_id': batch.pk,
+        'status': batch.status,
+        'status_url': reverse('tracker:api_invoice_upload_batch', args=[batch.pk]),
+    }, status=202)
+
+
+@login_required
+@require_http_methods(["GET"])
+def api_invoice_upload_batch(request, pk):
+    """
+    Status of a bulk upload queued by api_bulk_invoice_upload.
+
+    GET parameters:
+      - report (optional): 'csv' to download the exceptions report once the batch is done
+
+    Files listed for review should be created through the single upload flow.
+    """
+    from .services import invoice_batch
+
+    batches = InvoiceUploadBatch.objects.all()
+    if not request.user.is_superuser:
+        batches = batches.filter(created_by=request.user)
+    batch = get_object_or_404(batches, pk=pk)
+
+    if request.GET.get('report') == 'csv' and batch.status == 'done':
+        from django.http import HttpResponse
+        response = HttpResponse(content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="invoice_upload_{batch.pk}_exceptions.csv"'
+        invoice_batch.write_report_rows(batch.items, response)
+        return response
+    return JsonResponse({
+        'success': batch.status != 'failed',
+        'batch_id': batch.pk,
+        'status': batch.status,
+        'dry_run': batch.dry_run,
+        'summary': batch.summary,
+        'items': batch.items,
+        'error': batch.error,
+    })
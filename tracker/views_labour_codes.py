@@ -9,14 +9,12 @@ from django.db import transaction, models
 from django.views.decorators.http import require_http_methods
 from .models import LabourCode
 from .forms import LabourCodeForm, LabourCodeCSVImportForm
+from .utils.lazy import is_available
 
 logger = logging.getLogger(__name__)
 
-try:
-    import pandas as pd
-    PANDAS_AVAILABLE = True
-except ImportError:
-    PANDAS_AVAILABLE = False
+# pandas is only needed for Excel imports; checked here, imported when used
+PANDAS_AVAILABLE = is_available('pandas')
 
 
 @login_required
@@ -212,6 +210,8 @@ def _process_excel_import(excel_file, clear_existing=False):
             'error_message': 'Excel import requires pandas library. Please contact administrator.',
         }
 
+    import pandas as pd
+
     try:
         # Read Excel file using pandas
         try:
@@ -21,6 +21,10 @@ from .services import OrderService
 
 logger = logging.getLogger(__name__)
 
+# Started orders dashboard page sizes (flat cards / plate groups)
+STARTED_ORDERS_PER_PAGE = 60
+STARTED_PLATES_PER_PAGE = 20
+
 
 @login_required
 @require_http_methods(["POST"])
@@ -255,36 +259,14 @@ def api_check_plate(request):
 @require_http_methods(["GET"])
 def api_service_types(request):
     """Return list of active service types, addons, inventory items, and labour codes for UI."""
-    try:
-        svc_qs = ServiceType.objects.filter(is_active=True).order_by('name')
-        service_types = [{'id': s.id, 'name': s.name, 'estimated_minutes': s.estimated_minutes or 0} for s in svc_qs]
-
-        addon_qs = ServiceAddon.objects.filter(is_active=True).order_by('name')
-        service_addons = [{'id': a.id, 'name': a.name, 'estimated_minutes': a.estimated_minutes or 0} for a in addon_qs]
-
-        items_qs = InventoryItem.objects.select_related('brand').filter(is_active=True).order_by('brand__name', 'name')
-        inventory_items = []
-        for item in items_qs:
-            brand_name = item.brand.name if item.brand else 'Unbranded'
-            inventory_items.append({
-                'id': item.id,
-                'name': item.name,
-                'brand': brand_name,
-                'quantity': item.quantity or 0,
-                'price': float(item.price or 0)
-            })
-
-        # Load labour codes for service and labour order types
-        from .models import LabourCode
-        labour_codes_qs = LabourCode.objects.filter(is_active=True).order_by('code')
-        labour_codes = [{'id': lc.id, 'code': lc.code, 'item_name': lc.item_name, 'description': lc.description, 'brand': lc.brand or 'N/A'} for lc in labour_codes_qs]
+    from .services import reference_data
 
-        logger.debug(f"api_service_types: Returning {len(inventory_items)} inventory items and {len(labour_codes)} labour codes")
-        return JsonResponse({
-            'service_types': service_types,
-            'service_addons': service_addons,
-            'inventory_items': inventory_items,
-            'labour_codes': labour_codes
+    try:
+        return reference_data.json_response(request, {
+            'service_types': 'service_types',
+            'service_addons': 'service_addons',
+            'inventory_items': 'inventory_items',
+            'labour_codes': 'labour_codes',
         })
     except Exception as e:
         logger.error(f"Error fetching service types: {e}", exc_info=True)
@@ -308,82 +290,69 @@ def started_orders_dashboard(request):
     - status: Filter by order status (default: shows created, in_progress, completed from today/recent)
     - sort_by: Sort orders by 'started_at', 'plate_number', 'order_type' (default: '-started_at')
     - search: Search by plate number or customer name
+    - group: 'plate' to paginate by plate with orders grouped per vehicle
+    - page: Page number (orders, or plates when grouped)
     """
-    from django.db.models import Q, Count
+    from .services.started_orders import (
+        started_orders_filter, started_order_counts, plate_summary, plate_groups_page, paginate_orders,
+    )
 
     status_filter = request.GET.get('status', '')
     sort_by = request.GET.get('sort_by', '-started_at')
     search_query = request.GET.get('search', '').strip()
+    group_by_plate = request.GET.get('group') == 'plate'
+    page_number = request.GET.get('page')
+    today = timezone.now().date()
 
     # Build base queryset: scope to user's branch/permissions
     base_orders = scope_queryset(Order.objects.all(), request.user, request)
-
-    # Apply status filter
-    if status_filter:
-        # Specific status requested
-        orders = base_orders.filter(status=status_filter).select_related('customer', 'vehicle')
+    list_q = started_orders_filter(status_filter, search_query, today)
+    orders = base_orders.filter(list_q).select_related('customer', 'vehicle')
+
+    # KPI counts in one conditional aggregate; per-plate summary (unique plates,
+    # repeated vehicles today, listed order count) in one GROUP BY query
+    counts = started_order_counts(base_orders, today)
+    summary = plate_summary(base_orders, list_q, today)
+
+    plate_groups = None
+    if group_by_plate:
+        # Paginate by plate; each page streams its orders ordered by (plate, started_at)
+        page, plate_groups = plate_groups_page(orders, summary, page_number, per_page=STARTED_PLATES_PER_PAGE)
     else:
-        # Default: show active orders (created/in_progress/overdue) + completed from today
-        today = timezone.now().date()
-        orders = base_orders.filter(
-            Q(status__in=['created', 'in_progress', 'overdue']) |  # All active orders (including overdue)
-            Q(status='completed', completed_at__date=today)  # Completed today
-        ).select_related('customer', 'vehicle')
-
-    # Apply search filter
-    if search_query:
-        orders = orders.filter(
-            Q(vehicle__plate_number__icontains=search_query) |
-            Q(customer__full_name__icontains=search_query)
-        )
-
-    # Apply sorting (handle related fields properly)
-    if sort_by == 'plate_number':
-        orders = orders.order_by('vehicle__plate_number')
-    elif sort_by == 'type':
-        orders = orders.order_by('type')
-    elif sort_by == 'started_at':
-        orders = orders.order_by('started_at')
-    elif sort_by == '-started_at':
-        orders = orders.order_by('-started_at')
+        # Apply sorting (handle related fields properly)
+        if sort_by == 'plate_number':
+            orders = orders.order_by('vehicle__plate_number', '-started_at')
+        elif sort_by == 'type':
+            orders = orders.order_by('type', '-started_at')
+        elif sort_by == 'started_at':
+            orders = orders.order_by('started_at')
+        else:
+            # Default: sort by newest first
+            orders = orders.order_by('-started_at')
+        # The summary already counted the listed orders, so the paginator skips COUNT(*)
+        page = paginate_orders(orders, page_number, STARTED_ORDERS_PER_PAGE, count=summary['listed_orders'])
+
+    # Query strings for pagination links and the group-by-plate toggle
+    params = request.GET.copy()
+    params.pop('page', None)
+    page_query = params.urlencode()
+    if group_by_plate:
+        params.pop('group', None)
     else:
-        # Default: sort by newest first
-        orders = orders.order_by('-started_at')
-
-    # Group orders by plate number
-    orders_by_plate = {}
-    for order in orders:
-        plate = order.vehicle.plate_number if order.vehicle else 'Unknown'
-        if plate not in orders_by_plate:
-            orders_by_plate[plate] = []
-        orders_by_plate[plate].append(order)
-
-    # Calculate statistics
-    # Total started orders: all active statuses (created, in_progress, overdue)
-    total_started = base_orders.filter(
-        status__in=['created', 'in_progress', 'overdue']
-    ).count()
-
-    # Orders started today: those created today (before or after auto-progression)
-    today = timezone.now().date()
-    today_started = base_orders.filter(
-        status__in=['created', 'in_progress', 'overdue'],
-        created_at__date=today
-    ).count()
-
-    # Calculate repeated vehicles today (vehicles with 2+ orders created today)
-    today_orders = base_orders.filter(
-        created_at__date=today,
-        vehicle__isnull=False
-    ).values('vehicle__plate_number').annotate(order_count=Count('id')).filter(order_count__gte=2)
-    repeated_vehicles_today = today_orders.count()
+        params['group'] = 'plate'
 
     context = {
-        'orders': orders,
-        'orders_by_plate': orders_by_plate,
-        'total_started': total_started,
-        'today_started': today_started,
-        'repeated_vehicles_today': repeated_vehicles_today,
+        'orders': page if not group_by_plate else None,
+        'page_obj': page,
+        'plate_groups': plate_groups,
+        'group_by_plate': group_by_plate,
+        'page_query': page_query,
+        'group_toggle_query': params.urlencode(),
+        'unique_plates': summary['unique_plates'],
+        'total_listed': summary['listed_orders'],
+        'total_started': counts['total_started'],
+        'today_started': counts['today_started'],
+        'repeated_vehicles_today': summary['repeated_vehicles_today'],
         'search_query': search_query,
         'status_filter': status_filter,
         'sort_by': sort_by,
@@ -1236,15 +1205,13 @@ def api_create_order_from_modal(request):
                     brand = order_kwargs.get('brand')
                     quantity = order_kwargs.get('quantity')
 
-                    if item_name and brand and quantity:
-                        qty_int = int(quantity) if isinstance(quantity, (str, int)) and str(quantity).isdigit() else 0
-                        if qty_int > 0:
-                            from .utils import adjust_inventory
-                            ok, _, remaining = adjust_inventory(item_name, brand, -qty_int)
-                            if ok:
-                                logger.info(f"Inventory adjusted for order {order.id}: {item_name} ({brand}) -{qty_int}, remaining: {remaining}")
-                            else:
-                                logger.warning(f"Failed to adjust inventory for order {order.id}: {item_name} ({brand})")
+                    if item_name and brand and quantity and str(quantity).isdigit() and int(quantity) > 0:
+                        from .services import inventory_ledger
+                        ok, _, remaining = inventory_ledger.reserve_for_order(order, request.user)
+                        if ok:
+                            logger.info(f"Inventory reserved for order {order.id}: {item_name} ({brand}) -{quantity}, remaining: {remaining}")
+                        else:
+                            logger.warning(f"Failed to reserve inventory for order {order.id}: {item_name} ({brand})")
                 except Exception as e:
                     logger.warning(f"Failed to adjust inventory for sales order {order.id}: {e}")
 
@@ -1370,25 +1337,18 @@ def api_started_orders_kpis(request):
     """API endpoint to get KPI stats for started orders dashboard (for AJAX updates)."""
     try:
         from django.db.models import Count
+        from .services.started_orders import started_order_counts
         user_branch = get_user_branch(request.user)
-
-        # Total started orders: both 'created' (just initiated) and 'in_progress' (being worked on)
-        total_started = Order.objects.filter(
-            branch=user_branch,
-            status__in=['created', 'in_progress']
-        ).count()
-
-        # Orders started today: those created today
+        branch_orders = Order.objects.filter(branch=user_branch)
         today = timezone.now().date()
-        today_started = Order.objects.filter(
-            branch=user_branch,
-            created_at__date=today,
-            status__in=['created', 'in_progress']
-        ).count()
+
+        # Total started orders ('created' + 'in_progress') and those created today, in one query
+        counts = started_order_counts(branch_orders, today, statuses=('created', 'in_progress'))
+        total_started = counts['total_started']
+        today_started = counts['today_started']
 
         # Calculate repeated vehicles today (vehicles with 2+ orders created today)
-        today_orders = Order.objects.filter(
-            branch=user_branch,
+        today_orders = branch_orders.filter(
             created_at__date=today,
             vehicle__isnull=False
         ).values('vehicle__plate_number').annotate(order_count=Count('id')).filter(order_count__gte=2)
@@ -6,7 +6,6 @@ with analytics, charts, and detailed invoice/order information.
 
 import logging
 import json
-from collections import defaultdict
 import re
 from datetime import datetime, timedelta
 from decimal import Decimal
@@ -20,12 +19,14 @@ from django.utils import timezone
 
 from tracker.models import Vehicle, Order, Invoice, InvoiceLineItem, LabourCode, Customer
 from tracker.utils.order_type_detector import _normalize_category_to_order_type
+from .db_router import reporting_view
 from .utils import get_user_branch
 
 logger = logging.getLogger(__name__)
 
 
 @login_required
+@reporting_view
 def vehicle_tracking_dashboard(request):
     """
     Vehicle Tracking Dashboard - Shows vehicles that came for service
@@ -75,6 +76,7 @@ def vehicle_tracking_dashboard(request):
 
 @login_required
 @require_http_methods(["GET"])
+@reporting_view
 def api_vehicle_tracking_data(request):
     user_branch = get_user_branch(request.user)
     try:
@@ -555,6 +557,7 @@ def api_vehicle_tracking_data(request):
 
 @login_required
 @require_http_methods(["GET"])
+@reporting_view
 def api_vehicle_analytics(request):
     """
     API endpoint for vehicle analytics and trends.
@@ -583,106 +586,12 @@ def api_vehicle_analytics(request):
         except:
             start_date = end_date - timedelta(days=30)
         
-        # Build invoices with Python-level date filtering and branch fallback
-        invoices_qs_all = Invoice.objects.select_related('vehicle')
-        invoices_qs = invoices_qs_all
-        if user_branch:
-            invoices_qs = invoices_qs.filter(branch=user_branch)
-
-        def _in_range(inv):
-            try:
-                inv_date = inv.invoice_date or (getattr(inv, 'created_at', None).date() if getattr(inv, 'created_at', None) else None)
-            except Exception:
-                inv_date = inv.invoice_date
-            if not inv_date:
-                return False
-            return start_date <= inv_date <= end_date
+        from .services import vehicle_trends
 
-        invoices = [inv for inv in invoices_qs if _in_range(inv)]
+        data = vehicle_trends.analytics(user_branch.id if user_branch else None, start_date, end_date, period)
+        logger.info(f"Analytics - {period} trends {start_date} to {end_date}: {len(data['trends'])} buckets")
 
-        logger.info(f"Analytics - Invoices in range {start_date} to {end_date}: {len(invoices)}")
-
-        # Group data by period in Python
-        trends_dict = defaultdict(lambda: {'total_amount': Decimal('0'), 'invoice_count': 0, 'vehicles': set()})
-
-        for invoice in invoices:
-            # Get the date portion from invoice_date (handle datetime if needed)
-            invoice_date_value = invoice.invoice_date
-            if hasattr(invoice_date_value, 'date'):
-                # It's a datetime, convert to date
-                invoice_date = invoice_date_value.date()
-            else:
-                # It's already a date
-                invoice_date = invoice_date_value
-
-            # Determine grouping key based on period
-            if period == 'daily':
-                period_key = invoice_date
-            elif period == 'weekly':
-                # Group by week (Monday of that week)
-                period_key = invoice_date - timedelta(days=invoice_date.weekday())
-            else:  # monthly
-                # Group by first day of month
-                period_key = invoice_date.replace(day=1)
-
-            trends_dict[period_key]['total_amount'] += invoice.total_amount or Decimal('0')
-            trends_dict[period_key]['invoice_count'] += 1
-            if invoice.vehicle_id:
-                trends_dict[period_key]['vehicles'].add(invoice.vehicle_id)
-
-        # Convert to list and sort by date
-        trends_data = [
-            {
-                'date': date.isoformat() if date else '',
-                'total_amount': float(data['total_amount']),
-                'invoice_count': data['invoice_count'],
-                'vehicle_count': len(data['vehicles']),
-            }
-            for date, data in sorted(trends_dict.items())
-        ]
-        
-        # Spending by order type
-        spending_by_type = Invoice.objects.filter(id__in=[inv.id for inv in invoices]).filter(
-            order__type__isnull=False
-        ).values('order__type').annotate(
-            total=Sum('total_amount'),
-            count=Count('id')
-        ).order_by('-total')
-        
-        spending_by_type_data = [
-            {
-                'type': item['order__type'],
-                'total': float(item['total'] or 0),
-                'count': item['count'],
-                'average': float((item['total'] or 0) / item['count']) if item['count'] > 0 else 0,
-            }
-            for item in spending_by_type
-        ]
-        
-        # Top vehicles by spending
-        top_vehicle_ids = [inv.vehicle_id for inv in invoices if inv.vehicle_id]
-        top_vehicles = Vehicle.objects.filter(id__in=top_vehicle_ids).annotate(
-            total_spent=Sum('invoices__total_amount'),
-            invoice_count=Count('invoices', distinct=True)
-        ).filter(total_spent__isnull=False).order_by('-total_spent')[:10]
-        
-        top_vehicles_data = [
-            {
-                'plate_number': v.plate_number,
-                'customer_name': v.customer.full_name,
-                'total_spent': float(v.total_spent or 0),
-                'invoice_count': v.invoice_count,
-                'average_per_invoice': float((v.total_spent or 0) / v.invoice_count) if v.invoice_count > 0 else 0,
-            }
-            for v in top_vehicles
-        ]
-        
-        return JsonResponse({
-            'success': True,
-            'trends': trends_data,
-            'spending_by_type': spending_by_type_data,
-            'top_vehicles': top_vehicles_data,
-        })
+        return JsonResponse({'success': True, **data})
         
     except Exception as e:
         logger.error(f"Error fetching vehicle analytics: {e}", exc_info=True)
@@ -690,3 +599,43 @@ def api_vehicle_analytics(request):
             'success': False,
             'message': str(e)
         }, status=500)
+
+
+@login_required
+@require_http_methods(["GET"])
+def api_vehicle_history(request, pk):
+    """
+    API endpoint for one vehicle's full service history, archived orders and invoices included.
+
+    Returns orders and invoices newest first; archived entries carry "archived": true.
+    """
+    user_branch = get_user_branch(request.user)
+    vehicle = Vehicle.objects.filter(pk=pk).select_related('customer').first()
+    if vehicle is None or (user_branch and vehicle.customer.branch_id != user_branch.id):
+        return JsonResponse({'success': False, 'message': 'Vehicle not found'}, status=404)
+
+    from .services import archive
+
+    history = archive.vehicle_history(vehicle.pk, user_branch.id if user_branch else None)
+    return JsonResponse({
+        'success': True,
+        'vehicle': {'id': vehicle.pk, 'plate_number': vehicle.plate_number, 'customer_id': vehicle.customer_id},
+        'orders': [
+            {
+                'id': o.pk, 'order_number': o.order_number, 'type': o.type, 'status': o.status,
+                'created_at': o.created_at.isoformat() if o.created_at else None,
+                'completed_at': o.completed_at.isoformat() if o.completed_at else None,
+                'archived': getattr(o, 'is_archived', False),
+            }
+            for o in history['orders']
+        ],
+        'invoices': [
+            {
+                'id': i.pk, 'invoice_number': i.invoice_number, 'status': i.status,
+                'invoice_date': i.invoice_date.isoformat() if i.invoice_date else None,
+                'total_amount': str(i.total_amount or Decimal('0')), 'order_id': i.order_id,
+                'archived': getattr(i, 'is_archived', False),
+            }
+            for i in history['invoices']
+        ],
+    })